@@ -76,8 +76,8 @@ class JetCollection : public PhysicsObjectCollection< Jet > {
     
         //build JetCollection of varied Jets
         JetCollection buildVariedCollection( Jet (Jet::*variedJet)() const ) const;
-	JetCollection buildVariedCollection( Jet (Jet::*variedJet)(std::string) const, 
-	    std::string ) const;
+	JetCollection buildVariedCollection( Jet (Jet::*variedJet)(const std::string&) const, 
+	    const std::string& ) const;
 
         //number of b-taged jets with variation
         std::vector< size_type > countsAnyVariation( bool ( Jet::*passSelection )() const ) const;
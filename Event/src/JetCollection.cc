@@ -99,8 +99,8 @@ JetCollection JetCollection::buildVariedCollection( Jet (Jet::*variedJet)() cons
     return JetCollection( jetVector );
 }
 
-JetCollection JetCollection::buildVariedCollection( Jet (Jet::*variedJet)(std::string) const, 
-    std::string variationArg ) const{
+JetCollection JetCollection::buildVariedCollection( Jet (Jet::*variedJet)(const std::string&) const, 
+    const std::string& variationArg ) const{
     // similar to above but with argument passed to Jet::*variedJet
     std::vector< std::shared_ptr< Jet > > jetVector;
     for( const auto& jetPtr : *this ){
@@ -4,38 +4,19 @@
 #include <iostream>
 #include <stdexcept>
 
-// include other parts of the framework
-#include "../../Tools/interface/stringTools.h"
-
-std::string cleanJECVariationName( std::string branchName ){
-    // convert a branch name holding a JEC variation into the pure JEC variation name
-    std::string jecName = stringTools::removeOccurencesOf(branchName,"_jetPt_");
-    jecName = stringTools::removeOccurencesOf(jecName,"_jetSmearedPt_");
-    jecName = stringTools::removeOccurencesOf(jecName,"_JECSourcesUp");
-    jecName = stringTools::removeOccurencesOf(jecName,"_JECSourcesDown");
-    jecName = stringTools::removeOccurencesOf(jecName,"_JECGroupedUp");
-    jecName = stringTools::removeOccurencesOf(jecName,"_JECGroupedDown");
-    return jecName;
-}
 
 JetInfo::JetInfo( const TreeReader& treeReader, 
 		  const bool readAllJECVariations,
 		  const bool readGroupedJECVariations ){
+    // note: the variation names are cleaned and interned once per tree by the TreeReader
+    // (see TreeReader::buildJecVariationTable)
     _JECSources = std::vector< std::string >();
     _JECGrouped = std::vector< std::string >();
-    if( readAllJECVariations ){
-	for( auto mapEl: treeReader._jetSmearedPt_JECSourcesUp ){
-	    // note: in principle only checking one branch should be enough
-	    // as up/down and pt/smearedPt are supposed to contain the same variations
-	    _JECSources.push_back( cleanJECVariationName(mapEl.first) );
-	}
+    if( readAllJECVariations && treeReader._jecSourcesTable ){
+	_JECSources = treeReader._jecSourcesTable->names();
     }
-    if( readGroupedJECVariations ){
-	for( auto mapEl: treeReader._jetSmearedPt_JECGroupedUp ){
-	    // note: in principle only checking one branch should be enough
-            // as up/down and pt/smearedPt are supposed to contain the same variations
-            _JECGrouped.push_back( cleanJECVariationName(mapEl.first) );
-	}
+    if( readGroupedJECVariations && treeReader._jecGroupedTable ){
+	_JECGrouped = treeReader._jecGroupedTable->names();
     }
 }
 
@@ -0,0 +1,58 @@
+/*
+Class to buffer the inputs of a machine learning model for many events and evaluate them in batches
+The inputs of each event are appended to a contiguous buffer, and once the buffer holds a given number of events,
+the model is evaluated once for the whole batch, after which the score of each event is passed to the callback
+that was given together with its inputs.
+This avoids the per-call overhead of evaluating the model event by event (e.g. for models evaluated through Python).
+Any function evaluating a batch of inputs can be used (e.g. DenseModel::predictBatch or KerasModelReader::predictBatch).
+*/
+
+#ifndef BatchedPredictor_H
+#define BatchedPredictor_H
+
+//include c++ library classes
+#include <vector>
+#include <functional>
+
+//include other parts of framework
+#include "DenseModel.h"
+
+
+class BatchedPredictor {
+
+    public:
+        using size_type = std::vector< double >::size_type;
+
+        //function evaluating nRows sets of inputs (stored row by row), returning the outputs row by row
+        //(if the model has several outputs, the first output of each row is used as score)
+        using BatchFunction = std::function< std::vector< double >( const std::vector< double >&, const size_type ) >;
+        using Callback = std::function< void( double ) >;
+
+        BatchedPredictor( const BatchFunction&, const size_type numberOfInputs, const size_type batchSize = 1024 );
+        BatchedPredictor( const DenseModel&, const size_type batchSize = 1024 );
+
+        //the remaining events are evaluated at destruction, but calling flush explicitly is preferred
+        //since errors during the evaluation can not be propagated from the destructor
+        ~BatchedPredictor();
+
+        BatchedPredictor( const BatchedPredictor& ) = delete;
+        BatchedPredictor& operator=( const BatchedPredictor& ) = delete;
+
+        //add the inputs of an event, the callback is called with its score once the batch is evaluated
+        void add( const std::vector< double >& inputs, const Callback& );
+
+        //evaluate all events that are currently buffered
+        void flush();
+
+        size_type numberOfBufferedEvents() const{ return _callbacks.size(); }
+        size_type batchSize() const{ return _batchSize; }
+
+    private:
+        BatchFunction _batchFunction;
+        size_type _numberOfInputs;
+        size_type _batchSize;
+        std::vector< double > _inputBuffer;
+        std::vector< Callback > _callbacks;
+};
+
+#endif
@@ -0,0 +1,75 @@
+/*
+Pure C++ evaluator for feed-forward neural networks consisting of dense layers
+The model is read from a text file exported from a trained Keras model (see exportDenseModel in kerasPredict.py),
+so that no Python interpreter is needed to evaluate it.
+Supported layers are dense layers (with an optional activation), activation layers,
+(inference mode) batch normalization and PReLU activations. Dropout layers are dropped at export.
+
+file format (whitespace separated):
+    densemodel <number of layers>
+followed for each layer by one of:
+    dense <number of inputs> <number of outputs> <activation>, followed by the weights (input index running slowest) and the biases
+    batchnorm <size>, followed by the scales and the shifts
+    prelu <size>, followed by the slopes for negative inputs
+    activation <size> <activation>
+where <activation> is one of linear, relu, elu, selu, sigmoid, tanh, softmax.
+*/
+
+#ifndef DenseModel_H
+#define DenseModel_H
+
+//include c++ library classes
+#include <string>
+#include <vector>
+#include <istream>
+
+
+class DenseModel {
+
+    public:
+        using size_type = std::vector< double >::size_type;
+
+        DenseModel( const std::string& fileName );
+        DenseModel( std::istream& );
+
+        size_type numberOfInputs() const{ return _numberOfInputs; }
+        size_type numberOfOutputs() const{ return _numberOfOutputs; }
+
+        //first output of the model for a single set of inputs
+        double predict( const std::vector< double >& ) const;
+
+        //all outputs of the model for a single set of inputs
+        std::vector< double > predictAll( const std::vector< double >& ) const;
+
+        //outputs for a batch of nRows sets of inputs, stored row by row in a contiguous array
+        //the output array must have space for nRows*numberOfOutputs() values
+        void predictBatch( const double* inputs, const size_type nRows, double* outputs ) const;
+        std::vector< double > predictBatch( const std::vector< double >& inputs, const size_type nRows ) const;
+
+    private:
+        enum class LayerType { dense, batchnorm, prelu, activation };
+        enum class Activation { linear, relu, elu, selu, sigmoid, tanh, softmax };
+
+        struct Layer {
+            LayerType type;
+            Activation activation = Activation::linear;
+            size_type numberOfInputs = 0;
+            size_type numberOfOutputs = 0;
+            std::vector< double > weights;
+            std::vector< double > biases;
+        };
+
+        std::vector< Layer > _layers;
+        size_type _numberOfInputs = 0;
+        size_type _numberOfOutputs = 0;
+        size_type _maxLayerSize = 0;
+
+        void readModel( std::istream& );
+        static Activation activationFromString( const std::string& );
+        static void applyActivation( const Activation, double*, const size_type );
+
+        //evaluate a layer on one set of inputs, writing to output
+        static void evaluateLayer( const Layer&, const double* input, double* output );
+};
+
+#endif
@@ -0,0 +1,62 @@
+/*
+Compact set of event identifiers (run number, luminosity block, event number).
+The identifiers are packed into fixed-width 128-bit keys ( run number and luminosity block in one word,
+event number in the other ), which are stored in a flat open-addressing hash table with linear probing.
+This uses a fraction of the memory of a std::set< EventTags > (no per-node allocations or pointers),
+and lookups touch only contiguous memory.
+*/
+
+#ifndef EventKeySet_H
+#define EventKeySet_H
+
+//include C++ library classes
+#include <vector>
+#include <cstdint>
+
+
+class EventKeySet {
+
+    public:
+        using size_type = std::size_t;
+
+        //construct with space for a given number of keys (the table grows if needed)
+        EventKeySet( const size_type expectedSize = 0 );
+
+        //insert an event, returns false if the event was already present
+        bool insert( const std::uint64_t runNumber, const std::uint64_t luminosityBlock, const std::uint64_t eventNumber );
+        bool contains( const std::uint64_t runNumber, const std::uint64_t luminosityBlock, const std::uint64_t eventNumber ) const;
+
+        //remove all keys and reserve space for a given number of keys
+        void clear( const size_type expectedSize = 0 );
+
+        size_type size() const{ return _size; }
+        size_type capacity() const{ return _table.size(); }
+
+        //memory used by the table in bytes
+        size_type memoryUsage() const{ return _table.size()*sizeof( Key ); }
+
+        //memory that would be used by a table holding a given number of keys
+        static size_type memoryForSize( const size_type );
+
+    private:
+        struct Key {
+            std::uint64_t high = 0;
+            std::uint64_t low = 0;
+        };
+
+        std::vector< Key > _table;
+        size_type _size = 0;
+
+        //the key consisting of only zeros marks empty slots, so it is kept track of separately
+        bool _containsZeroKey = false;
+
+        static constexpr double _maxLoadFactor = 0.75;
+
+        static Key makeKey( const std::uint64_t, const std::uint64_t, const std::uint64_t );
+        static size_type tableSizeFor( const size_type );
+        static std::uint64_t hash( const Key& );
+        size_type findSlot( const Key& ) const;
+        void rehash( const size_type );
+};
+
+#endif
@@ -21,6 +21,10 @@ class KerasModelReader{
         ~KerasModelReader();
 
         double predict( const std::vector<double>&, const std::vector<double>& parameters = std::vector< double >() ) const;
+
+        //predict nRows events at once, with the inputs (and parameters) stored row by row in contiguous arrays
+        //(one call into Python for the whole batch, see also BatchedPredictor)
+        std::vector< double > predictBatch( const std::vector<double>&, const size_t nRows, const std::vector<double>& parameters = std::vector< double >() ) const;
         
     private:
         void initializePythonAPI() const;
@@ -29,6 +33,7 @@ class KerasModelReader{
 
         python::object pythonModule;
         python::object predictRoutine;
+        python::object predictBatchRoutine;
         python::object kerasModel;
         size_t numberOfInputs;
         bool hasShortCutConnection;
@@ -0,0 +1,75 @@
+/*
+Immutable two-dimensional lookup table (e.g. for fake-rate and charge-flip maps)
+The table is built once from a TH2, after which the axis edges, bin contents and bin errors
+are kept in contiguous arrays, independent of ROOT.
+Values outside the axis ranges are clamped to the first or last bin
+(consistent with histogram::contentAtValues), so there are no under- or overflow bins.
+Bin lookup is done in constant time for axes with equal bin widths,
+and with a binary search on the edges otherwise.
+*/
+
+#ifndef LookupTable2D_H
+#define LookupTable2D_H
+
+//include C++ library classes
+#include <vector>
+#include <cstddef>
+
+//include ROOT classes
+#include "TH2.h"
+
+
+class LookupTable2D {
+
+    public:
+        using size_type = std::vector< double >::size_type;
+
+        //contents and errors are given with the x-index running slowest, i.e. bin ( i, j ) is at index i*nBinsY + j
+        LookupTable2D( const std::vector< double >& xEdges, const std::vector< double >& yEdges,
+            const std::vector< double >& contents, const std::vector< double >& errors = std::vector< double >() );
+        LookupTable2D( const TH2& );
+
+        size_type numberOfBinsX() const{ return _xAxis.numberOfBins(); }
+        size_type numberOfBinsY() const{ return _yAxis.numberOfBins(); }
+        const std::vector< double >& xEdges() const{ return _xAxis.edges(); }
+        const std::vector< double >& yEdges() const{ return _yAxis.edges(); }
+        const std::vector< double >& contents() const{ return _contents; }
+        const std::vector< double >& errors() const{ return _errors; }
+
+        //flat index ( i*nBinsY + j ) of the bin containing the (clamped) values
+        size_type binIndex( const double xValue, const double yValue ) const{
+            return _xAxis.binIndex( xValue )*numberOfBinsY() + _yAxis.binIndex( yValue );
+        }
+
+        double contentAt( const double xValue, const double yValue ) const{ return _contents[ binIndex( xValue, yValue ) ]; }
+        double errorAt( const double xValue, const double yValue ) const{ return _errors[ binIndex( xValue, yValue ) ]; }
+
+        //batched lookup of n pairs of values
+        void contentsAt( const double* xValues, const double* yValues, double* output, const size_type n ) const;
+        std::vector< double > contentsAt( const std::vector< double >& xValues, const std::vector< double >& yValues ) const;
+
+    private:
+
+        class Axis {
+
+            public:
+                Axis() = default;
+                Axis( const std::vector< double >& );
+
+                size_type numberOfBins() const{ return _edges.size() - 1; }
+                const std::vector< double >& edges() const{ return _edges; }
+                size_type binIndex( const double ) const;
+
+            private:
+                std::vector< double > _edges;
+                bool _isUniform = false;
+                double _inverseBinWidth = 0.;
+        };
+
+        Axis _xAxis;
+        Axis _yAxis;
+        std::vector< double > _contents;
+        std::vector< double > _errors;
+};
+
+#endif
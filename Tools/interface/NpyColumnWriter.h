@@ -0,0 +1,73 @@
+/*
+Writer for a single column of a columnar cache, stored as a numpy .npy file
+Rows are appended one or more at a time, without knowing the total number of rows in advance:
+a header of fixed size is written when the file is opened, and rewritten with the final shape when it is closed.
+The resulting files can be opened without copying in Python with numpy.load( fileName, mmap_mode='r' ).
+Each row consists of a fixed number of elements (the product of the inner shape, 1 for a scalar column).
+The data type is given as a numpy type string (e.g. '<f8' for little-endian doubles, '|b1' for booleans),
+and the data is written as is, so it must be given in the byte order of the type string.
+*/
+
+#ifndef NpyColumnWriter_H
+#define NpyColumnWriter_H
+
+//include c++ library classes
+#include <string>
+#include <vector>
+#include <fstream>
+#include <stdexcept>
+
+
+class NpyColumnWriter {
+
+    public:
+        using size_type = std::vector< double >::size_type;
+
+        NpyColumnWriter( const std::string& fileName, const std::string& dataType,
+            const std::vector< size_type >& innerShape = {} );
+        ~NpyColumnWriter();
+
+        NpyColumnWriter( const NpyColumnWriter& ) = delete;
+        NpyColumnWriter& operator=( const NpyColumnWriter& ) = delete;
+
+        //append numberOfRows rows, data must point to numberOfRows*rowSize() elements of the column's type
+        void write( const void* data, const size_type numberOfRows = 1 );
+
+        //append a single element, only for columns with an inner size of 1
+        template< typename T > void writeValue( const T& value );
+
+        //write the final header and close the file, is also called by the destructor
+        void close();
+
+        const std::string& fileName() const{ return _fileName; }
+        const std::string& dataType() const{ return _dataType; }
+        size_type numberOfRows() const{ return _numberOfRows; }
+        size_type rowSize() const{ return _rowSize; }
+
+        //size in bytes of a single element of a numpy type string
+        static size_type elementSize( const std::string& dataType );
+
+        //total size of the header, including the magic string
+        static constexpr size_type headerSize = 128;
+
+    private:
+        std::string _fileName;
+        std::string _dataType;
+        std::vector< size_type > _innerShape;
+        size_type _rowSize;
+        size_type _rowBytes;
+        size_type _numberOfRows = 0;
+        std::ofstream _outputStream;
+
+        std::string header() const;
+};
+
+
+template< typename T > void NpyColumnWriter::writeValue( const T& value ){
+    if( sizeof( T ) != _rowBytes ){
+        throw std::invalid_argument( "Value of size " + std::to_string( sizeof( T ) ) + " can not be written to column " + _fileName + " with rows of " + std::to_string( _rowBytes ) + " bytes." );
+    }
+    write( &value, 1 );
+}
+
+#endif
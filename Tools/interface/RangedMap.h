@@ -27,6 +27,7 @@ template < typename T > class RangedMap {
 
         //unlike with an std::map, no new elements can be added with the index operator 
         T& operator[]( const double );
+        const T& operator[]( const double ) const;
 
         iterator begin(){ return lowerBoundMap.begin(); }
         const_iterator begin() const{ return lowerBoundMap.cbegin(); }
@@ -75,4 +76,9 @@ template< typename T > T& RangedMap< T >::operator[]( const double value ){
 }
 
 
+template< typename T > const T& RangedMap< T >::operator[]( const double value ) const{
+    return const_cast< RangedMap< T >& >( *this )[ value ];
+}
+
+
 #endif
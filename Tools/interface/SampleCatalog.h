@@ -0,0 +1,84 @@
+/*
+Catalog of per-sample metadata
+For each sample the number of entries, the sums of simulated event weights (hCounter, lheCounter and psCounter),
+the year flags and the size and modification time of the file are stored.
+The catalog is built once for a sample directory (opening each sample file once),
+after which the metadata of any sample can be looked up without opening its file or any other sample file
+(see TreeReader::initSample and SampleCrossSections).
+Entries are keyed by file name, and are only considered up to date if the size and modification time
+of the file did not change since the catalog was built.
+
+file format (whitespace separated, one line per sample after the header):
+    samplecatalog <number of samples>
+    <file name> <file size> <modification time> <isData> <year> <number of entries>
+        <hCounter sum of weights> <hCounter entries> <number of lhe weights> <lhe sums of weights> <number of ps weights> <ps sums of weights>
+*/
+
+#ifndef SampleCatalog_H
+#define SampleCatalog_H
+
+//include c++ library classes
+#include <string>
+#include <vector>
+#include <map>
+#include <istream>
+
+//include other parts of framework
+#include "Sample.h"
+
+
+class SampleCatalog {
+
+    public:
+        using size_type = std::vector< double >::size_type;
+
+        struct Entry {
+            std::string fileName;
+            long long fileSize = 0;
+            long long modificationTime = 0;
+            bool isData = false;
+            std::string year;
+            long unsigned numberOfEntries = 0;
+            double sumOfWeights = 0.;
+            double hCounterEntries = 0.;
+            std::vector< double > lheSumsOfWeights;
+            std::vector< double > psSumsOfWeights;
+        };
+
+        SampleCatalog() = default;
+
+        //build the catalog by opening each of the sample files
+        SampleCatalog( const std::vector< Sample >& );
+
+        //read the catalog from a file
+        SampleCatalog( const std::string& fileName );
+        SampleCatalog( std::istream& );
+
+        //read the catalog from a file, adding (and writing) the entries of samples that are missing or out of date
+        static SampleCatalog readOrBuild( const std::string& fileName, const std::vector< Sample >& );
+
+        //default location of the catalog for a given sample directory
+        static std::string defaultFileName( const std::string& sampleDirectory );
+
+        void write( const std::string& fileName ) const;
+
+        size_type size() const{ return _entries.size(); }
+        bool contains( const Sample& ) const;
+
+        //check if the catalog contains an entry for the sample that is consistent with its file on disk
+        bool isUpToDate( const Sample& ) const;
+
+        const Entry& entry( const Sample& ) const;
+
+        //add the entries of another catalog (overwriting entries for the same file names)
+        void merge( const SampleCatalog& );
+
+        static Entry makeEntry( const Sample& );
+
+    private:
+        std::map< std::string, Entry > _entries;
+
+        void readCatalog( std::istream& );
+};
+
+#endif
@@ -2,6 +2,7 @@
 #define SampleCrossSections_H
 
 #include "Sample.h"
+#include "SampleCatalog.h"
 
 
 class SampleCrossSections{
@@ -11,6 +12,9 @@ class SampleCrossSections{
 
 	    SampleCrossSections() = default;
 	    SampleCrossSections( const Sample& );
+	    // same as above, but take the sums of weights from the catalog
+	    // (without opening the sample file) if it has an up-to-date entry for the sample
+	    SampleCrossSections( const Sample&, const SampleCatalog& );
 
 	    // get number of LHE variations
 	    size_type numberOfLheVariations() const{ return lheCrossSectionRatios.size(); }
@@ -60,6 +64,9 @@ class SampleCrossSections{
 	    std::vector< double > psCrossSectionRatios;
 
 	    double crossSectionRatio_lheVar( const size_type ) const;
+	    void setCrossSectionRatios( const double nominalSumOfWeights,
+					const std::vector< double >& lheSumsOfWeights,
+					const std::vector< double >& psSumsOfWeights );
 };
 
 
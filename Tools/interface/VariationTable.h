@@ -0,0 +1,47 @@
+/*
+Table of interned variation names (e.g. split JEC uncertainty sources)
+Each name is assigned a fixed integer index, so that per-object variations can be stored
+in flat arrays indexed by variation, and names only need to be looked up (in constant time)
+when a variation is requested by name.
+*/
+
+#ifndef VariationTable_H
+#define VariationTable_H
+
+//include C++ library classes
+#include <string>
+#include <vector>
+#include <unordered_map>
+
+
+class VariationTable {
+
+    public:
+        using size_type = std::vector< std::string >::size_type;
+
+        //index returned by index() for unknown names
+        static const size_type npos = static_cast< size_type >( -1 );
+
+        VariationTable() = default;
+        VariationTable( const std::vector< std::string >& );
+
+        //add a name (if not yet present) and return its index
+        size_type add( const std::string& );
+
+        //index of a name, or npos if the name is not present
+        size_type index( const std::string& ) const;
+        bool contains( const std::string& name ) const{ return ( index( name ) != npos ); }
+
+        //name corresponding to an index
+        const std::string& name( const size_type ) const;
+        const std::vector< std::string >& names() const{ return _names; }
+
+        size_type size() const{ return _names.size(); }
+        bool empty() const{ return _names.empty(); }
+
+    private:
+        std::vector< std::string > _names;
+        std::unordered_map< std::string, size_type > _indices;
+};
+
+#endif
@@ -12,6 +12,9 @@ This is necessary to merge several primary datasets and make sure no events are
 
 //merge several ROOT files and remove overlap
 //input is a vector of file paths (strings) and the output path
-void mergeAndRemoveOverlap( const std::vector< std::string >&, const std::string&, const bool allowMergingYears = false );
+//memoryBudget is the maximum memory (in MB) for storing the events that have been seen;
+//if the events do not fit, the input files are processed once per range of run numbers
+//(a budget of 0 means no limit)
+void mergeAndRemoveOverlap( const std::vector< std::string >&, const std::string&, const bool allowMergingYears = false, const double memoryBudget = 0 );
 
 #endif
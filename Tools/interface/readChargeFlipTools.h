@@ -15,6 +15,7 @@ Tools related to charge flip map reading
 
 // include other parts of the framework
 #include "../../Event/interface/Event.h"
+#include "LookupTable2D.h"
 
 namespace readChargeFlipTools{
 
@@ -23,6 +24,11 @@ namespace readChargeFlipTools{
         const std::shared_ptr< TH2 >& chargeFlipMap,
 	bool doCorrectionFactor );
 
+    double chargeFlipWeight(
+        const Event& event,
+        const LookupTable2D& chargeFlipTable,
+	bool doCorrectionFactor );
+
     std::shared_ptr< TH2D > readChargeFlipMap(
         const std::string& filePath,
         const std::string& year,
@@ -34,6 +40,11 @@ namespace readChargeFlipTools{
         const std::string& flavour,
         const std::string& process,
         const std::string& binning );
+
+    LookupTable2D readChargeFlipTable(
+        const std::string& filePath,
+        const std::string& year,
+        const std::string& flavour );
             
 }
 
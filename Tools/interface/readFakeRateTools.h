@@ -15,6 +15,7 @@ Tools related to fake rate map reading
 
 // include other parts of the framework
 #include "../../Event/interface/Event.h"
+#include "LookupTable2D.h"
 
 namespace readFakeRateTools{
 
@@ -25,10 +26,21 @@ namespace readFakeRateTools{
 				       const std::string&, 
 				       const std::string& );
 
+    LookupTable2D readFRTable( const std::string&,
+			       const std::string& );
+
+    LookupTable2D readFRTable( const std::string&,
+			       const std::string&,
+			       const std::string& );
+
     double fakeRateWeight( const Event&,
 			   const std::shared_ptr< TH2D >&,
 			   const std::shared_ptr< TH2D >& );
 
+    double fakeRateWeight( const Event&,
+			   const LookupTable2D&,
+			   const LookupTable2D& );
+
     int fakeRateFlavour( const Event& );
 }
 
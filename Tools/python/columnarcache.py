@@ -0,0 +1,206 @@
+###################################################################
+# tools for reading the columnar cache of (skimmed) ntuples       #
+###################################################################
+
+# general use:
+# the columnar cache of an ntuple is made by skimmer/convertToColumnar
+# (see also skimmer/convertToColumnar.py for converting all files in a directory).
+# it is a directory with one .npy file per branch and a manifest.json describing the columns,
+# which can be read with numpy only (no ROOT needed), without building any event objects.
+# the column files are only opened when a column is used, and are memory mapped,
+# so that only the parts of the columns that are actually accessed are read from disk.
+# structure of the columns:
+# - scalar branches (e.g. _runNb, _met): one value per entry.
+# - fixed size array branches (e.g. _psWeight): one row of values per entry.
+# - variable size array branches (e.g. _lPt indexed by _nL, _jetPt indexed by _nJets):
+#   the values of all entries concatenated,
+#   with the start of each entry given by the offsets of the counter branch (_nL, _nJets);
+#   they are returned as JaggedArray objects.
+# example:
+#   cache = ColumnarCache('/path/to/cache/sample')
+#   for start, stop, chunk in cache.iterate(['_met','_lPt'], chunksize=100000):
+#       leadingpt = chunk['_lPt'].pad(1)[:,0]
+#       ...
+
+import os
+import json
+from collections import OrderedDict
+import numpy as np
+
+
+class JaggedArray(object):
+    ### variable number of values per entry, stored as flat values and offsets
+    # the values of entry i are values[offsets[i]:offsets[i+1]];
+    # offsets has one element more than the number of entries.
+    # note: values can have more than one dimension (for fixed size arrays per object),
+    #       the first dimension runs over the objects of all entries.
+
+    def __init__( self, values, offsets ):
+        self.values = values
+        self.offsets = np.asarray(offsets)
+        if len(self.offsets)==0:
+            raise Exception('ERROR in JaggedArray: offsets must have at least one element.')
+
+    def __len__( self ):
+        return len(self.offsets)-1
+
+    def __getitem__( self, index ):
+        ### values of a single entry, or a JaggedArray for a slice of entries
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step!=1:
+                raise Exception('ERROR in JaggedArray: slices with a step are not supported.')
+            stop = max(start, stop)
+            offsets = self.offsets[start:stop+1]
+            return JaggedArray(self.values[offsets[0]:offsets[-1]], offsets-offsets[0])
+        if index<0: index += len(self)
+        return self.values[self.offsets[index]:self.offsets[index+1]]
+
+    def counts( self ):
+        ### number of values per entry
+        return np.diff(self.offsets)
+
+    def flat( self ):
+        ### values of all entries (copied from disk in case of a memory mapped cache)
+        return np.asarray(self.values[self.offsets[0]:self.offsets[-1]])
+
+    def parents( self ):
+        ### entry index for each value
+        return np.repeat(np.arange(len(self)), self.counts())
+
+    def localindex( self ):
+        ### index of each value within its entry
+        counts = self.counts()
+        return np.arange(self.offsets[-1]-self.offsets[0]) - np.repeat(self.offsets[:-1]-self.offsets[0], counts)
+
+    def pad( self, length, fill=0 ):
+        ### convert to a regular array of shape (number of entries, length),
+        # truncating entries with more values and filling entries with less values
+        values = self.flat()
+        res = np.full((len(self), length)+values.shape[1:], fill, dtype=values.dtype)
+        index = self.localindex()
+        mask = (index<length)
+        res[self.parents()[mask], index[mask]] = values[mask]
+        return res
+
+
+class ColumnarCache(object):
+    ### read access to the columnar cache of a single ntuple
+
+    def __init__( self, cachedir ):
+        ### open the cache in a given directory
+        # note: only the manifest is read, the columns are opened when they are first used.
+        self.cachedir = os.path.abspath(cachedir)
+        manifestfile = os.path.join(self.cachedir, 'manifest.json')
+        if not os.path.exists(manifestfile):
+            raise Exception('ERROR in ColumnarCache: {} does not exist'.format(manifestfile)
+                            +' (the conversion was not run or did not finish).')
+        with open(manifestfile, 'r') as f:
+            self.manifest = json.load(f, object_pairs_hook=OrderedDict)
+        if self.manifest.get('format')!='columnarcache':
+            raise Exception('ERROR in ColumnarCache: {} is not a columnar cache manifest.'.format(
+                            manifestfile))
+        self.nentries = self.manifest['nentries']
+        self.sumofweights = self.manifest['sumofweights']
+        self._columns = {}
+        self._offsets = {}
+
+    def __len__( self ):
+        return self.nentries
+
+    def __contains__( self, name ):
+        return name in self.manifest['columns']
+
+    def __getitem__( self, name ):
+        return self.column(name)
+
+    def columns( self ):
+        ### names of all columns in the cache
+        return list(self.manifest['columns'].keys())
+
+    def counter( self, name ):
+        ### name of the counter of a variable size array column (None for other columns)
+        self._checkcolumn(name)
+        return self.manifest['columns'][name]['counter']
+
+    def isjagged( self, name ):
+        return self.counter(name) is not None
+
+    def source( self ):
+        ### path of the ntuple the cache was made from
+        return self.manifest['source']
+
+    def isuptodate( self, sourcefile=None ):
+        ### check if the source ntuple did not change (in size or modification time) since conversion
+        if sourcefile is None: sourcefile = self.source()
+        if not os.path.exists(sourcefile): return False
+        stat = os.stat(sourcefile)
+        return ( stat.st_size==self.manifest['sourcesize']
+                 and int(stat.st_mtime)==self.manifest['sourcemtime'] )
+
+    def _checkcolumn( self, name ):
+        if name not in self.manifest['columns']:
+            raise Exception('ERROR in ColumnarCache: column {} is not in cache {}.'.format(
+                            name, self.cachedir))
+
+    def _load( self, filename ):
+        return np.load(os.path.join(self.cachedir, filename), mmap_mode='r')
+
+    def offsets( self, counter ):
+        ### (memory mapped) offsets for a given counter branch
+        if counter not in self._offsets:
+            if counter not in self.manifest['counters']:
+                raise Exception('ERROR in ColumnarCache: {} is not a counter in cache {}.'.format(
+                                counter, self.cachedir))
+            self._offsets[counter] = self._load(counter+'.offsets.npy')
+        return self._offsets[counter]
+
+    def column( self, name ):
+        ### (memory mapped) column of a given name
+        # returns a numpy memmap for scalar and fixed size array columns,
+        # and a JaggedArray with memory mapped values for variable size array columns.
+        self._checkcolumn(name)
+        if name not in self._columns:
+            self._columns[name] = self._load(name+'.npy')
+        counter = self.counter(name)
+        if counter is None: return self._columns[name]
+        return JaggedArray(self._columns[name], self.offsets(counter))
+
+    def read( self, columns=None, start=0, stop=None ):
+        ### read a range of entries for a list of columns into memory
+        # input arguments:
+        # - columns: list of column names (default: all columns)
+        # - start and stop: range of entries to read (default: all entries)
+        # returns:
+        # an OrderedDict mapping column names to numpy arrays (or JaggedArrays)
+        # note: the offsets of the returned JaggedArrays start from zero.
+        if columns is None: columns = self.columns()
+        if stop is None or stop>self.nentries: stop = self.nentries
+        res = OrderedDict()
+        for name in columns:
+            column = self.column(name)
+            if isinstance(column, JaggedArray):
+                chunk = column[start:stop]
+                res[name] = JaggedArray(np.asarray(chunk.values), chunk.offsets)
+            else: res[name] = np.asarray(column[start:stop])
+        return res
+
+    def iterate( self, columns=None, chunksize=100000, start=0, stop=None ):
+        ### iterate over the entries in chunks of a fixed number of entries
+        # yields tuples (first entry, last entry (exclusive), OrderedDict of columns as in read)
+        if chunksize<=0:
+            raise Exception('ERROR in ColumnarCache.iterate: chunksize must be positive.')
+        if stop is None or stop>self.nentries: stop = self.nentries
+        for first in range(start, stop, chunksize):
+            last = min(first+chunksize, stop)
+            yield (first, last, self.read(columns=columns, start=first, stop=last))
+
+
+def opencaches( directory ):
+    ### open all caches in subdirectories of a given directory
+    # returns an OrderedDict mapping the subdirectory names (i.e. the sample names) to caches
+    res = OrderedDict()
+    for name in sorted(os.listdir(directory)):
+        if os.path.exists(os.path.join(directory, name, 'manifest.json')):
+            res[name] = ColumnarCache(os.path.join(directory, name))
+    return res
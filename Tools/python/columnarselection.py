@@ -0,0 +1,364 @@
+###############################################################################
+# vectorized object selection on the columnar cache of (skimmed) ntuples      #
+###############################################################################
+
+# general use:
+# numpy implementation of the lepton and jet selections in objectSelection
+# (MuonSelector.cc, ElectronSelector.cc, TauSelector.cc, JetSelector.cc and bTagWP.cc),
+# of the object cleaning in LeptonCollection and JetCollection,
+# and of the skim selections in skimmer/src/skimSelections.cc,
+# acting on the columns of a columnar cache (see columnarcache.py).
+# all selections return boolean masks over the flat values of the lepton (_nL) or jet (_nJets) columns,
+# i.e. with one element per lepton or jet of all events in the chunk.
+# note: each cut of the form 'if( x >= cut ) return false' in the C++ selectors
+#       is implemented as ~(x >= cut) rather than (x < cut),
+#       so that NaN values are treated in the same way as in the C++ code.
+# note: the selections should be kept in sync with the C++ selectors!
+#       use test/objects/columnarSelection_test.py to check the equivalence on a given sample.
+# example:
+#   cache = ColumnarCache('/path/to/cache/sample')
+#   for start, stop, chunk in cache.iterate(requiredcolumns(), chunksize=100000):
+#       passskim = passleptonicskim(chunk, '2018', 3)
+#       ...
+
+import numpy as np
+
+
+years = ['2016', '2016PreVFP', '2016PostVFP', '2017', '2018']
+
+eventcolumns = ['_nMu', '_nLight']
+
+leptoncolumns = ['_lPt', '_lPtCorr', '_lEta', '_lPhi', '_dxy', '_dz', '_3dIPSig', '_miniIso', '_ptRatio',
+                 '_leptonMvaTTH', '_lPOGVeto', '_lPOGLoose', '_lPOGMedium', '_lPOGTight',
+                 '_closestJetDeepFlavor_b', '_closestJetDeepFlavor_bb', '_closestJetDeepFlavor_lepb',
+                 '_lElectronMissingHits', '_lElectronPassMVAFall17NoIsoWPLoose',
+                 '_lElectronPassMVAFall17NoIsoWP80', '_lElectronPassConvVeto',
+                 '_lElectronHOverE', '_lElectronEInvMinusPInv', '_lElectronSigmaIetaIeta', '_lEtaSC',
+                 '_decayModeFinding']
+
+# lepton columns that are only filled for light leptons, i.e. indexed by _nLight instead of _nL
+# (see the branch definitions in TreeReader.cc)
+lightleptoncolumns = ['_lPtCorr', '_miniIso', '_ptRatio', '_leptonMvaTTH',
+                      '_closestJetDeepFlavor_b', '_closestJetDeepFlavor_bb', '_closestJetDeepFlavor_lepb',
+                      '_lElectronMissingHits', '_lElectronPassMVAFall17NoIsoWPLoose',
+                      '_lElectronPassMVAFall17NoIsoWP80', '_lElectronPassConvVeto',
+                      '_lElectronHOverE', '_lElectronEInvMinusPInv', '_lElectronSigmaIetaIeta', '_lEtaSC']
+
+jetcolumns = ['_jetSmearedPt', '_jetEta', '_jetPhi', '_jetIsTight',
+              '_jetDeepFlavor_b', '_jetDeepFlavor_bb', '_jetDeepFlavor_lepb']
+
+
+def requiredcolumns():
+    ### list of all columns needed for the selections in this module
+    return eventcolumns + leptoncolumns + jetcolumns
+
+
+### b-tagging working points ###
+
+btagwps = {
+    'DeepCSV': {
+        '2016': {'loose': 0.2217, 'medium': 0.6321, 'tight': 0.8953},
+        '2016PreVFP': {'loose': 0.2027, 'medium': 0.6001, 'tight': 0.8819},
+        '2016PostVFP': {'loose': 0.1918, 'medium': 0.5847, 'tight': 0.8767},
+        '2017': {'loose': 0.1355, 'medium': 0.4506, 'tight': 0.7738},
+        '2018': {'loose': 0.1208, 'medium': 0.4168, 'tight': 0.7665}
+    },
+    'DeepFlavor': {
+        '2016': {'loose': 0.0614, 'medium': 0.3093, 'tight': 0.7221},
+        '2016PreVFP': {'loose': 0.0508, 'medium': 0.2598, 'tight': 0.6502},
+        '2016PostVFP': {'loose': 0.0480, 'medium': 0.2489, 'tight': 0.6377},
+        '2017': {'loose': 0.0532, 'medium': 0.3040, 'tight': 0.7476},
+        '2018': {'loose': 0.0490, 'medium': 0.2783, 'tight': 0.7100}
+    }
+}
+
+def getbtagwp( tagger, wp, year ):
+    ### b-tagging threshold for a given tagger, working point and year (see bTagWP::getWP)
+    try: return btagwps[tagger][year][wp]
+    except KeyError:
+        raise Exception('ERROR in columnarselection.getbtagwp:'
+                        +' b-tag threshold to use not recognized ({}, {}, {})'.format(tagger, wp, year))
+
+def checkyear( year ):
+    if year not in years:
+        raise Exception('ERROR in columnarselection: year {} not recognized.'.format(year))
+
+def leptonbtagyear( year ):
+    ### year of the b-tagging working points used in the lepton FO selections
+    # note: the FO selections for 2016PreVFP and 2016PostVFP are copies of the one for 2016
+    checkyear(year)
+    if year.startswith('2016'): return '2016'
+    return year
+
+
+### help functions ###
+
+def flatvalues( columns, name ):
+    ### flat values of a variable size array column
+    return np.asarray(columns[name].flat())
+
+def leptonvalues( columns, name ):
+    ### flat values of a lepton column, in the layout of the _nL columns
+    # note: the columns in lightleptoncolumns only have values for the light leptons (_nLight per event);
+    #       as the light leptons come first in each event, their values are put
+    #       at the first _nLight positions of each event, and the taus get a dummy value
+    #       (NaN for floating point columns, False or 0 for boolean and integer columns).
+    values = flatvalues(columns, name)
+    if name not in lightleptoncolumns: return values
+    jagged = columns['_lPt']
+    islight = (jagged.localindex() < perobject(jagged, columns['_nLight']))
+    if np.count_nonzero(islight)!=len(values):
+        raise Exception('ERROR in columnarselection.leptonvalues: number of values of column {}'.format(name)
+                        +' ({}) does not match the number of light leptons ({}).'.format(
+                        len(values), np.count_nonzero(islight)))
+    fill = np.nan if np.issubdtype(values.dtype, np.floating) else 0
+    res = np.full(len(islight), fill, dtype=values.dtype)
+    res[islight] = values
+    return res
+
+def perobject( jagged, values ):
+    ### broadcast per-event values to the objects of a jagged column
+    return np.repeat(np.asarray(values), jagged.counts())
+
+def countperevent( jagged, mask ):
+    ### number of objects passing a mask (over the flat values of a jagged column) per event
+    cumulative = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+    offsets = jagged.offsets - jagged.offsets[0]
+    return cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+
+def deltaphi( phi1, phi2 ):
+    dphi = np.abs(phi1 - phi2)
+    return np.minimum(dphi, 2*np.pi - dphi)
+
+def deltar( eta1, phi1, eta2, phi2 ):
+    return np.sqrt((eta1-eta2)**2 + deltaphi(phi1, phi2)**2)
+
+def pairindices( offsets1, offsets2 ):
+    ### flat indices of all pairs of objects of two collections within the same events
+    offsets1 = np.asarray(offsets1) - offsets1[0]
+    offsets2 = np.asarray(offsets2) - offsets2[0]
+    counts1 = np.diff(offsets1)
+    counts2 = np.diff(offsets2)
+    npairs = counts1*counts2
+    event = np.repeat(np.arange(len(npairs)), npairs)
+    pairindex = np.arange(npairs.sum()) - np.repeat(np.cumsum(npairs)-npairs, npairs)
+    index1 = offsets1[:-1][event] + pairindex // counts2[event]
+    index2 = offsets2[:-1][event] + pairindex % counts2[event]
+    return (index1, index2)
+
+def overlaps( eta1, phi1, offsets1, candidates, eta2, phi2, offsets2, cleaners, conesize,
+              samecollection=False ):
+    ### mask of the candidate objects of a first collection
+    # that are within a given cone of any cleaning object of a second collection
+    index1, index2 = pairindices(offsets1, offsets2)
+    pairmask = candidates[index1] & cleaners[index2]
+    if samecollection: pairmask &= (index1 != index2)
+    index1 = index1[pairmask]
+    index2 = index2[pairmask]
+    close = deltar(eta1[index1], phi1[index1], eta2[index2], phi2[index2]) < conesize
+    res = np.zeros(len(candidates), dtype=bool)
+    res[index1[close]] = True
+    return res
+
+def slidingdeepflavorthreshold( loosewp, mediumwp, pt ):
+    ### interpolation between loose and medium working point from 20 to 45 GeV in muon pt
+    minpt = 20.
+    maxpt = 45.
+    interpolation = mediumwp - (mediumwp - loosewp) / (maxpt - minpt) * (pt - minpt)
+    return np.where(pt < minpt, mediumwp, np.where(pt > maxpt, loosewp, interpolation))
+
+
+### leptons ###
+
+def leptonflavours( columns ):
+    ### masks for muons, electrons and taus
+    # note: as in the LeptonCollection constructor, the flavour is determined
+    #       by the position in the lepton arrays (first muons, then electrons, then taus).
+    jagged = columns['_lPt']
+    index = jagged.localindex()
+    nmu = perobject(jagged, columns['_nMu'])
+    nlight = perobject(jagged, columns['_nLight'])
+    ismuon = (index < nmu)
+    iselectron = (index >= nmu) & (index < nlight)
+    istau = (index >= nlight)
+    return (ismuon, iselectron, istau)
+
+def closestjetdeepflavor( columns ):
+    ### deep flavor score of the closest jet, with invalid values set to zero
+    res = ( leptonvalues(columns, '_closestJetDeepFlavor_b')
+            + leptonvalues(columns, '_closestJetDeepFlavor_bb')
+            + leptonvalues(columns, '_closestJetDeepFlavor_lepb') )
+    return np.where(np.isnan(res) | (res < 0.), 0., res)
+
+def looseleptons( columns, year ):
+    ### loose lepton selection (see MuonSelector, ElectronSelector and TauSelector)
+    checkyear(year)
+    ismuon, iselectron, istau = leptonflavours(columns)
+    ptcorr = leptonvalues(columns, '_lPtCorr')
+    pt = leptonvalues(columns, '_lPt')
+    abseta = np.abs(leptonvalues(columns, '_lEta'))
+    # common light lepton cuts
+    light = ( ~(np.abs(leptonvalues(columns, '_dxy')) >= 0.05)
+              & ~(np.abs(leptonvalues(columns, '_dz')) >= 0.1)
+              & ~(leptonvalues(columns, '_3dIPSig') >= 8)
+              & ~(leptonvalues(columns, '_miniIso') >= 0.4) )
+    # muons
+    muon = ( ismuon & light
+             & ~(ptcorr <= 5)
+             & ~(abseta >= 2.4)
+             & leptonvalues(columns, '_lPOGLoose') )
+    # electrons
+    electron = ( iselectron & light
+                 & ~(ptcorr < 7)
+                 & ~(abseta >= 2.5)
+                 & ~(leptonvalues(columns, '_lElectronMissingHits') >= 2)
+                 & leptonvalues(columns, '_lElectronPassMVAFall17NoIsoWPLoose') )
+    # taus
+    tau = ( istau
+            & ~(pt < 20)
+            & ~(abseta >= 2.3)
+            & leptonvalues(columns, '_decayModeFinding')
+            & leptonvalues(columns, '_lPOGVeto') )
+    return muon | electron | tau
+
+def foleptons( columns, year, loose=None ):
+    ### FO lepton selection (see MuonSelector, ElectronSelector and TauSelector)
+    # note: the loose selection can be given to avoid recomputing it
+    if loose is None: loose = looseleptons(columns, year)
+    btagyear = leptonbtagyear(year)
+    loosewp = getbtagwp('DeepFlavor', 'loose', btagyear)
+    mediumwp = getbtagwp('DeepFlavor', 'medium', btagyear)
+    ismuon, iselectron, istau = leptonflavours(columns)
+    ptcorr = leptonvalues(columns, '_lPtCorr')
+    mva = leptonvalues(columns, '_leptonMvaTTH')
+    ptratio = leptonvalues(columns, '_ptRatio')
+    deepflavor = closestjetdeepflavor(columns)
+    # muons
+    lowmva = (mva <= 0.85)
+    muon = ( ismuon & loose
+             & ~(ptcorr <= 10)
+             & ~(lowmva & (ptratio <= 0.65))
+             & ~(lowmva & (deepflavor >= slidingdeepflavorthreshold(loosewp, mediumwp, ptcorr)))
+             & ~(~lowmva & (deepflavor >= mediumwp)) )
+    # electrons
+    lowmva = (mva <= 0.8)
+    sieie = leptonvalues(columns, '_lElectronSigmaIetaIeta')
+    barrel = (leptonvalues(columns, '_lEtaSC') <= 1.479)
+    electron = ( iselectron & loose
+                 & ~(ptcorr <= 10)
+                 & ~(leptonvalues(columns, '_lElectronMissingHits') > 0)
+                 & ~(leptonvalues(columns, '_lElectronHOverE') >= 0.1)
+                 & ~(leptonvalues(columns, '_lElectronEInvMinusPInv') <= -0.04)
+                 & ~(barrel & (sieie >= 0.011))
+                 & ~(~barrel & (sieie >= 0.030))
+                 & ~(lowmva & ~leptonvalues(columns, '_lElectronPassMVAFall17NoIsoWP80'))
+                 & ~(lowmva & (ptratio <= 0.7))
+                 & leptonvalues(columns, '_lElectronPassConvVeto')
+                 & ~(deepflavor >= mediumwp) )
+    # taus
+    tau = istau & loose
+    return muon | electron | tau
+
+def tightleptons( columns, year, fo=None ):
+    ### tight lepton selection (see MuonSelector, ElectronSelector and TauSelector)
+    # note: the FO selection can be given to avoid recomputing it
+    if fo is None: fo = foleptons(columns, year)
+    ismuon, iselectron, istau = leptonflavours(columns)
+    mva = leptonvalues(columns, '_leptonMvaTTH')
+    muon = ismuon & fo & leptonvalues(columns, '_lPOGMedium') & ~(mva <= 0.85)
+    electron = iselectron & fo & ~(mva <= 0.8)
+    tau = istau & fo & leptonvalues(columns, '_lPOGTight')
+    return muon | electron | tau
+
+def cleanelectronsfrommuons( columns, selected, muonselection, conesize=0.05 ):
+    ### remove electrons within a cone around muons passing a given selection
+    # (see LeptonCollection::cleanElectronsFromMuons)
+    # input arguments:
+    # - selected: mask of the leptons in the collection before cleaning
+    # - muonselection: selection the muons must pass to clean electrons
+    # returns:
+    # the mask of the leptons in the collection after cleaning
+    ismuon, iselectron, _ = leptonflavours(columns)
+    eta = flatvalues(columns, '_lEta')
+    phi = flatvalues(columns, '_lPhi')
+    offsets = columns['_lPt'].offsets
+    removed = overlaps(eta, phi, offsets, selected & iselectron,
+                       eta, phi, offsets, selected & ismuon & muonselection,
+                       conesize, samecollection=True)
+    return selected & ~removed
+
+def cleantausfromlightleptons( columns, selected, lightselection, conesize=0.4 ):
+    ### remove taus within a cone around light leptons passing a given selection
+    # (see LeptonCollection::cleanTausFromLightLeptons)
+    # input arguments and return value: see cleanelectronsfrommuons
+    ismuon, iselectron, istau = leptonflavours(columns)
+    eta = flatvalues(columns, '_lEta')
+    phi = flatvalues(columns, '_lPhi')
+    offsets = columns['_lPt'].offsets
+    removed = overlaps(eta, phi, offsets, selected & istau,
+                       eta, phi, offsets, selected & (ismuon | iselectron) & lightselection,
+                       conesize, samecollection=True)
+    return selected & ~removed
+
+
+### jets ###
+
+def jetdeepflavor( columns ):
+    ### deep flavor score of the jets, with invalid values set to zero
+    res = ( flatvalues(columns, '_jetDeepFlavor_b')
+            + flatvalues(columns, '_jetDeepFlavor_bb')
+            + flatvalues(columns, '_jetDeepFlavor_lepb') )
+    return np.where(np.isnan(res) | (res < 0.), 0., res)
+
+def goodjets( columns, year ):
+    ### good jet selection (see JetSelector)
+    checkyear(year)
+    pt = flatvalues(columns, '_jetSmearedPt')
+    abseta = np.abs(flatvalues(columns, '_jetEta'))
+    return ~(pt < 25) & ~(abseta > 2.4) & flatvalues(columns, '_jetIsTight')
+
+def btaggedjets( columns, year, wp, good=None ):
+    ### b-tagged jet selection for a given working point ('loose', 'medium' or 'tight')
+    # note: as in JetSelector, only good jets in the b-tagging acceptance are considered as b-tagged;
+    #       the good jet selection can be given to avoid recomputing it.
+    if good is None: good = goodjets(columns, year)
+    pt = flatvalues(columns, '_jetSmearedPt')
+    abseta = np.abs(flatvalues(columns, '_jetEta'))
+    acceptance = good & ~(pt < 25) & ~(abseta >= 2.4)
+    return acceptance & (jetdeepflavor(columns) > getbtagwp('DeepFlavor', wp, year))
+
+def cleanjetsfromleptons( columns, selectedjets, selectedleptons, conesize=0.4 ):
+    ### remove jets within a cone around selected leptons (see JetCollection::cleanJetsFromLeptons)
+    # input arguments:
+    # - selectedjets: mask of the jets in the collection before cleaning
+    # - selectedleptons: mask of the leptons in the collection that pass the selection for cleaning
+    # returns:
+    # the mask of the jets in the collection after cleaning
+    removed = overlaps(flatvalues(columns, '_jetEta'), flatvalues(columns, '_jetPhi'),
+                       columns['_jetSmearedPt'].offsets, selectedjets,
+                       flatvalues(columns, '_lEta'), flatvalues(columns, '_lPhi'),
+                       columns['_lPt'].offsets, selectedleptons, conesize)
+    return selectedjets & ~removed
+
+
+### skims ###
+
+def skimleptons( columns, year ):
+    ### loose leptons after cleaning, as in the leptonic and fake rate skims
+    loose = looseleptons(columns, year)
+    selected = cleanelectronsfrommuons(columns, loose, loose)
+    selected = cleantausfromlightleptons(columns, selected, loose)
+    return selected
+
+def passleptonicskim( columns, year, nleptons ):
+    ### per-event mask for the leptonic skims (see passLeptonicSkim)
+    return countperevent(columns['_lPt'], skimleptons(columns, year)) >= nleptons
+
+def passfakerateskim( columns, year ):
+    ### per-event mask for the fake rate skim (see passFakeRateSkim)
+    leptons = skimleptons(columns, year)
+    ismuon, iselectron, _ = leptonflavours(columns)
+    nlight = countperevent(columns['_lPt'], leptons & (ismuon | iselectron))
+    jets = cleanjetsfromleptons(columns, goodjets(columns, year), leptons)
+    njets = countperevent(columns['_jetSmearedPt'], jets)
+    return (nlight == 1) & (njets >= 1)
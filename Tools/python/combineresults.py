@@ -0,0 +1,274 @@
+#################################################################
+# tools for reading and caching the ROOT outputs of combine fits #
+#################################################################
+
+# general use:
+# instead of parsing the text that combine writes to stdout,
+# read the results directly from the ROOT files written by combine:
+# - the 'limit' tree in the higgsCombine<name>.<method>.mH<mass>.root files
+#   (best fit values, limits, significances, likelihood scan points, ...)
+# - the RooFitResults 'fit_s' and 'fit_b' in the fitDiagnostics<name>.root files
+# - the prefit and postfit shapes in the same files (if run with --saveShapes),
+#   converted to numpy arrays.
+# the results for a task (i.e. all output files with a given name)
+# can be stored in a compact .npz cache file,
+# that is reused as long as none of the ROOT files changed
+# (in size or modification time), see load_task_results.
+# note: the shape arrays follow the conventions of the numpy bridge in histtools,
+#       i.e. they include under- and overflow bins.
+
+import os
+import glob
+import json
+from collections import OrderedDict
+import numpy as np
+import ROOT
+import histtools as ht
+
+default_fitresults = ['fit_s','fit_b']
+default_shapefolders = ['shapes_prefit','shapes_fit_s','shapes_fit_b']
+
+
+### reading ###
+
+def read_limit_tree( rootfile, branches=None ):
+    ### read the limit tree of a combine output file into numpy arrays
+    # input arguments:
+    # - rootfile: name of a higgsCombine*.root file
+    # - branches: list of branch names to read (default: all branches)
+    # returns:
+    # an OrderedDict mapping branch names to numpy arrays (one element per entry),
+    # or None if the file has no limit tree
+    f = ROOT.TFile.Open(rootfile)
+    if( not f or f.IsZombie() ):
+        raise Exception('ERROR in combineresults.read_limit_tree: could not open {}'.format(
+                        rootfile))
+    tree = f.Get('limit')
+    if not tree:
+        f.Close()
+        return None
+    if branches is None:
+        branches = [b.GetName() for b in tree.GetListOfBranches()]
+    res = OrderedDict()
+    for branch in branches: res[branch] = np.zeros(tree.GetEntries())
+    for i in range(tree.GetEntries()):
+        tree.GetEntry(i)
+        for branch in branches: res[branch][i] = getattr(tree, branch)
+    f.Close()
+    return res
+
+def fitresulttodict( fitresult ):
+    ### convert a RooFitResult into a dict
+    # the returned dict has the following keys:
+    # - 'status', 'covqual', 'minnll' and 'edm': fit quality information
+    # - 'params': OrderedDict mapping parameter names to a tuple
+    #   (best fit value, down error, up error),
+    #   where the asymmetric errors are used if available (else the symmetric error)
+    # - 'correlation': numpy array with the correlation matrix of the floating parameters
+    #   (in the same order as 'params')
+    res = {'status':fitresult.status(), 'covqual':fitresult.covQual(),
+           'minnll':fitresult.minNll(), 'edm':fitresult.edm()}
+    params = OrderedDict()
+    pars = fitresult.floatParsFinal()
+    for i in range(pars.getSize()):
+        par = pars.at(i)
+        if par.hasAsymError():
+            params[par.GetName()] = (par.getVal(), abs(par.getErrorLo()), par.getErrorHi())
+        else:
+            params[par.GetName()] = (par.getVal(), par.getError(), par.getError())
+    res['params'] = params
+    corr = fitresult.correlationMatrix()
+    res['correlation'] = np.array([[corr(i,j) for j in range(pars.getSize())]
+                                   for i in range(pars.getSize())])
+    return res
+
+def read_fit_result( rootfile, name='fit_s' ):
+    ### read a RooFitResult from a fitDiagnostics file into a dict (see fitresulttodict)
+    # returns None if the file does not contain a fit result with the given name
+    f = ROOT.TFile.Open(rootfile)
+    if( not f or f.IsZombie() ):
+        raise Exception('ERROR in combineresults.read_fit_result: could not open {}'.format(
+                        rootfile))
+    fitresult = f.Get(name)
+    res = None
+    if( fitresult and isinstance(fitresult, ROOT.RooFitResult) ):
+        res = fitresulttodict(fitresult)
+    f.Close()
+    return res
+
+def read_shapes( rootfile, folder='shapes_fit_s' ):
+    ### read the shapes in a folder of a fitDiagnostics file into numpy arrays
+    # returns:
+    # a dict mapping channel names to dicts mapping process names
+    # (including 'total', 'total_signal', 'total_background' and 'data')
+    # to a dict with keys 'contents' and 'errors' (see histtools.histcontents and histerrors),
+    # or None if the folder is not present.
+    # note: the data is stored as a TGraphAsymmErrors by combine;
+    #       it is converted to a histogram first with the maximum of the up and down errors.
+    f = ROOT.TFile.Open(rootfile)
+    if( not f or f.IsZombie() ):
+        raise Exception('ERROR in combineresults.read_shapes: could not open {}'.format(
+                        rootfile))
+    directory = f.Get(folder)
+    if not directory:
+        f.Close()
+        return None
+    res = OrderedDict()
+    for channelkey in directory.GetListOfKeys():
+        channeldir = channelkey.ReadObj()
+        if not isinstance(channeldir, ROOT.TDirectory): continue
+        channel = OrderedDict()
+        for key in channeldir.GetListOfKeys():
+            obj = key.ReadObj()
+            if isinstance(obj, ROOT.TH2): continue # (skip covariance matrices)
+            if isinstance(obj, ROOT.TGraph):
+                if obj.GetN()==0: continue
+                obj = ht.tgraphtohist(obj)
+            elif not isinstance(obj, ROOT.TH1): continue
+            channel[key.GetName()] = {'contents':ht.histcontents(obj),
+                                      'errors':ht.histerrors(obj)}
+        res[channelkey.GetName()] = channel
+    f.Close()
+    return res
+
+def read_results( rootfiles, fitresults=None, shapefolders=None ):
+    ### read all results from a list of combine output files
+    # input arguments:
+    # - rootfiles: list of higgsCombine*.root and/or fitDiagnostics*.root files
+    # - fitresults: names of fit results to read (default: default_fitresults)
+    # - shapefolders: names of shape folders to read (default: default_shapefolders)
+    # returns:
+    # a dict with keys 'limit' (mapping method names to the output of read_limit_tree),
+    # 'fits' (mapping fit result names to the output of read_fit_result)
+    # and 'shapes' (mapping folder names to the output of read_shapes);
+    # results that are not present in any of the files are omitted.
+    if fitresults is None: fitresults = default_fitresults
+    if shapefolders is None: shapefolders = default_shapefolders
+    res = {'limit':OrderedDict(), 'fits':OrderedDict(), 'shapes':OrderedDict()}
+    for rootfile in rootfiles:
+        basename = os.path.basename(rootfile)
+        if basename.startswith('higgsCombine'):
+            # (the method is the second to last part of the file name before the mass)
+            method = basename.split('.')[-3] if basename.count('.')>=3 else basename
+            limit = read_limit_tree(rootfile)
+            if limit is not None: res['limit'][method] = limit
+        elif basename.startswith('fitDiagnostics'):
+            for name in fitresults:
+                fitresult = read_fit_result(rootfile, name=name)
+                if fitresult is not None: res['fits'][name] = fitresult
+            for folder in shapefolders:
+                shapes = read_shapes(rootfile, folder=folder)
+                if shapes is not None: res['shapes'][folder] = shapes
+    return res
+
+def get_poi( results, poi='r', fitresult='fit_s' ):
+    ### get the best fit value and errors of a parameter from the output of read_results
+    # returns:
+    # a tuple (best fit value, down error, up error),
+    # or None if the parameter is not present.
+    # note: if the fit result is not present (e.g. for MultiDimFit),
+    #       the value is taken from the limit tree instead,
+    #       assuming the standard combine layout of central value, -1 sigma and +1 sigma
+    #       as the first three entries.
+    fit = results['fits'].get(fitresult,None)
+    if( fit is not None and poi in fit['params'] ): return fit['params'][poi]
+    for limit in results['limit'].values():
+        if( poi not in limit or len(limit[poi])<3 ): continue
+        values = limit[poi]
+        return (values[0], values[0]-values[1], values[2]-values[0])
+    return None
+
+
+### caching ###
+
+def _filestats( rootfiles ):
+    ### get the size and modification time of a list of files (for cache validation)
+    return dict([(os.path.abspath(f), [os.path.getsize(f), os.path.getmtime(f)])
+                 for f in rootfiles])
+
+def save_results( cachefile, results, rootfiles ):
+    ### write the output of read_results to a .npz cache file
+    # all arrays are stored as separate entries (with a '/'-separated key),
+    # all other information is stored as json.
+    arrays = {}
+    meta = {'files':_filestats(rootfiles), 'limit':{}, 'fits':{}, 'shapes':{}}
+    for method,limit in results['limit'].items():
+        meta['limit'][method] = list(limit.keys())
+        for branch,values in limit.items(): arrays['limit/{}/{}'.format(method,branch)] = values
+    for name,fit in results['fits'].items():
+        meta['fits'][name] = {'status':fit['status'], 'covqual':fit['covqual'],
+                              'minnll':fit['minnll'], 'edm':fit['edm'],
+                              'params':[[par]+list(vals) for par,vals in fit['params'].items()]}
+        arrays['fits/{}/correlation'.format(name)] = fit['correlation']
+    for folder,shapes in results['shapes'].items():
+        meta['shapes'][folder] = [[channel, list(procs.keys())] for channel,procs in shapes.items()]
+        for channel,procs in shapes.items():
+            for proc,arrs in procs.items():
+                for key,values in arrs.items():
+                    arrays['shapes/{}/{}/{}/{}'.format(folder,channel,proc,key)] = values
+    arrays['meta'] = np.array(json.dumps(meta))
+    # (write to a temporary file first, so an interrupted write never leaves a corrupt cache;
+    #  note that np.savez appends the .npz extension if not present)
+    tmpfile = cachefile+'.tmp.npz'
+    np.savez(tmpfile, **arrays)
+    os.rename(tmpfile, cachefile)
+
+def load_cached_results( cachefile, rootfiles=None ):
+    ### read results from a .npz cache file written by save_results
+    # input arguments:
+    # - cachefile: name of the cache file
+    # - rootfiles: list of files from which the cache was made;
+    #   if specified, None is returned if the cache is not up to date with these files.
+    # returns:
+    # a dict in the same format as read_results, or None if the cache is not valid
+    if not os.path.exists(cachefile): return None
+    data = np.load(cachefile)
+    meta = json.loads(str(data['meta']))
+    if( rootfiles is not None and meta['files']!=_filestats(rootfiles) ): return None
+    res = {'limit':OrderedDict(), 'fits':OrderedDict(), 'shapes':OrderedDict()}
+    for method,branches in meta['limit'].items():
+        res['limit'][method] = OrderedDict([(branch, data['limit/{}/{}'.format(method,branch)])
+                                            for branch in branches])
+    for name,fit in meta['fits'].items():
+        res['fits'][name] = {'status':fit['status'], 'covqual':fit['covqual'],
+                             'minnll':fit['minnll'], 'edm':fit['edm'],
+                             'params':OrderedDict([(el[0],tuple(el[1:])) for el in fit['params']]),
+                             'correlation':data['fits/{}/correlation'.format(name)]}
+    for folder,channels in meta['shapes'].items():
+        res['shapes'][folder] = OrderedDict()
+        for channel,procs in channels:
+            res['shapes'][folder][channel] = OrderedDict()
+            for proc in procs:
+                prefix = 'shapes/{}/{}/{}/'.format(folder,channel,proc)
+                res['shapes'][folder][channel][proc] = {'contents':data[prefix+'contents'],
+                                                        'errors':data[prefix+'errors']}
+    data.close()
+    return res
+
+def find_task_files( workdir, name ):
+    ### find the combine output files for a task with a given name (i.e. the -n argument)
+    files = glob.glob(os.path.join(workdir, 'higgsCombine{}.*.root'.format(name)))
+    fitdiagnostics = os.path.join(workdir, 'fitDiagnostics{}.root'.format(name))
+    if os.path.exists(fitdiagnostics): files.append(fitdiagnostics)
+    return sorted(files)
+
+def load_task_results( workdir, name, cachefile=None, **kwargs ):
+    ### read all results for a task, using a cache file if it is up to date
+    # input arguments:
+    # - workdir: directory in which combine was run
+    # - name: name of the task (i.e. the -n argument to combine)
+    # - cachefile: name of the cache file (default: <workdir>/<name>_results.npz)
+    # - kwargs: passed down to read_results
+    # returns:
+    # a dict in the format of read_results
+    if cachefile is None: cachefile = os.path.join(workdir, '{}_results.npz'.format(name))
+    rootfiles = find_task_files(workdir, name)
+    if len(rootfiles)==0:
+        msg = 'ERROR in combineresults.load_task_results:'
+        msg += ' no combine output files found for task {} in {}'.format(name,workdir)
+        raise Exception(msg)
+    res = load_cached_results(cachefile, rootfiles=rootfiles)
+    if res is not None: return res
+    res = read_results(rootfiles, **kwargs)
+    save_results(cachefile, res, rootfiles)
+    return res
@@ -592,3 +592,292 @@ def get_likelihoodscan_commands(datacarddir, card,
     commands.append( ss_command+' > '+outtxtfile+' 2> '+outtxtfile )
   commands.append('cd {}'.format(cwd))
   return commands
+
+
+##############################################
+# Task graph runner for many combine tasks #
+##############################################
+# general use:
+# instead of collecting the commands returned by the get_*_commands functions above
+# and running them one by one, define all tasks at once in a CombineTaskRunner
+# (e.g. all channels times exp/obs times stat/syst), and run them in a single call.
+# the runner builds a graph of the needed steps with their dependencies:
+# - combination of datacards (optional, see add_combination)
+# - workspace creation (once per datacard)
+# - fits (once per task, after the workspace)
+# - result parsing (once per task, after the fit)
+# independent steps are run in parallel on a local process pool.
+# each step is identified by a content hash of its commands and its inputs
+# (datacards, histogram files referenced in the datacards, and the hashes of the steps
+#  it depends on); steps for which the hash did not change since a previous run
+# and for which the outputs still exist are skipped.
+# the hashes are kept in a state file in the datacard directory.
+# steps that fail (nonzero exit code of any command, missing outputs,
+# or a fit reported as failed in the combine output) are not recorded, and are rerun next time.
+
+import re
+import json
+import hashlib
+import subprocess
+import multiprocessing
+
+# output naming convention per method (see the get_*_commands functions above)
+# (suffix of the task name, function to get the commands,
+#  and root files produced by combine, formatted with the task name)
+task_methods = {
+  'significance': ('_out_significance', get_significance_commands,
+                   ['higgsCombine{}.Significance.mH120.root']),
+  'fitdiagnostics': ('_out_fitdiagnostics', get_fitdiagnostics_commands,
+                     ['higgsCombine{}.FitDiagnostics.mH120.root', 'fitDiagnostics{}.root']),
+  'multidimfit': ('_out_multidimfit', get_multidimfit_commands,
+                  ['higgsCombine{}.MultiDimFit.mH120.root']),
+  'initimpacts': ('_out_initimpacts', get_initimpacts_commands,
+                  ['higgsCombine_initialFit_{}.MultiDimFit.mH120.root']),
+  'channelcompatibility': ('_out_channelcompat', get_channelcompatibility_commands,
+                           ['higgsCombine{}.ChannelCompatibilityCheck.mH120.root'])
+}
+
+def get_task_name(card, method, usedata=False, dostatonly=False, nuisance=''):
+  ### get the name of the output of a task (without extension)
+  # note: must be kept in sync with the naming in the get_*_commands functions above
+  if method not in task_methods:
+    msg = 'ERROR in combinetools.get_task_name:'
+    msg += ' method {} not recognized.'.format(method)
+    raise Exception(msg)
+  name = os.path.splitext(card)[0] + task_methods[method][0]
+  name += '_obs' if usedata else '_exp'
+  if( dostatonly and method!='significance' ): name += '_stat'
+  if( method=='multidimfit' and nuisance!='' and not dostatonly ): name += '_'+nuisance
+  return name
+
+def get_shape_files(datacarddir, card):
+  ### get the histogram files referenced in the shapes lines of a datacard
+  files = []
+  with open(os.path.join(datacarddir,card),'r') as f:
+    for line in f:
+      parts = line.split()
+      if( len(parts)>=4 and parts[0]=='shapes' ):
+        shapefile = os.path.join(datacarddir, parts[3])
+        if shapefile not in files: files.append(shapefile)
+  return files
+
+def parse_combine_output(txtfile):
+  ### parse the text output of a combine command into a dict
+  # the returned dict has the following keys:
+  # - 'pois': dict mapping poi names to a tuple (best fit value, down error, up error)
+  # - 'significance': significance (or None if not present)
+  # - 'chi2': chi2-like compatibility variable (or None if not present)
+  # - 'fitfailed': whether the fit failed
+  res = {'pois':{}, 'significance':None, 'chi2':None, 'fitfailed':False}
+  if not os.path.exists(txtfile):
+    res['fitfailed'] = True
+    return res
+  number = r'([-+]?[\d.]+(?:[eE][-+]?\d+)?)'
+  # format of MultiDimFit (e.g. "   r :    +1.000   -0.123/+0.130 (68%)")
+  multidimfit = re.compile(r'^\s*(\w+)\s*:\s*'+number+r'\s+-'+number+r'/\+'+number+r'\s+\(68%\)')
+  # format of FitDiagnostics (e.g. "Best fit r: 1  -0.2/+0.3  (68% CL)")
+  fitdiagnostics = re.compile(r'^Best fit (\w+):\s*'+number+r'\s+-'+number+r'/\+'+number)
+  with open(txtfile,'r') as f:
+    for line in f:
+      if 'Fit failed' in line: res['fitfailed'] = True
+      match = multidimfit.match(line) or fitdiagnostics.match(line)
+      if match is not None:
+        res['pois'][match.group(1)] = (float(match.group(2)), float(match.group(3)),
+                                       float(match.group(4)))
+      elif line.startswith('Significance:'):
+        res['significance'] = float(line.split(':')[1])
+      elif line.startswith('Chi2-like compatibility variable:'):
+        res['chi2'] = float(line.split(':')[1])
+  return res
+
+def _run_script(script):
+  ### run a bash script (as a string) and return the exit code
+  # note: the script is run with -e, so that it stops with a nonzero exit code
+  #       as soon as one of the commands fails (and not with the exit code of the last command).
+  # note: defined at module level so it can be sent to a process pool
+  return subprocess.call(['bash','-e','-c',script])
+
+class CombineTaskRunner(object):
+  ### run many combine tasks as one parallel and incremental operation
+
+  def __init__(self, datacarddir, cmssw_version=None, nprocesses=None,
+               statefile='combinetasks_state.json'):
+    ### initializer
+    # input arguments:
+    # - datacarddir: directory containing the datacards
+    # - cmssw_version: CMSSW release in which to run the commands
+    # - nprocesses: number of parallel processes (default: number of cores)
+    # - statefile: name of the file (in datacarddir) holding the hashes of completed steps
+    self.datacarddir = os.path.abspath(datacarddir)
+    self.cmssw_version = cmssw_version
+    self.nprocesses = nprocesses if nprocesses is not None else multiprocessing.cpu_count()
+    self.statefile = os.path.join(self.datacarddir, statefile)
+    self.steps = {}
+    self.order = []
+    self.tasks = []
+
+  def _add_step(self, stepid, commands, outputs, inputs=[], dependencies=[]):
+    ### add a step to the graph (if not yet present)
+    if stepid in self.steps: return stepid
+    self.steps[stepid] = {'commands':commands, 'outputs':outputs, 'inputs':inputs,
+                          'dependencies':dependencies}
+    self.order.append(stepid)
+    return stepid
+
+  def add_combination(self, combcard, carddict):
+    ### add a combination of datacards (see makecombinedcards)
+    # input arguments:
+    # - combcard: filename of the combined datacard to create
+    # - carddict: dict mapping filenames of cards to combine to channelnames in combination
+    combcard = os.path.splitext(combcard)[0]+'.txt'
+    command = 'combineCards.py'
+    for card in sorted(carddict.keys()):
+      command += ' {}={}'.format(carddict[card],card)
+    commands = ['cd {}'.format(self.datacarddir), command+' > '+combcard]
+    dependencies = ['combination:'+card for card in carddict.keys()
+                    if 'combination:'+card in self.steps]
+    self._add_step('combination:'+combcard, commands, [combcard],
+                   inputs=sorted(carddict.keys()), dependencies=dependencies)
+    return combcard
+
+  def add_task(self, card, method='multidimfit', usedata=False, dostatonly=False, **kwargs):
+    ### add a task (i.e. a fit of a given type on a given datacard)
+    # input arguments:
+    # - card: filename of the datacard in datacarddir 
+    #   (either existing or added with add_combination)
+    # - method: see task_methods
+    # - usedata and dostatonly: see get_*_commands
+    # - kwargs: passed down to the get_*_commands function
+    # returns:
+    # the name of the task (see get_task_name)
+    name = get_task_name(card, method, usedata=usedata, dostatonly=dostatonly,
+                         nuisance=kwargs.get('nuisance',''))
+    if name in [task['name'] for task in self.tasks]: return name
+    # workspace step
+    workspace = card.replace('.txt','.root')
+    wsdeps = ['combination:'+card] if 'combination:'+card in self.steps else []
+    wsid = self._add_step('workspace:'+card,
+                          get_workspace_commands(self.datacarddir, card),
+                          [workspace], inputs=[card], dependencies=wsdeps)
+    # fit step
+    func = task_methods[method][1]
+    if method=='significance': commands = func(self.datacarddir, card, usedata=usedata, **kwargs)
+    else: commands = func(self.datacarddir, card, usedata=usedata, dostatonly=dostatonly, **kwargs)
+    outputs = [name+'.txt'] + [f.format(name) for f in task_methods[method][2]]
+    fitid = self._add_step('fit:'+name, commands, outputs, dependencies=[wsid])
+    self.tasks.append({'name':name, 'card':card, 'method':method, 'usedata':usedata,
+                       'dostatonly':dostatonly, 'step':fitid})
+    return name
+
+  def _file_hash(self, filename, filehashes):
+    ### get the content hash of a file, cached by size and modification time
+    stat = os.stat(filename)
+    cached = filehashes.get(filename,None)
+    if( cached is not None and cached['size']==stat.st_size and cached['mtime']==stat.st_mtime ):
+      return cached['hash']
+    sha = hashlib.sha1()
+    with open(filename,'rb') as f:
+      for block in iter(lambda: f.read(1024*1024), b''): sha.update(block)
+    filehashes[filename] = {'size':stat.st_size, 'mtime':stat.st_mtime, 'hash':sha.hexdigest()}
+    return sha.hexdigest()
+
+  def _step_hash(self, stepid, hashes, filehashes):
+    ### get the hash of a step from its commands, its inputs and its dependencies
+    # note: the histogram files referenced in input datacards are included as inputs
+    # note: the 'cd' commands are not included, as they depend on the working directory
+    #       from which the runner is used (the input files are hashed by content instead)
+    step = self.steps[stepid]
+    sha = hashlib.sha1()
+    for command in step['commands']:
+      if command.startswith('cd '): continue
+      sha.update(command.encode())
+    inputs = []
+    for card in step['inputs']:
+      inputs.append(os.path.join(self.datacarddir,card))
+      if stepid.startswith('workspace:'): inputs += get_shape_files(self.datacarddir, card)
+    for inputfile in inputs:
+      if not os.path.exists(inputfile): return None
+      sha.update(self._file_hash(inputfile, filehashes).encode())
+    for dependency in step['dependencies']: sha.update(hashes[dependency].encode())
+    return sha.hexdigest()
+
+  def _script(self, stepid):
+    ### make a bash script (as a string) for a step
+    script = ''
+    if self.cmssw_version is not None:
+      script += 'cd {}\n'.format(os.path.join(self.cmssw_version,'src'))
+      script += 'eval `scram runtime -sh`\n'
+    script += '\n'.join(self.steps[stepid]['commands'])+'\n'
+    return script
+
+  def run(self, force=False, verbose=True):
+    ### run all steps that are not up to date
+    # input arguments:
+    # - force: rerun all steps, even if they are up to date
+    # returns:
+    # a dict mapping task names to a dict with the task properties,
+    # the status ('done', 'skipped' (i.e. up to date), 'failed' or 'dependency failed')
+    # and the parsed result (see parse_combine_output)
+    state = {'steps':{}, 'files':{}}
+    if os.path.exists(self.statefile):
+      with open(self.statefile,'r') as f: state = json.load(f)
+    hashes = {}
+    status = {}
+    pool = multiprocessing.Pool(processes=self.nprocesses)
+    running = {}
+    while len(status)<len(self.steps):
+      # schedule all steps of which the dependencies are finished
+      for stepid in self.order:
+        if( stepid in status or stepid in running ): continue
+        deps = self.steps[stepid]['dependencies']
+        if any([dep not in status for dep in deps]): continue
+        if any([status[dep] not in ['done','skipped'] for dep in deps]):
+          status[stepid] = 'dependency failed'
+          continue
+        hashes[stepid] = self._step_hash(stepid, hashes, state['files'])
+        outputs = [os.path.join(self.datacarddir,f) for f in self.steps[stepid]['outputs']]
+        if( not force and hashes[stepid] is not None
+            and state['steps'].get(stepid,None)==hashes[stepid]
+            and all([os.path.exists(f) for f in outputs]) ):
+          status[stepid] = 'skipped'
+          continue
+        if hashes[stepid] is None:
+          print('ERROR in CombineTaskRunner: missing inputs for step {}'.format(stepid))
+          status[stepid] = 'failed'
+          continue
+        if verbose: print('INFO in CombineTaskRunner: running step {}'.format(stepid))
+        running[stepid] = pool.apply_async(_run_script, (self._script(stepid),))
+      # wait for a running step to finish and update the state
+      finished = [stepid for stepid,res in running.items() if res.ready()]
+      if( len(finished)==0 and len(running)>0 ):
+        list(running.values())[0].wait(0.2)
+        continue
+      for stepid in finished:
+        exitcode = running.pop(stepid).get()
+        outputs = [os.path.join(self.datacarddir,f) for f in self.steps[stepid]['outputs']]
+        # (a fit of which the output reports a failure is considered failed as well)
+        success = ( exitcode==0 and all([os.path.exists(f) for f in outputs]) )
+        if( success and stepid.startswith('fit:') ):
+          success = not parse_combine_output(outputs[0])['fitfailed']
+        if success:
+          status[stepid] = 'done'
+          state['steps'][stepid] = hashes[stepid]
+        else:
+          print('ERROR in CombineTaskRunner: step {} failed.'.format(stepid))
+          status[stepid] = 'failed'
+          state['steps'].pop(stepid,None)
+      with open(self.statefile,'w') as f: json.dump(state, f)
+    pool.close()
+    pool.join()
+    with open(self.statefile,'w') as f: json.dump(state, f)
+    # parse the results
+    summary = {}
+    for task in self.tasks:
+      res = dict(task)
+      res['status'] = status[task['step']]
+      res['result'] = None
+      if res['status'] in ['done','skipped']:
+        res['result'] = parse_combine_output(
+                          os.path.join(self.datacarddir,task['name']+'.txt'))
+      summary[task['name']] = res
+    return summary
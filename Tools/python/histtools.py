@@ -4,6 +4,7 @@
 
 import os
 import math
+from collections import OrderedDict
 import numpy as np
 from array import array
 import ROOT
@@ -126,6 +127,192 @@ def loadhistnames(histfile,
     return histnames
 
 
+### indexed histogram store ###
+
+def parsehistname(histname):
+    ### split a histogram name into its fields.
+    # the default naming convention is the one used in the fake rate measurement:
+    #   process_ptype_ftype_var_year_flavour_pT_ptvalue_eta_etavalue
+    # where ptype ("prompt" or "nonprompt") is absent for data,
+    # and the pT and eta parts are optional.
+    # returns a dict with keys 'process', 'ptype', 'ftype', 'variable',
+    # 'year', 'flavour', 'pt' and 'eta' (values are strings or None if absent).
+    fields = dict.fromkeys(['process','ptype','ftype','variable',
+                            'year','flavour','pt','eta'])
+    rest = histname
+    if '_eta_' in rest: (rest, fields['eta']) = rest.rsplit('_eta_',1)
+    if '_pT_' in rest: (rest, fields['pt']) = rest.rsplit('_pT_',1)
+    parts = rest.split('_')
+    fields['process'] = parts[0]
+    parts = parts[1:]
+    if( len(parts)>0 and parts[0] in ['prompt','nonprompt'] ):
+        fields['ptype'] = parts[0]
+        parts = parts[1:]
+    if len(parts)>=4:
+        fields['ftype'] = parts[0]
+        fields['variable'] = '_'.join(parts[1:-2])
+        fields['year'] = parts[-2]
+        fields['flavour'] = parts[-1]
+    return fields
+
+class HistogramStore(object):
+    ### read-only access to the histograms in a root file.
+    # the file is opened only once and an index of all keys is built at construction,
+    # so that selections on names or name fields do not touch the file.
+    # objects are loaded lazily on first access and kept in a least-recently-used cache;
+    # when the estimated memory of the cached objects exceeds maxmemory (in bytes),
+    # the least recently used objects are dropped from the cache.
+    # note: returned histograms are detached from the file (SetDirectory(0));
+    #       modifying them modifies the cached version as well,
+    #       so clone them first if needed.
+
+    def __init__( self, histfile, nameparser=parsehistname, maxmemory=1e9,
+                  allow_tgraphs=False, suppress_warnings=False ):
+        ### initializer
+        # input arguments:
+        # - histfile: path to a root file containing histograms
+        # - nameparser: function mapping a histogram name to a dict of name fields
+        #   (default: see parsehistname)
+        # - maxmemory: approximate maximum memory (in bytes) of cached objects
+        # - allow_tgraphs and suppress_warnings: see loadhistograms
+        self.histfile = os.path.abspath(histfile)
+        self.maxmemory = maxmemory
+        self.allow_tgraphs = allow_tgraphs
+        self.suppress_warnings = suppress_warnings
+        self.f = ROOT.TFile.Open(self.histfile)
+        if( not self.f or self.f.IsZombie() ):
+            raise Exception('ERROR in histtools.HistogramStore:'
+                            +' could not open file {}.'.format(histfile))
+        self.names = [key.GetName() for key in self.f.GetListOfKeys()]
+        # (note: in case of multiple cycles of the same key, keep only one entry)
+        self.names = list(OrderedDict.fromkeys(self.names))
+        self.nameset = set(self.names)
+        self.fields = {}
+        if nameparser is not None:
+            for name in self.names: self.fields[name] = nameparser(name)
+        self.cache = OrderedDict()
+        self.cachesizes = {}
+        self.cachememory = 0
+
+    def __enter__( self ):
+        return self
+
+    def __exit__( self, exc_type, exc_value, traceback ):
+        self.close()
+
+    def __len__( self ):
+        return len(self.names)
+
+    def __contains__( self, name ):
+        return name in self.nameset
+
+    def close( self ):
+        ### clear the cache and close the file
+        self.cache.clear()
+        self.cachesizes.clear()
+        self.cachememory = 0
+        if self.f is not None:
+            self.f.Close()
+            self.f = None
+
+    def histnames( self, mustcontainall=[], mustcontainone=[],
+                   maynotcontainall=[], maynotcontainone=[] ):
+        ### return the names of histograms satisfying the given string criteria
+        # note: the selection is done on the index, the file is not accessed.
+        return lt.subselect_strings(self.names,
+            mustcontainone=mustcontainone, mustcontainall=mustcontainall,
+            maynotcontainone=maynotcontainone, maynotcontainall=maynotcontainall)[1]
+
+    def select( self, **kwargs ):
+        ### return the names of histograms with given values of name fields
+        # e.g. select(ftype='numerator', pt='10', eta='1p2')
+        # a field value can also be a list, in which case any of its elements matches.
+        res = []
+        for name in self.names:
+            fields = self.fields.get(name, {})
+            match = True
+            for key,val in kwargs.items():
+                fieldval = fields.get(key, None)
+                if isinstance(val, list) or isinstance(val, tuple):
+                    if fieldval not in [str(v) for v in val]: match = False
+                elif fieldval!=str(val): match = False
+                if not match: break
+            if match: res.append(name)
+        return res
+
+    def fieldvalues( self, field, names=None ):
+        ### return the sorted unique values of a name field
+        # (optionally restricted to a list of histogram names)
+        if names is None: names = self.names
+        vals = set([self.fields[name][field] for name in names
+                    if self.fields.get(name,{}).get(field,None) is not None])
+        return sorted(vals)
+
+    def get( self, name ):
+        ### return the object with a given name, loading it if needed
+        # returns None if the object does not exist or is of a non-allowed type.
+        if name in self.cache:
+            hist = self.cache.pop(name)
+            self.cache[name] = hist
+            return hist
+        if self.f is None:
+            raise Exception('ERROR in histtools.HistogramStore:'
+                            +' file {} was already closed.'.format(self.histfile))
+        hist = self.f.Get(name)
+        ishist = ( isinstance(hist,ROOT.TH1)
+                   or isinstance(hist,ROOT.TH2) )
+        isgraph = ( isinstance(hist,ROOT.TGraph) )
+        if( not ishist and not (self.allow_tgraphs and isgraph) ):
+            if not self.suppress_warnings:
+                print('WARNING in histtools.HistogramStore:'
+                      +' key "'+str(name)+'" is not a valid histogram.')
+            return None
+        hist.SetName(name)
+        if ishist:
+            hist.SetDirectory(0)
+            ROOT.SetOwnership(hist, True)
+        self._addtocache( name, hist )
+        return hist
+
+    def load( self, names ):
+        ### return a list of objects for a list of names
+        # (objects that cannot be loaded are skipped)
+        res = [self.get(name) for name in names]
+        return [hist for hist in res if hist is not None]
+
+    def loadhistograms( self, mustcontainall=[], mustcontainone=[],
+                        maynotcontainall=[], maynotcontainone=[] ):
+        ### same as the module-level loadhistograms, but using the index and cache
+        return self.load( self.histnames(mustcontainall=mustcontainall,
+                            mustcontainone=mustcontainone,
+                            maynotcontainall=maynotcontainall,
+                            maynotcontainone=maynotcontainone) )
+
+    def loadallhistograms( self ):
+        ### same as the module-level loadallhistograms, but using the cache
+        return self.load( self.names )
+
+    def _addtocache( self, name, hist ):
+        ### add an object to the cache and evict least recently used objects if needed
+        size = _objectsize(hist)
+        self.cache[name] = hist
+        self.cachesizes[name] = size
+        self.cachememory += size
+        while( self.cachememory>self.maxmemory and len(self.cache)>1 ):
+            (oldname,_) = self.cache.popitem(last=False)
+            self.cachememory -= self.cachesizes.pop(oldname)
+
+def _objectsize( obj ):
+    ### rough estimate of the memory used by a histogram or graph (in bytes)
+    if isinstance(obj, ROOT.TH1):
+        ncells = obj.GetNcells()
+        nwords = 2 if obj.GetSumw2N()>0 else 1
+        return 8*nwords*ncells + 1000
+    if isinstance(obj, ROOT.TGraph):
+        return 8*4*obj.GetN() + 1000
+    return 1000
+
+
 ### histogram subselection ###
 
 def selecthistograms(histlist,mustcontainone=[],mustcontainall=[],
@@ -150,10 +337,12 @@ def cliphistogram(hist,clipboundary=0):
     ### clip a histogram to minimum zero
     # also allow a clipboundary different from zero, useful for plotting 
     # (e.g. to ignore artificial small values such as the one at the end of this function)
-    for i in range(0,hist.GetNbinsX()+2):
-        if hist.GetBinContent(i)<clipboundary:
-            hist.SetBinContent(i,0)
-            hist.SetBinError(i,0)
+    values = histcontents(hist)
+    (values,mask) = cliparray(values,clipboundary=clipboundary)
+    if np.any(mask):
+        errors = histerrors(hist)
+        errors[mask] = 0
+        arraytohist(hist,values,errors=errors)
     # check if histogram is empty after clipping and if so, fill it with dummy value
     if hist.GetSumOfWeights()<1e-12: hist.SetBinContent(1,1e-6)
 
@@ -181,9 +370,11 @@ def clipallhistograms(histfile,mustcontainall=[],clipboundary=0):
 
 def absolute(hist):
     ### take absolute value of each bin
-    for i in range(0,hist.GetNbinsX()+2):
-        if hist.GetBinContent(i)<0:
-            hist.SetBinContent(i,-hist.GetBinContent(i))
+    view = histview(hist)
+    if view is not None:
+        np.absolute(view, out=view)
+        hist.ResetStats()
+    else: arraytohist(hist, absolutearray(histcontents(hist)))
 
 
 ### finding minimum and maximum ###
@@ -211,31 +402,124 @@ def getminmaxmargin(histlist, includebinerror=False, clip=False):
     return (minv,maxv)
 
 
+### numpy bridge ###
+# note: all arrays below include under- and overflow bins
+#       and are indexed in the same way as GetBinContent,
+#       i.e. shape (nbins+2,) for a TH1 and (nxbins+2, nybins+2) for a TH2.
+# note: batched versions of the histogram calculations below
+#       work on stacked arrays of shape (N, nbins+2), see histstoarray.
+
+def _histshape( hist ):
+    ### return the shape of the arrays corresponding to a histogram
+    shape = [hist.GetNbinsX()+2]
+    if hist.GetDimension()>1: shape.append(hist.GetNbinsY()+2)
+    if hist.GetDimension()>2: shape.append(hist.GetNbinsZ()+2)
+    return tuple(shape)
+
+def _histdtype( hist ):
+    ### return the numpy type of the storage array of a histogram
+    # returns None for histograms for which the storage array
+    # does not correspond to the bin contents (e.g. profiles)
+    if( hist.InheritsFrom('TProfile') or hist.InheritsFrom('TProfile2D')
+        or hist.InheritsFrom('TProfile3D') ): return None
+    dtypes = ([ ('TArrayD',np.float64), ('TArrayF',np.float32),
+                ('TArrayI',np.int32), ('TArrayS',np.int16), ('TArrayC',np.int8) ])
+    for (arraytype,dtype) in dtypes:
+        if hist.InheritsFrom(arraytype): return dtype
+    return None
+
+def _bufferview( buf, ncells, dtype, shape ):
+    ### make a numpy array sharing memory with a ROOT buffer
+    if buf is None: return None
+    # (the buffer size is unknown to python and must be set explicitly;
+    #  the method to do so differs between ROOT versions)
+    if hasattr(buf,'reshape'): buf.reshape((ncells,))
+    elif hasattr(buf,'SetSize'): buf.SetSize(ncells)
+    try: arr = np.frombuffer(buf, dtype=dtype, count=ncells)
+    except (TypeError, ValueError): return None
+    return arr.reshape(shape, order='F')
+
+def histview( hist ):
+    ### return a numpy array sharing memory with the bin contents of a histogram
+    # writing into the array directly modifies the histogram (see also arraytohist).
+    # returns None if no such view can be made (e.g. for profiles).
+    dtype = _histdtype(hist)
+    if dtype is None: return None
+    return _bufferview( hist.GetArray(), hist.GetNcells(), dtype, _histshape(hist) )
+
+def sumw2view( hist ):
+    ### return a numpy array sharing memory with the sum of squared weights of a histogram
+    # returns None if the histogram has no Sumw2 structure.
+    if( _histdtype(hist) is None or hist.GetSumw2N()==0 ): return None
+    return _bufferview( hist.GetSumw2().GetArray(), hist.GetNcells(),
+                        np.float64, _histshape(hist) )
+
+def histcontents( hist ):
+    ### return a (float) numpy array with a copy of the bin contents of a histogram
+    view = histview(hist)
+    if view is not None: return np.array(view, dtype=float)
+    res = np.array([hist.GetBinContent(i) for i in range(hist.GetNcells())])
+    return res.reshape(_histshape(hist), order='F')
+
+def histerrors( hist ):
+    ### return a numpy array with a copy of the bin errors of a histogram
+    view = sumw2view(hist)
+    if view is not None: return np.sqrt(view)
+    if histview(hist) is not None: return np.sqrt(np.absolute(histcontents(hist)))
+    res = np.array([hist.GetBinError(i) for i in range(hist.GetNcells())])
+    return res.reshape(_histshape(hist), order='F')
+
+def arraytohist( hist, values, errors=None ):
+    ### write arrays of bin contents and (optionally) bin errors into a histogram
+    # note: values and errors must have the shape corresponding to hist
+    #       (see the note at the top of this section).
+    shape = _histshape(hist)
+    values = np.asarray(values)
+    if values.shape!=shape:
+        msg = 'ERROR in histtools.arraytohist:'
+        msg += ' array of shape {} is not compatible'.format(values.shape)
+        msg += ' with histogram of shape {}.'.format(shape)
+        raise Exception(msg)
+    view = histview(hist)
+    if view is not None:
+        view[...] = values
+        if errors is not None:
+            if hist.GetSumw2N()==0: hist.Sumw2()
+            sumw2view(hist)[...] = np.power(errors,2)
+        hist.ResetStats()
+        return
+    values = np.ravel(values, order='F')
+    for i in range(len(values)): hist.SetBinContent(i, values[i])
+    if errors is not None:
+        errors = np.ravel(np.asarray(errors), order='F')
+        for i in range(len(errors)): hist.SetBinError(i, errors[i])
+
+def histstoarray( histlist ):
+    ### stack the bin contents of a list of N histograms into a single array
+    # the returned array has shape (N, nbins+2) for TH1 (or (N, nxbins+2, nybins+2) for TH2)
+    if len(histlist)==0: return np.zeros((0,))
+    shape = _histshape(histlist[0])
+    for hist in histlist:
+        if _histshape(hist)!=shape:
+            msg = 'ERROR in histtools.histstoarray:'
+            msg += ' provided histograms have different number of bins.'
+            raise Exception(msg)
+    res = np.zeros( (len(histlist),)+shape )
+    for i,hist in enumerate(histlist): res[i] = histcontents(hist)
+    return res
+
+
 ### histogram conversion ###
 
 def histtoarray( hist ):
     ### get numpy array with bin contents (bin errors are ignored)
-    nbins = hist.GetNbinsX()
-    res = np.zeros( nbins+2 )
-    for i in range(0, nbins+2):
-	res[i] = hist.GetBinContent(i)
-    return res
+    return histcontents(hist)
 
 def histtoarray2d( hist, keepouterflow=True ):
     ### same as above but for 2D histogram
-    nxbins = hist.GetNbinsX()
-    nybins = hist.GetNbinsY()
-    if keepouterflow:
-	res = np.zeros( (nxbins+2, nybins+2) )
-	for i in range(0, nxbins+2):
-	    for j in range(0, nybins+2):
-		res[i,j] = hist.GetBinContent(i,j)
-    else:
-	res = np.zeros( (nxbins, nybins) )
-        for i in range(1, nxbins+1):
-            for j in range(1, nybins+1):
-                res[i-1,j-1] = hist.GetBinContent(i,j)
-    return res
+    res = histcontents(hist)
+    if keepouterflow: return res
+    return np.array(res[1:-1,1:-1])
 
 def tgraphtohist( graph ):
 
@@ -269,13 +553,8 @@ def binperbinmaxvar( histlist, nominalhist ):
     ### wrt nominalhist.
     maxhist = nominalhist.Clone()
     maxhist.Reset()
-    nbins = maxhist.GetNbinsX()
-    for i in range(0,nbins+2):
-	nomval = nominalhist.GetBinContent(i)
-	varvals = np.zeros(len(histlist))
-	for j in range(len(histlist)):
-	    varvals[j] = abs(histlist[j].GetBinContent(i)-nomval)
-	maxhist.SetBinContent(i,np.amax(varvals))
+    maxvar = binperbinmaxvararray( histstoarray(histlist), histcontents(nominalhist) )
+    arraytohist(maxhist, maxvar)
     return maxhist
 
 def envelope( histlist, returntype='tuple' ):
@@ -288,33 +567,23 @@ def envelope( histlist, returntype='tuple' ):
 	msg = 'ERROR in histtools.envelope: at least two histograms required.'
         raise Exception(msg)
     nbins = histlist[0].GetNbinsX()
-    minhist = histlist[0].Clone()
-    maxhist = histlist[0].Clone()
     for hist in histlist:
         if( hist.GetNbinsX()!=nbins ):
 	    msg = 'ERROR in histtools.envelope: '
 	    msg += ' provided histograms have different number of bins.'
             raise Exception(msg)
-        for i in range(0,nbins+2):
-	    bincontent = hist.GetBinContent(i)
-	    if bincontent < minhist.GetBinContent(i):
-              minhist.SetBinContent(i, bincontent)
-            if bincontent > maxhist.GetBinContent(i):
-              maxhist.SetBinContent(i, bincontent)
-    for i in range(0,nbins+2):
-        minhist.SetBinError(i,0)
-        maxhist.SetBinError(i,0)
-    if returntype=='tuple': return (minhist,maxhist)
+    (minvals,maxvals) = envelopearray( histstoarray(histlist) )
+    zeros = np.zeros(minvals.shape)
+    if returntype=='tuple':
+        minhist = histlist[0].Clone()
+        maxhist = histlist[0].Clone()
+        arraytohist(minhist, minvals, errors=zeros)
+        arraytohist(maxhist, maxvals, errors=zeros)
+        return (minhist,maxhist)
     elif returntype=='hist':
-	res = minhist.Clone()
+	res = histlist[0].Clone()
 	res.Reset()
-	for i in range(0,nbins+2):
-	    minc = minhist.GetBinContent(i)
-	    maxc = maxhist.GetBinContent(i)
-	    binc = (maxc+minc)/float(2)
-	    err = (maxc-minc)/float(2)
-	    res.SetBinContent(i, binc)
-	    res.SetBinError(i, err)
+	arraytohist(res, (maxvals+minvals)/2., errors=(maxvals-minvals)/2.)
 	return res
     else:
 	msg = 'ERROR in histtools.envelope:'
@@ -330,20 +599,44 @@ def rootsumsquare( histlist ):
     res = histlist[0].Clone()
     res.Reset()
     nbins = res.GetNbinsX()
-    bincontents = np.zeros(nbins+2)
     for hist in histlist:
 	if( hist.GetNbinsX()!=nbins ):
 	    print('### ERROR ###: histograms are not compatible for summing in quadrature')
 	    return None
-	thisbincontents = np.zeros(nbins+2)
-	for i in range(0,nbins+2): thisbincontents[i] = hist.GetBinContent(i)
-	bincontents += np.power(thisbincontents,2)
-    bincontents = np.sqrt(bincontents)
-    for i in range(0,nbins+2):
-	res.SetBinContent(i,bincontents[i])
+    arraytohist(res, rootsumsquarearray( histstoarray(histlist) ))
     return res
 
 
+### batched histogram calculations ###
+# note: these functions work on stacked arrays of bin contents
+#       (see histstoarray) and return arrays;
+#       use arraytohist to write the results back into a histogram.
+
+def binperbinmaxvararray( values, nominal ):
+    ### bin-per-bin maximum absolute variation of an array of shape (N, nbins+2)
+    ### wrt a nominal array of shape (nbins+2,)
+    return np.amax(np.absolute(values-nominal), axis=0)
+
+def envelopearray( values ):
+    ### bin-per-bin minimum and maximum of an array of shape (N, nbins+2)
+    return (np.amin(values, axis=0), np.amax(values, axis=0))
+
+def rootsumsquarearray( values ):
+    ### bin-per-bin root-sum-square of an array of shape (N, nbins+2)
+    return np.sqrt(np.sum(np.power(values,2), axis=0))
+
+def cliparray( values, clipboundary=0 ):
+    ### set all values below clipboundary to zero
+    # returns a tuple of the clipped array and the mask of clipped values
+    mask = (values<clipboundary)
+    res = np.where(mask, 0., values)
+    return (res,mask)
+
+def absolutearray( values ):
+    ### absolute value of each element
+    return np.absolute(values)
+
+
 ### printing ###
 
 def printhistogram(hist,naninfo=False,returnstr=False):
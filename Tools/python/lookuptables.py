@@ -0,0 +1,129 @@
+###################################################################
+# numpy version of two-dimensional lookup tables (see LookupTable2D) #
+###################################################################
+
+# general use:
+# fake-rate and charge-flip maps are stored as TH2 histograms in ROOT files.
+# for use in python (e.g. closure tests and plotting scripts),
+# the maps can be exported once to a .npz file (see exportmaps),
+# after which they can be loaded and evaluated with numpy only (see loadmaps),
+# without opening the ROOT file or looping over bins.
+# the lookup follows the same conventions as the C++ LookupTable2D class:
+# values outside the axis ranges are clamped to the first or last bin
+# (so there are no under- or overflow bins),
+# and contents and errors are stored as arrays of shape (nxbins, nybins).
+
+import os
+import sys
+import numpy as np
+
+
+class LookupTable2D(object):
+    ### immutable two-dimensional lookup table
+
+    def __init__( self, xedges, yedges, contents, errors=None ):
+        self.xedges = np.array(xedges, dtype=float)
+        self.yedges = np.array(yedges, dtype=float)
+        self.contents = np.array(contents, dtype=float)
+        shape = (len(self.xedges)-1, len(self.yedges)-1)
+        if self.contents.shape!=shape:
+            msg = 'ERROR in LookupTable2D: contents of shape {}'.format(self.contents.shape)
+            msg += ' are not compatible with edges (shape {})'.format(shape)
+            raise Exception(msg)
+        if errors is None: self.errors = np.zeros(shape)
+        else: self.errors = np.array(errors, dtype=float)
+        for arr in [self.xedges, self.yedges, self.contents, self.errors]:
+            arr.setflags(write=False)
+
+    @classmethod
+    def fromhist( cls, hist ):
+        ### make a lookup table from a TH2
+        import histtools as ht
+        xedges = [hist.GetXaxis().GetBinLowEdge(i) for i in range(1,hist.GetNbinsX()+2)]
+        yedges = [hist.GetYaxis().GetBinLowEdge(i) for i in range(1,hist.GetNbinsY()+2)]
+        # (remove the under- and overflow bins)
+        contents = ht.histcontents(hist)[1:-1,1:-1]
+        errors = ht.histerrors(hist)[1:-1,1:-1]
+        return cls(xedges, yedges, contents, errors=errors)
+
+    @staticmethod
+    def _binindices( edges, values ):
+        ### get the (clamped) bin indices for an array of values
+        values = np.asarray(values, dtype=float)
+        indices = np.searchsorted(edges[1:-1], values, side='right')
+        # (NaN values are put in the first bin, as in the C++ version)
+        return np.where(np.isnan(values), 0, indices)
+
+    def binindices( self, xvalues, yvalues ):
+        ### get a tuple of arrays with the x and y bin indices for arrays of values
+        return (self._binindices(self.xedges, xvalues), self._binindices(self.yedges, yvalues))
+
+    def contentsat( self, xvalues, yvalues ):
+        ### get the bin contents for arrays (or scalars) of x and y values
+        return self.contents[self.binindices(xvalues, yvalues)]
+
+    def errorsat( self, xvalues, yvalues ):
+        ### get the bin errors for arrays (or scalars) of x and y values
+        return self.errors[self.binindices(xvalues, yvalues)]
+
+    def tohist( self, name='' ):
+        ### convert back to a TH2D (e.g. for plotting with hist2dplotter)
+        import ROOT
+        from array import array
+        hist = ROOT.TH2D(name, name, len(self.xedges)-1, array('d',self.xedges),
+                         len(self.yedges)-1, array('d',self.yedges))
+        hist.SetDirectory(0)
+        for i in range(len(self.xedges)-1):
+            for j in range(len(self.yedges)-1):
+                hist.SetBinContent(i+1, j+1, self.contents[i,j])
+                hist.SetBinError(i+1, j+1, self.errors[i,j])
+        return hist
+
+
+def savemaps( npzfile, tables ):
+    ### save a dict of lookup tables to a .npz file
+    arrays = {}
+    for name,table in tables.items():
+        for key in ['xedges','yedges','contents','errors']:
+            arrays['{}/{}'.format(name,key)] = getattr(table,key)
+    np.savez(npzfile, **arrays)
+
+def loadmaps( npzfile ):
+    ### load a dict of lookup tables from a .npz file written by savemaps
+    data = np.load(npzfile)
+    names = sorted(set([key.rsplit('/',1)[0] for key in data.files]))
+    tables = {}
+    for name in names:
+        tables[name] = LookupTable2D(data[name+'/xedges'], data[name+'/yedges'],
+                                     data[name+'/contents'], errors=data[name+'/errors'])
+    data.close()
+    return tables
+
+def exportmaps( rootfile, npzfile=None ):
+    ### export all TH2 histograms in a ROOT file to a .npz file
+    # input arguments:
+    # - rootfile: name of the ROOT file (e.g. a fake-rate or charge-flip map file)
+    # - npzfile: name of the output file (default: rootfile with extension .npz)
+    # returns:
+    # the name of the output file
+    import ROOT
+    if npzfile is None: npzfile = os.path.splitext(rootfile)[0]+'.npz'
+    f = ROOT.TFile.Open(rootfile)
+    tables = {}
+    for key in f.GetListOfKeys():
+        obj = key.ReadObj()
+        if not isinstance(obj, ROOT.TH2): continue
+        tables[key.GetName()] = LookupTable2D.fromhist(obj)
+    f.Close()
+    savemaps(npzfile, tables)
+    return npzfile
+
+
+if __name__=='__main__':
+    # export the maps in one or more ROOT files
+    # (the output files are put next to the input files, with extension .npz)
+    if len(sys.argv)<2:
+        print('ERROR: need at least one ROOT file as command line argument.')
+        sys.exit()
+    for rootfile in sys.argv[1:]:
+        print('exported {} to {}'.format(rootfile, exportmaps(rootfile)))
@@ -15,6 +15,7 @@ class Sample(object):
 	self.version = None
 	self.path = None
 	self.xsec = 0.
+	self.metadata = None
 
     def read_from_line( self, line, sampledir=None, **kwargs ):
 	### read sample properties from a sample list line.
@@ -58,8 +59,28 @@ class Sample(object):
 	res += ', process: {}'.format(self.process)
 	res += ', version: {}'.format(self.version)
 	res += ', xsec: {}'.format(self.xsec)
-	res += ', path: {} )'.format(self.path)
+	res += ', path: {}'.format(self.path)
+	if self.metadata is not None:
+	    res += ', entries: {}'.format(self.metadata['entries'])
+	    res += ', sumweights: {}'.format(self.metadata['sumweights'])
+	res += ' )'
 	return res
+
+    def filename( self ):
+	### return the file name as used in the C++ Sample class (and in the sample catalog)
+	if self.version is None: return self.name
+	return self.name+'/'+self.version
+
+    def set_metadata( self, catalog ):
+	### set the metadata attribute from a sample catalog (see readsamplecatalog)
+	# note: metadata is only set if the catalog entry is consistent
+	#       with the size and modification time of the file
+	entry = catalog.get(self.filename(), None)
+	if entry is None or self.path is None: return
+	if not os.path.exists(self.path): return
+	stat = os.stat(self.path)
+	if( stat.st_size!=entry['filesize'] or int(stat.st_mtime)!=entry['mtime'] ): return
+	self.metadata = entry
 	
 
 class SampleCollection(object):
@@ -126,7 +147,42 @@ class SampleCollection(object):
 	return '\n'.join(['{}'.format(s) for s in self.samples])
 
 
-def readsamplelist( samplelistpaths, sampledir=None ):
+def readsamplecatalog( catalogfile ):
+    ### read a sample catalog (see Tools/interface/SampleCatalog.h)
+    # returns a dict matching file names to dicts with the following keys:
+    # filesize, mtime, isdata, year, entries, sumweights, hcounterentries, 
+    # lhesumweights, pssumweights
+    with open(catalogfile) as f:
+        values = f.read().split()
+    if( len(values)<2 or values[0]!='samplecatalog' ):
+        raise Exception('ERROR in readsamplecatalog:'
+                +' file {} is not a sample catalog.'.format(catalogfile))
+    catalog = {}
+    pos = 2
+    for i in range(int(values[1])):
+        entry = {}
+        filename = values[pos]
+        entry['filesize'] = int(values[pos+1])
+        entry['mtime'] = int(values[pos+2])
+        entry['isdata'] = (values[pos+3]=='1')
+        entry['year'] = values[pos+4]
+        entry['entries'] = int(values[pos+5])
+        entry['sumweights'] = float(values[pos+6])
+        entry['hcounterentries'] = float(values[pos+7])
+        pos += 8
+        for key in ['lhesumweights','pssumweights']:
+            n = int(values[pos])
+            entry[key] = [float(v) for v in values[pos+1:pos+1+n]]
+            pos += n+1
+        catalog[filename] = entry
+    return catalog
+
+def defaultcatalogfile( sampledir ):
+    ### return the default location of the sample catalog for a sample directory
+    # (see SampleCatalog::defaultFileName)
+    return os.path.join(sampledir, 'sampleCatalog.txt')
+
+def readsamplelist( samplelistpaths, sampledir=None, catalog=None ):
     ### returns a SampleCollection from a list of sample list files
     # input arguments:
     # - samplelistpaths: either string or list of strings 
@@ -140,6 +196,9 @@ def readsamplelist( samplelistpaths, sampledir=None ):
     #       and should not contain spaces,
     #	    the version_name is optional (defaults to empty string),
     #       and the cross_section is optional (defaults to 0)
+    # - catalog: path to a sample catalog (see readsamplecatalog),
+    #            from which the metadata attribute of each sample is set.
+    #            if not specified, the catalog in sampledir is used if it exists.
     
     collection = SampleCollection()
     if isinstance(samplelistpaths, str): samplelistpaths = [samplelistpaths]
@@ -163,6 +222,13 @@ def readsamplelist( samplelistpaths, sampledir=None ):
 	    for s in missing_samples: msg += '{}\n'.format(s)
 	    raise Exception(msg)
 
+    if( catalog is None and sampledir is not None ):
+        catalog = defaultcatalogfile(sampledir)
+        if not os.path.exists(catalog): catalog = None
+    if catalog is not None:
+        catalogdict = readsamplecatalog(catalog)
+        for sample in collection.get_samples(): sample.set_metadata(catalogdict)
+
     return collection
 
 
@@ -171,7 +237,8 @@ if __name__=='__main__':
     parser = argparse.ArgumentParser(description='Read sample list')
     parser.add_argument('--samplelist', required=True, type=os.path.abspath)
     parser.add_argument('--sampledir', type=apt.path_or_none)
+    parser.add_argument('--catalog', type=apt.path_or_none)
     args = parser.parse_args()
 
-    samples = readsamplelist( args.samplelist, sampledir=args.sampledir )
+    samples = readsamplelist( args.samplelist, sampledir=args.sampledir, catalog=args.catalog )
     print(samples)
@@ -0,0 +1,65 @@
+#include "../interface/BatchedPredictor.h"
+
+//include c++ library classes
+#include <stdexcept>
+#include <string>
+#include <iostream>
+
+
+BatchedPredictor::BatchedPredictor( const BatchFunction& batchFunction, const size_type numberOfInputs, const size_type batchSize ) :
+    _batchFunction( batchFunction ), _numberOfInputs( numberOfInputs ), _batchSize( batchSize )
+{
+    if( _batchSize == 0 ){
+        throw std::invalid_argument( "Batch size of BatchedPredictor must be larger than 0." );
+    }
+    _inputBuffer.reserve( _batchSize*_numberOfInputs );
+    _callbacks.reserve( _batchSize );
+}
+
+
+BatchedPredictor::BatchedPredictor( const DenseModel& model, const size_type batchSize ) :
+    BatchedPredictor( [&model]( const std::vector< double >& inputs, const size_type nRows ){ return model.predictBatch( inputs, nRows ); },
+        model.numberOfInputs(), batchSize )
+{}
+
+
+BatchedPredictor::~BatchedPredictor(){
+    try{
+        flush();
+    } catch( std::exception& e ){
+        std::cerr << "Error in BatchedPredictor: evaluation of the last batch failed with error: " << e.what() << std::endl;
+    }
+}
+
+
+void BatchedPredictor::add( const std::vector< double >& inputs, const Callback& callback ){
+    if( inputs.size() != _numberOfInputs ){
+        throw std::invalid_argument( "Number of inputs should be " + std::to_string( _numberOfInputs ) + " while " + std::to_string( inputs.size() ) + " inputs are given." );
+    }
+    _inputBuffer.insert( _inputBuffer.end(), inputs.cbegin(), inputs.cend() );
+    _callbacks.push_back( callback );
+    if( _callbacks.size() >= _batchSize ){
+        flush();
+    }
+}
+
+
+void BatchedPredictor::flush(){
+    if( _callbacks.empty() ) return;
+    const size_type nRows = _callbacks.size();
+
+    //clear the buffers before calling the callbacks, so that they can safely add new events
+    std::vector< double > outputs = _batchFunction( _inputBuffer, nRows );
+    std::vector< Callback > callbacks;
+    callbacks.swap( _callbacks );
+    _callbacks.reserve( _batchSize );
+    _inputBuffer.clear();
+
+    if( outputs.size() < nRows || outputs.size() % nRows != 0 ){
+        throw std::runtime_error( "Batch evaluation of " + std::to_string( nRows ) + " events returned " + std::to_string( outputs.size() ) + " outputs." );
+    }
+    const size_type numberOfOutputs = outputs.size() / nRows;
+    for( size_type row = 0; row < nRows; ++row ){
+        callbacks[ row ]( outputs[ row*numberOfOutputs ] );
+    }
+}
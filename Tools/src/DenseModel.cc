@@ -0,0 +1,198 @@
+#include "../interface/DenseModel.h"
+
+//include c++ library classes
+#include <fstream>
+#include <stdexcept>
+#include <algorithm>
+#include <cmath>
+
+
+DenseModel::DenseModel( const std::string& fileName ){
+    std::ifstream inputStream( fileName );
+    if( !inputStream ){
+        throw std::invalid_argument( "Model file " + fileName + " can not be opened." );
+    }
+    readModel( inputStream );
+}
+
+
+DenseModel::DenseModel( std::istream& inputStream ){
+    readModel( inputStream );
+}
+
+
+DenseModel::Activation DenseModel::activationFromString( const std::string& name ){
+    if( name == "linear" ) return Activation::linear;
+    if( name == "relu" ) return Activation::relu;
+    if( name == "elu" ) return Activation::elu;
+    if( name == "selu" ) return Activation::selu;
+    if( name == "sigmoid" ) return Activation::sigmoid;
+    if( name == "tanh" ) return Activation::tanh;
+    if( name == "softmax" ) return Activation::softmax;
+    throw std::invalid_argument( "Activation " + name + " is not supported by DenseModel." );
+}
+
+
+void DenseModel::readModel( std::istream& inputStream ){
+    std::string header;
+    size_type numberOfLayers = 0;
+    if( !( inputStream >> header >> numberOfLayers ) || header != "densemodel" ){
+        throw std::invalid_argument( "Model file does not start with the expected header 'densemodel <number of layers>'." );
+    }
+    if( numberOfLayers == 0 ){
+        throw std::invalid_argument( "Model has no layers." );
+    }
+
+    auto readValues = [&inputStream]( std::vector< double >& values, const size_type size ){
+        values.resize( size );
+        for( auto& value : values ){
+            if( !( inputStream >> value ) ){
+                throw std::invalid_argument( "Model file ends before all parameters are read." );
+            }
+        }
+    };
+
+    for( size_type l = 0; l < numberOfLayers; ++l ){
+        Layer layer;
+        std::string typeName;
+        inputStream >> typeName;
+        if( typeName == "dense" ){
+            std::string activationName;
+            layer.type = LayerType::dense;
+            inputStream >> layer.numberOfInputs >> layer.numberOfOutputs >> activationName;
+            layer.activation = activationFromString( activationName );
+            readValues( layer.weights, layer.numberOfInputs*layer.numberOfOutputs );
+            readValues( layer.biases, layer.numberOfOutputs );
+        } else if( typeName == "batchnorm" || typeName == "prelu" ){
+            layer.type = ( typeName == "batchnorm" ) ? LayerType::batchnorm : LayerType::prelu;
+            inputStream >> layer.numberOfInputs;
+            layer.numberOfOutputs = layer.numberOfInputs;
+            readValues( layer.weights, layer.numberOfInputs );
+            if( layer.type == LayerType::batchnorm ){
+                readValues( layer.biases, layer.numberOfInputs );
+            }
+        } else if( typeName == "activation" ){
+            std::string activationName;
+            layer.type = LayerType::activation;
+            inputStream >> layer.numberOfInputs >> activationName;
+            layer.numberOfOutputs = layer.numberOfInputs;
+            layer.activation = activationFromString( activationName );
+        } else {
+            throw std::invalid_argument( "Layer type '" + typeName + "' is not supported by DenseModel." );
+        }
+        if( !inputStream || layer.numberOfInputs == 0 ){
+            throw std::invalid_argument( "Layer " + std::to_string( l ) + " of model could not be read." );
+        }
+        if( !_layers.empty() && layer.numberOfInputs != _layers.back().numberOfOutputs ){
+            throw std::invalid_argument( "Layer " + std::to_string( l ) + " has " + std::to_string( layer.numberOfInputs ) + " inputs while the previous layer has " + std::to_string( _layers.back().numberOfOutputs ) + " outputs." );
+        }
+        _maxLayerSize = std::max( { _maxLayerSize, layer.numberOfInputs, layer.numberOfOutputs } );
+        _layers.push_back( std::move( layer ) );
+    }
+    _numberOfInputs = _layers.front().numberOfInputs;
+    _numberOfOutputs = _layers.back().numberOfOutputs;
+}
+
+
+void DenseModel::applyActivation( const Activation activation, double* values, const size_type size ){
+    switch( activation ){
+        case Activation::linear :
+            break;
+        case Activation::relu :
+            for( size_type i = 0; i < size; ++i ) values[ i ] = std::max( values[ i ], 0. );
+            break;
+        case Activation::elu :
+            for( size_type i = 0; i < size; ++i ) values[ i ] = ( values[ i ] > 0 ) ? values[ i ] : std::expm1( values[ i ] );
+            break;
+        case Activation::selu : {
+            static constexpr double alpha = 1.6732632423543772848170429916717;
+            static constexpr double scale = 1.0507009873554804934193349852946;
+            for( size_type i = 0; i < size; ++i ) values[ i ] = scale*( ( values[ i ] > 0 ) ? values[ i ] : alpha*std::expm1( values[ i ] ) );
+            break;
+        }
+        case Activation::sigmoid :
+            for( size_type i = 0; i < size; ++i ) values[ i ] = 1. / ( 1. + std::exp( -values[ i ] ) );
+            break;
+        case Activation::tanh :
+            for( size_type i = 0; i < size; ++i ) values[ i ] = std::tanh( values[ i ] );
+            break;
+        case Activation::softmax : {
+            double maxValue = *std::max_element( values, values + size );
+            double sum = 0.;
+            for( size_type i = 0; i < size; ++i ){
+                values[ i ] = std::exp( values[ i ] - maxValue );
+                sum += values[ i ];
+            }
+            for( size_type i = 0; i < size; ++i ) values[ i ] /= sum;
+            break;
+        }
+    }
+}
+
+
+void DenseModel::evaluateLayer( const Layer& layer, const double* input, double* output ){
+    switch( layer.type ){
+        case LayerType::dense : {
+
+            //loop over the inputs in the outer loop, so the weights are accessed contiguously
+            std::copy( layer.biases.cbegin(), layer.biases.cend(), output );
+            const double* weights = layer.weights.data();
+            for( size_type i = 0; i < layer.numberOfInputs; ++i ){
+                const double value = input[ i ];
+                for( size_type j = 0; j < layer.numberOfOutputs; ++j ){
+                    output[ j ] += value*weights[ j ];
+                }
+                weights += layer.numberOfOutputs;
+            }
+            break;
+        }
+        case LayerType::batchnorm :
+            for( size_type i = 0; i < layer.numberOfInputs; ++i ) output[ i ] = input[ i ]*layer.weights[ i ] + layer.biases[ i ];
+            break;
+        case LayerType::prelu :
+            for( size_type i = 0; i < layer.numberOfInputs; ++i ) output[ i ] = ( input[ i ] > 0 ) ? input[ i ] : layer.weights[ i ]*input[ i ];
+            break;
+        case LayerType::activation :
+            std::copy( input, input + layer.numberOfInputs, output );
+            break;
+    }
+    applyActivation( layer.activation, output, layer.numberOfOutputs );
+}
+
+
+void DenseModel::predictBatch( const double* inputs, const size_type nRows, double* outputs ) const{
+
+    //two buffers that are alternately used as input and output of the layers
+    std::vector< double > bufferA( _maxLayerSize );
+    std::vector< double > bufferB( _maxLayerSize );
+    for( size_type row = 0; row < nRows; ++row ){
+        const double* input = inputs + row*_numberOfInputs;
+        double* output = bufferA.data();
+        for( const auto& layer : _layers ){
+            evaluateLayer( layer, input, output );
+            input = output;
+            output = ( output == bufferA.data() ) ? bufferB.data() : bufferA.data();
+        }
+        std::copy( input, input + _numberOfOutputs, outputs + row*_numberOfOutputs );
+    }
+}
+
+
+std::vector< double > DenseModel::predictBatch( const std::vector< double >& inputs, const size_type nRows ) const{
+    if( inputs.size() != nRows*_numberOfInputs ){
+        throw std::invalid_argument( "Number of inputs should be " + std::to_string( nRows*_numberOfInputs ) + " for " + std::to_string( nRows ) + " rows, while " + std::to_string( inputs.size() ) + " inputs are given." );
+    }
+    std::vector< double > outputs( nRows*_numberOfOutputs );
+    predictBatch( inputs.data(), nRows, outputs.data() );
+    return outputs;
+}
+
+
+std::vector< double > DenseModel::predictAll( const std::vector< double >& inputs ) const{
+    return predictBatch( inputs, 1 );
+}
+
+
+double DenseModel::predict( const std::vector< double >& inputs ) const{
+    return predictAll( inputs ).front();
+}
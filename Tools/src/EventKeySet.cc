@@ -0,0 +1,118 @@
+#include "../interface/EventKeySet.h"
+
+//include C++ library classes
+#include <stdexcept>
+#include <string>
+
+
+constexpr double EventKeySet::_maxLoadFactor;
+
+
+EventKeySet::EventKeySet( const size_type expectedSize ) :
+    _table( tableSizeFor( expectedSize ) )
+    {}
+
+
+EventKeySet::Key EventKeySet::makeKey( const std::uint64_t runNumber, const std::uint64_t luminosityBlock, const std::uint64_t eventNumber ){
+    if( runNumber > 0xFFFFFFFF || luminosityBlock > 0xFFFFFFFF ){
+        throw std::out_of_range( "run number " + std::to_string( runNumber ) + " or luminosity block " + std::to_string( luminosityBlock ) + " does not fit in 32 bits." );
+    }
+    Key key;
+    key.high = ( runNumber << 32 ) | luminosityBlock;
+    key.low = eventNumber;
+    return key;
+}
+
+
+EventKeySet::size_type EventKeySet::tableSizeFor( const size_type numberOfKeys ){
+
+    //smallest power of 2 that keeps the load factor below its maximum
+    size_type tableSize = 16;
+    while( tableSize*_maxLoadFactor < numberOfKeys ){
+        tableSize *= 2;
+    }
+    return tableSize;
+}
+
+
+EventKeySet::size_type EventKeySet::memoryForSize( const size_type numberOfKeys ){
+    return tableSizeFor( numberOfKeys )*sizeof( Key );
+}
+
+
+std::uint64_t EventKeySet::hash( const Key& key ){
+
+    //mix both words (splitmix64 finalizer)
+    std::uint64_t h = key.high*0x9E3779B97F4A7C15ULL ^ key.low;
+    h ^= h >> 30;
+    h *= 0xBF58476D1CE4E5B9ULL;
+    h ^= h >> 27;
+    h *= 0x94D049BB133111EBULL;
+    h ^= h >> 31;
+    return h;
+}
+
+
+EventKeySet::size_type EventKeySet::findSlot( const Key& key ) const{
+
+    //linear probing until the key or an empty slot is found
+    //note: the table size is a power of 2 and never completely filled
+    size_type mask = _table.size() - 1;
+    size_type slot = hash( key ) & mask;
+    while( true ){
+        const Key& current = _table[ slot ];
+        if( ( current.high == key.high && current.low == key.low ) || ( current.high == 0 && current.low == 0 ) ){
+            return slot;
+        }
+        slot = ( slot + 1 ) & mask;
+    }
+}
+
+
+void EventKeySet::rehash( const size_type newTableSize ){
+    std::vector< Key > oldTable( newTableSize );
+    oldTable.swap( _table );
+    for( const Key& key : oldTable ){
+        if( key.high == 0 && key.low == 0 ) continue;
+        _table[ findSlot( key ) ] = key;
+    }
+}
+
+
+bool EventKeySet::insert( const std::uint64_t runNumber, const std::uint64_t luminosityBlock, const std::uint64_t eventNumber ){
+    Key key = makeKey( runNumber, luminosityBlock, eventNumber );
+    if( key.high == 0 && key.low == 0 ){
+        if( _containsZeroKey ) return false;
+        _containsZeroKey = true;
+        ++_size;
+        return true;
+    }
+    size_type slot = findSlot( key );
+    if( _table[ slot ].high != 0 || _table[ slot ].low != 0 ){
+        return false;
+    }
+    if( ( _size + 1 ) > _table.size()*_maxLoadFactor ){
+        rehash( 2*_table.size() );
+        slot = findSlot( key );
+    }
+    _table[ slot ] = key;
+    ++_size;
+    return true;
+}
+
+
+bool EventKeySet::contains( const std::uint64_t runNumber, const std::uint64_t luminosityBlock, const std::uint64_t eventNumber ) const{
+    Key key = makeKey( runNumber, luminosityBlock, eventNumber );
+    if( key.high == 0 && key.low == 0 ){
+        return _containsZeroKey;
+    }
+    const Key& found = _table[ findSlot( key ) ];
+    return ( found.high != 0 || found.low != 0 );
+}
+
+
+void EventKeySet::clear( const size_type expectedSize ){
+    std::vector< Key >( tableSizeFor( expectedSize ) ).swap( _table );
+    _size = 0;
+    _containsZeroKey = false;
+}
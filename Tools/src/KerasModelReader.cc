@@ -2,6 +2,7 @@
 
 //include c++ library functions
 #include <iostream>
+#include <cstring>
 
 
 //convert std::vector to python list 
@@ -14,6 +15,12 @@ template <class T> inline boost::python::list vectorToPyList(const std::vector<T
 }
 
 
+//copy a contiguous array of doubles into a python bytearray (in a single copy)
+inline python::object vectorToPyByteArray( const std::vector<double>& vector ){
+    return python::object( python::handle<>( PyByteArray_FromStringAndSize( reinterpret_cast< const char* >( vector.data() ), vector.size()*sizeof( double ) ) ) );
+}
+
+
 KerasModelReader::KerasModelReader( const std::string& modelName, size_t numInputs, const bool shortCutConnection, size_t numParameters ):
     numberOfInputs( numInputs ),
     hasShortCutConnection( shortCutConnection ),
@@ -37,13 +44,12 @@ void KerasModelReader::initializePythonAPI() const{
 
 void KerasModelReader::loadPythonModule( const std::string& modelName ){
     try{
-        if( hasShortCutConnection ){
-            pythonModule = python::import("kerasPredict_shortcut");
-        } else {
-            pythonModule = python::import("kerasPredict");
-        }
+        //the same module handles models with and without shortcut connection
+        //(the parameters are passed as an extra argument for the former)
+        pythonModule = python::import("kerasPredict");
         kerasModel =  pythonModule.attr("kerasModel")(modelName);
         predictRoutine = kerasModel.attr("predict");
+        predictBatchRoutine = kerasModel.attr("predictBatch");
     } catch(...){
         PyErr_Print();
     }
@@ -65,3 +71,30 @@ double KerasModelReader::predict( const std::vector<double>& inputs, const std::
     }
     return python::extract<double>( pythonOutput );
 }
+
+
+std::vector< double > KerasModelReader::predictBatch( const std::vector<double>& inputs, const size_t nRows, const std::vector< double >& parameters ) const{
+    if( inputs.size() != nRows*numberOfInputs ){
+        throw std::invalid_argument( "Number of inputs should be " + std::to_string( nRows*numberOfInputs ) + " for " + std::to_string( nRows ) + " events while " + std::to_string( inputs.size() ) + " inputs are given." );
+    }
+    if( nRows == 0 ) return std::vector< double >();
+    python::object pythonOutput;
+    python::object inputArray = vectorToPyByteArray( inputs );
+    if( hasShortCutConnection ){
+        if( parameters.size() != nRows*numberOfParameters ){
+            throw std::invalid_argument( "Number of parameters should be " + std::to_string( nRows*numberOfParameters ) + " for " + std::to_string( nRows ) + " events while " + std::to_string( parameters.size() ) + " parameters are given." );
+        }
+        pythonOutput = predictBatchRoutine( inputArray, nRows, vectorToPyByteArray( parameters ) );
+    } else {
+        pythonOutput = predictBatchRoutine( inputArray, nRows );
+    }
+
+    //the scores are returned as a bytearray holding one double per event
+    PyObject* outputPtr = pythonOutput.ptr();
+    if( !PyByteArray_Check( outputPtr ) || static_cast< size_t >( PyByteArray_Size( outputPtr ) ) != nRows*sizeof( double ) ){
+        throw std::runtime_error( "Batch prediction did not return one score per event." );
+    }
+    std::vector< double > outputs( nRows );
+    std::memcpy( outputs.data(), PyByteArray_AsString( outputPtr ), nRows*sizeof( double ) );
+    return outputs;
+}
@@ -0,0 +1,117 @@
+#include "../interface/LookupTable2D.h"
+
+//include C++ library classes
+#include <algorithm>
+#include <cmath>
+#include <stdexcept>
+#include <string>
+
+
+LookupTable2D::Axis::Axis( const std::vector< double >& edges ) :
+    _edges( edges )
+{
+    if( _edges.size() < 2 ){
+        throw std::invalid_argument( "axis of lookup table needs at least 2 edges, while " + std::to_string( _edges.size() ) + " are given." );
+    }
+    for( size_type i = 1; i < _edges.size(); ++i ){
+        if( !( _edges[ i ] > _edges[ i - 1 ] ) ){
+            throw std::invalid_argument( "edges of lookup table axis must be strictly increasing." );
+        }
+    }
+
+    //check if all bins have the same width (up to rounding), in which case the bin can be computed directly
+    double binWidth = ( _edges.back() - _edges.front() ) / numberOfBins();
+    _isUniform = true;
+    for( size_type i = 1; i < _edges.size(); ++i ){
+        if( std::abs( ( _edges[ i ] - _edges[ i - 1 ] ) - binWidth ) > 1e-9*binWidth ){
+            _isUniform = false;
+            break;
+        }
+    }
+    _inverseBinWidth = 1. / binWidth;
+}
+
+
+LookupTable2D::size_type LookupTable2D::Axis::binIndex( const double value ) const{
+
+    //clamp values outside the axis range (and NaN) to the first or last bin
+    if( !( value > _edges.front() ) ) return 0;
+    const size_type lastBin = numberOfBins() - 1;
+    if( value >= _edges.back() ) return lastBin;
+
+    if( _isUniform ){
+        size_type index = std::min( static_cast< size_type >( ( value - _edges.front() )*_inverseBinWidth ), lastBin );
+
+        //correct for rounding in the computation above, so that the result always agrees with the edges
+        if( value < _edges[ index ] ){
+            --index;
+        } else if( value >= _edges[ index + 1 ] && index < lastBin ){
+            ++index;
+        }
+        return index;
+    }
+
+    //binary search on the inner edges
+    return static_cast< size_type >( std::upper_bound( _edges.cbegin() + 1, _edges.cend() - 1, value ) - ( _edges.cbegin() + 1 ) );
+}
+
+
+LookupTable2D::LookupTable2D( const std::vector< double >& xEdges, const std::vector< double >& yEdges,
+    const std::vector< double >& contents, const std::vector< double >& errors ) :
+    _xAxis( xEdges ), _yAxis( yEdges ), _contents( contents ), _errors( errors )
+{
+    const size_type numberOfBins = numberOfBinsX()*numberOfBinsY();
+    if( _contents.size() != numberOfBins ){
+        throw std::invalid_argument( "lookup table with " + std::to_string( numberOfBins ) + " bins is given " + std::to_string( _contents.size() ) + " bin contents." );
+    }
+    if( _errors.empty() ){
+        _errors.assign( numberOfBins, 0. );
+    } else if( _errors.size() != numberOfBins ){
+        throw std::invalid_argument( "lookup table with " + std::to_string( numberOfBins ) + " bins is given " + std::to_string( _errors.size() ) + " bin errors." );
+    }
+}
+
+
+namespace {
+
+    std::vector< double > axisEdges( const TAxis& axis ){
+        std::vector< double > edges( axis.GetNbins() + 1 );
+        for( int bin = 1; bin <= axis.GetNbins(); ++bin ){
+            edges[ bin - 1 ] = axis.GetBinLowEdge( bin );
+        }
+        edges.back() = axis.GetBinUpEdge( axis.GetNbins() );
+        return edges;
+    }
+
+}
+
+
+LookupTable2D::LookupTable2D( const TH2& hist ) :
+    _xAxis( axisEdges( *hist.GetXaxis() ) ), _yAxis( axisEdges( *hist.GetYaxis() ) )
+{
+    _contents.reserve( numberOfBinsX()*numberOfBinsY() );
+    _errors.reserve( numberOfBinsX()*numberOfBinsY() );
+    for( size_type i = 0; i < numberOfBinsX(); ++i ){
+        for( size_type j = 0; j < numberOfBinsY(); ++j ){
+            _contents.push_back( hist.GetBinContent( i + 1, j + 1 ) );
+            _errors.push_back( hist.GetBinError( i + 1, j + 1 ) );
+        }
+    }
+}
+
+
+void LookupTable2D::contentsAt( const double* xValues, const double* yValues, double* output, const size_type n ) const{
+    for( size_type i = 0; i < n; ++i ){
+        output[ i ] = contentAt( xValues[ i ], yValues[ i ] );
+    }
+}
+
+
+std::vector< double > LookupTable2D::contentsAt( const std::vector< double >& xValues, const std::vector< double >& yValues ) const{
+    if( xValues.size() != yValues.size() ){
+        throw std::invalid_argument( "batched lookup is given " + std::to_string( xValues.size() ) + " x-values and " + std::to_string( yValues.size() ) + " y-values." );
+    }
+    std::vector< double > output( xValues.size() );
+    contentsAt( xValues.data(), yValues.data(), output.data(), xValues.size() );
+    return output;
+}
@@ -0,0 +1,82 @@
+#include "../interface/NpyColumnWriter.h"
+
+//include c++ library classes
+#include <iostream>
+
+
+NpyColumnWriter::NpyColumnWriter( const std::string& fileName, const std::string& dataType,
+    const std::vector< size_type >& innerShape ) :
+    _fileName( fileName ), _dataType( dataType ), _innerShape( innerShape ), _rowSize( 1 )
+{
+    for( size_type dimension : _innerShape ) _rowSize *= dimension;
+    _rowBytes = _rowSize*elementSize( _dataType );
+    _outputStream.open( _fileName, std::ios::binary | std::ios::trunc );
+    if( !_outputStream ){
+        throw std::runtime_error( "Column file " + _fileName + " can not be opened for writing." );
+    }
+
+    //placeholder header, rewritten with the final number of rows when the file is closed
+    _outputStream << header();
+}
+
+
+NpyColumnWriter::~NpyColumnWriter(){
+    try{
+        close();
+    } catch( std::exception& error ){
+        std::cerr << "ERROR in NpyColumnWriter::~NpyColumnWriter: " << error.what() << std::endl;
+    }
+}
+
+
+NpyColumnWriter::size_type NpyColumnWriter::elementSize( const std::string& dataType ){
+    static const std::string typeCharacters = "biuf";
+    if( dataType.size() < 3 || std::string( "<>|=" ).find( dataType[0] ) == std::string::npos
+        || typeCharacters.find( dataType[1] ) == std::string::npos ){
+        throw std::invalid_argument( "Data type '" + dataType + "' is not a supported numpy type string." );
+    }
+    size_type size = std::stoul( dataType.substr( 2 ) );
+    if( size == 0 ){
+        throw std::invalid_argument( "Data type '" + dataType + "' has elements of size 0." );
+    }
+    return size;
+}
+
+
+std::string NpyColumnWriter::header() const{
+    std::string shape = "(" + std::to_string( _numberOfRows ) + ",";
+    for( size_type dimension : _innerShape ) shape += " " + std::to_string( dimension ) + ",";
+    if( !_innerShape.empty() ) shape.pop_back();
+    shape += ")";
+    std::string dictionary = "{'descr': '" + _dataType + "', 'fortran_order': False, 'shape': " + shape + ", }";
+
+    //magic string, version 1.0 and the length of the dictionary (little endian), followed by the dictionary padded with spaces
+    static const std::string magic = std::string( "\x93NUMPY" ) + char( 1 ) + char( 0 );
+    const size_type dictionarySize = headerSize - magic.size() - 2;
+    if( dictionary.size() + 1 > dictionarySize ){
+        throw std::invalid_argument( "Header of column " + _fileName + " does not fit in " + std::to_string( headerSize ) + " bytes." );
+    }
+    dictionary.append( dictionarySize - dictionary.size() - 1, ' ' );
+    dictionary += '\n';
+    return magic + char( dictionarySize & 0xff ) + char( dictionarySize >> 8 ) + dictionary;
+}
+
+
+void NpyColumnWriter::write( const void* data, const size_type numberOfRows ){
+    if( !_outputStream.is_open() ){
+        throw std::runtime_error( "Trying to write to column " + _fileName + " after it was closed." );
+    }
+    _outputStream.write( static_cast< const char* >( data ), numberOfRows*_rowBytes );
+    _numberOfRows += numberOfRows;
+}
+
+
+void NpyColumnWriter::close(){
+    if( !_outputStream.is_open() ) return;
+    _outputStream.seekp( 0 );
+    _outputStream << header();
+    _outputStream.close();
+    if( _outputStream.fail() ){
+        throw std::runtime_error( "Column file " + _fileName + " could not be written." );
+    }
+}
@@ -0,0 +1,216 @@
+#include "../interface/SampleCatalog.h"
+
+//include c++ library classes
+#include <fstream>
+#include <iomanip>
+#include <stdexcept>
+#include <cstdio>
+#include <sys/stat.h>
+
+//include ROOT classes
+#include "TFile.h"
+#include "TTree.h"
+#include "TH1.h"
+
+//include other parts of framework
+#include "../interface/stringTools.h"
+#include "../interface/systemTools.h"
+
+
+namespace {
+
+    //get the size and modification time of a file, returns false if the file does not exist
+    bool fileStatus( const std::string& filePath, long long& fileSize, long long& modificationTime ){
+        struct stat fileStat;
+        if( stat( filePath.c_str(), &fileStat ) != 0 ) return false;
+        fileSize = static_cast< long long >( fileStat.st_size );
+        modificationTime = static_cast< long long >( fileStat.st_mtime );
+        return true;
+    }
+
+    std::vector< double > binContents( TH1* hist ){
+        std::vector< double > contents;
+        if( hist == nullptr ) return contents;
+        for( int bin = 1; bin < hist->GetNbinsX() + 1; ++bin ){
+            contents.push_back( hist->GetBinContent( bin ) );
+        }
+        return contents;
+    }
+
+}
+
+
+SampleCatalog::Entry SampleCatalog::makeEntry( const Sample& sample ){
+    Entry entry;
+    entry.fileName = sample.fileName();
+    if( !fileStatus( sample.filePath(), entry.fileSize, entry.modificationTime ) ){
+        throw std::invalid_argument( "File '" + sample.filePath() + "' does not exist." );
+    }
+    entry.isData = sample.isData();
+    entry.year = sample.year();
+
+    std::shared_ptr< TFile > sampleFile = sample.filePtr();
+    if( sampleFile->IsZombie() ){
+        throw std::runtime_error( "File '" + sample.filePath() + "' can not be opened." );
+    }
+    TTree* tree = dynamic_cast< TTree* >( sampleFile->Get( "blackJackAndHookers/blackJackAndHookersTree" ) );
+    if( tree == nullptr ){
+        throw std::runtime_error( "File '" + sample.filePath() + "' does not contain blackJackAndHookersTree." );
+    }
+    entry.numberOfEntries = tree->GetEntries();
+
+    if( sample.isMC() ){
+        TH1* hCounter = dynamic_cast< TH1* >( sampleFile->Get( "blackJackAndHookers/hCounter" ) );
+        if( hCounter == nullptr ){
+            throw std::runtime_error( "File '" + sample.filePath() + "' does not contain hCounter." );
+        }
+        entry.sumOfWeights = hCounter->GetBinContent( 1 );
+        entry.hCounterEntries = hCounter->GetEntries();
+
+        //lhe and ps counters are not present in all samples, in which case they are left empty
+        entry.lheSumsOfWeights = binContents( dynamic_cast< TH1* >( sampleFile->Get( "blackJackAndHookers/lheCounter" ) ) );
+        entry.psSumsOfWeights = binContents( dynamic_cast< TH1* >( sampleFile->Get( "blackJackAndHookers/psCounter" ) ) );
+    }
+    return entry;
+}
+
+
+SampleCatalog::SampleCatalog( const std::vector< Sample >& samples ){
+    for( const auto& sample : samples ){
+        _entries[ sample.fileName() ] = makeEntry( sample );
+    }
+}
+
+
+SampleCatalog::SampleCatalog( const std::string& fileName ){
+    std::ifstream inputStream( fileName );
+    if( !inputStream ){
+        throw std::invalid_argument( "Sample catalog " + fileName + " can not be opened." );
+    }
+    readCatalog( inputStream );
+}
+
+
+SampleCatalog::SampleCatalog( std::istream& inputStream ){
+    readCatalog( inputStream );
+}
+
+
+void SampleCatalog::readCatalog( std::istream& inputStream ){
+    std::string header;
+    size_type numberOfSamples = 0;
+    if( !( inputStream >> header >> numberOfSamples ) || header != "samplecatalog" ){
+        throw std::invalid_argument( "Sample catalog does not start with the expected header 'samplecatalog <number of samples>'." );
+    }
+
+    auto readValues = [&inputStream]( std::vector< double >& values ){
+        size_type size = 0;
+        inputStream >> size;
+        values.resize( size );
+        for( auto& value : values ) inputStream >> value;
+    };
+
+    for( size_type s = 0; s < numberOfSamples; ++s ){
+        Entry entry;
+        inputStream >> entry.fileName >> entry.fileSize >> entry.modificationTime >> entry.isData >> entry.year;
+        inputStream >> entry.numberOfEntries >> entry.sumOfWeights >> entry.hCounterEntries;
+        readValues( entry.lheSumsOfWeights );
+        readValues( entry.psSumsOfWeights );
+        if( !inputStream ){
+            throw std::invalid_argument( "Entry " + std::to_string( s ) + " of sample catalog could not be read." );
+        }
+        _entries[ entry.fileName ] = std::move( entry );
+    }
+}
+
+
+void SampleCatalog::write( const std::string& fileName ) const{
+
+    //write to a temporary file first, so that jobs reading the catalog never see a partially written file
+    std::string temporaryFileName = systemTools::uniqueFileName( fileName + ".tmp" );
+    std::ofstream outputStream( temporaryFileName );
+    if( !outputStream ){
+        throw std::runtime_error( "Sample catalog " + fileName + " can not be written." );
+    }
+    outputStream << "samplecatalog " << _entries.size() << "\n" << std::setprecision( 17 );
+    for( const auto& fileNameAndEntry : _entries ){
+        const Entry& entry = fileNameAndEntry.second;
+        outputStream << entry.fileName << " " << entry.fileSize << " " << entry.modificationTime << " " << entry.isData << " " << entry.year;
+        outputStream << " " << entry.numberOfEntries << " " << entry.sumOfWeights << " " << entry.hCounterEntries;
+        for( const auto* values : { &entry.lheSumsOfWeights, &entry.psSumsOfWeights } ){
+            outputStream << " " << values->size();
+            for( double value : *values ) outputStream << " " << value;
+        }
+        outputStream << "\n";
+    }
+    outputStream.close();
+    if( std::rename( temporaryFileName.c_str(), fileName.c_str() ) != 0 ){
+        systemTools::deleteFile( temporaryFileName );
+        throw std::runtime_error( "Sample catalog " + fileName + " can not be written." );
+    }
+}
+
+
+SampleCatalog SampleCatalog::readOrBuild( const std::string& fileName, const std::vector< Sample >& samples ){
+    SampleCatalog catalog;
+    if( systemTools::fileExists( fileName ) ){
+        try{
+            catalog = SampleCatalog( fileName );
+        } catch( std::invalid_argument& error ){
+            std::cerr << "WARNING in SampleCatalog::readOrBuild: " << error.what() << " The catalog will be rebuilt." << std::endl;
+        }
+    }
+
+    bool isModified = false;
+    for( const auto& sample : samples ){
+        if( catalog.isUpToDate( sample ) ) continue;
+        std::cout << "adding " << sample.fileName() << " to sample catalog " << fileName << std::endl;
+        catalog._entries[ sample.fileName() ] = makeEntry( sample );
+        isModified = true;
+    }
+
+    //a catalog that can not be written (e.g. in a read-only sample directory) can still be used in this job
+    if( isModified ){
+        try{
+            catalog.write( fileName );
+        } catch( std::runtime_error& error ){
+            std::cerr << "WARNING in SampleCatalog::readOrBuild: " << error.what() << std::endl;
+        }
+    }
+    return catalog;
+}
+
+
+std::string SampleCatalog::defaultFileName( const std::string& sampleDirectory ){
+    return stringTools::formatDirectoryName( sampleDirectory ) + "sampleCatalog.txt";
+}
+
+
+bool SampleCatalog::contains( const Sample& sample ) const{
+    return ( _entries.find( sample.fileName() ) != _entries.cend() );
+}
+
+
+bool SampleCatalog::isUpToDate( const Sample& sample ) const{
+    auto it = _entries.find( sample.fileName() );
+    if( it == _entries.cend() ) return false;
+    long long fileSize, modificationTime;
+    if( !fileStatus( sample.filePath(), fileSize, modificationTime ) ) return false;
+    return ( fileSize == it->second.fileSize && modificationTime == it->second.modificationTime );
+}
+
+
+const SampleCatalog::Entry& SampleCatalog::entry( const Sample& sample ) const{
+    auto it = _entries.find( sample.fileName() );
+    if( it == _entries.cend() ){
+        throw std::out_of_range( "Sample catalog has no entry for " + sample.fileName() + "." );
+    }
+    return it->second;
+}
+
+
+void SampleCatalog::merge( const SampleCatalog& rhs ){
+    for( const auto& fileNameAndEntry : rhs._entries ){
+        _entries[ fileNameAndEntry.first ] = fileNameAndEntry.second;
+    }
+}
@@ -35,18 +35,45 @@ SampleCrossSections::SampleCrossSections( const Sample& sample ){
     }
 
     double nominalSumOfWeights = hCounter->GetBinContent( 1 );
-    int numberOfLheWeights = lheCounter->GetNbinsX();
-    int numberOfPsWeights = psCounter->GetNbinsX();
+    std::vector< double > lheSumsOfWeights;
+    for( int bin = 1; bin < lheCounter->GetNbinsX() + 1; ++bin ){
+        lheSumsOfWeights.push_back( lheCounter->GetBinContent( bin ) );
+    }
+    std::vector< double > psSumsOfWeights;
+    for( int bin = 1; bin < psCounter->GetNbinsX() + 1; ++bin ){
+        psSumsOfWeights.push_back( psCounter->GetBinContent( bin ) );
+    }
+    setCrossSectionRatios( nominalSumOfWeights, lheSumsOfWeights, psSumsOfWeights );
+}
+
+
+SampleCrossSections::SampleCrossSections( const Sample& sample, const SampleCatalog& catalog ){
+
+    // fall back to reading the sample file if the catalog is missing or outdated for this sample
+    // (or if the sample has no lhe or ps counters, in which case an error is thrown there)
+    if( !catalog.isUpToDate( sample ) 
+	|| catalog.entry( sample ).lheSumsOfWeights.empty() 
+	|| catalog.entry( sample ).psSumsOfWeights.empty() ){
+        *this = SampleCrossSections( sample );
+        return;
+    }
+    const SampleCatalog::Entry& entry = catalog.entry( sample );
+    setCrossSectionRatios( entry.sumOfWeights, entry.lheSumsOfWeights, entry.psSumsOfWeights );
+}
+
+
+void SampleCrossSections::setCrossSectionRatios( const double nominalSumOfWeights,
+						 const std::vector< double >& lheSumsOfWeights,
+						 const std::vector< double >& psSumsOfWeights ){
     
     // printouts for testing
     std::cout << "INFO from SampleCrossSections constructor:" << std::endl;
-    std::cout << "  number of lhe variations: " << numberOfLheWeights << std::endl;
-    std::cout << "  number of ps variations: " << numberOfPsWeights << std::endl;
+    std::cout << "  number of lhe variations: " << lheSumsOfWeights.size() << std::endl;
+    std::cout << "  number of ps variations: " << psSumsOfWeights.size() << std::endl;
 
     // store all lhe variations
     bool doLheWarning = true;
-    for( int bin = 1; bin < lheCounter->GetNbinsX() + 1; ++bin ){
-        double lheVariedSumOfWeights = lheCounter->GetBinContent( bin );
+    for( double lheVariedSumOfWeights : lheSumsOfWeights ){
         // 0 entries indicates that a sample didn't have the respective weights
         if( lheVariedSumOfWeights < 1e-6 ){
 	    if( doLheWarning ){
@@ -63,8 +90,7 @@ SampleCrossSections::SampleCrossSections( const Sample& sample ){
 
     // store all parton shower variations
     bool doPsWarning = true;
-    for( int bin = 1; bin < psCounter->GetNbinsX() + 1; ++bin ){
-        double psVariedSumOfWeights = psCounter->GetBinContent( bin );
+    for( double psVariedSumOfWeights : psSumsOfWeights ){
         // 0 entries indicates that a sample didn't have the respective weights
         if( psVariedSumOfWeights < 1e-6 ){
 	    if( doPsWarning ){
@@ -0,0 +1,40 @@
+#include "../interface/VariationTable.h"
+
+//include C++ library classes
+#include <stdexcept>
+
+
+VariationTable::VariationTable( const std::vector< std::string >& names ){
+    for( const auto& name : names ){
+        add( name );
+    }
+}
+
+
+VariationTable::size_type VariationTable::add( const std::string& name ){
+    auto it = _indices.find( name );
+    if( it != _indices.cend() ){
+        return it->second;
+    }
+    size_type newIndex = _names.size();
+    _names.push_back( name );
+    _indices.insert( { name, newIndex } );
+    return newIndex;
+}
+
+
+VariationTable::size_type VariationTable::index( const std::string& name ) const{
+    auto it = _indices.find( name );
+    if( it == _indices.cend() ){
+        return npos;
+    }
+    return it->second;
+}
+
+
+const std::string& VariationTable::name( const size_type index ) const{
+    if( index >= _names.size() ){
+        throw std::out_of_range( "variation index " + std::to_string( index ) + " is out of range for table of size " + std::to_string( _names.size() ) + "." );
+    }
+    return _names[ index ];
+}
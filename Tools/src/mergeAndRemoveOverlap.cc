@@ -1,14 +1,19 @@
 #include "../interface/mergeAndRemoveOverlap.h"
 
+//include c++ library classes
+#include <map>
+#include <limits>
+#include <iostream>
+
 //include ROOT classes 
 #include "TFile.h"
+#include "TTree.h"
 
 //include other parts of framework
 #include "../../Tools/interface/stringTools.h"
 #include "../../Tools/interface/analysisTools.h"
 #include "../../TreeReader/interface/TreeReader.h"
-#include "../../Event/interface/EventTags.h"
-#include "../../Event/interface/Event.h"
+#include "../../Tools/interface/EventKeySet.h"
 
 
 
@@ -35,26 +40,78 @@ bool yearsAreConsistent( const std::vector< std::string >& inputPathVector ){
 
 
 
-bool eventIsNew( const Event& event, std::set< EventTags >& usedEventTags ){
+// number of entries per run number in a list of files 
+// (only the run number branch is read)
+std::map< long unsigned, long unsigned > countEntriesPerRun( const std::vector< std::string >& inputPathVector ){
+    std::map< long unsigned, long unsigned > entriesPerRun;
+    for( const auto& inputFilePath : inputPathVector ){
+        TFile* inputFilePtr = TFile::Open( inputFilePath.c_str() );
+        TTree* treePtr = (TTree*) inputFilePtr->Get( "blackJackAndHookers/blackJackAndHookersTree" );
+        ULong_t runNb;
+        treePtr->SetBranchStatus( "*", 0 );
+        treePtr->SetBranchStatus( "_runNb", 1 );
+        treePtr->SetBranchAddress( "_runNb", &runNb );
+        for( long unsigned entry = 0; entry < (long unsigned) treePtr->GetEntries(); ++entry ){
+            treePtr->GetEntry( entry );
+            ++entriesPerRun[ runNb ];
+        }
+        inputFilePtr->Close();
+    }
+    return entriesPerRun;
+}
 
-    //search set for the current event 
-    auto tagIt = usedEventTags.find( event.eventTags() );
 
-    //continue if event with the same tags was seen before
-    if( tagIt != usedEventTags.end() ){
-        return false;
+// split the run numbers into consecutive ranges 
+// for which the event keys fit within a memory budget (in MB)
+// returns a vector of inclusive run ranges and the number of entries in each range
+// note: if the memory budget is not positive, or if all keys fit at once, 
+//       a single range covering all runs is returned
+std::vector< std::pair< std::pair< long unsigned, long unsigned >, long unsigned > > planRunShards( 
+	const std::vector< std::string >& inputPathVector, const double memoryBudget ){
+    
+    // total number of entries (upper bound on the number of distinct events)
+    long unsigned totalEntries = 0;
+    for( const auto& inputFilePath : inputPathVector ){
+        TFile* inputFilePtr = TFile::Open( inputFilePath.c_str() );
+        TTree* treePtr = (TTree*) inputFilePtr->Get( "blackJackAndHookers/blackJackAndHookersTree" );
+        totalEntries += treePtr->GetEntries();
+        inputFilePtr->Close();
+    }
+    const long unsigned allRunsMax = std::numeric_limits< long unsigned >::max();
+    double budgetBytes = memoryBudget*1024*1024;
+    if( memoryBudget <= 0 || EventKeySet::memoryForSize( totalEntries ) <= budgetBytes ){
+        return { { { 0, allRunsMax }, totalEntries } };
     }
 
-    //add unseen events to the set 
-    usedEventTags.emplace( event.eventTags() ); 
-
-    return true;
+    // group consecutive runs as long as their keys fit in the budget
+    // (a run that does not fit by itself is put in a separate range)
+    std::cout << "event keys do not fit within the memory budget of " << memoryBudget;
+    std::cout << " MB, processing the input files per range of runs" << std::endl;
+    std::vector< std::pair< std::pair< long unsigned, long unsigned >, long unsigned > > shards;
+    for( const auto& runCount : countEntriesPerRun( inputPathVector ) ){
+        if( shards.empty() || EventKeySet::memoryForSize( shards.back().second + runCount.second ) > budgetBytes ){
+            if( EventKeySet::memoryForSize( runCount.second ) > budgetBytes ){
+                std::cerr << "WARNING in mergeAndRemoveOverlap: event keys for run " << runCount.first;
+                std::cerr << " alone do not fit within the memory budget." << std::endl;
+            }
+            shards.push_back( { { runCount.first, runCount.first }, runCount.second } );
+        } else {
+            shards.back().first.second = runCount.first;
+            shards.back().second += runCount.second;
+        }
+    }
+    if( !shards.empty() ){
+        shards.front().first.first = 0;
+        shards.back().first.second = allRunsMax;
+    }
+    return shards;
 }
 
 
 void mergeAndRemoveOverlap( const std::vector< std::string >& inputPathVector, 
 			    const std::string& outputPath, 
-			    const bool allowMergingYears ){
+			    const bool allowMergingYears,
+			    const double memoryBudget ){
 
     // size of input vector must be at least 2, otherwise there can be no merging 
     if( inputPathVector.size() < 2 ){
@@ -70,6 +127,9 @@ void mergeAndRemoveOverlap( const std::vector< std::string >& inputPathVector,
         throw std::logic_error( msg );
     }
 
+    // ranges of runs to process in each pass over the input files
+    auto shards = planRunShards( inputPathVector, memoryBudget );
+
     // initialize TreeReader
     TreeReader treeReader;
 
@@ -84,66 +144,91 @@ void mergeAndRemoveOverlap( const std::vector< std::string >& inputPathVector,
     std::map< std::string, std::shared_ptr< TH1 > > outputHistogramMap;
 
     // set of events that has been seen
-    // use std::set so search scales as log(N) 
-    std::set< EventTags > usedEventTags;
-
-    // loop over files
-    for( auto inputPathIt = inputPathVector.cbegin(); 
-	inputPathIt != inputPathVector.cend(); 
-	++inputPathIt ){
+    // (packed keys in a flat hash table, see EventKeySet)
+    EventKeySet usedEventTags;
+
+    // number of entries and duplicate entries per input file
+    std::vector< long unsigned > numberOfEntries( inputPathVector.size(), 0 );
+    std::vector< long unsigned > numberOfDuplicates( inputPathVector.size(), 0 );
+
+    // loop over ranges of runs
+    for( auto shardIt = shards.cbegin(); shardIt != shards.cend(); ++shardIt ){
+        const long unsigned firstRun = shardIt->first.first;
+        const long unsigned lastRun = shardIt->first.second;
+        if( shards.size() > 1 ){
+            std::cout << "processing runs " << firstRun << " to " << lastRun;
+            std::cout << " (range " << shardIt-shards.cbegin()+1 << " of " << shards.size() << ")" << std::endl;
+        }
+        usedEventTags.clear( shardIt->second );
 
-	std::cout << "processing file " << inputPathIt-inputPathVector.begin()+1;
-	std::cout << " of " << inputPathVector.size() << std::endl;
-        const auto& inputFilePath = *inputPathIt;
+        // loop over files
+        for( auto inputPathIt = inputPathVector.cbegin(); 
+            inputPathIt != inputPathVector.cend(); 
+            ++inputPathIt ){
 
-        // open next sample
-        // DO NOT reset triggers because this will invalidate the addresses set by setOutputTree 
-	// and trigger decisions in output file will be wrong!
-        treeReader.initSampleFromFile( inputFilePath, false );
-        outputTreePtr->SetDirectory( outputFilePtr );
+            std::cout << "processing file " << inputPathIt-inputPathVector.begin()+1;
+            std::cout << " of " << inputPathVector.size() << std::endl;
+            const auto& inputFilePath = *inputPathIt;
+            const auto fileIndex = inputPathIt - inputPathVector.cbegin();
 
-        // set output histograms and output tree for first file
-        if( inputPathIt == inputPathVector.cbegin() ){
+            // open next sample
+            // DO NOT reset triggers because this will invalidate the addresses set by setOutputTree 
+            // and trigger decisions in output file will be wrong!
+            treeReader.initSampleFromFile( inputFilePath, false );
+            outputTreePtr->SetDirectory( outputFilePtr );
 
-            for( const auto& histPtr : treeReader.getHistogramsFromCurrentFile() ){
-                outputHistogramMap[ histPtr->GetName() ] = histPtr;
-            }
+            // set output histograms and output tree for first file
+            if( shardIt == shards.cbegin() && inputPathIt == inputPathVector.cbegin() ){
 
-            // set uo output tree
-            treeReader.setOutputTree( outputTreePtr.get() );
+                for( const auto& histPtr : treeReader.getHistogramsFromCurrentFile() ){
+                    outputHistogramMap[ histPtr->GetName() ] = histPtr;
+                }
 
-        // for next files, add the histograms to the current histograms 
-	// and check that no unknown histograms are present
-        } else {
-            for( const auto& histPtr : treeReader.getHistogramsFromCurrentFile() ){
-                auto histIt = outputHistogramMap.find( histPtr->GetName() );
-                if( histIt == outputHistogramMap.cend() ){
-		    std::string msg = "ERROR in mergeAndRemoveOverlap: ";
-		    msg += "Histogram " + std::string( histPtr->GetName() ); 
-		    msg += " not found in file " + inputPathVector[0] + ".";
-                    throw std::invalid_argument( msg );
+                // set uo output tree
+                treeReader.setOutputTree( outputTreePtr.get() );
+
+            // for next files, add the histograms to the current histograms 
+            // and check that no unknown histograms are present
+            } else if( shardIt == shards.cbegin() ){
+                for( const auto& histPtr : treeReader.getHistogramsFromCurrentFile() ){
+                    auto histIt = outputHistogramMap.find( histPtr->GetName() );
+                    if( histIt == outputHistogramMap.cend() ){
+                        std::string msg = "ERROR in mergeAndRemoveOverlap: ";
+                        msg += "Histogram " + std::string( histPtr->GetName() ); 
+                        msg += " not found in file " + inputPathVector[0] + ".";
+                        throw std::invalid_argument( msg );
+                    }
+                    histIt->second->Add( histPtr.get() );
                 }
-                histIt->second->Add( histPtr.get() );
             }
-        }
 
-        // loop over events in tree and write them to the output tree if there is no overlap
-        for( long unsigned entry = 0; entry < treeReader.numberOfEntries(); ++entry ){
-	    if(entry%1000 == 0){
-		std::cout << "processed: " << entry;
-		std::cout << " of "<< treeReader.numberOfEntries() << std::endl;
-	    }
+            // only read the event tags to check for overlap,
+            // and read the full entry only for new events
+            treeReader.initPartialRead( { "_runNb", "_lumiBlock", "_eventNb" } );
 
-            Event event = treeReader.buildEvent( entry );
+            // loop over events in tree and write them to the output tree if there is no overlap
+            for( long unsigned entry = 0; entry < treeReader.numberOfEntries(); ++entry ){
+                if(entry%1000 == 0){
+                    std::cout << "processed: " << entry;
+                    std::cout << " of "<< treeReader.numberOfEntries() << std::endl;
+                }
+
+                treeReader.GetPartialEntry( entry );
+                if( treeReader._runNb < firstRun || treeReader._runNb > lastRun ) continue;
+                ++numberOfEntries[ fileIndex ];
 
-            // check if event is new and insert it into the list of used events 
-            if( eventIsNew( event, usedEventTags ) ){
+                // check if event is new and insert it into the list of used events 
+                if( usedEventTags.insert( treeReader._runNb, treeReader._lumiBlock, treeReader._eventNb ) ){
 
-                // write event to output tree
-                outputTreePtr->Fill();
+                    // write event to output tree
+                    treeReader.GetEntry( entry );
+                    outputTreePtr->Fill();
+                } else {
+                    ++numberOfDuplicates[ fileIndex ];
+                }
             }
-        }
 
+        }
     }
 
     // need to change directory for writing
@@ -159,4 +244,12 @@ void mergeAndRemoveOverlap( const std::vector< std::string >& inputPathVector,
 
     // close output file
     outputFilePtr->Close();
+
+    // print duplicate statistics per input file
+    std::cout << "overlap removal statistics:" << std::endl;
+    for( std::vector< std::string >::size_type i = 0; i < inputPathVector.size(); ++i ){
+        std::cout << inputPathVector[i] << ": " << numberOfEntries[i] << " entries, ";
+        std::cout << numberOfDuplicates[i] << " duplicates removed, ";
+        std::cout << numberOfEntries[i] - numberOfDuplicates[i] << " entries written" << std::endl;
+    }
 }
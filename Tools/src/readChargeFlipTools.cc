@@ -5,6 +5,26 @@ Tools for reading charge flip maps and weights
 // include header
 #include "../interface/readChargeFlipTools.h"
 
+// help function for the correction factor to the charge flip weights
+namespace{
+    double chargeFlipCorrectionFactor( const Event& event ){
+	std::string year = event.sample().year();
+	// need extra step for year since it is not split in Pre and Post for 2016 data.
+	std::string sampleName = event.sample().fileName();
+	if( year=="2016" ){
+	    if( stringTools::stringContains(sampleName,"HIPM") ) year = "2016PreVFP";
+	    else year = "2016PostVFP";
+	}
+	if( year=="2016PreVFP" ) return 0.85;
+	if( year=="2016PostVFP" ) return 0.95;
+	if( year=="2017" ) return 1.4;
+	if( year=="2018" ) return 1.4;
+	std::string msg = "ERROR in readChargeFlipTools::chargeFlipWeight:";
+	msg += " year " + year + " not recognized (needed for correction factor).";
+	throw std::runtime_error(msg);
+    }
+}
+
 // help function for reading charge flip weights
 double readChargeFlipTools::chargeFlipWeight( 
 	const Event& event, 
@@ -26,20 +46,27 @@ double readChargeFlipTools::chargeFlipWeight(
     }
     double totalProbability = summedProbabilities - multipliedProbabilities;
     if( !doCorrectionFactor ) return totalProbability;
-    std::string year = event.sample().year();
-    // need extra step for year since it is not split in Pre and Post for 2016 data.
-    std::string sampleName = event.sample().fileName();
-    if( year=="2016" ){
-	if( stringTools::stringContains(sampleName,"HIPM") ) year = "2016PreVFP";
-        else year = "2016PostVFP";
+    return chargeFlipCorrectionFactor( event ) * totalProbability;
+}
+
+// same as above but with a charge flip lookup table
+double readChargeFlipTools::chargeFlipWeight(
+	const Event& event,
+	const LookupTable2D& chargeFlipTable,
+	bool doCorrectionFactor ){
+    double summedProbabilities = 0.;
+    double multipliedProbabilities = 1.;
+    for( const auto& leptonPtr : event.lightLeptonCollection() ){
+	double flipRate = 0;
+	if( leptonPtr->isElectron() ){
+	    flipRate = chargeFlipTable.contentAt( leptonPtr->pt(), leptonPtr->absEta() );
+	}
+        summedProbabilities += flipRate / ( 1. - flipRate );
+        multipliedProbabilities *= flipRate / ( 1. - flipRate );
     }
-    if( year=="2016PreVFP" ) return 0.85 * totalProbability;
-    if( year=="2016PostVFP" ) return 0.95 * totalProbability;
-    if( year=="2017" ) return 1.4 * totalProbability;
-    if( year=="2018" ) return 1.4 * totalProbability;
-    std::string msg = "ERROR in readChargeFlipTools::chargeFlipWeight:";
-    msg += " year " + year + " not recognized (needed for correction factor).";
-    throw std::runtime_error(msg);
+    double totalProbability = summedProbabilities - multipliedProbabilities;
+    if( !doCorrectionFactor ) return totalProbability;
+    return chargeFlipCorrectionFactor( event ) * totalProbability;
 }
 
 // help function for reading the charge flip map
@@ -67,3 +94,11 @@ std::shared_ptr< TH2D > readChargeFlipTools::readChargeFlipMap(
     std::string filePath = stringTools::formatDirectoryName(directory)+fileName;
     return readChargeFlipMap(filePath, year, flavour);
 }
+
+// help function for reading the charge flip map into a lookup table
+LookupTable2D readChargeFlipTools::readChargeFlipTable(
+	const std::string& filePath,
+	const std::string& year,
+        const std::string& flavour ){
+    return LookupTable2D( *readChargeFlipMap( filePath, year, flavour ) );
+}
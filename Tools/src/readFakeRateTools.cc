@@ -52,6 +52,25 @@ std::shared_ptr< TH2D > readFakeRateTools::readFRMap(
 }
 
 
+LookupTable2D readFakeRateTools::readFRTable(
+				    const std::string& pathToFile,
+				    const std::string& histName ){
+    // read a fake rate map into a lookup table (see LookupTable2D),
+    // which is faster to evaluate than the histogram itself
+    return LookupTable2D( *readFRMap( pathToFile, histName ) );
+}
+
+
+LookupTable2D readFakeRateTools::readFRTable(
+				    const std::string& pathToFile,
+				    const std::string& flavor,
+				    const std::string& year ){
+    // read a fake rate lookup table for given flavor and year,
+    // with default naming convention
+    return LookupTable2D( *readFRMap( pathToFile, flavor, year ) );
+}
+
+
 double readFakeRateTools::fakeRateWeight( 
 			const Event& event,
 			const std::shared_ptr< TH2D >& frMap_muon,
@@ -88,6 +107,36 @@ double readFakeRateTools::fakeRateWeight(
 }
 
 
+double readFakeRateTools::fakeRateWeight(
+			const Event& event,
+			const LookupTable2D& frTable_muon,
+			const LookupTable2D& frTable_electron ){
+    // same as above but with fake rate lookup tables,
+    // where the fake rates for all FO leptons of a given flavour are looked up in one batch
+    std::vector< double > muonPt, muonAbsEta, electronPt, electronAbsEta;
+    for( const auto& leptonPtr : event.lightLeptonCollection() ){
+	if( !(leptonPtr->isFO() && !leptonPtr->isTight()) ) continue;
+	double ptMax = 44.9; // limit to bin up to 45 GeV
+	double croppedPt = std::min( leptonPtr->pt(), ptMax );
+	if( leptonPtr->isMuon() ){
+	    muonPt.push_back( croppedPt );
+	    muonAbsEta.push_back( std::min( leptonPtr->absEta(), 2.4 ) );
+	} else {
+	    electronPt.push_back( croppedPt );
+	    electronAbsEta.push_back( std::min( leptonPtr->absEta(), 2.5 ) );
+	}
+    }
+    double weight = -1.;
+    for( double fr : frTable_muon.contentsAt( muonPt, muonAbsEta ) ){
+	weight *= ( - fr / ( 1. - fr ) );
+    }
+    for( double fr : frTable_electron.contentsAt( electronPt, electronAbsEta ) ){
+	weight *= ( - fr / ( 1. - fr ) );
+    }
+    return weight;
+}
+
+
 int readFakeRateTools::fakeRateFlavour( const Event& event ){
     // return flavour of failing lepton:
     // -1 if none,
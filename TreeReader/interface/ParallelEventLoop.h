@@ -0,0 +1,69 @@
+/*
+Parallel event loop over multiple samples
+The entries of all samples are split in tasks (ranges of entries of a single sample),
+which are processed by a pool of worker threads.
+Each worker has its own TreeReader (and hence its own TFile, TTree and Event state),
+so the function processing a task should only modify objects belonging to its worker
+(e.g. a separate set of histograms per worker, indexed by the worker index),
+which can then be merged after the loop.
+With a single thread, all tasks are processed in the calling thread, in order.
+*/
+
+#ifndef ParallelEventLoop_H
+#define ParallelEventLoop_H
+
+//include c++ library classes
+#include <vector>
+#include <functional>
+
+//include other parts of framework
+#include "TreeReader.h"
+#include "../../Tools/interface/Sample.h"
+#include "../../Tools/interface/SampleCatalog.h"
+
+
+class ParallelEventLoop {
+
+    public:
+        using size_type = std::vector< Sample >::size_type;
+
+        //range [ firstEntry, lastEntry ) of the entries of a sample
+        struct Task {
+            size_type sampleIndex;
+            long unsigned firstEntry;
+            long unsigned lastEntry;
+        };
+
+        //function processing a task, the TreeReader of the worker is initialized to the sample of the task
+        using TaskFunction = std::function< void( TreeReader&, const Task&, const unsigned workerIndex ) >;
+
+        //the number of entries of each sample is taken from the catalog if it has an up-to-date entry,
+        //otherwise the sample file is opened once to read it
+        ParallelEventLoop( const std::vector< Sample >& samples, const unsigned numberOfThreads,
+            const SampleCatalog* catalog = nullptr );
+
+        unsigned numberOfThreads() const{ return _numberOfThreads; }
+        size_type numberOfSamples() const{ return _samples.size(); }
+        const Sample& sample( const size_type sampleIndex ) const{ return _samples.at( sampleIndex ); }
+
+        //number of entries in the sample file, and number of entries that will be processed
+        long unsigned availableEntries( const size_type sampleIndex ) const{ return _availableEntries.at( sampleIndex ); }
+        long unsigned numberOfEntries( const size_type sampleIndex ) const{ return _numberOfEntries.at( sampleIndex ); }
+
+        //only process the first numberOfEntries entries of a sample
+        void setNumberOfEntries( const size_type sampleIndex, const long unsigned numberOfEntries );
+
+        //process all entries, in tasks of at most entriesPerTask entries
+        //an exception thrown in any of the workers is rethrown here after all workers are finished
+        void run( const TaskFunction&, const long unsigned entriesPerTask = 100000 ) const;
+
+    private:
+        std::vector< Sample > _samples;
+        unsigned _numberOfThreads;
+        std::vector< long unsigned > _availableEntries;
+        std::vector< long unsigned > _numberOfEntries;
+
+        std::vector< Task > makeTasks( const long unsigned entriesPerTask ) const;
+};
+
+#endif
@@ -12,6 +12,11 @@
 
 //include other parts of code
 #include "../../Tools/interface/Sample.h"
+#include "../../Tools/interface/SampleCatalog.h"
+#include "../../Tools/interface/VariationTable.h"
+
+//include c++ library classes
+#include <memory>
 
 
 class Event;
@@ -222,6 +227,15 @@ class TreeReader {
         std::map< std::string, Double_t[nJets_max] > _jetSmearedPt_JECGroupedUp;
         std::map< std::string, Double_t[nJets_max] > _jetSmearedPt_JECSourcesDown;
         std::map< std::string, Double_t[nJets_max] > _jetSmearedPt_JECSourcesUp;
+        // interned split JEC variation names (without prefix and suffix),
+        // and pointers to the corresponding arrays in the maps above (index-aligned with the names,
+        // nullptr if a variation is not present in one direction), see buildJecVariationTable
+        std::shared_ptr< const VariationTable > _jecSourcesTable;
+        std::vector< const Double_t* > _jetSmearedPt_JECSourcesUpArrays;
+        std::vector< const Double_t* > _jetSmearedPt_JECSourcesDownArrays;
+        std::shared_ptr< const VariationTable > _jecGroupedTable;
+        std::vector< const Double_t* > _jetSmearedPt_JECGroupedUpArrays;
+        std::vector< const Double_t* > _jetSmearedPt_JECGroupedDownArrays;
         // variables related to missing transverse energy
 	Double_t        _met;
         Double_t        _met_JECDown;
@@ -311,6 +325,12 @@ class TreeReader {
         void readSamples2018(const std::string&, const std::string&);
         void readSamples(const std::string& list, const std::string& directory);
 
+        //read a catalog of sample metadata (see SampleCatalog),
+        //which is used instead of reading the sums of weights from the sample files.
+        //note: the catalog in the sample directory (if present) is read automatically in readSamples
+        void readSampleCatalog( const std::string& catalogFile );
+        const SampleCatalog* sampleCatalogPtr() const{ return _sampleCatalog.get(); }
+
         //initialize the current sample directly from a root file
         //always reset triggers instead of rare case of combining primary datasets
 	// to prevent invalidating addresses set by setOutputTree
@@ -342,6 +362,17 @@ class TreeReader {
                             const bool readGroupedJECVariations = false,
 			    const bool readParticleLevel = false );
 
+        //Partial reading of entries (e.g. for a fast first stage in skimming)
+        //only branches starting with one of the given prefixes (and not containing any
+        //of the anti-identifiers) are read, all other variables keep their previous values.
+        //note: initPartialRead reads the first entry in full, so that all variables are valid.
+        //note: call GetEntry before writing an entry to an output tree!
+        void initPartialRead( const std::vector< std::string >& branchPrefixes,
+                              const std::vector< std::string >& antiIdentifiers = {} );
+        void GetPartialEntry( long unsigned );
+        Event buildPartialEvent( long unsigned );
+        bool partialReadInitialized() const{ return !_partialReadBranches.empty(); }
+
         //check whether specific info is present in current tree
         bool containsTauInfo() const;
 	bool containsGeneratorInfo() const;
@@ -404,6 +435,12 @@ class TreeReader {
         //current sample
         std::shared_ptr< const Sample > _currentSamplePtr;
 
+        //metadata of the samples (if available)
+        std::shared_ptr< SampleCatalog > _sampleCatalog;
+
+        //sum of simulated event weights of a sample, taken from the catalog if possible
+        double sumSimulatedEventWeights( const Sample& ) const;
+
         //TFile associated to current sample
         std::shared_ptr< TFile > _currentFilePtr;
 
@@ -413,6 +450,9 @@ class TreeReader {
         //cache whether current sample is SUSY to avoid having to check the branch names for each event
         bool _isSusy = false;
 
+        //branches to read in partial reading mode (see initPartialRead)
+        std::vector< TBranch* > _partialReadBranches;
+
         //check whether current sample is initialized, throw an error if it is not 
         void checkCurrentSample() const;
 
@@ -442,6 +482,11 @@ class TreeReader {
 	// initialize split jec uncertainty source maps
         void initializeJecSourcesMaps( TTree* );
         void initializeJecSourcesGroupedMaps( TTree* );
+        void buildJecVariationTable( const std::map< std::string, Double_t[nJets_max] >& upMap,
+                const std::map< std::string, Double_t[nJets_max] >& downMap,
+                const std::string& prefix, const std::string& variationType,
+                std::shared_ptr< const VariationTable >& table,
+                std::vector< const Double_t* >& upArrays, std::vector< const Double_t* >& downArrays );
 
         //list of branches
         TBranch        *b__runNb;   
@@ -0,0 +1,112 @@
+#include "../interface/ParallelEventLoop.h"
+
+//include c++ library classes
+#include <thread>
+#include <atomic>
+#include <mutex>
+#include <exception>
+#include <stdexcept>
+#include <iostream>
+#include <algorithm>
+
+//include ROOT classes
+#include "TROOT.h"
+
+
+ParallelEventLoop::ParallelEventLoop( const std::vector< Sample >& samples, const unsigned numberOfThreads,
+    const SampleCatalog* catalog ) :
+    _samples( samples ), _numberOfThreads( std::max( numberOfThreads, 1u ) )
+{
+    for( const auto& sample : _samples ){
+        long unsigned entries;
+        if( catalog != nullptr && catalog->isUpToDate( sample ) ){
+            entries = catalog->entry( sample ).numberOfEntries;
+        } else {
+            TreeReader treeReader;
+            treeReader.initSample( sample, false, false );
+            entries = treeReader.numberOfEntries();
+        }
+        _availableEntries.push_back( entries );
+    }
+    _numberOfEntries = _availableEntries;
+}
+
+
+void ParallelEventLoop::setNumberOfEntries( const size_type sampleIndex, const long unsigned numberOfEntries ){
+    _numberOfEntries.at( sampleIndex ) = std::min( numberOfEntries, _availableEntries.at( sampleIndex ) );
+}
+
+
+std::vector< ParallelEventLoop::Task > ParallelEventLoop::makeTasks( const long unsigned entriesPerTask ) const{
+    if( entriesPerTask == 0 ){
+        throw std::invalid_argument( "Number of entries per task must be larger than 0." );
+    }
+
+    //tasks are ordered by sample, so that workers rarely have to switch files
+    std::vector< Task > tasks;
+    for( size_type sampleIndex = 0; sampleIndex < _samples.size(); ++sampleIndex ){
+        for( long unsigned first = 0; first < _numberOfEntries[ sampleIndex ]; first += entriesPerTask ){
+            tasks.push_back( { sampleIndex, first, std::min( first + entriesPerTask, _numberOfEntries[ sampleIndex ] ) } );
+        }
+    }
+    return tasks;
+}
+
+
+void ParallelEventLoop::run( const TaskFunction& processTask, const long unsigned entriesPerTask ) const{
+    const std::vector< Task > tasks = makeTasks( entriesPerTask );
+    long unsigned totalEntries = 0;
+    for( const auto& task : tasks ) totalEntries += ( task.lastEntry - task.firstEntry );
+    std::cout << "starting parallel event loop over " << totalEntries << " entries of " << _samples.size();
+    std::cout << " samples in " << tasks.size() << " tasks with " << _numberOfThreads << " threads" << std::endl;
+
+    //ROOT needs to be told that files are opened and read from several threads
+    if( _numberOfThreads > 1 ) ROOT::EnableThreadSafety();
+
+    std::atomic< std::size_t > nextTask( 0 );
+    std::mutex progressMutex;
+    long unsigned processedEntries = 0;
+    unsigned printedPercentage = 0;
+    std::vector< std::exception_ptr > errors( _numberOfThreads );
+
+    auto worker = [&]( const unsigned workerIndex ){
+        try{
+            TreeReader treeReader;
+            size_type currentSample = _samples.size();
+            for( std::size_t t = nextTask++; t < tasks.size(); t = nextTask++ ){
+                const Task& task = tasks[ t ];
+                if( task.sampleIndex != currentSample ){
+                    treeReader.initSample( _samples[ task.sampleIndex ] );
+                    currentSample = task.sampleIndex;
+                }
+                processTask( treeReader, task, workerIndex );
+
+                //print progress in steps of 10%
+                std::lock_guard< std::mutex > lock( progressMutex );
+                processedEntries += ( task.lastEntry - task.firstEntry );
+                unsigned percentage = ( totalEntries == 0 ) ? 100 : unsigned( 100*processedEntries / totalEntries );
+                if( percentage >= printedPercentage + 10 ){
+                    printedPercentage = percentage - percentage%10;
+                    std::cout << "processed " << processedEntries << " of " << totalEntries << " entries" << std::endl;
+                }
+            }
+        } catch( ... ){
+            errors[ workerIndex ] = std::current_exception();
+
+            //make the other workers stop after their current task
+            nextTask = tasks.size();
+        }
+    };
+
+    std::vector< std::thread > threads;
+    for( unsigned workerIndex = 1; workerIndex < _numberOfThreads; ++workerIndex ){
+        threads.emplace_back( worker, workerIndex );
+    }
+    worker( 0 );
+    for( auto& thread : threads ) thread.join();
+
+    for( const auto& error : errors ){
+        if( error ) std::rethrow_exception( error );
+    }
+    std::cout << "finished parallel event loop" << std::endl;
+}
@@ -4,6 +4,7 @@
 #include <fstream>
 #include <iostream>
 #include <typeinfo>
+#include <stdexcept>
 
 //include other parts of analysis framework
 #include "../../Tools/interface/analysisTools.h"
@@ -36,6 +37,19 @@ void TreeReader::readSamples( const std::string& list,
     for(auto& sample : sampleVector){
         std::cout << "sample: " << sample << std::endl;
     }
+
+    //read the sample catalog if it was built for this directory
+    std::string catalogFile = SampleCatalog::defaultFileName( directory );
+    if( systemTools::fileExists( catalogFile ) ){
+        readSampleCatalog( catalogFile );
+    }
+}
+
+
+void TreeReader::readSampleCatalog( const std::string& catalogFile ){
+    if( !_sampleCatalog ) _sampleCatalog = std::make_shared< SampleCatalog >();
+    _sampleCatalog->merge( SampleCatalog( catalogFile ) );
+    std::cout << "read sample catalog " << catalogFile << std::endl;
 }
 
 
@@ -173,6 +187,10 @@ void TreeReader::initializeJecSourcesMaps( TTree* treePtr ){
     for( auto mapEl: b__corrMETy_JECSourcesUp ){ _corrMETy_JECSourcesUp[mapEl.first]; }
     b__corrMETy_JECSourcesDown = buildBranchMap( treePtr, {"_corrMETy","_JECSourcesDown"}).second;
     for( auto mapEl: b__corrMETy_JECSourcesDown ){ _corrMETy_JECSourcesDown[mapEl.first]; }
+    // build interned table of variation names
+    buildJecVariationTable( _jetSmearedPt_JECSourcesUp, _jetSmearedPt_JECSourcesDown,
+	"_jetSmearedPt_", "JECSources", _jecSourcesTable,
+	_jetSmearedPt_JECSourcesUpArrays, _jetSmearedPt_JECSourcesDownArrays );
 }
 
 
@@ -203,6 +221,40 @@ void TreeReader::initializeJecSourcesGroupedMaps( TTree* treePtr ){
     for( auto mapEl: b__corrMETy_JECGroupedUp ){ _corrMETy_JECGroupedUp[mapEl.first]; }
     b__corrMETy_JECGroupedDown = buildBranchMap( treePtr, {"_corrMETy","_JECGroupedDown"}).second;
     for( auto mapEl: b__corrMETy_JECGroupedDown ){ _corrMETy_JECGroupedDown[mapEl.first]; }
+    // build interned table of variation names
+    buildJecVariationTable( _jetSmearedPt_JECGroupedUp, _jetSmearedPt_JECGroupedDown,
+	"_jetSmearedPt_", "JECGrouped", _jecGroupedTable,
+	_jetSmearedPt_JECGroupedUpArrays, _jetSmearedPt_JECGroupedDownArrays );
+}
+
+
+void TreeReader::buildJecVariationTable( const std::map< std::string, Double_t[nJets_max] >& upMap,
+	const std::map< std::string, Double_t[nJets_max] >& downMap,
+	const std::string& prefix, const std::string& variationType,
+	std::shared_ptr< const VariationTable >& table,
+	std::vector< const Double_t* >& upArrays, std::vector< const Double_t* >& downArrays ){
+    // convert the branch names of the split JEC variations into pure variation names,
+    // so that they are cleaned only once per tree instead of once per jet,
+    // and store pointers to the arrays for each variation in the same order as the names.
+    // note: the map elements are never erased, so the pointers stay valid.
+    const std::string upSuffix = "_" + variationType + "Up";
+    const std::string downSuffix = "_" + variationType + "Down";
+    auto cleanName = [&prefix]( const std::string& branchName, const std::string& suffix ){
+	std::string name = stringTools::removeOccurencesOf( branchName, prefix );
+	return stringTools::removeOccurencesOf( name, suffix );
+    };
+    std::shared_ptr< VariationTable > newTable = std::make_shared< VariationTable >();
+    for( const auto& mapEl : upMap ){ newTable->add( cleanName( mapEl.first, upSuffix ) ); }
+    for( const auto& mapEl : downMap ){ newTable->add( cleanName( mapEl.first, downSuffix ) ); }
+    upArrays.assign( newTable->size(), nullptr );
+    downArrays.assign( newTable->size(), nullptr );
+    for( const auto& mapEl : upMap ){
+	upArrays[ newTable->index( cleanName( mapEl.first, upSuffix ) ) ] = mapEl.second;
+    }
+    for( const auto& mapEl : downMap ){
+	downArrays[ newTable->index( cleanName( mapEl.first, downSuffix ) ) ] = mapEl.second;
+    }
+    table = newTable;
 }
 
 
@@ -373,6 +425,11 @@ std::pair<double, int> TreeReader::getHCounterInfo() const{
 	msg.append(" the current sample is a data sample.");
 	throw std::runtime_error(msg);
     }
+    // take the sum of simulated event weights from the catalog if possible
+    if( _sampleCatalog && _sampleCatalog->isUpToDate( *_currentSamplePtr ) ){
+        const SampleCatalog::Entry& entry = _sampleCatalog->entry( *_currentSamplePtr );
+        return std::make_pair( entry.sumOfWeights, int( entry.hCounterEntries ) );
+    }
     // read sum of simulated event weights
     TH1D* hCounter = new TH1D( "hCounter", "Events counter", 1, 0, 1 );
     _currentFilePtr->cd( "blackJackAndHookers" );
@@ -384,6 +441,22 @@ std::pair<double, int> TreeReader::getHCounterInfo() const{
 }
 
 
+double TreeReader::sumSimulatedEventWeights( const Sample& samp ) const{
+    // get the sum of simulated event weights of a sample,
+    // from the sample catalog if it has an up-to-date entry for this sample,
+    // otherwise from hCounter in the current file
+    if( _sampleCatalog && _sampleCatalog->isUpToDate( samp ) ){
+        return _sampleCatalog->entry( samp ).sumOfWeights;
+    }
+    TH1D* hCounter = new TH1D( "hCounter", "Events counter", 1, 0, 1 );
+    _currentFilePtr->cd( "blackJackAndHookers" );
+    hCounter->Read( "hCounter" ); 
+    double sumOfWeights = hCounter->GetBinContent(1);
+    delete hCounter;
+    return sumOfWeights;
+}
+
+
 void TreeReader::initSample( const Sample& samp,
     const bool doInitTree,
     const bool doInitHCounter ){ 
@@ -411,11 +484,7 @@ void TreeReader::initSample( const Sample& samp,
     if( !samp.isData() && doInitHCounter ){
 
         //read sum of simulated event weights
-        TH1D* hCounter = new TH1D( "hCounter", "Events counter", 1, 0, 1 );
-        _currentFilePtr->cd( "blackJackAndHookers" );
-        hCounter->Read( "hCounter" ); 
-        double sumSimulatedEventWeights = hCounter->GetBinContent(1);
-        delete hCounter;
+        double sumSimulatedEventWeights = this->sumSimulatedEventWeights( samp );
 
         //event weights set with lumi depending on sample's era 
         double dataLumi;
@@ -436,6 +505,10 @@ void TreeReader::initSample( const Sample& samp,
 void TreeReader::initSample( unsigned int sampleIndex,
 			     const bool doInitTree,
                              const bool doInitHCounter ){
+    // note: only the file of the requested sample is opened, not the ones before it
+    if( sampleIndex >= samples.size() ){
+        throw std::out_of_range( "Requesting sample " + std::to_string( sampleIndex ) + " while only " + std::to_string( samples.size() ) + " samples are present." );
+    }
     currentSampleIndex = sampleIndex;
     initSample( samples[ sampleIndex ], doInitTree, doInitHCounter );
 }
@@ -552,6 +625,48 @@ Event TreeReader::buildEvent( long unsigned entry,
 }
 
 
+void TreeReader::initPartialRead( const std::vector< std::string >& branchPrefixes,
+				  const std::vector< std::string >& antiIdentifiers ){
+    checkCurrentTree();
+    _partialReadBranches.clear();
+    TObjArray* branch_list = _currentTreePtr->GetListOfBranches();
+    for( const auto& branchObj : *branch_list ){
+	std::string branchName = branchObj->GetName();
+	bool select = false;
+	for( const std::string& prefix : branchPrefixes ){
+	    if( stringTools::stringStartsWith( branchName, prefix ) ) select = true;
+	}
+	for( const std::string& antiIdentifier : antiIdentifiers ){
+	    if( stringTools::stringContains( branchName, antiIdentifier ) ) select = false;
+	}
+	if( select ) _partialReadBranches.push_back( dynamic_cast< TBranch* >( branchObj ) );
+    }
+    if( _partialReadBranches.empty() ){
+	throw std::invalid_argument( "no branches found for partial reading." );
+    }
+    // read the first entry in full,
+    // to make sure the variables that are not read partially have valid values
+    if( numberOfEntries() > 0 ) GetEntry( 0 );
+}
+
+
+void TreeReader::GetPartialEntry( long unsigned entry ){
+    checkCurrentTree();
+    if( !partialReadInitialized() ){
+	throw std::runtime_error( "partial reading requested, but initPartialRead was not called." );
+    }
+    for( TBranch* branchPtr : _partialReadBranches ){
+	branchPtr->GetEntry( entry );
+    }
+}
+
+
+Event TreeReader::buildPartialEvent( long unsigned entry ){
+    GetPartialEntry( entry );
+    return Event( *this, false, false, false, false, false );
+}
+
+
 template< typename T > void setMapBranchAddresses( TTree* treePtr, 
 	std::map< std::string, T >& variableMap, 
 	std::map< std::string, TBranch* > branchMap ){
@@ -581,6 +696,9 @@ void TreeReader::initTree( const bool resetTriggersAndFilters ){
     // Set branch addresses and branch pointers
     checkCurrentTree();
 
+    // (branches for partial reading refer to the previous tree)
+    _partialReadBranches.clear();
+
     _currentTreePtr->SetMakeClass(1);
 
     _currentTreePtr->SetBranchAddress("_runNb", &_runNb, &b__runNb);
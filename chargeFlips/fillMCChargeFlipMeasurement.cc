@@ -12,6 +12,7 @@ Perform a charge flip measurement in MC
 
 // include other parts of framework
 #include "../TreeReader/interface/TreeReader.h"
+#include "../TreeReader/interface/ParallelEventLoop.h"
 #include "../Event/interface/Event.h"
 #include "../Tools/interface/systemTools.h"
 #include "../Tools/interface/stringTools.h"
@@ -28,7 +29,8 @@ void determineMCChargeFlipRate( const std::string& year,
 				const std::string& flavour, 
 				const std::string& sampleListFile, 
 				const std::string& sampleDirectory,
-				const long nEntries ){
+				const long nEntries,
+				const unsigned numberOfThreads = 1 ){
 
     // simple check on provided year identifier
     analysisTools::checkYearString( year );
@@ -45,43 +47,47 @@ void determineMCChargeFlipRate( const std::string& year,
     const std::vector< double > ptBins = {10., 30., 45., 65., 100., 200.};
     const std::vector< double > etaBins = { 0., 0.4, 0.8, 1.1, 1.4, 1.6, 1.9, 2.2, 2.5 };
 
-    // initialize 2D histogram for numerator
-    std::string numerator_name = "chargeFlipRate_numerator_" + flavour + "_" + year;
-    std::shared_ptr< TH2D > numeratorMap( 
-	new TH2D( numerator_name.c_str(), (numerator_name+"; p_{T} (GeV); |#eta|").c_str(), 
-	ptBins.size() - 1, &ptBins[0], etaBins.size() - 1, &etaBins[0] ) );
-    numeratorMap->Sumw2();
+    // make TreeReader and set the number of entries to process for each sample
+    TreeReader treeReader( sampleListFile, sampleDirectory );
+    std::vector< Sample > samples = treeReader.sampleVector();
+    ParallelEventLoop eventLoop( samples, numberOfThreads, treeReader.sampleCatalogPtr() );
+    if( nEntries>0 ){
+	for( unsigned i = 0; i < samples.size(); ++i ){
+	    eventLoop.setNumberOfEntries( i, (unsigned) nEntries );
+	}
+    }
 
-    // initialize 2D histogram for denominator
+    // initialize 2D histograms for numerator, denominator and ratio for each worker
+    // (histograms are not attached to any file, since each worker opens its own input files)
+    const bool addDirectoryStatus = TH1::AddDirectoryStatus();
+    TH1::AddDirectory( false );
+    auto make2DHistogram = [&]( const std::string& name ){
+	std::shared_ptr< TH2D > hist(
+	    new TH2D( name.c_str(), (name+"; p_{T} (GeV); |#eta|").c_str(),
+	    ptBins.size() - 1, &ptBins[0], etaBins.size() - 1, &etaBins[0] ) );
+	hist->Sumw2();
+	return hist;
+    };
+    std::string numerator_name = "chargeFlipRate_numerator_" + flavour + "_" + year;
     std::string denominator_name = "chargeFlipRate_denominator_" + flavour + "_" + year;
-    std::shared_ptr< TH2D > denominatorMap( 
-	new TH2D( denominator_name.c_str(), (denominator_name+"; p_{T} (GeV); |#eta|").c_str(), 
-	ptBins.size() - 1, &ptBins[0], etaBins.size() - 1, &etaBins[0] ) );
-    denominatorMap->Sumw2();
-
-    // initialize 2D histogram for ratio
     std::string ratio_name = "chargeFlipRate_" + flavour + "_" + year;
-    std::shared_ptr< TH2D > ratioMap(
-        new TH2D( ratio_name.c_str(), (ratio_name+"; p_{T} (GeV); |#eta|").c_str(),
-        ptBins.size() - 1, &ptBins[0], etaBins.size() - 1, &etaBins[0] ) );
-    ratioMap->Sumw2();
+    std::vector< std::shared_ptr< TH2D > > numeratorMaps;
+    std::vector< std::shared_ptr< TH2D > > denominatorMaps;
+    std::vector< std::shared_ptr< TH2D > > ratioMaps;
+    for( unsigned w = 0; w < eventLoop.numberOfThreads(); ++w ){
+	numeratorMaps.push_back( make2DHistogram( numerator_name ) );
+	denominatorMaps.push_back( make2DHistogram( denominator_name ) );
+	ratioMaps.push_back( make2DHistogram( ratio_name ) );
+    }
+    std::vector< std::vector< long unsigned > > numberOfPassingLeptons( 
+	eventLoop.numberOfThreads(), std::vector< long unsigned >( samples.size(), 0 ) );
 
-    // make TreeReader and loop over samples
-    TreeReader treeReader( sampleListFile, sampleDirectory );
-    for( unsigned i = 0; i < treeReader.numberOfSamples(); ++i ){
-        treeReader.initSample();
-    
-	// loop over entries
-	long unsigned numberOfPassingLeptons = 0;
-	long unsigned numberOfEntries = treeReader.numberOfEntries();
-	if( nEntries>0 && (unsigned)nEntries<numberOfEntries ){ 
-	    numberOfEntries = (unsigned) nEntries; 
-	}
-	std::cout << "starting loop over " << numberOfEntries << " events." << std::endl;
-        for( long unsigned entry = 0; entry < numberOfEntries; ++entry ){
+    // loop over entries of all samples
+    eventLoop.run( [&]( TreeReader& reader, const ParallelEventLoop::Task& task, const unsigned workerIndex ){
+        for( long unsigned entry = task.firstEntry; entry < task.lastEntry; ++entry ){
 
 	    // build the event
-            Event event = treeReader.buildEvent( entry );
+            Event event = reader.buildEvent( entry );
 
             // apply electron selection
 	    // arguments are: diElectron, onZ, bVeto
@@ -101,23 +107,33 @@ void determineMCChargeFlipRate( const std::string& year,
 		// (since they are matched to photons so the matched charge is 0)
                 if( lepton.matchPdgId() == 22 ) continue;
 
-		// printouts for testing
-		/*std::cout << "lepton:" << std::endl;
-		std::cout << "measured charge: " << lepton.charge() << std::endl;
-		std::cout << "matched charge: " << lepton.matchCharge() << std::endl;*/
-
                 // fill denominator histogram 
-		numberOfPassingLeptons++;
-                histogram::fillValues( denominatorMap.get(), lepton.pt(), lepton.absEta(), 1. );
+		numberOfPassingLeptons[ workerIndex ][ task.sampleIndex ]++;
+                histogram::fillValues( denominatorMaps[ workerIndex ].get(), lepton.pt(), lepton.absEta(), 1. );
     
                 //fill numerator histogram
                 if( lepton.isChargeFlip() ){
-                    histogram::fillValues( numeratorMap.get(), lepton.pt(), lepton.absEta(), 1. );
-		    histogram::fillValues( ratioMap.get(), lepton.pt(), lepton.absEta(), 1. );
+                    histogram::fillValues( numeratorMaps[ workerIndex ].get(), lepton.pt(), lepton.absEta(), 1. );
+		    histogram::fillValues( ratioMaps[ workerIndex ].get(), lepton.pt(), lepton.absEta(), 1. );
                 }
             }
         }
-	std::cout << "number of leptons passing selections: " << numberOfPassingLeptons << std::endl;
+    } );
+    for( unsigned i = 0; i < samples.size(); ++i ){
+	long unsigned numberOfPassingLeptonsInSample = 0;
+	for( const auto& counts : numberOfPassingLeptons ) numberOfPassingLeptonsInSample += counts[ i ];
+	std::cout << "number of leptons passing selections in " << samples[i].fileName();
+	std::cout << ": " << numberOfPassingLeptonsInSample << std::endl;
+    }
+
+    // merge the histograms of all workers
+    std::shared_ptr< TH2D > numeratorMap = numeratorMaps.front();
+    std::shared_ptr< TH2D > denominatorMap = denominatorMaps.front();
+    std::shared_ptr< TH2D > ratioMap = ratioMaps.front();
+    for( unsigned w = 1; w < numeratorMaps.size(); ++w ){
+	numeratorMap->Add( numeratorMaps[w].get() );
+	denominatorMap->Add( denominatorMaps[w].get() );
+	ratioMap->Add( ratioMaps[w].get() );
     }
 
     // divide numerator by denominator to get charge flip rate
@@ -142,6 +158,7 @@ void determineMCChargeFlipRate( const std::string& year,
     numeratorMap->Write();
     denominatorMap->Write();
     outputFile->Close();
+    TH1::AddDirectory( addDirectoryStatus );
 }
 
 
@@ -150,14 +167,15 @@ int main( int argc, char* argv[] ){
     std::cerr << "###starting###" << std::endl;
     // check command line arguments
     std::vector< std::string > argvStr( &argv[0], &argv[0] + argc );
-    if( !( argvStr.size() == 6 ) ){
+    if( !( argvStr.size() == 6 || argvStr.size() == 7 ) ){
         std::cerr << "ERROR: found " << argc-1 << " command line args,";
-	std::cerr << " while 5 are needed:" << std::endl;
+	std::cerr << " while 5 or 6 are needed:" << std::endl;
         std::cerr << "  - flavour (only 'electron' supported for now)" << std::endl;
 	std::cerr << "  - year" << std::endl;
 	std::cerr << "  - sample list" << std::endl;
 	std::cerr << "  - sample directory" << std::endl;
 	std::cerr << "  - number of entries" << std::endl;
+	std::cerr << "  - (optional) number of threads (default: 1)" << std::endl;
         return 1;
     }
     std::string flavour = argvStr[1];
@@ -165,9 +183,11 @@ int main( int argc, char* argv[] ){
     std::string sampleList = argvStr[3];
     std::string sampleDirectory = argvStr[4];
     long nEntries = std::stol(argvStr[5]);
+    unsigned numberOfThreads = 1;
+    if( argvStr.size() == 7 ) numberOfThreads = std::stoul(argvStr[6]);
     setTDRStyle();
     determineMCChargeFlipRate(
-	year, flavour, sampleList, sampleDirectory, nEntries);
+	year, flavour, sampleList, sampleDirectory, nEntries, numberOfThreads);
     std::cerr << "###done###" << std::endl;
     return 0;
 }
@@ -20,6 +20,8 @@ runmode = 'local'
 # (pick from 'condor' or 'local')
 nentries = 100
 # (number of entries to use per file)
+nthreads = 1
+# (number of threads per job, used to process the samples of a year in parallel)
 samplelistdirectory = os.path.abspath('sampleListsUL')
 samplelist = 'samples_chargeFlips_MC_{}.txt'
 # (see also below in loop to set the correct sample list name per flavour/year!)
@@ -46,8 +48,8 @@ for year in years:
     nsamples = samples.number()
     print('Found {} samples.'.format(nsamples))
     # make the command and add it to the list
-    command = '{} {} {} {} {} {}'.format(exe,
-              flavour, year, thissamplelist, thissampledir, nentries)
+    command = '{} {} {} {} {} {} {}'.format(exe,
+              flavour, year, thissamplelist, thissampledir, nentries, nthreads)
     cmds.append(command)
 
 # submit the commands as jobs
@@ -55,4 +57,4 @@ if( runmode=='local' ):
   for cmd in cmds: os.system(cmd)
 elif( runmode=='condor' ):
   ct.submitCommandsAsCondorCluster('cjob_fillMCChargeFlipMeasurement', cmds,
-		                   cmssw_version=CMSSW_VERSION)
+		                   cmssw_version=CMSSW_VERSION, cpus=nthreads)
@@ -10,7 +10,7 @@ import matplotlib.pyplot as plt
 sys.path.append('../Tools/python')
 import histtools as ht
 sys.path.append('../plotting/python')
-import histplotter as hp
+from plotbatch import PlotBatch
 from constantfit import fitConstant
 
 def plot_fitresult_summary( fitresults, title=None ):
@@ -66,6 +66,10 @@ else:
          if ('closurePlots_data' in f and f[-5:]=='.root') ])
 inputfiles = [os.path.abspath(f) for f in inputfiles]
 
+# collect the plots of all input files to render them in parallel at the end
+# (plots that did not change since a previous run are skipped)
+batch = PlotBatch()
+
 # loop over input files
 for f in inputfiles:
   print('now running on {}...'.format(f))
@@ -89,12 +93,12 @@ for f in inputfiles:
              '2016PreVFP':19520, '2016PostVFP':16810 }
   lumi = lumimap[year]
 
-  # load all histograms
-  histlist = ht.loadallhistograms(f)
+  # index all histograms
+  # (only the selected ones are loaded below)
+  histstore = ht.HistogramStore(f, nameparser=None)
 
   # get a list of variables
-  datahists = ht.selecthistograms(histlist, mustcontainall=['_Data'])[1]
-  names = [h.GetName() for h in datahists]
+  names = histstore.histnames(mustcontainall=['_Data'])
   variables = []
   for name in names:
     var = name.split(instancename)[0].strip('_')
@@ -109,18 +113,18 @@ for f in inputfiles:
     print('running on variable {}'.format(var))
 
     # get the histograms
-    datahists = ht.selecthistograms(histlist,
-      mustcontainall=[var+'_',instancename,'Data'])[1]
-    prompthists = ht.selecthistograms(histlist,
-      mustcontainall=[var+'_',instancename,'PromptBkg'])[1]
-    nonprompthists = ht.selecthistograms(histlist,
-      mustcontainall=[var+'_',instancename,'NonpromptBkg'])[1]
-    cfhists = ht.selecthistograms(histlist,
-      mustcontainall=[var+'_',instancename,'ChargeFlips'])[1]
-    promptcfhists = ht.selecthistograms(histlist,
-      mustcontainall=[var+'_',instancename,'PromptCF'])[1]
-    nonpromptcfhists = ht.selecthistograms(histlist,
-      mustcontainall=[var+'_',instancename,'NonpromptCF'])[1]
+    datahists = histstore.loadhistograms(
+      mustcontainall=[var+'_',instancename,'Data'])
+    prompthists = histstore.loadhistograms(
+      mustcontainall=[var+'_',instancename,'PromptBkg'])
+    nonprompthists = histstore.loadhistograms(
+      mustcontainall=[var+'_',instancename,'NonpromptBkg'])
+    cfhists = histstore.loadhistograms(
+      mustcontainall=[var+'_',instancename,'ChargeFlips'])
+    promptcfhists = histstore.loadhistograms(
+      mustcontainall=[var+'_',instancename,'PromptCF'])
+    nonpromptcfhists = histstore.loadhistograms(
+      mustcontainall=[var+'_',instancename,'NonpromptCF'])
     print('found {} histograms for data'.format(len(datahists)))
     print('found {} histograms for prompt background'.format(len(prompthists)))
     print('found {} histograms for nonprompt background'.format(len(nonprompthists)))
@@ -189,7 +193,7 @@ for f in inputfiles:
     # make plot before scaling
     figname = os.path.join(outdir,var+'_'+instancename+'_beforescaling')
     extraextrainfos = ['Before scaling']
-    hp.plotdatavsmc( figname, 
+    batch.add( 'histplotter.plotdatavsmc', figname, 
       datahist, mchists, 
       mcsysthist=cfsyst,
       colormap=colormap, labelmap=labelmap,
@@ -204,7 +208,7 @@ for f in inputfiles:
     cfsyst.Scale( sf )
     figname = os.path.join(outdir,var+'_'+instancename+'_afterscaling')
     extraextrainfos = (['After scaling','(with factor {:.2f})'.format(sf)])
-    hp.plotdatavsmc( figname, 
+    batch.add( 'histplotter.plotdatavsmc', figname, 
       datahist, mchists, 
       mcsysthist=cfsyst,
       colormap=colormap, labelmap=labelmap,
@@ -213,8 +217,13 @@ for f in inputfiles:
       extracmstext=extracmstext,
       extrainfos=extrainfos+extraextrainfos)
 
+  histstore.close()
+
   # make a summary figure of fit results
   title = 'Charge flip fit summary for {}'.format(year)
   fig,ax = plot_fitresult_summary( fitresults, title=title )
   figname = os.path.join(outdir, 'fitresult_summary.png')
   fig.savefig(figname)
+
+# make all plots
+batch.run()
@@ -40,15 +40,22 @@
 #include "Tools/src/systemTools.cc"
 #include "Tools/src/analysisTools.cc"
 #include "Tools/src/IndexFlattener.cc"
+#include "Tools/src/VariationTable.cc"
+#include "Tools/src/EventKeySet.cc"
 #include "Tools/src/Categorization.cc"
 #include "Tools/src/Sample.cc"
+#include "Tools/src/SampleCatalog.cc"
 #include "Tools/src/mergeAndRemoveOverlap.cc"
 #include "Tools/src/histogramTools.cc"
+#include "Tools/src/LookupTable2D.cc"
 #include "Tools/src/SusyScan.cc"
 #include "Tools/src/ConstantFit.cc"
 #include "Tools/src/Prescale.cc"
 #include "Tools/src/SampleCrossSections.cc"
 #include "Tools/src/QuantileBinner.cc"
+#include "Tools/src/DenseModel.cc"
+#include "Tools/src/BatchedPredictor.cc"
+#include "Tools/src/NpyColumnWriter.cc"
 #include "Tools/src/mt2.cc"
 #include "Tools/src/variableTools.cc"
 #include "Tools/src/rootFileTools.cc"
@@ -58,6 +65,7 @@
 //include TreeReader code 
 #include "TreeReader/src/TreeReader.cc"
 #include "TreeReader/src/TreeReaderErrors.cc"
+#include "TreeReader/src/ParallelEventLoop.cc"
 
 //include plotting code 
 #include "plotting/src/drawLumi.cc"
@@ -1,5 +1,6 @@
 from keras import models 
 import numpy as np
+import sys
 
 
 class kerasModel():
@@ -8,13 +9,84 @@ class kerasModel():
 
 
     #return model prediction given a list of inputs
-    def predict( self, x ):
+    #for models with a shortcut connection, the parameters (e.g. the mass splitting)
+    #are given as a second list, and are fed to the second input of the model
+    def predict( self, x, params=None ):
         x = np.asarray(x, dtype=float)
         x = x.reshape( (1, len(x)) )
+        if params is not None:
+            params = np.asarray(params, dtype=float)
+            params = params.reshape( (1, len(params)) )
+            return float( self.model.predict([x, params]) )
         return float( self.model.predict(x) )
 
 
+    #return model predictions for a batch of events
+    #the inputs (and parameters for models with a shortcut connection)
+    #are given as buffers of doubles (stored event by event),
+    #and the scores are returned as a bytearray of doubles (one per event)
+    def predictBatch( self, x, nrows, params=None ):
+        x = np.frombuffer(x, dtype=np.float64).reshape( (nrows, -1) )
+        if params is not None:
+            params = np.frombuffer(params, dtype=np.float64).reshape( (nrows, -1) )
+            scores = self.model.predict([x, params], batch_size=nrows)
+        else:
+            scores = self.model.predict(x, batch_size=nrows)
+        scores = np.ascontiguousarray( scores.reshape((nrows, -1))[:,0], dtype=np.float64 )
+        return bytearray( scores.tobytes() )
 
-if __name__ == '__main__':
-    pass
 
+#export a sequential model consisting of dense layers to a text file
+#that can be evaluated in C++ without python (see Tools/interface/DenseModel.h)
+def exportDenseModel( model_file, output_file ):
+    model = models.load_model( model_file )
+    supported_activations = ['linear', 'relu', 'elu', 'selu', 'sigmoid', 'tanh', 'softmax']
+    def activationName( layer ):
+        activation = layer.get_config()['activation']
+        if activation not in supported_activations:
+            raise Exception('ERROR in exportDenseModel: activation {} of layer {}'.format(
+                activation, layer.name)+' is not supported.')
+        return activation
+    def formatValues( values ):
+        return ' '.join( [repr(float(v)) for v in np.ravel(values)] )
+    layers = []
+    for layer in model.layers:
+        layertype = layer.__class__.__name__
+        if layertype in ['InputLayer', 'Dropout', 'AlphaDropout', 'GaussianDropout', 'GaussianNoise']:
+            continue
+        if layertype=='Dense':
+            weights, biases = layer.get_weights()
+            layers.append( 'dense {} {} {}\n{}\n{}'.format( weights.shape[0], weights.shape[1],
+                activationName(layer), formatValues(weights), formatValues(biases) ) )
+        elif layertype=='BatchNormalization':
+            # (fold the moving mean and variance into a scale and shift)
+            config = layer.get_config()
+            weights = layer.get_weights()
+            gamma = weights.pop(0) if config['scale'] else 1.
+            beta = weights.pop(0) if config['center'] else 0.
+            mean, variance = weights
+            scale = gamma / np.sqrt( variance + config['epsilon'] )
+            shift = beta - mean * scale
+            scale = scale * np.ones(len(mean))
+            layers.append( 'batchnorm {}\n{}\n{}'.format( len(mean), formatValues(scale),
+                formatValues(shift) ) )
+        elif layertype=='PReLU':
+            alphas = np.ravel( layer.get_weights()[0] )
+            layers.append( 'prelu {}\n{}'.format( len(alphas), formatValues(alphas) ) )
+        elif layertype=='Activation':
+            size = int( layer.output_shape[-1] )
+            layers.append( 'activation {} {}'.format( size, activationName(layer) ) )
+        else:
+            raise Exception('ERROR in exportDenseModel: layer {} of type {}'.format(
+                layer.name, layertype)+' is not supported.')
+    with open(output_file, 'w') as f:
+        f.write( 'densemodel {}\n'.format(len(layers)) )
+        for layer in layers: f.write( layer+'\n' )
+
+
+if __name__ == '__main__':
+    # export a keras model for evaluation in C++
+    if len(sys.argv)!=3:
+        print('use: python kerasPredict.py <keras model file> <output text file>')
+        sys.exit()
+    exportDenseModel( sys.argv[1], sys.argv[2] )
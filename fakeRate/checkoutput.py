@@ -2,24 +2,27 @@
 # check current directory for .sh.e files and scanning for failed commands #
 ############################################################################
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'../jobSubmission'))
+import logScanner as ls
 
-def check_start_done(filename,filetext):
-    nstarted = filetext.count('###starting###')
+def check_start_done(filename,counts):
+    nstarted = counts['###starting###']
     if(nstarted==0):
-        print('### WARNING: file '+fname+' contains no valid starting tag.')
+        print('### WARNING: file '+filename+' contains no valid starting tag.')
         print('             does the process write the correct tags to the error files?')
         return 1
-    ndone = filetext.count('###done###')
+    ndone = counts['###done###']
     if(nstarted==ndone): return 0
     print('found issue in file '+filename+':')
     print('   '+str(nstarted)+' commands were initiated.')
     print('   '+str(ndone)+' seem to have finished normally.')
     return 1
 
-def check_content(filename,filetext,contentlist):
+def check_content(filename,counts,contentlist):
     contains = False
     for content in contentlist:
-	if filetext.count(content)>0:
+	if counts[content]>0:
 	    contains = True
 	    print('found issue in file '+filename+':')
 	    print('   file contains the sequence '+content+' which was flagged as problematic.')
@@ -35,13 +38,13 @@ files = qsubfiles + condorfiles
 print('found '+str(len(files))+' error log files.')
 print('start scanning...')
 
+errortags = ['SysError','/var/torque/mom_priv/jobs']
+counts = ls.scanFilesAsDicts(files, ['###starting###','###done###']+errortags)
+
 nerror = 0
 for fname in files:
-    f = open(fname)
-    c = f.read()
-    f.close()
-    nerror += check_start_done(fname,c)
-    nerror += check_content(fname,c,['SysError','/var/torque/mom_priv/jobs'])
+    nerror += check_start_done(fname,counts[fname])
+    nerror += check_content(fname,counts[fname],errortags)
 
 if(nerror==0):
     print('no problematic files were found by this automated checking!')
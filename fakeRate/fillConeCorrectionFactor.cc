@@ -69,10 +69,7 @@ void determineConeCorrectionFactor(
     // make tree reader and set to correct sample
     std::cout << "creating TreeReader and setting to sample no. " << sampleIndex << std::endl;
     TreeReader treeReader( sampleList, sampleDirectory );
-    treeReader.initSample();
-    for( unsigned i=1; i<=sampleIndex; ++i){
-        treeReader.initSample();
-    }
+    treeReader.initSample( sampleIndex );
 
     // extra check on year
     if( (year=="2016" && !treeReader.is2016()) ||
@@ -5,6 +5,8 @@
 #include <string>
 #include <iterator>
 #include <fstream>
+#include <thread>
+#include <algorithm>
 
 // import tools
 #include "interface/prescaleMeasurementTools.h"
@@ -17,25 +19,29 @@ int main( int argc, char* argv[] ){
     // check command line arguments
     std::vector< std::string > argvStr( &argv[0], &argv[0] + argc );
     unsigned nargs = 7;
-    if( !( argvStr.size() == nargs+1 ) ){
+    if( !( argvStr.size() == nargs+1 || argvStr.size() == nargs+2 ) ){
         std::cerr << "found " << argc-1 << " command line args,";
 	std::cerr << " while " << nargs << " are needed." << std::endl;
         std::cerr << "- flavour" << std::endl;
 	std::cerr << "- year" << std::endl;
 	std::cerr << "- sampleDirectory" << std::endl;
 	std::cerr << "- sampleList" << std::endl;
-	std::cerr << "- sampleIndex" << std::endl;
+	std::cerr << "- sampleIndex (or 'all' to process all data samples in one job)" << std::endl;
 	std::cerr << "- isTestRun" << std::endl;
 	std::cerr << "- nEvents" << std::endl;
+	std::cerr << "- (optional) number of threads, only used for sampleIndex 'all'" << std::endl;
         return 1;
     }
     std::string year = argvStr[2];
     std::string flavor = argvStr[1];
     const std::string& sampleDirectory = argvStr[3];
     const std::string sampleList = argvStr[4];
-    const unsigned sampleIndex = std::stoi(argvStr[5]);
+    const bool processAllSamples = ( argvStr[5] == "all" );
+    const unsigned sampleIndex = processAllSamples ? 0 : std::stoi(argvStr[5]);
     const bool isTestRun = (argvStr[6]=="true" || argvStr[6]=="True");
     const unsigned long nEvents = std::stoul(argvStr[7]);
+    unsigned numberOfThreads = std::max( std::thread::hardware_concurrency(), 1u );
+    if( argvStr.size() == nargs+2 ) numberOfThreads = std::stoul(argvStr[8]);
 
     // configuration and variable definition
     const double mTLowerCut_prescaleFit = 90; // 90
@@ -81,11 +87,19 @@ int main( int argc, char* argv[] ){
 		    mTUpperCut_prescaleFit, false, false );
     prescale_filePtr->Close();
 
-    fillFakeRateMeasurementHistograms(
-	flavor, year, sampleDirectory, sampleList, sampleIndex,
-	triggerVectorMap[ year ], prescaleMap, 
-	mTUpperCut_fakeRateMeasurement, metUpperCut_fakeRateMeasurement, 
-	isTestRun, nEvents );
+    if( processAllSamples ){
+	fillFakeRateMeasurementHistogramsParallel(
+	    flavor, year, sampleDirectory, sampleList,
+	    triggerVectorMap[ year ], prescaleMap,
+	    mTUpperCut_fakeRateMeasurement, metUpperCut_fakeRateMeasurement,
+	    numberOfThreads, isTestRun, nEvents );
+    } else {
+	fillFakeRateMeasurementHistograms(
+	    flavor, year, sampleDirectory, sampleList, sampleIndex,
+	    triggerVectorMap[ year ], prescaleMap, 
+	    mTUpperCut_fakeRateMeasurement, metUpperCut_fakeRateMeasurement, 
+	    isTestRun, nEvents );
+    }
 
     std::cerr << "###done###" << std::endl;
     return 0;
@@ -10,6 +10,7 @@ from jobSubmission import submitQsubJob, initializeJobScript
 # import job submission tools for condor
 sys.path.append(os.path.abspath('../jobSubmission'))
 import condorTools as ct
+import executorTools as et
 from jobSettings import CMSSW_VERSION
 
 # set global properties
@@ -18,7 +19,7 @@ years = ['2016PreVFP','2016PostVFP','2017','2018']
 flavours = ['muon','electron']
 # (choose any combination from 'muon' and 'electron')
 runmode = 'condor'
-# (choose 'qsub', 'condor' or 'local')
+# (choose 'qsub', 'condor', 'local' or 'local-parallel')
 testrun = False
 samplelistdirectory = os.path.abspath('sampleListsUL')
 # (directory where the sample lists are)
@@ -30,6 +31,10 @@ nevents = 0
 # (use 0 for all events)
 # (note: a reweighting factor ntotal/nevents will be applied to each used event)
 # (note: ignored for data, only applicable to simulation)
+nthreads = 0
+# (number of threads per job)
+# (use 0 to submit one job per sample, as before)
+# (use a positive number to process all samples of a year/flavour in one multithreaded job)
 
 # check if executable exists
 if not os.path.exists('./fillFakeRateMeasurement'):
@@ -50,6 +55,12 @@ for year in years:
 	    for sl in sf:
 		if not sl[0] == '#': nsamples += 1
 	print('found '+str(nsamples)+' samples for '+year+' '+flavour+'s')
+	# make a single multithreaded command for all samples
+	if nthreads>0:
+	    command = './fillFakeRateMeasurement {} {} {} {} {} {} {} {}'.format(
+                            flavour,year,sampledirectory,samplelist,'all',testrun,nevents,nthreads)
+	    cmds.append(command)
+	    continue
 	# loop over samples and make commands
 	for i in range(nsamples):
 	    if( testrun and i!=0 ): continue
@@ -68,6 +79,8 @@ if(runmode=='qsub' or runmode=='local'):
 	if runmode=='qsub': submitQsubJob(script_name)
 	else: os.system('bash '+script_name)
 
-elif(runmode=='condor'):
-    ct.submitCommandsAsCondorCluster('cjob_fillFakeRateMeasurement', cmds,
-				     cmssw_version=CMSSW_VERSION)  
+elif(runmode=='condor' or runmode=='local-parallel'):
+    # (request one cpu per thread for multithreaded jobs)
+    cpus = nthreads if nthreads>0 else 1
+    et.submitCommandsAsCluster('cjob_fillFakeRateMeasurement', cmds,
+				runmode=runmode, cmssw_version=CMSSW_VERSION, cpus=cpus)
@@ -55,12 +55,12 @@ std::string frMapFile( const std::string& flavor, const std::string& year,
     return file_name;
 }
 
-std::shared_ptr< TH2D > readFRMap(  const std::string& flavor, 
-				    const std::string& year,
-				    const bool isMCFRMap,
-				    const bool use_mT ){
+LookupTable2D readFRTable( const std::string& flavor, 
+			   const std::string& year,
+			   const bool isMCFRMap,
+			   const bool use_mT ){
     std::string pathToFile = frMapFile( flavor, year, isMCFRMap, use_mT );
-    return readFakeRateTools::readFRMap( pathToFile, flavor, year );
+    return readFakeRateTools::readFRTable( pathToFile, flavor, year );
 }
 
 bool passClosureTestEventSelection( Event& event, const bool requireMuon = false, 
@@ -174,8 +174,9 @@ int main( int argc, char* argv[] ){
     }
 
     // read fake-rate map corresponding to this year and flavor 
-    std::shared_ptr< TH2D > fakeRateMap_muon = readFRMap( "muon", year, isMCFR, use_mT );
-    std::shared_ptr< TH2D > fakeRateMap_electron = readFRMap( "electron", year, isMCFR, use_mT );
+    // (as lookup tables, which are faster to evaluate than the histograms)
+    const LookupTable2D fakeRateMap_muon = readFRTable( "muon", year, isMCFR, use_mT );
+    const LookupTable2D fakeRateMap_electron = readFRTable( "electron", year, isMCFR, use_mT );
 
     // make a TreeReader instance
     TreeReader treeReader( sampleListFile, sampleDirectory );
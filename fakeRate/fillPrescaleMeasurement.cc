@@ -5,6 +5,8 @@
 #include <string>
 #include <iterator>
 #include <fstream>
+#include <thread>
+#include <algorithm>
 
 // import framework
 #include "../plotting/tdrStyle.h"
@@ -19,15 +21,16 @@ int main( int argc, char* argv[] ){
     // check number of command line arguments
     std::vector< std::string > argvStr( &argv[0], &argv[0] + argc );
     unsigned nargs = 6;
-    if( !( argvStr.size() == nargs+1 ) ){
+    if( !( argvStr.size() == nargs+1 || argvStr.size() == nargs+2 ) ){
         std::cerr << "found " << argc-1 << " command line args,";
 	std::cerr << " while " << nargs << " are needed:" << std::endl;
         std::cerr << "- year" << std::endl;
 	std::cerr << "- sampleDirectory" << std::endl;
 	std::cerr << "- sampleList" << std::endl;
-	std::cerr << "- sampleIndex" << std::endl;
+	std::cerr << "- sampleIndex (or 'all' to process all samples in one job)" << std::endl;
 	std::cerr << "- isTestRun" << std::endl;
 	std::cerr << "- nEvents" << std::endl;
+	std::cerr << "- (optional) number of threads, only used for sampleIndex 'all'" << std::endl;
         return 1;
     }
 
@@ -35,9 +38,12 @@ int main( int argc, char* argv[] ){
     std::string year = argvStr[1];
     std::string& sampleDirectory = argvStr[2];
     std::string& sampleList = argvStr[3];
-    const unsigned sampleIndex = std::stoi(argvStr[4]);
+    const bool processAllSamples = ( argvStr[4] == "all" );
+    const unsigned sampleIndex = processAllSamples ? 0 : std::stoi(argvStr[4]);
     const bool isTestRun = (argvStr[5]=="true" || argvStr[5]=="True");
     const unsigned long nEvents = std::stoul(argvStr[6]);
+    unsigned numberOfThreads = std::max( std::thread::hardware_concurrency(), 1u );
+    if( argvStr.size() == nargs+2 ) numberOfThreads = std::stoul(argvStr[7]);
     
     // define and set configuration variables
     const double metLowerCut_prescaleMeasurement = 40;
@@ -72,11 +78,19 @@ int main( int argc, char* argv[] ){
 	} ) }
     };
 
-    fillPrescaleMeasurementHistograms(year, sampleDirectory, sampleList, sampleIndex, 
+    if( processAllSamples ){
+	fillPrescaleMeasurementHistogramsParallel(year, sampleDirectory, sampleList,
+					numberOfThreads, isTestRun, nEvents,
+					triggerVectorMap[ year ], use_mT,
+					metLowerCut_prescaleMeasurement,
+					mTLowerCut_prescaleMeasurement );
+    } else {
+	fillPrescaleMeasurementHistograms(year, sampleDirectory, sampleList, sampleIndex, 
 					isTestRun, nEvents,
 					triggerVectorMap[ year ], use_mT, 
 					metLowerCut_prescaleMeasurement, 
 					mTLowerCut_prescaleMeasurement );
+    }
     std::cerr << "###done###" << std::endl;
     return 0;
 }
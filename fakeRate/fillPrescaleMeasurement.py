@@ -30,6 +30,10 @@ nevents = 0
 # (use 0 for all events)
 # (note: a reweighting factor ntotal/nevents will be applied to each used event)
 # (note: ignored for data, only applicable to simulation)
+nthreads = 0
+# number of threads per job
+# (use 0 to submit one job per sample)
+# (use a positive number to process all samples of a year in one multithreaded job)
 
 # check if executable exists
 if not os.path.exists('./fillPrescaleMeasurement'):
@@ -49,6 +53,12 @@ for year in years:
 	for sl in sf: 
 	    if not sl[0] == '#': nsamples += 1
     print('found '+str(nsamples)+' samples for '+year)
+    # make a single multithreaded command for all samples
+    if nthreads>0:
+	command = './fillPrescaleMeasurement {} {} {} {} {} {} {}'.format(
+                        year, sampledirectory, samplelist, 'all', testrun, nevents, nthreads)
+	cmds.append(command)
+	continue
     # loop over samples
     for i in range(nsamples):
 	if( testrun and i!=0 ): continue
@@ -68,5 +78,7 @@ if( runmode=='qsub' or runmode=='local' ):
 	else: os.system('bash '+script_name)
 
 if( runmode=='condor' ):
+    # (request one cpu per thread for multithreaded jobs)
+    cpus = nthreads if nthreads>0 else 1
     ct.submitCommandsAsCondorCluster('cjob_fillPrescaleMeasurement', cmds,
-                                     cmssw_version=CMSSW_VERSION)
+                                     cmssw_version=CMSSW_VERSION, cpus=cpus)
@@ -73,10 +73,7 @@ void fillTuneFOSelection( const std::string& leptonFlavor, const std::string& ye
     // create TreeReader and set to right sample
     std::cout << "initializing TreeReader and setting to sample no. " << sampleIndex << std::endl;
     TreeReader treeReader( sampleList, sampleDirectory );
-    treeReader.initSample();
-    for( unsigned i = 1; i <= sampleIndex; ++i ){
-        treeReader.initSample();
-    }
+    treeReader.initSample( sampleIndex );
 
     // loop over events in sample
     long unsigned nentries = treeReader.numberOfEntries();
@@ -35,6 +35,8 @@ fitmethod = 'subtraction'
 # but input plots are made if doprefitplots is True!)
 doprefitplots = False
 # (set to True to create plots of input histograms before subtraction or template fit)
+templatefit_nworkers = 1
+# (number of bins to fit in parallel in case of 'templatefit')
 
 # hadd files if needed
 # note that the subfiles are assumed to be in a folder named FakeRateMeasurementSubFiles
@@ -175,8 +177,8 @@ for year in years:
 	    frmapdir = 'fakeRateMaps'
 	    if not os.path.exists(frmapdir): os.makedirs(frmapdir)
 	    var = 'mT' if use_mT else 'met'
-	    command = 'python fitFakeRateMeasurementTemplateFit.py {} {} {} {}'.format(
-			    var,flavour,year,frmapdir)
+	    command = 'python fitFakeRateMeasurementTemplateFit.py {} {} {} {} {}'.format(
+			    var,flavour,year,frmapdir,templatefit_nworkers)
 	    cmds.append(command)
 	### method 3: template fits using simple chi2 fit
 	elif fitmethod=='chi2fit':
@@ -16,6 +16,7 @@ import matplotlib.pyplot as plt
 # import local tools
 sys.path.append('../Tools/python')
 import histtools as ht
+import lookuptables as lut
 sys.path.append('../plotting/python')
 import histplotter as hp
 import hist2dplotter as h2dp
@@ -42,6 +43,203 @@ def calcchi2(obs, exp, std):
     return (chi2, npoints)
 
 
+def calcchi2batch(poivals, obs, sig, sig_std, bkg, bkg_std):
+    ### calculate the chi2 test statistic for many signal strengths and bins at once
+    # input arguments:
+    # - poivals: array of signal strength values, 
+    #   of shape (nbins_map, npoints) or broadcastable to it (e.g. (npoints,))
+    # - obs, sig, sig_std, bkg, bkg_std: arrays of shape (nbins_map, nbins_var)
+    # returns:
+    # an array of shape (nbins_map, npoints) with chi2 values
+    # note: points with zero error are not taken into account (see calcchi2)
+    poivals = np.asarray(poivals, dtype=float)
+    poi = poivals[...,np.newaxis]
+    exp = bkg[:,np.newaxis,:] + poi*sig[:,np.newaxis,:]
+    var = (obs[:,np.newaxis,:] + np.power(poi*sig_std[:,np.newaxis,:],2)
+            + np.power(bkg_std[:,np.newaxis,:],2))
+    valid = (var>0)
+    pulls = np.divide(np.where(valid, obs[:,np.newaxis,:]-exp, 0.),
+                      np.sqrt(np.where(valid, var, 1.)))
+    return np.sum(np.power(pulls,2), axis=-1)
+
+
+def _goldensection(func, low, high, niterations):
+    ### vectorized golden section search for the minimum of func in [low, high]
+    # input arguments:
+    # - func: function mapping an array of shape (n,) to an array of shape (n,)
+    # - low, high: arrays of shape (n,) defining the brackets
+    invphi = (np.sqrt(5.)-1.)/2.
+    a = np.array(low, dtype=float)
+    b = np.array(high, dtype=float)
+    c = b - invphi*(b-a)
+    d = a + invphi*(b-a)
+    fc = func(c)
+    fd = func(d)
+    for i in range(niterations):
+        # where f(c)<f(d), the minimum is in [a,d], else in [c,b]
+        left = (fc<fd)
+        newa = np.where(left, a, c)
+        newb = np.where(left, d, b)
+        newc = np.where(left, newb - invphi*(newb-newa), d)
+        newd = np.where(left, c, newa + invphi*(newb-newa))
+        # only one new function evaluation per iteration
+        fnew = func(np.where(left, newc, newd))
+        newfc = np.where(left, fnew, fd)
+        newfd = np.where(left, fc, fnew)
+        (a, b, c, d, fc, fd) = (newa, newb, newc, newd, newfc, newfd)
+    return (a+b)/2.
+
+
+def _bisection(func, low, high, niterations):
+    ### vectorized bisection for the root of func in [low, high]
+    # note: func(low) and func(high) are assumed to have opposite sign
+    #       (where this is not the case, the result is meaningless but finite)
+    a = np.array(low, dtype=float)
+    b = np.array(high, dtype=float)
+    fa = func(a)
+    for i in range(niterations):
+        m = (a+b)/2.
+        fm = func(m)
+        sameside = (np.sign(fm)==np.sign(fa))
+        a = np.where(sameside, m, a)
+        fa = np.where(sameside, fm, fa)
+        b = np.where(sameside, b, m)
+    return (a+b)/2.
+
+
+def chi2fitbatch(obs, sig, sig_std, bkg=None, bkg_std=None,
+                 poirange=(0,3), nsteps=301, niterations=60):
+    ### perform chi2 fits for a single signal strength POI in many bins at once
+    # input arguments:
+    # - obs, sig, sig_std, bkg, bkg_std: see chi2fit,
+    #   but with shape (nbins_map, nbins_var) (i.e. one row per fit)
+    # - poirange: scanning range for signal strength
+    # - nsteps: number of grid points for the initial scan;
+    #   the minimum and the crossings with minimum+1 are subsequently refined
+    #   with a bracketed minimizer and root finder, so the result is not limited
+    #   to the grid precision.
+    # - niterations: number of iterations for the refinement
+    # returns:
+    # a dict with arrays of shape (nbins_map,) for the keys
+    # 'bestpoi', 'uperror', 'downerror', 'minchi2', 'ndof' and 'atedge',
+    # and the scanned grid in 'poivals' (shape (nsteps,)) 
+    # and 'chi2vals' (shape (nbins_map, nsteps)).
+    obs = np.atleast_2d(np.asarray(obs, dtype=float))
+    sig = np.atleast_2d(np.asarray(sig, dtype=float))
+    sig_std = np.atleast_2d(np.asarray(sig_std, dtype=float))
+    if bkg is None: bkg = np.zeros(sig.shape)
+    if bkg_std is None: bkg_std = np.zeros(sig.shape)
+    bkg = np.atleast_2d(np.asarray(bkg, dtype=float))
+    bkg_std = np.atleast_2d(np.asarray(bkg_std, dtype=float))
+    nfits = obs.shape[0]
+    rows = np.arange(nfits)
+    def chi2at(poi):
+        # chi2 for one poi value per fit
+        return calcchi2batch(poi[:,np.newaxis], obs, sig, sig_std, bkg, bkg_std)[:,0]
+    # determine effective number of degrees of freedom (assume independent of poi)
+    std = np.sqrt(obs + np.power(sig_std,2) + np.power(bkg_std,2))
+    ndof = np.count_nonzero(std, axis=1) - 1
+    # scan the full grid in one go
+    poivals = np.linspace(poirange[0], poirange[1], num=nsteps)
+    chi2vals = calcchi2batch(poivals, obs, sig, sig_std, bkg, bkg_std)
+    argmin = np.argmin(chi2vals, axis=1)
+    atedge = ((argmin==0) | (argmin==nsteps-1))
+    # refine the minimum within the neighbouring grid points
+    low = poivals[np.maximum(argmin-1,0)]
+    high = poivals[np.minimum(argmin+1,nsteps-1)]
+    bestpoi = _goldensection(chi2at, low, high, niterations)
+    minchi2 = chi2at(bestpoi)
+    # (keep grid minimum in case refinement would be worse, e.g. at the edges)
+    gridmin = chi2vals[rows,argmin]
+    usegrid = (gridmin<minchi2)
+    bestpoi = np.where(usegrid, poivals[argmin], bestpoi)
+    minchi2 = np.where(usegrid, gridmin, minchi2)
+    # find the crossings with the minchi2+1 contour:
+    # first on the grid, then refine with a root finder
+    above = (chi2vals>minchi2[:,np.newaxis]+1)
+    indices = np.arange(nsteps)[np.newaxis,:]
+    # upper crossing: first grid point above the contour to the right of the minimum
+    right = above & (indices>argmin[:,np.newaxis])
+    hasup = np.any(right, axis=1)
+    upidx = np.where(hasup, np.argmax(right, axis=1), nsteps-1)
+    # lower crossing: last grid point above the contour to the left of the minimum
+    left = above & (indices<argmin[:,np.newaxis])
+    hasdown = np.any(left, axis=1)
+    downidx = np.where(hasdown, nsteps-1-np.argmax(left[:,::-1], axis=1), 0)
+    def contour(poi): return chi2at(poi)-minchi2-1
+    upcross = _bisection(contour, np.maximum(poivals[np.maximum(upidx-1,0)],bestpoi),
+                         poivals[upidx], niterations)
+    downcross = _bisection(contour, poivals[downidx],
+                           np.minimum(poivals[np.minimum(downidx+1,nsteps-1)],bestpoi),
+                           niterations)
+    upcross = np.where(hasup, upcross, poivals[-1])
+    downcross = np.where(hasdown, downcross, poivals[0])
+    return ({ 'bestpoi':bestpoi, 'uperror':upcross-bestpoi, 'downerror':bestpoi-downcross,
+              'minchi2':minchi2, 'ndof':ndof, 'atedge':atedge,
+              'poivals':poivals, 'chi2vals':chi2vals })
+
+
+def plotchi2profile(figname, poivals, chi2vals, bestpoi, uperror, downerror,
+                    minchi2, ndof):
+    ### plot the chi2 profile of a fit
+    # input arguments:
+    # - figname: name of figure to make
+    # - poivals, chi2vals: scanned signal strengths and corresponding chi2 values
+    # - other arguments: fit results (see chi2fitbatch)
+    # also find minimum for normalized chi2 (only for goodness-of-fit estimate)
+    minnormchi2 = minchi2/ndof
+    fig,ax = plt.subplots()
+    #ylims = (minchi2/2, minchi2*5) # for log scale
+    ylims = (minchi2-0.5, minchi2+7.5) # for lin scale
+    #xlims = (poivals[0], poivals[-1]) # full range
+    xlims = (max(bestpoi-5*downerror,poivals[0]),min(bestpoi+5*uperror,poivals[-1])) # subrange
+    ytextoffset = (ylims[1]-ylims[0])*0.03
+    xtextoffset = (xlims[1]-xlims[0])*0.03
+    # basic plot
+    ax.plot(poivals, chi2vals, color='b', label='$\chi^2$ test statistic')
+    # horizontal lines and labels
+    ax.hlines(minchi2, xlims[0], xlims[1], colors='g')
+    ax.text(xlims[0]+xtextoffset, minchi2, 'minimum', color='g')
+    ax.hlines(minchi2+1, xlims[0], xlims[1], colors='r')
+    ax.text(xlims[0]+xtextoffset, minchi2+1, '$\pm 1\sigma$', color='r')
+    ax.hlines(minchi2+4, xlims[0], xlims[1], colors='k')
+    ax.text(xlims[0]+xtextoffset, minchi2+4, '$\pm 2\sigma$')
+    # vertical line and patch
+    area = mpl.patches.Rectangle( (bestpoi-downerror,ylims[0]), 
+            downerror+uperror, ylims[1]-ylims[0], color='r', alpha=0.2 )
+    ax.add_patch(area)
+    ax.vlines(bestpoi, ylims[0], ylims[1], colors='g', linestyles='dashed')
+    # other properties
+    ax.set_ylabel('$\chi^2$')
+    #ax.set_yscale('log')
+    ax.set_ylim(ylims)
+    ax.set_xlabel('Signal strength')
+    ax.set_xlim(xlims)
+    # write fit result
+    poitext = 'Fit result: r = {:.2f} + {:.2f} - {:.2f}'.format(
+                bestpoi, uperror, downerror)
+    txt = ax.text(0.05, 0.95, poitext,
+            horizontalalignment='left', verticalalignment='top',
+            transform=ax.transAxes)
+    txt.set_bbox(dict(facecolor='white', 
+                      alpha=0.8, 
+                      edgecolor='black'))
+    # write goodness-of-fit
+    goftext = 'Goodness of fit:\n'
+    goftext += '$\chi^2$/ndof = {:.2f}\n'.format(minnormchi2)
+    goftext += 'ndof = {}'.format(ndof)
+    txt = ax.text(0.05, 0.85, goftext,
+            horizontalalignment='left', verticalalignment='top',
+            transform=ax.transAxes)
+    txt.set_bbox(dict(facecolor='white',             
+                      alpha=0.8,             
+                      edgecolor='black'))
+    ax.legend()
+    figname = os.path.splitext(figname)[0]+'.png'
+    fig.savefig(figname)
+    plt.close(fig)
+
+
 def chi2fit(obs, sig, sig_std, bkg=None, bkg_std=None, 
 	    poirange=(0,3), nsteps=301, figname=None):
     ### perform a chi2 fit for a single signal strength POI
@@ -52,101 +250,28 @@ def chi2fit(obs, sig, sig_std, bkg=None, bkg_std=None,
     # - bkg: array of background (defaults to zero-array)
     # - bkg_std: array of (expected) error on background (defaults to zero-array)
     # - poirange: scanning range for signal strength
-    # - nsteps: scanning step for signal strength
+    # - nsteps: number of grid points for the initial scan (see chi2fitbatch)
     # - figname: name of figure to make (default: no plotting)
-    poivals = np.linspace(poirange[0], poirange[1], num=nsteps)
-    chi2vals = np.zeros(nsteps)
-    if bkg is None: bkg = np.zeros(len(sig))
-    if bkg_std is None: bkg_std = np.zeros(len(sig))
-    # determine effective number of degrees of freedom (assume independent of poi)
-    exp = bkg+sig
-    std = np.sqrt(obs + np.power(sig_std,2) + np.power(bkg_std,2))
-    ndof = calcchi2(obs, exp, std)[1] - 1
-    # loop over allowed values of poi and calculate chi2
-    for i in range(nsteps):
-	# recalculate expectation
-	exp = bkg + poivals[i]*sig
-	# recalculate total error
-	std = np.sqrt(obs + np.power(poivals[i]*sig_std,2) + np.power(bkg_std,2))
-	# calculate chi2
-	chi2vals[i] = calcchi2(obs, exp, std)[0]
-    # find minimum
-    argmin = np.argmin(chi2vals)
-    minchi2 = chi2vals[argmin]
-    bestpoi = poivals[argmin]
-    # also find minimum in log scale (only for plotting)
-    minlogchi2 = np.log(minchi2)
-    # also find minimum for normalized chi2 (only for goodness-of-fit estimate)
-    minnormchi2 = minchi2/ndof
+    res = chi2fitbatch(obs, sig, sig_std, bkg=bkg, bkg_std=bkg_std,
+                       poirange=poirange, nsteps=nsteps)
+    bestpoi = res['bestpoi'][0]
+    uperror = res['uperror'][0]
+    downerror = res['downerror'][0]
     # check if minimum is pathologic
-    if( argmin==0 or argmin==nsteps-1 ):
+    if res['atedge'][0]:
 	print('WARNING in chi2fit: minimum chi2 value is at the edge of scanning range.')
-    # determine errors by crossing with minchi2+1 contour
-    stdinds = np.nonzero(chi2vals<=minchi2+1)[0]
-    uperror = poivals[stdinds[-1]]-bestpoi
-    downerror = bestpoi-poivals[stdinds[0]]
     # make a plot
     if figname is not None:
-	fig,ax = plt.subplots()
-	#ylims = (minchi2/2, minchi2*5) # for log scale
-	ylims = (minchi2-0.5, minchi2+7.5) # for lin scale
-	#xlims = (poivals[0], poivals[-1]) # full range
-	xlims = (max(bestpoi-5*downerror,poivals[0]),min(bestpoi+5*uperror,poivals[-1])) # subrange
-	ytextoffset = (ylims[1]-ylims[0])*0.03
-	xtextoffset = (xlims[1]-xlims[0])*0.03
-	# basic plot
-	ax.plot(poivals, chi2vals, color='b', label='$\chi^2$ test statistic')
-	# horizontal lines and labels
-	ax.hlines(minchi2, xlims[0], xlims[1], colors='g')
-	ax.text(xlims[0]+xtextoffset, minchi2, 'minimum', color='g')
-	ax.hlines(minchi2+1, xlims[0], xlims[1], colors='r')
-	ax.text(xlims[0]+xtextoffset, minchi2+1, '$\pm 1\sigma$', color='r')
-	ax.hlines(minchi2+4, xlims[0], xlims[1], colors='k')
-	ax.text(xlims[0]+xtextoffset, minchi2+4, '$\pm 2\sigma$')
-	# vertical line and patch
-	area = mpl.patches.Rectangle( (bestpoi-downerror,ylims[0]), 
-		downerror+uperror, ylims[1]-ylims[0], color='r', alpha=0.2 )
-	ax.add_patch(area)
-	ax.vlines(bestpoi, ylims[0], ylims[1], colors='g', linestyles='dashed')
-	# other properties
-	ax.set_ylabel('$\chi^2$')
-	#ax.set_yscale('log')
-	ax.set_ylim(ylims)
-	ax.set_xlabel('Signal strength')
-	ax.set_xlim(xlims)
-	# write fit result
-	poitext = 'Fit result: r = {:.2f} + {:.2f} - {:.2f}'.format(
-		    bestpoi, uperror, downerror)
-	txt = ax.text(0.05, 0.95, poitext,
-		horizontalalignment='left', verticalalignment='top',
-		transform=ax.transAxes)
-	txt.set_bbox(dict(facecolor='white', 
-                          alpha=0.8, 
-                          edgecolor='black'))
-	# write goodness-of-fit
-	goftext = 'Goodness of fit:\n'
-	goftext += '$\chi^2$/ndof = {:.2f}\n'.format(minnormchi2)
-	goftext += 'ndof = {}'.format(ndof)
-	txt = ax.text(0.05, 0.85, goftext,
-                horizontalalignment='left', verticalalignment='top',
-		transform=ax.transAxes)
-	txt.set_bbox(dict(facecolor='white',             
-                          alpha=0.8,             
-                          edgecolor='black'))
-	ax.legend()
-	figname = os.path.splitext(figname)[0]+'.png'
-	fig.savefig(figname)
+        plotchi2profile(figname, res['poivals'], res['chi2vals'][0],
+                        bestpoi, uperror, downerror, res['minchi2'][0], res['ndof'][0])
     return (bestpoi, uperror, downerror)
     
     
 def readroothist(hist):
     ### read a root histogram into a numpy array
-    nbins = hist.GetNbinsX()
-    val = np.zeros(nbins)
-    err = np.zeros(nbins)
-    for i in range(1,nbins+1):
-	val[i-1] = hist.GetBinContent(i)
-	err[i-1] = hist.GetBinError(i)
+    # (under- and overflow bins are not included)
+    val = ht.histcontents(hist)[1:-1]
+    err = ht.histerrors(hist)[1:-1]
     return (val,err)
     
 
@@ -175,9 +300,13 @@ if __name__=='__main__':
     if not os.path.exists(workingdir):
 	os.makedirs(workingdir)
 
+    # index the input file once
+    # (instead of reading all histograms again for each bin)
+    histstore = ht.HistogramStore(inputfile)
+
     # read pt and eta bins and ranges
     basehistname = 'data_numerator_'+var+'_'+year+'_'+flavour
-    (ptbins,etabins) = frt.readptetabins(inputfile,basehistname)
+    (ptbins,etabins) = frt.readptetabins(histstore,basehistname)
     ptrange = copy(ptbins); ptrange.append(100)
     etarange = copy(etabins); etarange.append(2.5)
     if(flavour=='muon'): etarange[-1]=2.4
@@ -217,6 +346,7 @@ if __name__=='__main__':
     # loop over pt and eta bins
     print('running on file {}'.format(inputfile))
     print('start looping over pt and eta bins...')
+    fitbins = []
     for ptbinnb,ptbin in enumerate(ptbins):
 	for etabinnb,etabin in enumerate(etabins):
 	    #if( ptbinnb!=2 or etabinnb!=0 ): continue # for testing on small number of bins
@@ -228,7 +358,7 @@ if __name__=='__main__':
 		### get the correct histograms and make a prefit plot
 		thisbin = ftype+'_'+var+'_'+year+'_'+flavour+'_pT_'+ptbinstr+'_eta_'+etabinstr
 		# get histograms
-		histograms = frt.loadselectedhistograms(inputfile,
+		histograms = frt.loadselectedhistograms(histstore,
                                 ftype, var, year, flavour, ptbin, etabin)
                 datahist = histograms['datahist']
 		prompthists = histograms['prompthists']
@@ -277,14 +407,48 @@ if __name__=='__main__':
 		datahist.Write()
 		f.Close()
 		prefitnp = nonprompthist.Integral()
-		
-		### run chi2 fit
-		(obs, _) = readroothist( datahist )
-		(sig, sig_std) = readroothist( nonprompthist )
-		(bkg, bkg_std) = readroothist( prompthist )
+		# keep track of the histograms for the fit and postfit processing
+		fitbins.append( {'ftype':ftype, 'ptbin':ptbin, 'etabin':etabin, 
+				 'thisbin':thisbin, 'prefitnp':prefitnp,
+				 'datahist':datahist, 'prompthist':prompthist,
+				 'nonprompthist':nonprompthist} )
+
+    ### run chi2 fits for all bins at once
+    print('running chi2 fits for {} bins...'.format(len(fitbins)))
+    (obs, sig, sig_std, bkg, bkg_std) = ([], [], [], [], [])
+    for fitbin in fitbins:
+	obs.append( readroothist(fitbin['datahist'])[0] )
+	(val,err) = readroothist( fitbin['nonprompthist'] )
+	sig.append( val ); sig_std.append( err )
+	(val,err) = readroothist( fitbin['prompthist'] )
+	bkg.append( val ); bkg_std.append( err )
+    poirange = (0,5)
+    fitresults = chi2fitbatch( np.array(obs), np.array(sig), np.array(sig_std),
+				bkg=np.array(bkg), bkg_std=np.array(bkg_std),
+				poirange=poirange, nsteps=1001 )
+
+    # loop over fitted bins
+    for fitidx,fitbin in enumerate(fitbins):
+		ftype = fitbin['ftype']
+		ptbin = fitbin['ptbin']
+		etabin = fitbin['etabin']
+		thisbin = fitbin['thisbin']
+		prefitnp = fitbin['prefitnp']
+		datahist = fitbin['datahist']
+		prompthist = fitbin['prompthist']
+		nonprompthist = fitbin['nonprompthist']
+		print('   bin {}'.format(thisbin))
+
+		### get chi2 fit results
+		r = fitresults['bestpoi'][fitidx]
+		uperror = fitresults['uperror'][fitidx]
+		downerror = fitresults['downerror'][fitidx]
+		if fitresults['atedge'][fitidx]:
+		    print('WARNING in chi2fit: minimum chi2 value is at the edge of scanning range.')
 		figname = thisbin+'_chi2profile'
-		(r,uperror,downerror) = chi2fit(obs, sig, sig_std, bkg=bkg, bkg_std=bkg_std,
-					    poirange=(0,5), nsteps=1001, figname=figname)
+		plotchi2profile(figname, fitresults['poivals'], fitresults['chi2vals'][fitidx],
+				r, uperror, downerror, fitresults['minchi2'][fitidx],
+				fitresults['ndof'][fitidx])
 		print('measured signal strength: {} + {} - {}'.format(r,uperror,downerror))
 
 		### process results
@@ -339,18 +503,15 @@ if __name__=='__main__':
     denomrmap.Write("signalstrengths_denominator")
     f.Close()
     title = 'Signal strengths for {} {}s numerator'.format(year, flavour)
-    h2dp.plot2dhistogram( numrmap, rmapfile.replace('.root','_numerator.pdf'), histtitle=title,
-			    drawoptions='col0ztexte', cmin=0.5, cmax=1.5 )
-    h2dp.plot2dhistogram( numrmap, rmapfile.replace('.root','_numerator.png'), histtitle=title,
-			    drawoptions='col0ztexte', cmin=0.5, cmax=1.5 )
+    h2dp.plot2dhistogram( numrmap, rmapfile.replace('.root','_numerator'), histtitle=title,
+			    outfmts=['.pdf','.png'], drawoptions='col0ztexte', cmin=0.5, cmax=1.5 )
     title = 'Signal strengths for {} {}s denominator'.format(year, flavour)
-    h2dp.plot2dhistogram( denomrmap, rmapfile.replace('.root','_denominator.pdf'), histtitle=title,
-			    drawoptions='col0ztexte', cmin=0.5, cmax=1.5 )
-    h2dp.plot2dhistogram( denomrmap, rmapfile.replace('.root','_denominator.png'), histtitle=title,
-			    drawoptions='col0ztexte', cmin=0.5, cmax=1.5 )
+    h2dp.plot2dhistogram( denomrmap, rmapfile.replace('.root','_denominator'), histtitle=title,
+			    outfmts=['.pdf','.png'], drawoptions='col0ztexte', cmin=0.5, cmax=1.5 )
 
     # move back to main directory
     os.chdir(cwd)
+    histstore.close()
 
     ### make fake rate map
     frmap = numyieldmap.Clone()
@@ -360,7 +521,9 @@ if __name__=='__main__':
     f = ROOT.TFile.Open(frmapfile,'recreate')
     frmap.Write("fakeRate_" + flavour + "_" + year)
     f.Close()
+    # also export the map as a numpy lookup table for use in python scripts
+    lut.exportmaps(frmapfile)
     title = 'Fake rate map for {} {}s'.format(year, flavour)
-    h2dp.plot2dhistogram( frmap, frmapfile.replace('.root','.pdf'), histtitle=title )
-    h2dp.plot2dhistogram( frmap, frmapfile.replace('.root','.png'), histtitle=title )
+    h2dp.plot2dhistogram( frmap, frmapfile.replace('.root',''), histtitle=title,
+			  outfmts=['.pdf','.png'] )
     sys.stderr.write('###done###\n')
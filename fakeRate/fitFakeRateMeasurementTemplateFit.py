@@ -4,6 +4,7 @@
 
 import sys
 import os
+import multiprocessing as mp
 import ROOT
 from array import array
 from copy import copy
@@ -15,9 +16,10 @@ from jobSettings import CMSSW_VERSION
 # import local tools
 sys.path.append('../Tools/python')
 import histtools as ht
+import lookuptables as lut
+import combineresults as cr
 sys.path.append('../plotting/python')
-import histplotter as hp
-import hist2dplotter as h2dp
+from plotbatch import PlotBatch
 sys.path.append('python')
 import fakeRateMeasurementTools as frt
 
@@ -150,12 +152,14 @@ def makedatacard(inputfile, datacardname, ftype, variable, year, flavour, pt, et
     f.Close()
     return initialsignal
 
-def addcombinecommands(script, datacard, impactfig=''):
+def addcombinecommands(script, datacard, impactfig='', strategy=0, robustfit=True):
     ### add combine commands for a given datacard to a given script
     # input arguments:
     # - script: name of executable script
     # - datacard: name of datacard
     # - impactfig: name of impact plot file (default: do not make impact plot)
+    # - strategy: default minimizer strategy for the fit
+    # - robustfit: whether to use the --robustFit option for the fit
 
     # make workspace
     script.write('text2workspace.py '+datacard+'\n')
@@ -171,8 +175,8 @@ def addcombinecommands(script, datacard, impactfig=''):
     # run FitDiagnostics to compute signal strength
     ss_command = 'combine -M FitDiagnostics '+workspace+' -n '+name
     ss_command += ' --saveShapes --saveWithUncertainties'
-    ss_command += ' --cminDefaultMinimizerStrategy 0'
-    ss_command += ' --robustFit=1'
+    ss_command += ' --cminDefaultMinimizerStrategy {}'.format(strategy)
+    if robustfit: ss_command += ' --robustFit=1'
     ss_command += ' --rMin 0 --rMax 3'
     script.write(ss_command+' > '+ss_obs_outfile+' 2> '+ss_obs_outfile+'\n')
 
@@ -214,20 +218,212 @@ def readr(filename):
     return (float(r),float(uperror),float(downerror))
 
 
+# fit options to try in case of failed fits, in order
+# (the first entry corresponds to the default settings)
+fitoptions = ([ {'strategy':0, 'robustfit':True},
+                {'strategy':1, 'robustfit':True},
+                {'strategy':2, 'robustfit':True},
+                {'strategy':1, 'robustfit':False} ])
+
+def getlumi(year):
+    ### help function for plotting
+    lumimap = {'all':137600, '2016':36300, '2017':41500, '2018':59700,
+                '2016PreVFP':19520, '2016PostVFP':16810, 
+                '2016Merged':36300 }
+    return lumimap[year]
+
+def plotbin(batch, figname, datahist, prompthist, nonprompthist, task, stage):
+    ### add a prefit or postfit plot for a given bin to a batch of plots
+    # input arguments:
+    # - batch: plotbatch.PlotBatch to add the plot to
+    # - figname: name of the figure to make
+    # - datahist, prompthist, nonprompthist: histograms to plot
+    # - task: dict with bin properties (see preparebin)
+    # - stage: either "prefit" or "postfit"
+    xaxtitle = datahist.GetXaxis().GetTitle()
+    yaxtitle = datahist.GetYaxis().GetTitle()
+    lumi = getlumi(task['year'])
+    extracmstext = 'Preliminary'
+    extrainfos = []
+    extrainfos.append('{} {}'.format(task['year'], task['flavour']))
+    extrainfos.append('pT: {}, eta: {}, {}'.format(task['ptbin'], task['etabin'], task['ftype']))
+    extrainfos.append(stage)
+    colormap = {}
+    colormap['Prompt'] = ROOT.kAzure + 1
+    colormap['Nonprompt'] = ROOT.kRed - 7
+    batch.add( 'histplotter.plotdatavsmc', figname, datahist,
+                [prompthist,nonprompthist],
+                datalabel='Data', p2yaxtitle='#frac{Data}{Pred.}',
+                colormap=colormap,
+                xaxtitle=xaxtitle,yaxtitle=yaxtitle,lumi=lumi,
+                extracmstext=extracmstext,
+                extrainfos=extrainfos, infosize=15 )
+
+def preparebin(histstore, workingdir, ftype, var, year, flavour, ptbin, etabin):
+    ### get the histograms for a given bin and write them to a file in a dedicated directory
+    # input arguments:
+    # - histstore: histtools.HistogramStore holding the input histograms
+    # - workingdir: directory in which to create the subdirectory for this bin
+    # - other arguments: see frt.loadselectedhistograms
+    # returns:
+    # a dict with the bin properties, to be passed to fitbin
+    ptbinstr = str(ptbin).replace('.','p')
+    etabinstr = str(etabin).replace('.','p')
+    thisbin = ftype+'_'+var+'_'+year+'_'+flavour+'_pT_'+ptbinstr+'_eta_'+etabinstr
+    # get histograms
+    histograms = frt.loadselectedhistograms(histstore,
+                    ftype, var, year, flavour, ptbin, etabin)
+    datahist = histograms['datahist']
+    prompthists = histograms['prompthists']
+    nonprompthists = histograms['nonprompthists']
+    # add all prompt processes into one histogram
+    prompthist = prompthists[0].Clone()
+    prompthist.Reset()
+    for hist in prompthists: prompthist.Add( hist )
+    prompthist.SetName('total_prompt_'+thisbin)
+    prompthist.SetTitle('Prompt')
+    # do the same for nonprompt processes
+    nonprompthist = nonprompthists[0].Clone()
+    nonprompthist.Reset()
+    for hist in nonprompthists: nonprompthist.Add( hist )
+    nonprompthist.SetName('total_nonprompt_'+thisbin)
+    nonprompthist.SetTitle('Nonprompt')
+    # write the histograms to a temporary file in a separate directory
+    bindir = os.path.abspath(os.path.join(workingdir, thisbin))
+    if not os.path.exists(bindir): os.makedirs(bindir)
+    tempfilename = thisbin+'_histograms.root'
+    f = ROOT.TFile.Open(os.path.join(bindir,tempfilename),'recreate')
+    prompthist.Write()
+    nonprompthist.Write()
+    datahist.Write()
+    f.Close()
+    task = ({ 'ftype':ftype, 'var':var, 'year':year, 'flavour':flavour,
+              'ptbin':ptbin, 'etabin':etabin, 
+              'ptbinstr':ptbinstr, 'etabinstr':etabinstr,
+              'thisbin':thisbin, 'datahistname':datahist.GetName(),
+              'workingdir':os.path.abspath(workingdir), 'bindir':bindir,
+              'tempfilename':tempfilename })
+    return task
+
+def runfit(task):
+    ### run the combine fit for a given bin, trying the fit options in order until success
+    # note: must be called from within the bin directory.
+    # returns:
+    # a tuple of (name of the combine output file, index of the successful fit option),
+    # where the index is None if all fit options failed.
+    datacard = task['thisbin']+'_datacard.txt'
+    makedatacard(task['tempfilename'], datacard, task['ftype'], task['var'],
+                 task['year'], task['flavour'], task['ptbinstr'], task['etabinstr'])
+    script_name = datacard.replace('.txt','.sh')
+    resfile = datacard.replace('.txt','_out_signalstrength_obs.txt')
+    impactfig = '' # empty string means no impact plot will be made
+    for idx,options in enumerate(fitoptions):
+        if idx>0:
+            print('### WARNING ###: fit for bin {} seems to have failed,'.format(task['thisbin'])
+                  +' retrying with options {}'.format(options))
+        initJobScript(script_name, cmssw_version=CMSSW_VERSION)
+        with open( script_name, 'a') as script:
+            addcombinecommands(script, datacard, impactfig=impactfig, **options)
+        os.system('bash '+script_name)
+        if( os.path.exists(resfile) and not fitfailed(resfile) ): return (datacard,idx)
+    return (datacard,None)
+
+def fitbin(task):
+    ### run the fit and process the results for a given bin
+    # input arguments:
+    # - task: dict with bin properties as returned by preparebin
+    # returns:
+    # a dict with the fit results;
+    # the key 'success' is False in case the fit failed for all fit options.
+    # note: the prefit and postfit histograms are returned as well (if available),
+    #       so that the plots of all bins can be made together afterwards.
+    res = {'ftype':task['ftype'], 'ptbin':task['ptbin'], 'etabin':task['etabin'],
+           'success':False}
+    cwd = os.getcwd()
+    os.chdir(task['bindir'])
+    try:
+        thisbin = task['thisbin']
+        # read the prefit histograms
+        f = ROOT.TFile.Open(task['tempfilename'],'read')
+        prompthist = f.Get('total_prompt_'+thisbin)
+        nonprompthist = f.Get('total_nonprompt_'+thisbin)
+        datahist = f.Get(task['datahistname'])
+        for hist in [prompthist,nonprompthist,datahist]: hist.SetDirectory(0)
+        f.Close()
+        res['prefithists'] = (datahist, prompthist, nonprompthist)
+        res['prefitnp'] = nonprompthist.Integral()
+
+        # run combine fit
+        (datacard,fitoption) = runfit(task)
+        if fitoption is None:
+            print('### WARNING ###: fit for bin {} seems to have failed....'.format(thisbin))
+            print('continuing without postfit processing.')
+            return res
+        res['fitoption'] = fitoption
+
+        # process results
+        # (read directly from the fitDiagnostics output, cached per bin, see combineresults)
+        results = cr.load_task_results('.', datacard.replace('.txt',''),
+                                       shapefolders=['shapes_fit_s'])
+        poi = cr.get_poi(results, 'r')
+        if poi is None:
+            resfile = datacard.replace('.txt','_out_signalstrength_obs.txt')
+            (r,uperror,downerror) = readr(resfile)
+        else: (r,downerror,uperror) = poi
+        # make post-fit distributions with the correct x-axis bin values
+        postfitshapes = results['shapes']['shapes_fit_s'][thisbin]
+        postfitprompthist = prompthist.Clone()
+        postfitprompthist.Reset()
+        ht.arraytohist( postfitprompthist, postfitshapes['total_prompt']['contents'],
+                        errors=postfitshapes['total_prompt']['errors'] )
+        postfitprompthist.SetTitle('Prompt')
+        postfitprompthist.SetDirectory(0)
+        postfitnonprompthist = nonprompthist.Clone()
+        postfitnonprompthist.Reset()
+        ht.arraytohist( postfitnonprompthist, postfitshapes['total_nonprompt']['contents'],
+                        errors=postfitshapes['total_nonprompt']['errors'] )
+        postfitnonprompthist.SetTitle('Nonprompt')
+        postfitnonprompthist.SetDirectory(0)
+        res['postfithists'] = (datahist, postfitprompthist, postfitnonprompthist)
+        # directly take integral of postfit distribution
+        # (but still use signal strength measurement for relative error)
+        res['postfitnp'] = postfitnonprompthist.Integral()
+        res['r'] = r
+        res['uperror'] = uperror
+        res['downerror'] = downerror
+        res['success'] = True
+        # print results
+        print('results for bin {}:'.format(thisbin))
+        print('initial amount of nonprompt leptons: {}'.format(res['prefitnp']))
+        print('measured signal strength: {} + {} - {}'.format(r,uperror,downerror))
+        print('post-fit amount of nonprompt leptons: {}'.format(res['postfitnp']))
+    except Exception as e:
+        # catch all errors so that a single failing bin does not stop the other ones
+        print('### WARNING ###: processing of bin {} failed'.format(task['thisbin'])
+              +' with the following error: {}'.format(e))
+    finally:
+        os.chdir(cwd)
+    return res
+
+
 if __name__=='__main__':
    
     sys.stderr.write('###starting###\n')
  
-    if not len(sys.argv)==5:
+    if not len(sys.argv) in [5,6]:
 	print('### ERROR ###: wrong number of command-line arguments')
-	print('               use: python fitTemplates.py <var> <flavour> <year> <frmapdir>')
+	print('               use: python fitTemplates.py <var> <flavour> <year> <frmapdir>'
+              +' [<nworkers>]')
 	sys.exit()
     
     # initialize arguments and global parameters
     var = sys.argv[1]
     flavour = sys.argv[2]
     year = sys.argv[3]
-    frmapdir = sys.argv[4]
+    frmapdir = os.path.abspath(sys.argv[4])
+    nworkers = 1
+    if len(sys.argv)>5: nworkers = int(sys.argv[5])
+    # (number of bins to fit in parallel, each one in a separate process)
     instancename = '{}_{}_{}'.format(flavour, year, var)
     inputfile = os.path.abspath('fakeRateMeasurement_data_'+instancename+'_histograms.root')
 
@@ -239,9 +435,13 @@ if __name__=='__main__':
     if not os.path.exists(workingdir):
 	os.makedirs(workingdir)
 
+    # index the input file once
+    # (instead of reading all histograms again for each bin)
+    histstore = ht.HistogramStore(inputfile)
+
     # read pt and eta bins and ranges
     basehistname = 'data_numerator_'+var+'_'+year+'_'+flavour
-    (ptbins,etabins) = frt.readptetabins(inputfile,basehistname)
+    (ptbins,etabins) = frt.readptetabins(histstore,basehistname)
     ptrange = copy(ptbins); ptrange.append(100)
     etarange = copy(etabins); etarange.append(2.5)
     if(flavour=='muon'): etarange[-1]=2.4
@@ -260,162 +460,63 @@ if __name__=='__main__':
     # group the nummap and denommap in a dict for easier access
     npyieldmaps = {'denominator':denommap,'numerator':nummap}
 
-    # move to workingdir
-    cwd = os.getcwd()
-    os.chdir(workingdir)
-
-    # loop over pt and eta bins
+    # prepare the input for each pt and eta bin
     print('running on file {}'.format(inputfile))
-    print('start looping over pt and eta bins...')
+    print('preparing pt and eta bins...')
+    tasks = []
     for ptbinnb,ptbin in enumerate(ptbins):
 	for etabinnb,etabin in enumerate(etabins):
 	    #if( ptbinnb!=0 or etabinnb!=0 ): continue # for testing on small number of bins
-	    ptbinstr = str(ptbin).replace('.','p')
-	    etabinstr = str(etabin).replace('.','p')
-	    print('   bin pt {}, eta {}'.format(ptbinstr,etabinstr))
 	    for ftype in ['denominator','numerator']:
-	
-		### get the correct histograms and make a prefit plot
-		thisbin = ftype+'_'+var+'_'+year+'_'+flavour+'_pT_'+ptbinstr+'_eta_'+etabinstr
-		# get histograms
-		histograms = frt.loadselectedhistograms(inputfile,
-                                ftype, var, year, flavour, ptbin, etabin)
-                datahist = histograms['datahist']
-		prompthists = histograms['prompthists']
-		nonprompthists = histograms['nonprompthists']	
-		# add all prompt processes into one histogram
-		prompthist = prompthists[0].Clone()
-		prompthist.Reset()
-		for hist in prompthists: prompthist.Add( hist )
-		prompthist.SetName('total_prompt_'+thisbin)
-		prompthist.SetTitle('Prompt')
-		# do the same for nonprompt processes
-		nonprompthist = nonprompthists[0].Clone()
-		nonprompthist.Reset()
-		for hist in nonprompthists: nonprompthist.Add( hist )
-		nonprompthist.SetName('total_nonprompt_'+thisbin)
-		nonprompthist.SetTitle('Nonprompt')
-		# make a prefit plot
-                xaxtitle = datahist.GetXaxis().GetTitle()
-                yaxtitle = datahist.GetYaxis().GetTitle()
-                lumimap = {'all':137600, '2016':36300, '2017':41500, '2018':59700,
-                            '2016PreVFP':19520, '2016PostVFP':16810, 
-                            '2016Merged':36300 }
-                lumi = lumimap[year]
-                extracmstext = 'Preliminary'
-                extrainfos = []
-                extrainfos.append('{} {}'.format(year, flavour))
-                extrainfos.append('pT: {}, eta: {}, {}'.format(ptbin, etabin, ftype))
-                extrainfos.append('prefit')
-                colormap = {}
-                colormap['Prompt'] = ROOT.kAzure + 1
-                colormap['Nonprompt'] = ROOT.kRed - 7
-                figname = os.path.join(thisbin+'_prefit')
-                hp.plotdatavsmc( figname, datahist,
-                            [prompthist,nonprompthist],
-                            datalabel='Data', p2yaxtitle='#frac{Data}{Pred.}',
-                            colormap=colormap,
-                            xaxtitle=xaxtitle,yaxtitle=yaxtitle,lumi=lumi,
-                            extracmstext=extracmstext,
-                            extrainfos=extrainfos, infosize=15 )
-		# write the histograms to a temporary file
-		tempfilename = thisbin+'_histograms.root'
-		f = ROOT.TFile.Open(tempfilename,'recreate')
-		prompthist.Write()
-		nonprompthist.Write()
-		datahist.Write()
-		f.Close()
-		prefitnp = nonprompthist.Integral()
-		
-		### run combine fit
-		# make the datacard
-		datacard = thisbin+'_datacard.txt'
-		makedatacard(tempfilename, datacard, ftype, var, year, flavour, ptbinstr, etabinstr)
-		# run combine
-		script_name = datacard.replace('.txt','.sh')
-		impactfig = '' # empty string means no impact plot will be made
-		initJobScript(script_name, cmssw_version=CMSSW_VERSION)
-		with open( script_name, 'a') as script:
-		    addcombinecommands(script, datacard, impactfig=impactfig)
-		os.system('bash '+script_name)
-		resfile = datacard.replace('.txt','_out_signalstrength_obs.txt')
-		if fitfailed(resfile):
-		    print('### WARNING ###: fit for this bin seems to have failed....')
-		    print('continuing to next bin without postfit processing.')
-		    continue
-
-		### process results
-		(r,uperror,downerror) = readr(resfile)
-		print('measured signal strength: {} + {} - {}'.format(r,uperror,downerror))
-		# make post-fit distributions
-		postfitfile = 'fitDiagnostics'+datacard.replace('.txt','.root')
-		f = ROOT.TFile.Open(postfitfile,'read')
-		# get post-fit histograms and set the correct x-axis bin values
-		temp = f.Get('shapes_fit_s/'+thisbin+'/total_prompt')
-		postfitprompthist = prompthist.Clone()
-		postfitprompthist.Reset()
-		for i in range(0, postfitprompthist.GetNbinsX()+2):
-		    postfitprompthist.SetBinContent( i, temp.GetBinContent(i) )
-		    postfitprompthist.SetBinError( i, temp.GetBinError(i) )
-		postfitprompthist.SetTitle('Prompt')
-		postfitprompthist.SetDirectory(0)
-		temp = f.Get('shapes_fit_s/'+thisbin+'/total_nonprompt')
-		postfitnonprompthist = nonprompthist.Clone()
-                postfitnonprompthist.Reset()
-                for i in range(0, postfitnonprompthist.GetNbinsX()+2):
-                    postfitnonprompthist.SetBinContent( i, temp.GetBinContent(i) )
-                    postfitnonprompthist.SetBinError( i, temp.GetBinError(i) )
-		postfitnonprompthist.SetTitle('Nonprompt')
-		postfitnonprompthist.SetDirectory(0)
-		f.Close()
-		# make the postfit plot
-                xaxtitle = datahist.GetXaxis().GetTitle()
-                yaxtitle = datahist.GetYaxis().GetTitle()
-                lumimap = {'all':137600, '2016':36300, '2017':41500, '2018':59700,
-                            '2016PreVFP':19520, '2016PostVFP':16810, 
-                            '2016Merged':36300 }
-                lumi = lumimap[year]
-                extracmstext = 'Preliminary'
-                extrainfos = []
-                extrainfos.append('{} {}'.format(year, flavour))
-                extrainfos.append('pT: {}, eta: {}, {}'.format(ptbin, etabin, ftype))
-		extrainfos.append('postfit')
-                colormap = {}
-                colormap['Prompt'] = ROOT.kAzure + 1
-                colormap['Nonprompt'] = ROOT.kRed - 7
-                figname = os.path.join(thisbin+'_postfit')
-                hp.plotdatavsmc( figname, datahist,
-                            [postfitprompthist,postfitnonprompthist],
-                            datalabel='Data', p2yaxtitle='#frac{Data}{Pred.}',
-                            colormap=colormap,
-                            xaxtitle=xaxtitle,yaxtitle=yaxtitle,lumi=lumi,
-                            extracmstext=extracmstext,
-                            extrainfos=extrainfos, infosize=15 )
-		
-		### fill the yield maps ###
-		binindex = nummap.FindBin(ptbin+1e-6,etabin+1e-6)
-		# directly take integral of postfit distribution
-		# (but still use signal strength measurement for relative error)
-		postfitnp = postfitnonprompthist.Integral()
-		npyieldmaps[ftype].SetBinContent(binindex,postfitnp)
-		npyieldmaps[ftype].SetBinError(binindex,postfitnp*max(uperror,downerror)/r)
-		# print results
-                print('initial amount of nonprompt leptons: {}'.format(prefitnp))
-                print('measured signal strength: {} + {} - {}'.format(r,uperror,downerror))
-                print('post-fit amount of nonprompt leptons: {}'.format(postfitnp))
-
-    # move back to main directory
-    os.chdir(cwd)
+		tasks.append( preparebin(histstore, workingdir,
+				ftype, var, year, flavour, ptbin, etabin) )
+    histstore.close()
+
+    # run the fits
+    # (the bins are independent, so they can be run in parallel)
+    print('running fits for {} bins using {} worker(s)...'.format(len(tasks),nworkers))
+    if nworkers>1:
+	pool = mp.Pool(processes=nworkers)
+	results = pool.map(fitbin, tasks, chunksize=1)
+	pool.close()
+	pool.join()
+    else: results = [fitbin(task) for task in tasks]
+
+    ### fill the yield maps ###
+    for res in results:
+	if not res['success']: continue
+	binindex = nummap.FindBin(res['ptbin']+1e-6,res['etabin']+1e-6)
+	postfitnp = res['postfitnp']
+	relerror = max(res['uperror'],res['downerror'])/res['r']
+	npyieldmaps[res['ftype']].SetBinContent(binindex,postfitnp)
+	npyieldmaps[res['ftype']].SetBinError(binindex,postfitnp*relerror)
+    nfailed = len([res for res in results if not res['success']])
+    if nfailed>0:
+	print('### WARNING ###: fits for {} out of {} bins failed.'.format(nfailed,len(results)))
 
     ### make fake rate map
     frmap = nummap.Clone()
     frmap.Divide(denommap)
-    # save and plot fake rate map
+    # save fake rate map
     frmapfile = os.path.join(frmapdir,'fakeRateMap_data_'+instancename+'.root')
     f = ROOT.TFile.Open(frmapfile,'recreate')
     frmap.Write("fakeRate_" + flavour + "_" + year)
     f.Close()
+    # also export the map as a numpy lookup table for use in python scripts
+    lut.exportmaps(frmapfile)
+
+    ### make all plots ###
+    # (the prefit and postfit plots of all bins and the fake rate map are rendered in parallel,
+    #  skipping the plots that did not change since a previous run)
+    batch = PlotBatch(nprocesses=nworkers)
+    for task,res in zip(tasks,results):
+	for stage in ['prefit','postfit']:
+	    if stage+'hists' not in res: continue
+	    (datahist, prompthist, nonprompthist) = res[stage+'hists']
+	    figname = os.path.join(task['workingdir'], task['thisbin']+'_'+stage)
+	    plotbin(batch, figname, datahist, prompthist, nonprompthist, task, stage)
     title = 'Fake rate map for {} {}s'.format(year, flavour)
-    h2dp.plot2dhistogram( frmap, frmapfile.replace('.root','.pdf'), histtitle=title )
-    h2dp.plot2dhistogram( frmap, frmapfile.replace('.root','.png'), histtitle=title )
+    batch.add( 'hist2dplotter.plot2dhistogram', frmap, frmapfile.replace('.root',''),
+	       histtitle=title, outfmts=['.pdf','.png'] )
+    batch.run()
     sys.stderr.write('###done###\n')
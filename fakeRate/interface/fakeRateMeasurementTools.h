@@ -10,6 +10,7 @@
 #include "TFile.h"
 
 #include "../../Event/interface/Event.h"
+#include "../../TreeReader/interface/ParallelEventLoop.h"
 #include "../../Tools/interface/RangedMap.h"
 #include "../../Tools/interface/HistInfo.h"
 #include "../../Tools/interface/stringTools.h"
@@ -31,6 +32,8 @@ RangedMap< RangedMap< std::shared_ptr< TH1D > > > build2DHistogramMap(
     const HistInfo& mtHistInfo, const std::string& name );
 
 void write2DHistogramMap( const RangedMap< RangedMap< std::shared_ptr< TH1D > > >& histMap );
+void add2DHistogramMap( RangedMap< RangedMap< std::shared_ptr< TH1D > > >& histMap,
+    const RangedMap< RangedMap< std::shared_ptr< TH1D > > >& otherHistMap );
 std::shared_ptr< Reweighter > makeLeptonReweighter( const std::string& year, const bool isMuon, 
     const bool isFO);
 
@@ -40,6 +43,12 @@ void fillFakeRateMeasurementHistograms(const std::string& leptonFlavor, const st
     const std::map< std::string, Prescale >& prescaleMap, double maxMT, double maxMet,
     const bool isTestRun = false, const unsigned long nEvents = 0 );
 
+void fillFakeRateMeasurementHistogramsParallel(const std::string& leptonFlavor, const std::string& year,
+    const std::string& sampleDirectory, const std::string& sampleList,
+    const std::vector< std::string >& triggerVector,
+    const std::map< std::string, Prescale >& prescaleMap, double maxMT, double maxMet,
+    const unsigned numberOfThreads, const bool isTestRun = false, const unsigned long nEvents = 0 );
+
 void fillMCFakeRateMeasurementHistograms(const std::string& leptonFlavor, const std::string& year,
     const std::string& sampleDirectory, const std::string& sampleList, const unsigned sampleIndex,
     const bool isTestRun = false );
@@ -22,7 +22,7 @@ namespace fakeRate{
     //bool passFakeRateTrigger( const Event& event, RangedMap< std::string >& triggerThresholdMap  );
     bool passFakeRateEventSelection( Event& event, bool onlyMuon = false, bool onlyElectrons = false, bool onlyTightLeptons = false, bool requireJet = true, double jetDeltaRCut = 1, double jetPtCut = 25);
 
-    bool passTriggerJetSelection( Event& event, const std::string& trigger, std::map< std::string, double >& triggerToJetPtMap );
+    bool passTriggerJetSelection( Event& event, const std::string& trigger, const std::map< std::string, double >& triggerToJetPtMap );
 
 }
 
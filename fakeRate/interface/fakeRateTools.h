@@ -35,6 +35,10 @@ namespace fakeRate{
     std::string extractTriggerName( const std::string& );
     std::string extractYear( const std::string& );
 
+    // number of entries to process for a sample, and the corresponding reweighting factor
+    long unsigned limitNumberOfEntries( long unsigned numberOfEntries, const bool isData,
+	const bool isTestRun, const unsigned long nEvents, double& nEventsReweight );
+
     std::map< std::string, Prescale > fitTriggerPrescales_cut( TFile* filePtr, 
 					const double min, const double max, 
 					const bool doPlot=true, const bool doSave=true );
@@ -11,6 +11,7 @@
 
 // include parts of the framework
 #include "../../Event/interface/Event.h"
+#include "../../TreeReader/interface/ParallelEventLoop.h"
 #include "../../Tools/interface/RangedMap.h"
 #include "../../Tools/interface/HistInfo.h"
 #include "../../Tools/interface/stringTools.h"
@@ -37,3 +38,10 @@ void fillPrescaleMeasurementHistograms( const std::string& year,
     const bool isTestRun, const unsigned long nEvents,
     const std::vector< std::string >& triggerVector, const bool useMT = true,
     const double metCut = 0, double mtCut = 0);
+
+void fillPrescaleMeasurementHistogramsParallel( const std::string& year,
+    const std::string& sampleDirectoryPath,
+    const std::string& sampleListPath, const unsigned numberOfThreads,
+    const bool isTestRun, const unsigned long nEvents,
+    const std::vector< std::string >& triggerVector, const bool useMT = true,
+    const double metCut = 0, double mtCut = 0);
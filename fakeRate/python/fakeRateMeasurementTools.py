@@ -15,12 +15,17 @@ def readptetabins(inputfile, basename):
     # note: the names of the histograms are supposed to be of the form:
     #	    basename_pt_<pt>_eta_<eta>
     # note: factorized binning is assumed, so separate pt and eta bin arrays
+    # note: inputfile can also be a histtools.HistogramStore,
+    #       in which case only its index is used (no histograms are loaded)
     ptbins = []
     etabins = []
-    histlist = ht.loadallhistograms(inputfile)
-    for hist in histlist:
-	if not basename in hist.GetName(): continue
-	ptetaname = hist.GetName().split(basename)[-1].strip('_')
+    if isinstance(inputfile, ht.HistogramStore):
+	histnames = inputfile.histnames(mustcontainall=[basename])
+    else:
+	histnames = [hist.GetName() for hist in ht.loadallhistograms(inputfile)]
+    for histname in histnames:
+	if not basename in histname: continue
+	ptetaname = histname.split(basename)[-1].strip('_')
 	pt = float(ptetaname.split('_')[1].replace('p','.'))
 	if pt.is_integer(): pt = int(pt)
 	eta = float(ptetaname.split('_')[3].replace('p','.'))
@@ -37,6 +42,9 @@ def loadselectedhistograms(inputfile, ftype, variable, year, flavour, ptbin, eta
     # - variable: name of the x-axis variable, usually "mT"
     # - year, flavour: strings representing year and lepton flavour
     # - ptbin, etabin: floats representing bin low edges
+    # note: inputfile can also be a histtools.HistogramStore,
+    #       in which case the selection is done on its index
+    #       and only the selected histograms are loaded.
     # note: histograms are assumed to be named as follows:
     #       process_ptype_ftype_var_year_flavour_pT_ptvalue_eta_etavalue
     #       where:
@@ -46,7 +54,12 @@ def loadselectedhistograms(inputfile, ftype, variable, year, flavour, ptbin, eta
     etabinstr = str(etabin).replace('.','p')
     thisbin = '{}_{}_{}_{}_pT_{}_eta_{}'.format(ftype, variable, year, flavour, ptbinstr, etabinstr)
     # load and select histograms
-    histlist = ht.loadallhistograms(inputfile)
+    if isinstance(inputfile, ht.HistogramStore):
+        histnames = inputfile.histnames(mustcontainall=[ftype])
+        histnames = ([name for name in histnames
+                      if name.split('_pT_')[-1]==ptbinstr+'_eta_'+etabinstr])
+        histlist = inputfile.load(histnames)
+    else: histlist = ht.loadallhistograms(inputfile)
     newhistlist = []
     for hist in histlist:
         if( hist.GetName().split('_pT_')[-1]==ptbinstr+'_eta_'+etabinstr
@@ -66,136 +66,155 @@ void write2DHistogramMap( const RangedMap< RangedMap< std::shared_ptr< TH1D > >
     }
 }*/
 
-// function for filling fake rate histograms for a single sample
-void fillFakeRateMeasurementHistograms(const std::string& leptonFlavor, const std::string& year, 
-    const std::string& sampleDirectory, const std::string& sampleList, const unsigned sampleIndex,
-    const std::vector< std::string >& triggerVector, 
-    const std::map< std::string, Prescale >& prescaleMap, double maxMT, double maxMet,
-    const bool isTestRun, const unsigned long nEvents ){ 
- 
-    std::cout<<"start function fillFakeRateMeasurementHistograms"<<std::endl;
+// help function for adding the contents of a 2D histogram map to another one with the same binning
+void add2DHistogramMap( RangedMap< RangedMap< std::shared_ptr< TH1D > > >& histMap,
+    const RangedMap< RangedMap< std::shared_ptr< TH1D > > >& otherHistMap ){
+    auto map_it = histMap.begin();
+    for( auto& other_map_pair : otherHistMap ){
+        auto hist_it = map_it->second.begin();
+        for( auto& other_hist_pair : other_map_pair.second ){
+            hist_it->second->Add( other_hist_pair.second.get() );
+            ++hist_it;
+        }
+        ++map_it;
+    }
+}
 
-    progressTracker progress = progressTracker("fillFakeRateMeasurement_progress_"+year+"_"
-                                +leptonFlavor+"_sample_"+std::to_string(sampleIndex)+".txt");
 
-    // initialize flavor and year
-    fakeRate::checkFlavorString( leptonFlavor );
-    bool isMuonMeasurement = ( leptonFlavor == "muon" );
-    analysisTools::checkYearString( year );
+namespace{
+
+    // histogram maps for the fake rate measurement in data for a single process
+    struct FakeRateMeasurementMaps{
+        bool isData;
+        RangedMap< RangedMap< std::shared_ptr< TH1D > > > prompt_numerator_map;
+        RangedMap< RangedMap< std::shared_ptr< TH1D > > > prompt_denominator_map;
+        RangedMap< RangedMap< std::shared_ptr< TH1D > > > nonprompt_numerator_map;
+        RangedMap< RangedMap< std::shared_ptr< TH1D > > > nonprompt_denominator_map;
+        RangedMap< RangedMap< std::shared_ptr< TH1D > > > data_numerator_map;
+        RangedMap< RangedMap< std::shared_ptr< TH1D > > > data_denominator_map;
+    };
+
+    // settings of the fake rate measurement in data, shared by all samples
+    struct FakeRateMeasurementSettings{
+        bool isMuonMeasurement;
+        std::vector< double > ptBinBorders;
+        std::vector< double > etaBinBorders;
+        HistInfo mtHistInfo;
+        RangedMap< std::string > conePtToTriggerMap;
+        std::map< std::string, double > triggerToJetPtMap;
+        double maxMT;
+        double maxMet;
+    };
+
+    FakeRateMeasurementSettings makeFakeRateMeasurementSettings( const std::string& leptonFlavor, 
+	const std::string& year, const std::vector< std::string >& triggerVector, 
+	const std::map< std::string, Prescale >& prescaleMap, double maxMT, double maxMet ){
+
+        // initialize flavor and year
+        fakeRate::checkFlavorString( leptonFlavor );
+        bool isMuonMeasurement = ( leptonFlavor == "muon" );
+        analysisTools::checkYearString( year );
+
+        // check if all triggers have a prescale defined
+        for( const auto& trigger : triggerVector ){
+            if( prescaleMap.find( trigger ) == prescaleMap.end() ){
+	        std::string errorm("Given vector of triggers contains triggers");
+	        errorm.append("that are not present in the given prescale map.");
+                throw std::invalid_argument(errorm);
+            }
+        }
 
-    // check if all triggers have a prescale defined
-    for( const auto& trigger : triggerVector ){
-        if( prescaleMap.find( trigger ) == prescaleMap.end() ){
-	    std::string errorm("Given vector of triggers contains triggers");
-	    errorm.append("that are not present in the given prescale map.");
-            throw std::invalid_argument(errorm);
+        // define binning
+        std::vector< double > ptBinBorders;
+        std::vector< double > etaBinBorders;
+        if( isMuonMeasurement ){
+            etaBinBorders = {0., 1.2, 2.1};
+            //ptBinBorders = { 10, 15, 20, 30, 45 };
+	    ptBinBorders = { 10, 20, 30, 45 };
+        } else{
+            etaBinBorders = {0., 0.8, 1.442};
+            //ptBinBorders = { 10, 15, 20, 30, 45 };
+	    ptBinBorders = {10, 20, 30, 45 };
         }
-    }
+        unsigned numberOfMTBins = 16;
+        HistInfo mtHistInfo( "mT", "m_{T}( GeV )", numberOfMTBins, 0., 160. );
+
+        // do some pt-to-trigger matching
+        RangedMap< std::string > leptonPtToTriggerMap = fakeRate::mapLeptonPtToTriggerName( 
+						        triggerVector, isMuonMeasurement );
+        std::map< double, std::string > conePtLowerBoundMap;
+        for( auto it = leptonPtToTriggerMap.cbegin(); it != leptonPtToTriggerMap.cend(); ++it ){
+            double conePtBound;
+            if( it == leptonPtToTriggerMap.cbegin() ){conePtBound = it->first;} 
+	    else {
+                if( isMuonMeasurement ){conePtBound = 2*it->first;} 
+	        else {conePtBound = 1.5*it->first;}
+            }
+            conePtLowerBoundMap[ conePtBound ] = it->second;
+        }
+        RangedMap< std::string > conePtToTriggerMap( conePtLowerBoundMap );
+        std::map<std::string,double> triggerToJetPtMap = fakeRate::mapTriggerToJetPtThreshold(triggerVector);
 
-    // define binning
-    std::vector< double > ptBinBorders;
-    std::vector< double > etaBinBorders;
-    if( isMuonMeasurement ){
-        etaBinBorders = {0., 1.2, 2.1};
-        //ptBinBorders = { 10, 15, 20, 30, 45 };
-	ptBinBorders = { 10, 20, 30, 45 };
-    } else{
-        etaBinBorders = {0., 0.8, 1.442};
-        //ptBinBorders = { 10, 15, 20, 30, 45 };
-	ptBinBorders = {10, 20, 30, 45 };
+        return { isMuonMeasurement, ptBinBorders, etaBinBorders, mtHistInfo, 
+		 conePtToTriggerMap, triggerToJetPtMap, maxMT, maxMet };
     }
 
-    // initialize TreeReader and set to correct sample
-    std::cout<<"initializing TreeReader and setting to sample n. "<<sampleIndex<<std::endl;
-    TreeReader treeReader( sampleList , sampleDirectory );
-    treeReader.initSample();
-    for(unsigned idx=1; idx<=sampleIndex; ++idx){
-        treeReader.initSample();
+    FakeRateMeasurementMaps buildFakeRateMeasurementMaps( const FakeRateMeasurementSettings& settings,
+	const Sample& sample, const std::string& leptonFlavor, const std::string& year ){
+        FakeRateMeasurementMaps maps;
+        maps.isData = sample.isData();
+        const std::vector< double >& pt = settings.ptBinBorders;
+        const std::vector< double >& eta = settings.etaBinBorders;
+        const HistInfo& info = settings.mtHistInfo;
+        std::string suffix = "_mT_" + year + "_" + leptonFlavor;
+        maps.prompt_numerator_map = build2DHistogramMap( pt, eta, info,
+	    sample.processName() + "_prompt_numerator" + suffix );
+        maps.prompt_denominator_map = build2DHistogramMap( pt, eta, info,
+	    sample.processName() + "_prompt_denominator" + suffix );
+        maps.nonprompt_numerator_map = build2DHistogramMap( pt, eta, info,
+	    sample.processName() + "_nonprompt_numerator" + suffix );
+        maps.nonprompt_denominator_map = build2DHistogramMap( pt, eta, info,
+	    sample.processName() + "_nonprompt_denominator" + suffix );
+        maps.data_numerator_map = build2DHistogramMap( pt, eta, info, "data_numerator" + suffix );
+        maps.data_denominator_map = build2DHistogramMap( pt, eta, info, "data_denominator" + suffix );
+        return maps;
     }
-    const bool isData = treeReader.isData();
 
-    // make histogram maps
-    std::cout<<"start building histogram maps"<<std::endl;
-    unsigned numberOfMTBins = 16;
-    HistInfo mtHistInfo( "mT", "m_{T}( GeV )", numberOfMTBins, 0., 160. );
-    RangedMap< RangedMap< std::shared_ptr< TH1D > > > prompt_numerator_map = build2DHistogramMap( 
-	ptBinBorders, etaBinBorders, mtHistInfo, 
-	treeReader.currentSamplePtr()->processName() + "_prompt_numerator_mT_" 
-	+ year + "_" + leptonFlavor );
-    RangedMap< RangedMap< std::shared_ptr< TH1D > > > prompt_denominator_map = build2DHistogramMap( 
-	ptBinBorders, etaBinBorders, mtHistInfo, 
-	treeReader.currentSamplePtr()->processName() + "_prompt_denominator_mT_" 
-	+ year + "_" + leptonFlavor );
-    RangedMap< RangedMap< std::shared_ptr< TH1D > > > nonprompt_numerator_map = build2DHistogramMap( 
-	ptBinBorders, etaBinBorders, mtHistInfo, 
-	treeReader.currentSamplePtr()->processName() + "_nonprompt_numerator_mT_" 
-	+ year + "_" + leptonFlavor );
-    RangedMap< RangedMap< std::shared_ptr< TH1D > > > nonprompt_denominator_map = build2DHistogramMap( 
-	ptBinBorders, etaBinBorders, mtHistInfo, 
-	treeReader.currentSamplePtr()->processName() + "_nonprompt_denominator_mT_" 
-	+ year + "_" + leptonFlavor );
-    RangedMap< RangedMap< std::shared_ptr< TH1D > > > data_numerator_map = build2DHistogramMap( 
-	ptBinBorders, etaBinBorders, mtHistInfo, "data_numerator_mT_" + year + "_" + leptonFlavor);
-    RangedMap< RangedMap< std::shared_ptr< TH1D > > > data_denominator_map = build2DHistogramMap( 
-	ptBinBorders, etaBinBorders, mtHistInfo, "data_denominator_mT_" + year + "_" + leptonFlavor );
-
-    
-    // do some pt-to-trigger matching
-    RangedMap< std::string > leptonPtToTriggerMap = fakeRate::mapLeptonPtToTriggerName( 
-						    triggerVector, isMuonMeasurement );
-    std::map< double, std::string > conePtLowerBoundMap;
-    for( auto it = leptonPtToTriggerMap.cbegin(); it != leptonPtToTriggerMap.cend(); ++it ){
-        double conePtBound;
-        if( it == leptonPtToTriggerMap.cbegin() ){conePtBound = it->first;} 
-	else {
-            if( isMuonMeasurement ){conePtBound = 2*it->first;} 
-	    else {conePtBound = 1.5*it->first;}
-        }
-        conePtLowerBoundMap[ conePtBound ] = it->second;
+    void addFakeRateMeasurementMaps( FakeRateMeasurementMaps& maps, const FakeRateMeasurementMaps& otherMaps ){
+        add2DHistogramMap( maps.prompt_numerator_map, otherMaps.prompt_numerator_map );
+        add2DHistogramMap( maps.prompt_denominator_map, otherMaps.prompt_denominator_map );
+        add2DHistogramMap( maps.nonprompt_numerator_map, otherMaps.nonprompt_numerator_map );
+        add2DHistogramMap( maps.nonprompt_denominator_map, otherMaps.nonprompt_denominator_map );
+        add2DHistogramMap( maps.data_numerator_map, otherMaps.data_numerator_map );
+        add2DHistogramMap( maps.data_denominator_map, otherMaps.data_denominator_map );
     }
-    RangedMap< std::string > conePtToTriggerMap( conePtLowerBoundMap );
-    std::map<std::string,double> triggerToJetPtMap = fakeRate::mapTriggerToJetPtThreshold(triggerVector);
-    
-    // initialize a reweighter
-    std::cout<<"building reweighter"<<std::endl;
-    std::shared_ptr< ReweighterFactory >reweighterFactory( new EmptyReweighterFactory() );
-    std::vector<Sample> thissample;
-    thissample.push_back(treeReader.currentSample());
-    CombinedReweighter reweighter = reweighterFactory->buildReweighter( "../weights/", year, 
-					thissample );
 
-    // set number of entries
-    long unsigned numberOfEntries = treeReader.numberOfEntries();
-    double nEventsReweight = 1.;
-    if( isTestRun ){
-        // loop over a smaller number of entries for testing and debugging
-        unsigned long nLimit = 10000;
-        std::cout << "limiting number of entries because of test run setting" << std::endl;
-        numberOfEntries = std::min(nLimit, numberOfEntries);
-    }
-    if( nEvents!=0 && nEvents<numberOfEntries && !isData ){
-        // loop over a smaller number of entries if samples are impractically large
-        std::cout << "limiting number of entries to " << nEvents << std::endl;
-        nEventsReweight = (double)numberOfEntries/nEvents;
-        std::cout << "(with corresponding reweighting factor " << nEventsReweight << ")" << std::endl;
-        numberOfEntries = nEvents;
+    void writeFakeRateMeasurementMaps( const FakeRateMeasurementMaps& maps ){
+        if( !maps.isData ){
+	    write2DHistogramMap( maps.prompt_numerator_map );
+	    write2DHistogramMap( maps.prompt_denominator_map );
+	    write2DHistogramMap( maps.nonprompt_numerator_map );
+	    write2DHistogramMap( maps.nonprompt_denominator_map );
+        } else {
+	    write2DHistogramMap( maps.data_numerator_map );
+	    write2DHistogramMap( maps.data_denominator_map );
+        }
     }
 
-    // do event loop
-    std::cout<<"starting event loop for "<<numberOfEntries<<" events"<<std::endl;
-    for(long unsigned entry=0; entry<numberOfEntries; ++entry){
-	if( entry%50000 == 0 ) progress.writeProgress( static_cast<double>(entry)/numberOfEntries );
-
-	Event event = treeReader.buildEvent( entry, true, false );
+    // fill the histograms for a single event
+    void fillFakeRateMeasurementEvent( Event& event, const Sample& sample, 
+	const FakeRateMeasurementSettings& settings,
+	const std::map< std::string, Prescale >& prescaleMap, const CombinedReweighter& reweighter,
+	const double nEventsReweight, FakeRateMeasurementMaps& maps ){
 
 	// apply MET filters
-	if( !event.passMetFilters() ) continue; 
+	if( !event.passMetFilters() ) return; 
 
 	// apply event selection
-	if( !fakeRate::passFakeRateEventSelection( event, isMuonMeasurement, 
-		!isMuonMeasurement, false, true, 0.7, 30 ) ) continue;
+	if( !fakeRate::passFakeRateEventSelection( event, settings.isMuonMeasurement, 
+		!settings.isMuonMeasurement, false, true, 0.7, 30 ) ) return;
         LightLepton& lepton = event.lightLepton( 0 );
-	if( lepton.pt() < 10 ) continue;
+	if( lepton.pt() < 10 ) return;
 
 	const double pTFix = 35.;
         PhysicsObject leptonFix( pTFix, lepton.eta(), lepton.phi(), lepton.energy(),
@@ -203,13 +222,13 @@ void fillFakeRateMeasurementHistograms(const std::string& leptonFlavor, const st
 				    lepton.is2017(), lepton.is2018() );
         double mT = mt( leptonFix, event.met() );
 
-	if( mT >= maxMT ) continue;
-        if( event.metPt() >= maxMet ) continue;
+	if( mT >= settings.maxMT ) return;
+        if( event.metPt() >= settings.maxMet ) return;
 
 	// check if event passes correct trigger and jet selection
-	std::string triggerToUse = conePtToTriggerMap[ lepton.pt() ];
-        if( !event.passTrigger( triggerToUse ) ) continue;
-	if( !fakeRate::passTriggerJetSelection( event, triggerToUse, triggerToJetPtMap ) ) continue;
+	std::string triggerToUse = settings.conePtToTriggerMap[ lepton.pt() ];
+        if( !event.passTrigger( triggerToUse ) ) return;
+	if( !fakeRate::passTriggerJetSelection( event, triggerToUse, settings.triggerToJetPtMap ) ) return;
 
 	// determine correct event weight
 	double weight = event.weight();
@@ -221,7 +240,7 @@ void fillFakeRateMeasurementHistograms(const std::string& leptonFlavor, const st
             std::string msg = "WARNING: vetooing event with large weight.";
             msg += " (weight is " + std::to_string(weight) + ")";
             std::cerr << msg << std::endl;
-            continue;
+            return;
         }
 
 	weight *= nEventsReweight;
@@ -236,60 +255,171 @@ void fillFakeRateMeasurementHistograms(const std::string& leptonFlavor, const st
 	// determine whether lepton is prompt or nonprompt (for MC)
 	bool isPrompt = false;
 	if( event.isMC() ){ 
-	    if( lepton.isPrompt() && treeReader.currentSamplePtr()->processName()!="QCD" ){
+	    if( lepton.isPrompt() && sample.processName()!="QCD" ){
 		// manually set all leptons in QCD samples to nonprompt!
 		isPrompt = true;
 	    }
 	}
 
 	// fill numerator histograms
+	double mTToFill = std::min( mT, settings.mtHistInfo.maxBinCenter() );
 	if( lepton.isTight() ){
-	    if( treeReader.isData() ){
-                data_numerator_map[ lepton.pt() ][ lepton.absEta() ]->Fill( 
-		    std::min( mT, mtHistInfo.maxBinCenter() ), weight );
+	    if( sample.isData() ){
+                maps.data_numerator_map[ lepton.pt() ][ lepton.absEta() ]->Fill( mTToFill, weight );
             } else if( isPrompt ){
-                prompt_numerator_map[ lepton.pt() ][ lepton.absEta() ]->Fill( 
-		    std::min( mT, mtHistInfo.maxBinCenter() ), weight );
+                maps.prompt_numerator_map[ lepton.pt() ][ lepton.absEta() ]->Fill( mTToFill, weight );
             } else {
-                nonprompt_numerator_map[ lepton.pt() ][ lepton.absEta() ]->Fill( 
-		    std::min( mT, mtHistInfo.maxBinCenter() ), weight );
+                maps.nonprompt_numerator_map[ lepton.pt() ][ lepton.absEta() ]->Fill( mTToFill, weight );
             }
         }
 
 	// fill denominator histograms
-	if( treeReader.isData() ){
-            data_denominator_map[ lepton.pt() ][ lepton.absEta() ]->Fill( 
-		std::min( mT, mtHistInfo.maxBinCenter() ), weight );
+	if( sample.isData() ){
+            maps.data_denominator_map[ lepton.pt() ][ lepton.absEta() ]->Fill( mTToFill, weight );
         } else if( isPrompt ){
-            prompt_denominator_map[ lepton.pt() ][ lepton.absEta() ]->Fill( std::min( 
-		mT, mtHistInfo.maxBinCenter() ), weight );
+            maps.prompt_denominator_map[ lepton.pt() ][ lepton.absEta() ]->Fill( mTToFill, weight );
         } else {
-            nonprompt_denominator_map[ lepton.pt() ][ lepton.absEta() ]->Fill( 
-		std::min( mT, mtHistInfo.maxBinCenter() ), weight );
+            maps.nonprompt_denominator_map[ lepton.pt() ][ lepton.absEta() ]->Fill( mTToFill, weight );
         }
     }
 
+}
+
+
+// function for filling fake rate histograms for a single sample
+void fillFakeRateMeasurementHistograms(const std::string& leptonFlavor, const std::string& year, 
+    const std::string& sampleDirectory, const std::string& sampleList, const unsigned sampleIndex,
+    const std::vector< std::string >& triggerVector, 
+    const std::map< std::string, Prescale >& prescaleMap, double maxMT, double maxMet,
+    const bool isTestRun, const unsigned long nEvents ){ 
+ 
+    std::cout<<"start function fillFakeRateMeasurementHistograms"<<std::endl;
+
+    progressTracker progress = progressTracker("fillFakeRateMeasurement_progress_"+year+"_"
+                                +leptonFlavor+"_sample_"+std::to_string(sampleIndex)+".txt");
+
+    // initialize settings (binning, trigger matching)
+    FakeRateMeasurementSettings settings = makeFakeRateMeasurementSettings( 
+	leptonFlavor, year, triggerVector, prescaleMap, maxMT, maxMet );
+
+    // initialize TreeReader and set to correct sample
+    std::cout<<"initializing TreeReader and setting to sample n. "<<sampleIndex<<std::endl;
+    TreeReader treeReader( sampleList , sampleDirectory );
+    treeReader.initSample( sampleIndex );
+    const bool isData = treeReader.isData();
+    const Sample& sample = treeReader.currentSample();
+
+    // make histogram maps
+    std::cout<<"start building histogram maps"<<std::endl;
+    FakeRateMeasurementMaps maps = buildFakeRateMeasurementMaps( settings, sample, leptonFlavor, year );
+    
+    // initialize a reweighter
+    std::cout<<"building reweighter"<<std::endl;
+    std::shared_ptr< ReweighterFactory >reweighterFactory( new EmptyReweighterFactory() );
+    std::vector<Sample> thissample;
+    thissample.push_back(treeReader.currentSample());
+    CombinedReweighter reweighter = reweighterFactory->buildReweighter( "../weights/", year, 
+					thissample );
+
+    // set number of entries
+    double nEventsReweight = 1.;
+    long unsigned numberOfEntries = fakeRate::limitNumberOfEntries( treeReader.numberOfEntries(), isData,
+					isTestRun, nEvents, nEventsReweight );
+
+    // do event loop
+    std::cout<<"starting event loop for "<<numberOfEntries<<" events"<<std::endl;
+    for(long unsigned entry=0; entry<numberOfEntries; ++entry){
+	if( entry%50000 == 0 ) progress.writeProgress( static_cast<double>(entry)/numberOfEntries );
+	Event event = treeReader.buildEvent( entry, true, false );
+	fillFakeRateMeasurementEvent( event, sample, settings, prescaleMap, reweighter, 
+				      nEventsReweight, maps );
+    }
+
     // write output file
     progress.close();
     std::cout<<"finished event loop"<<std::endl;
     std::string file_name = "fakeRateMeasurement_data_" + leptonFlavor + "_" + year;
     file_name.append("_mT_histograms_sample_"+std::to_string(sampleIndex)+".root");
     TFile* histogram_file = TFile::Open( file_name.c_str(), "RECREATE" );
-    
-    if( treeReader.isMC() ){
-	write2DHistogramMap( prompt_numerator_map );
-	write2DHistogramMap( prompt_denominator_map );
-	write2DHistogramMap( nonprompt_numerator_map );
-	write2DHistogramMap( nonprompt_denominator_map );
+    writeFakeRateMeasurementMaps( maps );
+    histogram_file->Close();
+    std::cout<<"finished function fillFakeRateMeasurementHistograms"<<std::endl;
+}  
+
+
+// function for filling fake rate histograms for all samples in a sample list in a single process
+// note: the output file is equivalent to the hadd of the outputs of 
+//       fillFakeRateMeasurementHistograms for all samples
+void fillFakeRateMeasurementHistogramsParallel(const std::string& leptonFlavor, const std::string& year, 
+    const std::string& sampleDirectory, const std::string& sampleList,
+    const std::vector< std::string >& triggerVector, 
+    const std::map< std::string, Prescale >& prescaleMap, double maxMT, double maxMet,
+    const unsigned numberOfThreads, const bool isTestRun, const unsigned long nEvents ){
+
+    std::cout<<"start function fillFakeRateMeasurementHistogramsParallel"<<std::endl;
+
+    // initialize settings (binning, trigger matching)
+    FakeRateMeasurementSettings settings = makeFakeRateMeasurementSettings( 
+	leptonFlavor, year, triggerVector, prescaleMap, maxMT, maxMet );
+
+    // read samples and set the number of entries to process for each of them
+    TreeReader treeReader( sampleList , sampleDirectory );
+    std::vector< Sample > samples = treeReader.sampleVector();
+    ParallelEventLoop eventLoop( samples, numberOfThreads, treeReader.sampleCatalogPtr() );
+    std::vector< double > nEventsReweights( samples.size(), 1. );
+    for( unsigned i = 0; i < samples.size(); ++i ){
+	eventLoop.setNumberOfEntries( i, fakeRate::limitNumberOfEntries( eventLoop.availableEntries( i ), 
+	    samples[i].isData(), isTestRun, nEvents, nEventsReweights[i] ) );
     }
-    if( treeReader.isData() ){
-	write2DHistogramMap( data_numerator_map );
-	write2DHistogramMap( data_denominator_map );
+
+    // initialize a reweighter
+    std::cout<<"building reweighter"<<std::endl;
+    std::shared_ptr< ReweighterFactory >reweighterFactory( new EmptyReweighterFactory() );
+    CombinedReweighter reweighter = reweighterFactory->buildReweighter( "../weights/", year, samples );
+
+    // make histogram maps for each worker and each process
+    // (histograms are not attached to any file, since each worker opens its own input files)
+    const bool addDirectoryStatus = TH1::AddDirectoryStatus();
+    TH1::AddDirectory( false );
+    std::vector< std::map< std::string, FakeRateMeasurementMaps > > workerMaps( eventLoop.numberOfThreads() );
+    std::vector< std::string > mapKeys;
+    for( const auto& sample : samples ){
+        mapKeys.push_back( sample.isData() ? "data" : sample.processName() );
+    }
+    for( auto& maps : workerMaps ){
+        for( unsigned i = 0; i < samples.size(); ++i ){
+            if( maps.find( mapKeys[i] ) != maps.end() ) continue;
+            maps[ mapKeys[i] ] = buildFakeRateMeasurementMaps( settings, samples[i], leptonFlavor, year );
+        }
     }
 
+    // do event loop
+    eventLoop.run( [&]( TreeReader& reader, const ParallelEventLoop::Task& task, const unsigned workerIndex ){
+        const Sample& sample = eventLoop.sample( task.sampleIndex );
+        FakeRateMeasurementMaps& maps = workerMaps[ workerIndex ].at( mapKeys[ task.sampleIndex ] );
+        for( long unsigned entry = task.firstEntry; entry < task.lastEntry; ++entry ){
+	    Event event = reader.buildEvent( entry, true, false );
+	    fillFakeRateMeasurementEvent( event, sample, settings, prescaleMap, reweighter, 
+					  nEventsReweights[ task.sampleIndex ], maps );
+        }
+    } );
+
+    // merge the histograms of all workers and write output file
+    for( unsigned w = 1; w < workerMaps.size(); ++w ){
+        for( auto& maps_pair : workerMaps.front() ){
+            addFakeRateMeasurementMaps( maps_pair.second, workerMaps[w].at( maps_pair.first ) );
+        }
+    }
+    std::string file_name = "fakeRateMeasurement_data_" + leptonFlavor + "_" + year;
+    file_name.append("_mT_histograms.root");
+    TFile* histogram_file = TFile::Open( file_name.c_str(), "RECREATE" );
+    for( const auto& maps_pair : workerMaps.front() ){
+        writeFakeRateMeasurementMaps( maps_pair.second );
+    }
     histogram_file->Close();
-    std::cout<<"finished function fillFakeRateMeasurementHistograms"<<std::endl;
-}  
+    TH1::AddDirectory( addDirectoryStatus );
+    std::cout<<"finished function fillFakeRateMeasurementHistogramsParallel"<<std::endl;
+}
 
 
 void fillMCFakeRateMeasurementHistograms( const std::string& flavor, const std::string& year, 
@@ -377,10 +507,7 @@ void fillMCFakeRateMeasurementHistograms( const std::string& flavor, const std::
     // make TreeReader and set to correct sample
     std::cout<<"making TreeReader and setting to sample no. "<<sampleIndex<<"."<<std::endl;
     TreeReader treeReader( sampleList, sampleDirectory );
-    treeReader.initSample();
-    for( unsigned i = 1; i <= sampleIndex; ++i ){
-        treeReader.initSample();
-    }
+    treeReader.initSample( sampleIndex );
 
     // loop over events to fill histograms
     unsigned numberOfEntries = treeReader.numberOfEntries();
@@ -189,7 +189,7 @@ RangedMap< std::string > fakeRate::mapElectronPtToTriggerName( const std::vector
 }
 
 
-bool fakeRate::passTriggerJetSelection( Event& event, const std::string& trigger, std::map< std::string, double >& triggerToJetPtMap ){
+bool fakeRate::passTriggerJetSelection( Event& event, const std::string& trigger, const std::map< std::string, double >& triggerToJetPtMap ){
     if( !stringTools::stringContains( trigger, "PFJet" ) ){
         return true;
     } else{
@@ -202,7 +202,7 @@ bool fakeRate::passTriggerJetSelection( Event& event, const std::string& trigger
 		if( event.jet(0).absEta() >= 2.4 ) return false;
 
 		//apply offline pT threshold to be on the trigger plateau
-        if( event.jet(0).pt() <= triggerToJetPtMap[ trigger ] ) return false;
+        if( event.jet(0).pt() <= triggerToJetPtMap.at( trigger ) ) return false;
 		
 		return true;
 	}
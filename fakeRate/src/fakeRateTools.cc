@@ -79,6 +79,26 @@ std::string fakeRate::extractYear( const std::string& histogramName ){
     }
 }
 
+// number of entries to process for a sample, and the corresponding reweighting factor
+long unsigned fakeRate::limitNumberOfEntries( long unsigned numberOfEntries, const bool isData,
+	const bool isTestRun, const unsigned long nEvents, double& nEventsReweight ){
+    nEventsReweight = 1.;
+    if( isTestRun ){
+        // loop over a smaller number of entries for testing and debugging
+        unsigned long nLimit = 10000;
+        std::cout << "limiting number of entries because of test run setting" << std::endl;
+        numberOfEntries = std::min(nLimit, numberOfEntries);
+    }
+    if( nEvents!=0 && nEvents<numberOfEntries && !isData ){
+        // loop over a smaller number of entries if samples are impractically large
+        std::cout << "limiting number of entries to " << nEvents << std::endl;
+        nEventsReweight = (double)numberOfEntries/nEvents;
+        std::cout << "(with corresponding reweighting factor " << nEventsReweight << ")" << std::endl;
+        numberOfEntries = nEvents;
+    }
+    return numberOfEntries;
+}
+
 /********************************************************************************
 function to fit prescales from a file containing prescale measurement  histograms
 ********************************************************************************/
@@ -20,113 +20,110 @@ HistInfo makeVarHistInfo( const unsigned numberOfBins, const double cut, const d
     }
 }
 
-// function for filling prescale histograms for a single sample
-void fillPrescaleMeasurementHistograms( 
-	const std::string& year,
-	const std::string& sampleDirectoryPath, 
-	const std::string& sampleListPath,
-	const unsigned sampleIndex, 
-	const bool isTestRun,
-	const unsigned long nEvents,
-	const std::vector< std::string >& triggerVector,
-	const bool useMT, const double metCut, double mtCut ){
+namespace{
 
-    progressTracker progress = progressTracker("fillPrescaleMeasurement_progress_"+year
-                                +"_sample_"+std::to_string(sampleIndex)+".txt");
+    // histograms for the prescale measurement for a single process (one per trigger)
+    struct PrescaleMeasurementMaps{
+        bool isData;
+        std::map< std::string, std::shared_ptr< TH1D > > prompt_map;
+        std::map< std::string, std::shared_ptr< TH1D > > nonprompt_map;
+        std::map< std::string, std::shared_ptr< TH1D > > data_map;
+    };
 
-    std::cout<<"start function fillPrescaleMeasurementHistograms"<<std::endl;
-    analysisTools::checkYearString( year );
+    // settings of the prescale measurement, shared by all samples
+    struct PrescaleMeasurementSettings{
+        std::vector< std::string > triggerVector;
+        HistInfo histInfo;
+        std::map< std::string, double > leptonPtCutMap;
+        std::map< std::string, double > jetPtCutMap;
+        bool useMT;
+        double metCut;
+        double mtCut;
+        double maxBin;
+    };
+
+    PrescaleMeasurementSettings makePrescaleMeasurementSettings( const std::string& year,
+	const std::vector< std::string >& triggerVector,
+	const bool useMT, const double metCut, const double mtCut ){
+        analysisTools::checkYearString( year );
 
-    // do some histogram initialization and map triggers to lepton pT and jet pT thresholds
-    static constexpr unsigned numberOfBins = 16;
-    static constexpr double maxBin = 160;
-    HistInfo histInfo;
-    if( useMT ){ histInfo = makeVarHistInfo( numberOfBins, mtCut, maxBin, true );}
-    else { histInfo = makeVarHistInfo( numberOfBins, metCut, maxBin, false );}
+        // do some histogram initialization and map triggers to lepton pT and jet pT thresholds
+        static constexpr unsigned numberOfBins = 16;
+        static constexpr double maxBin = 160;
+        HistInfo histInfo;
+        if( useMT ){ histInfo = makeVarHistInfo( numberOfBins, mtCut, maxBin, true );}
+        else { histInfo = makeVarHistInfo( numberOfBins, metCut, maxBin, false );}
 
-    std::map<std::string,double> leptonPtCutMap = fakeRate::mapTriggerToLeptonPtThreshold(
+        std::map<std::string,double> leptonPtCutMap = fakeRate::mapTriggerToLeptonPtThreshold(
+                                                        triggerVector );
+        std::map<std::string,double> jetPtCutMap = fakeRate::mapTriggerToJetPtThreshold(
                                                     triggerVector );
-    std::map<std::string,double> jetPtCutMap = fakeRate::mapTriggerToJetPtThreshold(
-                                                triggerVector );
 
-    // initialize TreeReader and select correct sample
-    std::cout<<"creating TreeReader and set to sample n. "<<sampleIndex<<std::endl;
-    TreeReader treeReader( sampleListPath, sampleDirectoryPath);
-    treeReader.initSample();
-    for(unsigned idx=1; idx<=sampleIndex; ++idx){
-        treeReader.initSample();
+        return { triggerVector, histInfo, leptonPtCutMap, jetPtCutMap, useMT, metCut, mtCut, maxBin };
     }
-    const bool isData = treeReader.isData();
-    
-    // printouts for testing
-    /*std::cout << treeReader.is2016() << std::endl;
-    std::cout << treeReader.is2016PreVFP() << std::endl;
-    std::cout << treeReader.is2016PostVFP() << std::endl;
-    std::cout << treeReader.is2017() << std::endl;
-    std::cout << treeReader.is2018() << std::endl;*/
 
-    // make histograms for this sample
-    std::map< std::string, std::shared_ptr< TH1D > > prompt_map;
-    std::map< std::string, std::shared_ptr< TH1D > > nonprompt_map;
-    std::map< std::string, std::shared_ptr< TH1D > > data_map;
-    if( isData ){
-        for( const auto& trigger : triggerVector ){
-            data_map[trigger] = histInfo.makeHist( "data_mT_" + year + "_" + trigger );
-        }
-    }
-    else{
-        for( const auto& trigger : triggerVector ){
-            prompt_map[trigger] = histInfo.makeHist( treeReader.currentSamplePtr()->processName()
+    PrescaleMeasurementMaps buildPrescaleMeasurementMaps( const PrescaleMeasurementSettings& settings,
+	const Sample& sample, const std::string& year ){
+        PrescaleMeasurementMaps maps;
+        maps.isData = sample.isData();
+        for( const auto& trigger : settings.triggerVector ){
+            if( maps.isData ){
+                maps.data_map[trigger] = settings.histInfo.makeHist( "data_mT_" + year + "_" + trigger );
+            } else {
+                maps.prompt_map[trigger] = settings.histInfo.makeHist( sample.processName()
                                                     + "_prompt_mT_" + year + "_" + trigger );
-            nonprompt_map[trigger] = histInfo.makeHist( treeReader.currentSamplePtr()->processName()
+                maps.nonprompt_map[trigger] = settings.histInfo.makeHist( sample.processName()
                                                     + "_nonprompt_mT_" + year + "_" + trigger );
+            }
         }
+        return maps;
     }
 
-    // make reweighter
-    std::shared_ptr< ReweighterFactory >reweighterFactory( new EmptyReweighterFactory() );
-    CombinedReweighter reweighter = reweighterFactory->buildReweighter( "../weights/",
-                                                        year, treeReader.sampleVector() );
-    
-    // set number of entries
-    long unsigned numberOfEntries = treeReader.numberOfEntries();
-    double nEventsReweight = 1.;
-    if( isTestRun ){
-	// loop over a smaller number of entries for testing and debugging
-	unsigned long nLimit = 10000;
-	std::cout << "limiting number of entries because of test run setting" << std::endl;
-	numberOfEntries = std::min(nLimit, numberOfEntries);
+    void addPrescaleMeasurementMaps( PrescaleMeasurementMaps& maps, const PrescaleMeasurementMaps& otherMaps ){
+        for( const auto& hist_pair : otherMaps.data_map ){
+            maps.data_map.at( hist_pair.first )->Add( hist_pair.second.get() );
+        }
+        for( const auto& hist_pair : otherMaps.prompt_map ){
+            maps.prompt_map.at( hist_pair.first )->Add( hist_pair.second.get() );
+        }
+        for( const auto& hist_pair : otherMaps.nonprompt_map ){
+            maps.nonprompt_map.at( hist_pair.first )->Add( hist_pair.second.get() );
+        }
     }
-    if( nEvents!=0 && nEvents<numberOfEntries && !isData ){
-	// loop over a smaller number of entries if samples are impractically large
-	std::cout << "limiting number of entries to " << nEvents << std::endl;
-	nEventsReweight = (double)numberOfEntries/nEvents;
-	std::cout << "(with corresponding reweighting factor " << nEventsReweight << ")" << std::endl;
-	numberOfEntries = nEvents;
+
+    void writePrescaleMeasurementMaps( const PrescaleMeasurementSettings& settings,
+	const PrescaleMeasurementMaps& maps ){
+        for( const auto& trigger : settings.triggerVector ){
+            if( maps.isData ){
+                maps.data_map.at( trigger )->Write();
+            } else {
+                maps.prompt_map.at( trigger )->Write();
+                maps.nonprompt_map.at( trigger )->Write();
+            }
+        }
     }
 
-    // do event loop
-    std::cout<<"start event loop for "<<numberOfEntries<<" events"<<std::endl;
-    for( long unsigned entry = 0; entry < numberOfEntries; ++entry ){
-        if( entry%10000 == 0 ) progress.writeProgress( static_cast<double>(entry)/numberOfEntries );
-        Event event = treeReader.buildEvent( entry, true, false );
+    // fill the histograms for a single event
+    void fillPrescaleMeasurementEvent( Event& event, const Sample& sample,
+	const PrescaleMeasurementSettings& settings, const CombinedReweighter& reweighter,
+	const double nEventsReweight, PrescaleMeasurementMaps& maps ){
 
         // check if event passes necessary selections
         // consider both electrons and muons, only tight leptons and events with a jet.
-        if(!fakeRate::passFakeRateEventSelection(event,false,false,true,true,0.7,40)) continue;
+        if(!fakeRate::passFakeRateEventSelection(event,false,false,true,true,0.7,40)) return;
         LightLepton& lepton = event.lightLepton(0);
         double mT = mt( lepton, event.met() );
-        if( mT <= mtCut ) continue;
-        if( event.metPt() <= metCut ) continue;
-        if( mT > maxBin ) continue;
+        if( mT <= settings.mtCut ) return;
+        if( event.metPt() <= settings.metCut ) return;
+        if( mT > settings.maxBin ) return;
 
         // determine event weight
         double weight = event.weight()*nEventsReweight;
-        if( !isData ) weight *= reweighter.totalWeight( event );
+        if( !maps.isData ) weight *= reweighter.totalWeight( event );
         else weight = 1;
 
 	// loop over triggers
-        for( const auto& trigger : triggerVector ){
+        for( const auto& trigger : settings.triggerVector ){
 	    // check if event passes trigger and if lepton is correct flavor
             if( !event.passTrigger( trigger ) ) continue;
             if( stringTools::stringContains( trigger, "Mu" ) ){
@@ -140,31 +137,79 @@ void fillPrescaleMeasurementHistograms(
                 throw std::invalid_argument(errorm);
             }
 	    // check if lepton has correct pT for this trigger
-            if( lepton.uncorrectedPt() <= leptonPtCutMap[trigger] ) continue;
+            if( lepton.uncorrectedPt() <= settings.leptonPtCutMap.at( trigger ) ) continue;
 	    // check if jet passes trigger requirements
-            if( !fakeRate::passTriggerJetSelection( event, trigger, jetPtCutMap ) ) continue;
+            if( !fakeRate::passTriggerJetSelection( event, trigger, settings.jetPtCutMap ) ) continue;
 	    // fill correct histogram
-            double valueToFill = ( useMT ? mT : event.metPt() );
+            double valueToFill = std::min( ( settings.useMT ? mT : event.metPt() ),
+					   settings.histInfo.maxBinCenter() );
 	    bool isPrompt = false;
 	    if( event.isMC() ){
-		if( lepton.isPrompt() && treeReader.currentSamplePtr()->processName()!="QCD" ){
+		if( lepton.isPrompt() && sample.processName()!="QCD" ){
 		    // manually set all leptons in QCD samples to nonprompt!
 		    isPrompt = true;
 		}
 	    }
-            if( isData ){
-                data_map[ trigger ]->Fill( std::min( valueToFill, histInfo.maxBinCenter() ), weight );
+            if( maps.isData ){
+                maps.data_map.at( trigger )->Fill( valueToFill, weight );
+            } else if( isPrompt ){
+                maps.prompt_map.at( trigger )->Fill( valueToFill, weight );
             } else {
-                if( isPrompt ){
-                    prompt_map[ trigger ]->Fill( std::min( valueToFill, histInfo.maxBinCenter() ),
-                                                weight );
-                } else {
-                    nonprompt_map[ trigger ]->Fill( std::min( valueToFill, histInfo.maxBinCenter() ),
-                                                        weight );
-                }
+                maps.nonprompt_map.at( trigger )->Fill( valueToFill, weight );
             }
         }
     }
+}
+
+
+// function for filling prescale histograms for a single sample
+void fillPrescaleMeasurementHistograms( 
+	const std::string& year,
+	const std::string& sampleDirectoryPath, 
+	const std::string& sampleListPath,
+	const unsigned sampleIndex, 
+	const bool isTestRun,
+	const unsigned long nEvents,
+	const std::vector< std::string >& triggerVector,
+	const bool useMT, const double metCut, double mtCut ){
+
+    progressTracker progress = progressTracker("fillPrescaleMeasurement_progress_"+year
+                                +"_sample_"+std::to_string(sampleIndex)+".txt");
+
+    std::cout<<"start function fillPrescaleMeasurementHistograms"<<std::endl;
+
+    // initialize settings (binning, trigger thresholds)
+    PrescaleMeasurementSettings settings = makePrescaleMeasurementSettings(
+	year, triggerVector, useMT, metCut, mtCut );
+
+    // initialize TreeReader and select correct sample
+    std::cout<<"creating TreeReader and set to sample n. "<<sampleIndex<<std::endl;
+    TreeReader treeReader( sampleListPath, sampleDirectoryPath);
+    treeReader.initSample( sampleIndex );
+    const bool isData = treeReader.isData();
+    const Sample& sample = treeReader.currentSample();
+
+    // make histograms for this sample
+    PrescaleMeasurementMaps maps = buildPrescaleMeasurementMaps( settings, sample, year );
+
+    // make reweighter
+    std::shared_ptr< ReweighterFactory >reweighterFactory( new EmptyReweighterFactory() );
+    CombinedReweighter reweighter = reweighterFactory->buildReweighter( "../weights/",
+                                                        year, treeReader.sampleVector() );
+    
+    // set number of entries
+    double nEventsReweight = 1.;
+    long unsigned numberOfEntries = fakeRate::limitNumberOfEntries( treeReader.numberOfEntries(), isData,
+					isTestRun, nEvents, nEventsReweight );
+
+    // do event loop
+    std::cout<<"start event loop for "<<numberOfEntries<<" events"<<std::endl;
+    for( long unsigned entry = 0; entry < numberOfEntries; ++entry ){
+        if( entry%10000 == 0 ) progress.writeProgress( static_cast<double>(entry)/numberOfEntries );
+        Event event = treeReader.buildEvent( entry, true, false );
+        fillPrescaleMeasurementEvent( event, sample, settings, reweighter, nEventsReweight, maps );
+    }
+
     // write output histograms to file
     progress.close();
     std::cout<<"finished event loop"<<std::endl;
@@ -173,17 +218,87 @@ void fillPrescaleMeasurementHistograms(
     outfilename.append("_histograms_"+year+"_sample_"+std::to_string(sampleIndex)+".root");
     std::cout<<"writing to file "<<outfilename<<std::endl;
     TFile* histogram_file = TFile::Open( outfilename.c_str(), "RECREATE" );
-    if( isData ){
-        for( const auto& trigger : triggerVector ){
-            data_map[ trigger ]->Write();
+    writePrescaleMeasurementMaps( settings, maps );
+    histogram_file->Close();
+    std::cout<<"finished function fillPrescaleMeasurementHistograms"<<std::endl;
+}
+
+
+// function for filling prescale histograms for all samples in a sample list in a single process
+// note: the output file is equivalent to the hadd of the outputs of 
+//       fillPrescaleMeasurementHistograms for all samples
+void fillPrescaleMeasurementHistogramsParallel(
+	const std::string& year,
+	const std::string& sampleDirectoryPath,
+	const std::string& sampleListPath,
+	const unsigned numberOfThreads,
+	const bool isTestRun,
+	const unsigned long nEvents,
+	const std::vector< std::string >& triggerVector,
+	const bool useMT, const double metCut, double mtCut ){
+
+    std::cout<<"start function fillPrescaleMeasurementHistogramsParallel"<<std::endl;
+
+    // initialize settings (binning, trigger thresholds)
+    PrescaleMeasurementSettings settings = makePrescaleMeasurementSettings(
+	year, triggerVector, useMT, metCut, mtCut );
+
+    // read samples and set the number of entries to process for each of them
+    TreeReader treeReader( sampleListPath, sampleDirectoryPath );
+    std::vector< Sample > samples = treeReader.sampleVector();
+    ParallelEventLoop eventLoop( samples, numberOfThreads, treeReader.sampleCatalogPtr() );
+    std::vector< double > nEventsReweights( samples.size(), 1. );
+    for( unsigned i = 0; i < samples.size(); ++i ){
+	eventLoop.setNumberOfEntries( i, fakeRate::limitNumberOfEntries( eventLoop.availableEntries( i ),
+	    samples[i].isData(), isTestRun, nEvents, nEventsReweights[i] ) );
+    }
+
+    // make reweighter
+    std::shared_ptr< ReweighterFactory >reweighterFactory( new EmptyReweighterFactory() );
+    CombinedReweighter reweighter = reweighterFactory->buildReweighter( "../weights/", year, samples );
+
+    // make histograms for each worker and each process
+    // (histograms are not attached to any file, since each worker opens its own input files)
+    const bool addDirectoryStatus = TH1::AddDirectoryStatus();
+    TH1::AddDirectory( false );
+    std::vector< std::map< std::string, PrescaleMeasurementMaps > > workerMaps( eventLoop.numberOfThreads() );
+    std::vector< std::string > mapKeys;
+    for( const auto& sample : samples ){
+        mapKeys.push_back( sample.isData() ? "data" : sample.processName() );
+    }
+    for( auto& maps : workerMaps ){
+        for( unsigned i = 0; i < samples.size(); ++i ){
+            if( maps.find( mapKeys[i] ) != maps.end() ) continue;
+            maps[ mapKeys[i] ] = buildPrescaleMeasurementMaps( settings, samples[i], year );
         }
     }
-    else{
-        for( const auto& trigger : triggerVector ){
-            prompt_map[ trigger ]->Write();
-            nonprompt_map[ trigger ]->Write();
+
+    // do event loop
+    eventLoop.run( [&]( TreeReader& reader, const ParallelEventLoop::Task& task, const unsigned workerIndex ){
+        const Sample& sample = eventLoop.sample( task.sampleIndex );
+        PrescaleMeasurementMaps& maps = workerMaps[ workerIndex ].at( mapKeys[ task.sampleIndex ] );
+        for( long unsigned entry = task.firstEntry; entry < task.lastEntry; ++entry ){
+            Event event = reader.buildEvent( entry, true, false );
+            fillPrescaleMeasurementEvent( event, sample, settings, reweighter,
+                                          nEventsReweights[ task.sampleIndex ], maps );
+        }
+    } );
+
+    // merge the histograms of all workers and write output file
+    for( unsigned w = 1; w < workerMaps.size(); ++w ){
+        for( auto& maps_pair : workerMaps.front() ){
+            addPrescaleMeasurementMaps( maps_pair.second, workerMaps[w].at( maps_pair.first ) );
         }
     }
+    std::string outfilename("prescaleMeasurement_");
+    outfilename.append(useMT?"mT":"met");
+    outfilename.append("_histograms_"+year+".root");
+    std::cout<<"writing to file "<<outfilename<<std::endl;
+    TFile* histogram_file = TFile::Open( outfilename.c_str(), "RECREATE" );
+    for( const auto& maps_pair : workerMaps.front() ){
+        writePrescaleMeasurementMaps( settings, maps_pair.second );
+    }
     histogram_file->Close();
-    std::cout<<"finished function fillPrescaleMeasurementHistograms"<<std::endl;
+    TH1::AddDirectory( addDirectoryStatus );
+    std::cout<<"finished function fillPrescaleMeasurementHistogramsParallel"<<std::endl;
 }
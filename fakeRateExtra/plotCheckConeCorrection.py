@@ -8,8 +8,8 @@ import glob
 import ROOT
 import array
 sys.path.append('../plotting/python')
-import hist2dplotter as h2p
 import plottools as pt
+from plotbatch import PlotBatch
 
 # global settings
 flavours = ['muon','electron','emu']
@@ -230,6 +230,10 @@ if __name__=='__main__':
 	    print('executing {}'.format(cmd))
 	    os.system(cmd)
 
+    # collect the 2D plots to render them in parallel at the end
+    # (plots that did not change since a previous run are skipped)
+    batch = PlotBatch()
+
     # loop over years and flavours
     cwd = os.getcwd()
     for year in years:
@@ -289,7 +293,7 @@ if __name__=='__main__':
 		    outfile = 'correlation_{}_{}_{}_{}'.format(year,flavour,leptontype,pttype)
 		    outfile = os.path.join(outputdir,outfile)
 		    thisextrainfos = extrainfos + [labeldict[pttype]]
-		    h2p.plot2dhistogram( histdict[pttype][leptontype], outfile,
+		    batch.add( 'hist2dplotter.plot2dhistogram', histdict[pttype][leptontype], outfile,
 			drawoptions='colz', cmin=0.01,
 			docmstext=True, extracmstext='Preliminary Simulation',
 			cms_in_grid=False,
@@ -310,3 +314,6 @@ if __name__=='__main__':
 			yaxtitle='Lepton p_{T} (GeV)',
 			extracmstext='#splitline{Preliminary}{Simulation}',
 			extrainfos=extrainfos )
+
+    # make all 2D plots
+    batch.run()
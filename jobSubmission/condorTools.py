@@ -11,6 +11,9 @@
 
 import os
 import sys
+import re
+import json
+import subprocess
 
 def makeUnique(fname):
     ### make a file name unique by appending a number to it,
@@ -41,7 +44,7 @@ def initJobScript(name,
     # parse filename
     name = os.path.splitext(name)[0]
     fname = name+'.sh'
-    if os.path.exists(fname): os.system('rm {}'.format(fname))
+    if os.path.exists(fname): os.remove(fname)
     cwd = os.path.abspath(os.getcwd())
     # parse home
     if home=='auto': home = os.environ['HOME']
@@ -65,7 +68,8 @@ def initJobScript(name,
             script.write('export X509_USER_PROXY={}\n'.format( proxy ))
         script.write('cd {}\n'.format( cwd ) )
     # make executable
-    os.system('chmod +x '+fname)
+    # (note: avoid spawning a shell, as this is called once per job)
+    os.chmod(fname, os.stat(fname).st_mode | 0o111)
     print('initJobScript created {}'.format(fname))
 
 def makeJobDescription(name, exe, argstring=None, 
@@ -208,3 +212,128 @@ def submitCommandsAsCondorJobs(name, commands, stdout=None, stderr=None, log=Non
                             jobflavour=jobflavour)
         # finally submit the job
         submitCondorJob(jdname)
+
+def makeBulkJobDescription(name, scripts, 
+                       stdout=None, stderr=None, log=None,
+                       cpus=1, mem=1024, disk=10240, 
+                       proxy=None, jobflavour=None):
+    ### create a single job description txt file for a list of executables
+    # the executables are listed in a 'queue ... from' table,
+    # so that all jobs can be submitted in a single call to condor_submit.
+    # note: the job with ProcId i corresponds to scripts[i].
+    name = os.path.splitext(name)[0]
+    fname = name+'.txt'
+    if os.path.exists(fname): os.remove(fname)
+    if stdout is None: stdout = name+'_out_$(ClusterId)_$(ProcId)'
+    if stderr is None: stderr = name+'_err_$(ClusterId)_$(ProcId)'
+    if log is None: log = name+'_log_$(ClusterId)_$(ProcId)'
+    with open(fname,'w') as f:
+        f.write('executable = $(script)\n\n')
+        f.write('output = {}\n'.format(stdout))
+        f.write('error = {}\n'.format(stderr))
+        f.write('log = {}\n\n'.format(log))
+        f.write('request_cpus = {}\n'.format(cpus))
+        f.write('request_memory = {}\n'.format(mem))
+        f.write('request_disk = {}\n'.format(disk))
+        if proxy is not None: 
+            f.write('x509userproxy = {}\n'.format(proxy))
+            f.write('use_x509userproxy = true\n\n')
+        if jobflavour is not None:
+            f.write('+JobFlavour = "{}"\n\n'.format(jobflavour))
+        f.write('queue script from (\n')
+        for script in scripts: f.write('{}\n'.format(script))
+        f.write(')\n')
+    print('makeBulkJobDescription created {} ({} jobs)'.format(fname,len(scripts)))
+    return fname
+
+def submitCondorJobGetClusterId(jobDescription):
+    ### submit a job description file and return the cluster id
+    # returns None if the cluster id could not be retrieved from the condor_submit output.
+    fname = os.path.splitext(jobDescription)[0]+'.txt'
+    if not os.path.exists(fname):
+        print('ERROR: job description file {} not found'.format(fname))
+        sys.exit()
+    try:
+        output = subprocess.check_output(['condor_submit', fname], stderr=subprocess.STDOUT)
+    except subprocess.CalledProcessError as error:
+        print('ERROR: condor_submit failed with the following output:')
+        print(error.output)
+        return None
+    if not isinstance(output,str): output = output.decode()
+    print(output)
+    # (expected format of the last line: "<n> job(s) submitted to cluster <id>.")
+    match = re.search(r'submitted to cluster (\d+)', output)
+    if match is None: return None
+    return int(match.group(1))
+
+def getResources(cpus=1, mem=1024, disk=10240, proxy=None, jobflavour=None):
+    ### make a dict of the requested resources of a submission
+    # (as stored in the manifest, to be passed back to makeBulkJobDescription on resubmission)
+    return {'cpus': cpus, 'mem': mem, 'disk': disk, 'proxy': proxy, 'jobflavour': jobflavour}
+
+def writeManifest(manifest, jobs, jobdescription=None, clusterid=None, resources=None):
+    ### write a manifest file for a set of jobs
+    # input arguments:
+    # - manifest: name of the manifest file to write
+    # - jobs: list of dicts, one per job, with keys 'procid', 'script' and 'commands'
+    # - jobdescription: name of the job description file
+    # - clusterid: cluster id of the submitted jobs
+    # - resources: dict of requested resources (see getResources)
+    info = {'jobdescription': jobdescription, 'clusterid': clusterid,
+            'workdir': os.path.abspath(os.getcwd()), 'jobs': jobs,
+            'resources': resources}
+    with open(manifest,'w') as f:
+        json.dump(info, f, indent=1)
+    print('writeManifest created {}'.format(manifest))
+
+def readManifest(manifest):
+    ### read a manifest file (see writeManifest)
+    # note: for manifests written before the resources were stored,
+    #       'resources' is set to None (i.e. default resources).
+    with open(manifest,'r') as f:
+        info = json.load(f)
+    info.setdefault('resources', None)
+    return info
+
+def submitCommandsAsCondorJobsBulk(name, commands, stdout=None, stderr=None, log=None,
+            cpus=1, mem=1024, disk=10240,
+            home=None,
+            proxy=None,
+            cmssw_version=None,
+            jobflavour=None):
+    ### submit multiple sets of commands as jobs (one job per set) in a single submission
+    # same as submitCommandsAsCondorJobs, but all jobs are put in the same cluster
+    # using a single job description file and a single call to condor_submit.
+    # a manifest file (json) is written that maps each job (cluster id and process id)
+    # to its executable and commands.
+    # returns:
+    # the name of the manifest file
+    name = os.path.splitext(name)[0]
+    # find a unique name for this submission
+    # (only probing the manifest name instead of every executable name)
+    manifest = makeUnique(name+'_manifest.json')
+    bulkname = os.path.splitext(manifest)[0].replace('_manifest','',1)
+    # make the executables
+    jobs = []
+    scripts = []
+    for procid,commandset in enumerate(commands):
+        shname = '{}_job{}.sh'.format(bulkname,procid)
+        initJobScript(shname, home=home, cmssw_version=cmssw_version, proxy=proxy)
+        with open(shname,'a') as script:
+             for cmd in commandset: script.write(cmd+'\n')
+        scripts.append(shname)
+        jobs.append({'procid':procid, 'script':os.path.abspath(shname),
+                     'commands':list(commandset)})
+    # make the job description
+    jdname = makeBulkJobDescription(bulkname, scripts,
+                        stdout=stdout, stderr=stderr, log=log,
+                        cpus=cpus, mem=mem, disk=disk, proxy=proxy,
+                        jobflavour=jobflavour)
+    # submit all jobs at once
+    clusterid = submitCondorJobGetClusterId(jdname)
+    if clusterid is None:
+        print('WARNING: could not retrieve the cluster id of the submitted jobs.')
+    writeManifest(manifest, jobs, jobdescription=os.path.abspath(jdname), clusterid=clusterid,
+                  resources=getResources(cpus=cpus, mem=mem, disk=disk, proxy=proxy,
+                                         jobflavour=jobflavour))
+    return manifest
@@ -0,0 +1,61 @@
+################################################################
+# common entry points for running jobs with different backends #
+################################################################
+
+# general use:
+# the functions in this tool have the same entry points as the ones in condorTools.py,
+# with an additional runmode argument to choose the backend:
+# - 'condor': submit jobs to condor (see condorTools.py)
+# - 'condor-bulk': submit all jobs to condor in a single submission,
+#   and write a manifest file mapping jobs to commands
+#   (see condorTools.submitCommandsAsCondorJobsBulk)
+# - 'local': run jobs one after the other on the local machine (see localTools.py)
+# - 'local-parallel': run jobs on the local machine in a bounded process pool
+#   (see localTools.py; the number of simultaneous jobs is set by nworkers,
+#   default is the number of cores)
+# in the local modes, a list of exit codes is returned.
+
+import os
+import sys
+import condorTools as ct
+import localTools as lt
+
+runmodes = ['condor', 'condor-bulk', 'local', 'local-parallel']
+
+def checkRunmode(runmode):
+    ### check if a runmode is valid
+    if runmode not in runmodes:
+        msg = 'ERROR in executorTools: runmode {} not recognized;'.format(runmode)
+        msg += ' choose from {}.'.format(runmodes)
+        raise Exception(msg)
+
+def submitCommandsAsJobs(name, commands, runmode='condor', nworkers=None, **kwargs):
+    ### run multiple sets of commands as jobs (one job per set)
+    # note: see condorTools.submitCommandsAsCondorJobs for the format of commands.
+    # note: kwargs are passed down to the backend-specific function.
+    checkRunmode(runmode)
+    if runmode=='condor':
+        return ct.submitCommandsAsCondorJobs(name, commands, **kwargs)
+    if runmode=='condor-bulk':
+        return ct.submitCommandsAsCondorJobsBulk(name, commands, **kwargs)
+    if runmode=='local': nworkers = 1
+    return lt.submitCommandsAsLocalJobs(name, commands, nworkers=nworkers, **kwargs)
+
+def submitCommandsAsCluster(name, commands, runmode='condor', nworkers=None, **kwargs):
+    ### run several similar commands as a cluster of jobs (one job per command)
+    # note: see condorTools.submitCommandsAsCondorCluster for the requirements on commands.
+    # note: kwargs are passed down to the backend-specific function.
+    checkRunmode(runmode)
+    # (note: a condor cluster is already submitted in a single call)
+    if runmode in ['condor','condor-bulk']:
+        return ct.submitCommandsAsCondorCluster(name, commands, **kwargs)
+    if runmode=='local': nworkers = 1
+    return lt.submitCommandsAsLocalCluster(name, commands, nworkers=nworkers, **kwargs)
+
+def submitCommandsAsJob(name, commands, runmode='condor', nworkers=None, **kwargs):
+    ### run a set of commands as a single job
+    return submitCommandsAsJobs(name, [commands], runmode=runmode, nworkers=nworkers, **kwargs)
+
+def submitCommandAsJob(name, command, runmode='condor', nworkers=None, **kwargs):
+    ### run a single command as a single job
+    return submitCommandsAsJobs(name, [[command]], runmode=runmode, nworkers=nworkers, **kwargs)
@@ -22,6 +22,9 @@
 #   you can simply run 'jobCheck [+args]' from anywhere, 
 #   without specifying "python" or the path to this script.
 # Note:
+#   With the --db option, the job states are kept in a database in the job directory
+#   (see jobDatabase.py), and only log files that changed since the previous check are read.
+# Note:
 #   Should work for both condor and qsub log files.
 #   The latter has not been used in a long time however, so not sure.
 
@@ -30,27 +33,41 @@ import sys
 import os
 import argparse
 import glob
+import logScanner as ls
+
+
+# hard-coded default error content
+default_error_content = ([  'SysError',
+                            '/var/torque/mom_priv/jobs',
+                            'R__unzip: error',
+                            'hadd exiting due to error in',
+                            'Bus error',
+                            'Exception:',
+                            'Traceback (most recent call last):' ])
+default_error_content.append('###error###') # custom error tag for targeted flagging
 
 
 def check_start_done( filename, 
 		      starting_tag='###starting###',
 		      done_tag='###done###',
 		      ntarget=None,
-		      verbose=True ):
+		      verbose=True,
+		      counts=None ):
     ### check starting and done tags in a file.
     # returns 0 in case of no errors, which is defined as:
     #   - at least one starting tag is present in the file.
     #   - the number of done tags equals the number of starting tags.
     #   - the number of done tags equals the target number (if provided).
     # returns 1 in all other cases.
+    # note: counts is an optional dict of tag counts for this file
+    #       (see logScanner.scanFilesAsDicts); if not provided, the file is scanned.
 
-    # read the file content
-    f = open(filename)
-    filetext = f.read()
-    f.close()
+    # scan the file
+    if counts is None:
+	counts = ls.scanFilesAsDicts([filename], [starting_tag, done_tag])[filename]
     
     # count number of starting tags
-    nstarted = filetext.count(starting_tag)
+    nstarted = counts[starting_tag]
     if(nstarted==0):
 	if verbose:
 	    msg = 'WARNING in jobCheck.py: file {}'.format(filename)
@@ -59,7 +76,7 @@ def check_start_done( filename,
         return 1
 
     # count number of done tags
-    ndone = filetext.count(done_tag)
+    ndone = counts[done_tag]
     if ntarget is None: ntarget = ndone
 
     # return 0 if all is ok
@@ -75,31 +92,25 @@ def check_start_done( filename,
     return 1
 
 
-def check_error_content(filename, contentlist='default', verbose=True):
+def check_error_content(filename, contentlist='default', verbose=True, counts=None):
     ### check for known error messages in a file.
     # returns 0 if none of the elements of contentlist is present in the file;
     # returns 1 otherwise.
-
-    # read the file content
-    f = open(filename)
-    filetext = f.read()
-    f.close()
+    # note: counts is an optional dict of tag counts for this file
+    #       (see logScanner.scanFilesAsDicts); if not provided, the file is scanned.
 
     # hard-coded default error content
     if( isinstance(contentlist,str) and contentlist=='default' ):
-	contentlist = ([    'SysError',
-                           '/var/torque/mom_priv/jobs',
-                           'R__unzip: error',
-                           'hadd exiting due to error in',
-                           'Bus error',
-                           'Exception:',
-                           'Traceback (most recent call last):' ])
-	contentlist.append('###error###') # custom error tag for targeted flagging
+	contentlist = default_error_content
+
+    # scan the file
+    if counts is None:
+	counts = ls.scanFilesAsDicts([filename], contentlist)[filename]
 
     # check if the file content contains provided error tags
     contains = []
     for idx,content in enumerate(contentlist):
-	if filetext.count(content)>0:
+	if counts[content]>0:
 	    contains.append(idx)
     if len(contains)==0: return 0
     if verbose:
@@ -126,6 +137,12 @@ if __name__=='__main__':
 			help='Ignore starting and done tags, only check for errors.')
     parser.add_argument('--noerrors', action='store_true',
 			help='Ignore errors, only check starting and done tags.')
+    parser.add_argument('--nthreads', default=None, type=int,
+			help='Number of threads for scanning files (default: number of cores).')
+    parser.add_argument('--db', action='store_true',
+			help='Keep the job states in a database in the job directory'
+			    +' and only scan log files that changed since the previous check'
+			    +' (see jobDatabase.py).')
     args = parser.parse_args()
 
     # print arguments
@@ -136,6 +153,24 @@ if __name__=='__main__':
     # some more parsing
     if args.ntags is not None: args.ntags = int(args.ntags)
 
+    # incremental checking using the job state database
+    if args.db:
+	import jobDatabase
+	with jobDatabase.JobDatabase(args.dir) as jobdb:
+	    print('scanning changed error log files...')
+	    (nfiles, nread) = jobdb.update(starting_tag=args.starting_tag,
+		done_tag=args.done_tag,
+		errortags=([] if args.noerrors else None),
+		ntarget=args.ntags,
+		ignoretags=args.notags,
+		nthreads=args.nthreads)
+	    summary = jobdb.summary()
+	print('number of error log files: {}'.format(nfiles))
+	print('number of files scanned (new or changed): {}'.format(nread))
+	for status in jobDatabase.statuses:
+	    print('number of jobs with status {}: {}'.format(status, summary[status]))
+	sys.exit()
+
     # find files
     print('finding files...')
     condorpattern = os.path.join(args.dir,'*_err_*')
@@ -145,6 +180,12 @@ if __name__=='__main__':
     print('found {} error log files.'.format(nfiles))
     print('start scanning...')
 
+    # scan all files in a single pass per file
+    tags = []
+    if not args.notags: tags += [args.starting_tag, args.done_tag]
+    if not args.noerrors: tags += default_error_content
+    counts = ls.scanFilesAsDicts(files, tags, nthreads=args.nthreads)
+
     # loop over files
     nerror = 0
     for fname in files:
@@ -156,9 +197,10 @@ if __name__=='__main__':
 	    error_start_done = check_start_done(fname,
 		starting_tag = args.starting_tag,
 		done_tag = args.done_tag,
-		ntarget = args.ntags)
+		ntarget = args.ntags,
+		counts = counts[fname])
 	if not args.noerrors: 
-	    error_content = check_error_content(fname)
+	    error_content = check_error_content(fname, counts=counts[fname])
 	if(error_start_done + error_content > 0): nerror += 1
 
     # print results
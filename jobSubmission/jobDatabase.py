@@ -0,0 +1,291 @@
+#######################################################
+# persistent job state database for checking jobs     #
+#######################################################
+
+# general use:
+# the state of all jobs in a job directory is kept in an SQLite database
+# (by default the file jobState.db in that directory),
+# with one entry per job, keyed by condor cluster id and process id.
+# for each job, the database holds the executable script and commands,
+# the requested resources (see condorTools.getResources), the status, the number of submission attempts,
+# and the results of the previous scans of its error log file
+# (file size, modification time, scanned offset, tag counts and found errors).
+# this allows to:
+# - check only the error log files that changed since the previous check,
+#   and in that case only read the part that was added since the previous check.
+# - resubmit all failed jobs in a single operation (see resubmitJobs).
+# note: the executable and commands for each job are taken from manifest files
+#       (see condorTools.submitCommandsAsCondorJobsBulk) if available,
+#       else from the ###exename### line in the output log file.
+
+import os
+import sys
+import glob
+import json
+import sqlite3
+import condorTools as ct
+import logScanner as ls
+from jobCheck import default_error_content
+
+
+# possible job statuses
+# - submitted: no error log file found (yet)
+# - unfinished: not all starting tags have a corresponding done tag
+#   (i.e. either still running or crashed)
+# - done: all starting tags have a corresponding done tag and no errors were found
+# - failed: known error content was found
+# - resubmitted: the job was resubmitted under a new cluster id and process id
+statuses = ['submitted', 'unfinished', 'done', 'failed', 'resubmitted']
+
+
+def parseLogFileName(filename):
+    ### get cluster id and process id from the name of a condor log file
+    # (assuming the default naming convention <name>_<type>_<ClusterId>_<ProcId>)
+    # returns None if the name does not have the expected format.
+    parts = os.path.basename(filename).rsplit('_',2)
+    if len(parts)!=3: return None
+    try: return (int(parts[1]), int(parts[2]))
+    except: return None
+
+
+class JobDatabase(object):
+    ### persistent job state database for a job directory
+
+    def __init__(self, jobdir, dbname='jobState.db'):
+        ### open (or create) the database in a given job directory
+        self.jobdir = os.path.abspath(jobdir)
+        self.dbfile = os.path.join(self.jobdir, dbname)
+        self.conn = sqlite3.connect(self.dbfile)
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS jobs (
+            clusterid INTEGER, procid INTEGER,
+            script TEXT, commands TEXT,
+            status TEXT, attempts INTEGER,
+            errfile TEXT, errsize INTEGER, errmtime REAL, erroffset INTEGER,
+            nstarted INTEGER, ndone INTEGER, errors TEXT, resources TEXT,
+            PRIMARY KEY (clusterid, procid) )''')
+        # (databases made before the resources were stored do not have the resources column yet)
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(jobs)').fetchall()]
+        if 'resources' not in columns:
+            self.conn.execute('ALTER TABLE jobs ADD COLUMN resources TEXT')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS manifests (
+            manifest TEXT PRIMARY KEY, mtime REAL )''')
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def addJob(self, clusterid, procid, script=None, commands=None, attempts=1, resources=None):
+        ### add a job to the database (if it is not yet present)
+        # note: resources is a dict of requested resources (see condorTools.getResources),
+        #       or None if not known (i.e. default resources).
+        self.conn.execute('''INSERT OR IGNORE INTO jobs
+            (clusterid, procid, script, commands, status, attempts,
+             errfile, errsize, errmtime, erroffset, nstarted, ndone, errors, resources)
+            VALUES (?, ?, ?, ?, 'submitted', ?, NULL, -1, -1, 0, 0, 0, '[]', ?)''',
+            (clusterid, procid, script, json.dumps(commands), attempts, json.dumps(resources)))
+
+    def addManifest(self, manifest, attempts=1):
+        ### add all jobs from a manifest file (see condorTools.writeManifest)
+        info = ct.readManifest(manifest)
+        if info['clusterid'] is None:
+            print('WARNING in JobDatabase.addManifest: manifest {}'.format(manifest)
+                  +' has no cluster id, skipping it.')
+            return
+        for job in info['jobs']:
+            self.addJob(info['clusterid'], job['procid'], script=job['script'],
+                        commands=job['commands'], attempts=attempts,
+                        resources=info['resources'])
+        self.conn.execute('INSERT OR REPLACE INTO manifests VALUES (?, ?)',
+                          (os.path.abspath(manifest), os.path.getmtime(manifest)))
+        self.conn.commit()
+
+    def addManifests(self):
+        ### add jobs from all manifest files in the job directory that are not yet known
+        known = dict(self.conn.execute('SELECT manifest, mtime FROM manifests').fetchall())
+        for manifest in glob.glob(os.path.join(self.jobdir,'*_manifest*.json')):
+            manifest = os.path.abspath(manifest)
+            if known.get(manifest,None)==os.path.getmtime(manifest): continue
+            self.addManifest(manifest)
+
+    def getJobs(self, statuses=None):
+        ### get a list of jobs (as dicts), optionally only with given statuses
+        query = 'SELECT * FROM jobs'
+        params = ()
+        if statuses is not None:
+            query += ' WHERE status IN ({})'.format(','.join(['?']*len(statuses)))
+            params = tuple(statuses)
+        cursor = self.conn.execute(query+' ORDER BY clusterid, procid', params)
+        keys = [col[0] for col in cursor.description]
+        res = []
+        for row in cursor.fetchall():
+            job = dict(zip(keys,row))
+            job['commands'] = json.loads(job['commands']) if job['commands'] else None
+            job['errors'] = json.loads(job['errors']) if job['errors'] else []
+            job['resources'] = json.loads(job['resources']) if job['resources'] else None
+            res.append(job)
+        return res
+
+    def update(self, starting_tag='###starting###', done_tag='###done###',
+               errortags=None, ntarget=None, ignoretags=False, nthreads=None, verbose=True):
+        ### scan the error log files in the job directory and update the job statuses
+        # only files that changed (in size or modification time) since the previous update
+        # are read, and only from the offset where the previous scan ended.
+        # input arguments:
+        # - starting_tag and done_tag: see jobCheck.check_start_done
+        # - errortags: list of error content (default: see jobCheck.check_error_content)
+        # - ntarget: expected number of starting and done tags per job
+        # - ignoretags: do not take into account the starting and done tags for the status
+        # - nthreads: number of threads for scanning the files (see logScanner.scanFiles)
+        # returns:
+        # a tuple of the number of error log files and the number of files that were read
+        if errortags is None: errortags = default_error_content
+        tags = [starting_tag, done_tag]+errortags
+        self.addManifests()
+        known = {}
+        for row in self.conn.execute('''SELECT clusterid, procid, errsize, errmtime,
+                erroffset, nstarted, ndone, errors, status FROM jobs''').fetchall():
+            known[(row[0],row[1])] = row[2:]
+        errfiles = glob.glob(os.path.join(self.jobdir,'*_err_*'))
+        # find the files that changed since the previous update
+        toscan = []
+        for errfile in errfiles:
+            jobid = parseLogFileName(errfile)
+            if jobid is None: continue
+            stat = os.stat(errfile)
+            if jobid not in known:
+                # job not known from a manifest: get the executable from the output log
+                self.addJob(jobid[0], jobid[1], script=self._findScript(errfile))
+                known[jobid] = (-1, -1, 0, 0, 0, '[]', 'submitted')
+            (size, mtime, offset, nstarted, ndone, errors, status) = known[jobid]
+            if status=='resubmitted': continue
+            if( size==stat.st_size and mtime==stat.st_mtime ): continue
+            # in case the file was truncated or replaced, scan it from the start
+            if stat.st_size<offset:
+                (offset, nstarted, ndone, errors) = (0, 0, 0, '[]')
+            toscan.append((errfile, jobid, stat, offset, nstarted, ndone, errors))
+        # scan the changed files (in parallel)
+        results = ls.scanFiles([el[0] for el in toscan], tags,
+                               offsets=[el[3] for el in toscan], nthreads=nthreads)
+        for (errfile, jobid, stat, _, nstarted, ndone, errors),(counts, newoffset) in zip(
+                toscan, results):
+            nstarted += counts[0]
+            ndone += counts[1]
+            errors = json.loads(errors)
+            for tag,count in zip(errortags,counts[2:]):
+                if( count>0 and tag not in errors ): errors.append(tag)
+            # determine the status
+            thisntarget = ntarget if ntarget is not None else ndone
+            if len(errors)>0: status = 'failed'
+            elif ignoretags: status = 'done'
+            elif( nstarted>0 and nstarted==ndone and ndone==thisntarget ): status = 'done'
+            else: status = 'unfinished'
+            if( verbose and status!='done' ):
+                msg = 'WARNING in JobDatabase: found issue in file {}:\n'.format(errfile)
+                msg += '   {} commands were initiated.\n'.format(nstarted)
+                msg += '   {} seem to have finished normally.\n'.format(ndone)
+                for error in errors: msg += '   found sequence {}\n'.format(error)
+                print(msg)
+            self.conn.execute('''UPDATE jobs SET status=?, errfile=?, errsize=?, errmtime=?,
+                erroffset=?, nstarted=?, ndone=?, errors=?
+                WHERE clusterid=? AND procid=?''',
+                (status, os.path.abspath(errfile), stat.st_size, stat.st_mtime, newoffset,
+                 nstarted, ndone, json.dumps(errors), jobid[0], jobid[1]))
+        nread = len(toscan)
+        self.conn.commit()
+        return (len(errfiles), nread)
+
+    def summary(self):
+        ### return a dict of number of jobs per status
+        res = dict([(status,0) for status in statuses])
+        for (status,count) in self.conn.execute(
+                'SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall():
+            res[status] = count
+        return res
+
+    def resubmitJobs(self, jobs, name=None, removelogs=True, **kwargs):
+        ### resubmit a list of jobs (as returned by getJobs) in bulk submissions
+        # the jobs are resubmitted with the resources of their original submission;
+        # jobs with the same resources are put in a single bulk submission
+        # (i.e. there is only one submission unless the jobs had different resources).
+        # input arguments:
+        # - jobs: list of jobs to resubmit
+        # - name: name for the job description and manifest of the resubmission
+        # - removelogs: whether to remove the log files of the original jobs
+        # - kwargs: passed down to condorTools.makeBulkJobDescription
+        #   (overriding the resources of the original submission)
+        # returns:
+        # a list of the cluster ids of the resubmitted jobs
+        if len(jobs)==0: return []
+        for job in jobs:
+            if job['script'] is None:
+                msg = 'ERROR in JobDatabase.resubmitJobs: no executable known'
+                msg += ' for job {}.{}'.format(job['clusterid'],job['procid'])
+                raise Exception(msg)
+        # remove the original jobs (if still present) in a single call
+        os.system('condor_rm {}'.format(' '.join(['{}.{}'.format(job['clusterid'],job['procid'])
+                                                  for job in jobs])))
+        # group the jobs by resources
+        groups = []
+        for job in jobs:
+            resources = dict(job['resources']) if job['resources'] is not None else {}
+            resources.update(kwargs)
+            for (groupresources, groupjobs) in groups:
+                if groupresources==resources:
+                    groupjobs.append(job)
+                    break
+            else: groups.append((resources, [job]))
+        # make a job description per group and submit it
+        if name is None: name = os.path.join(self.jobdir,'cjob_resubmit')
+        clusterids = []
+        for (resources, groupjobs) in groups:
+            manifest = ct.makeUnique(name+'_manifest.json')
+            thisname = os.path.splitext(manifest)[0].replace('_manifest','',1)
+            scripts = [job['script'] for job in groupjobs]
+            jdname = ct.makeBulkJobDescription(thisname, scripts, **resources)
+            clusterid = ct.submitCondorJobGetClusterId(jdname)
+            if clusterid is None:
+                msg = 'ERROR in JobDatabase.resubmitJobs: could not retrieve cluster id'
+                msg += ' of the resubmitted jobs.'
+                raise Exception(msg)
+            clusterids.append(clusterid)
+            # update the database
+            resources = resources if len(resources)>0 else None
+            newjobs = []
+            for procid,job in enumerate(groupjobs):
+                newjobs.append({'procid':procid, 'script':job['script'], 'commands':job['commands']})
+                self.addJob(clusterid, procid, script=job['script'], commands=job['commands'],
+                            attempts=job['attempts']+1, resources=resources)
+                self.conn.execute('''UPDATE jobs SET status='resubmitted'
+                    WHERE clusterid=? AND procid=?''', (job['clusterid'],job['procid']))
+            ct.writeManifest(manifest, newjobs, jobdescription=os.path.abspath(jdname),
+                             clusterid=clusterid, resources=resources)
+            self.conn.execute('INSERT OR REPLACE INTO manifests VALUES (?, ?)',
+                              (os.path.abspath(manifest), os.path.getmtime(manifest)))
+            self.conn.commit()
+        # remove old log files
+        if removelogs:
+            for job in jobs:
+                if job['errfile'] is None: continue
+                for logfile in ([ job['errfile'],
+                                  job['errfile'].replace('_err_','_out_'),
+                                  job['errfile'].replace('_err_','_log_') ]):
+                    if os.path.exists(logfile): os.remove(logfile)
+        return clusterids
+
+    def _findScript(self, errfile):
+        ### find the executable of a job from the first line of its output log file
+        shtag = '###exename###:'
+        outfile = errfile.replace('_err_','_out_')
+        if not os.path.exists(outfile): return None
+        with open(outfile,'r') as f:
+            line = f.readline()
+        if shtag not in line: return None
+        shfile = line.replace(shtag,'').strip(' \t\n')
+        return os.path.join(self.jobdir, shfile)
@@ -14,7 +14,14 @@
 #     (The name of the executable is printed on the first line, see condorTools.py.)
 #   - Modify the job description file for each of these
 #     and call "condor_submit" on this file.
+#     (Alternatively, if the jobs were submitted in bulk with a manifest file,
+#     see condorTools.submitCommandsAsCondorJobsBulk, the executables are retrieved
+#     from the manifest instead of from the _out_ files,
+#     and all failed jobs are resubmitted with a single call to "condor_submit".)
 #   - Remove the original _err_, _out_ and _log_ files of the resubmitted jobs.
+#   With the --db option, the job states are instead taken from the job state database
+#   (see jobDatabase.py), which only rescans the log files that changed since the previous
+#   check, and all failed jobs are resubmitted with a single call to "condor_submit".
 # Usage:
 #   Run 'python jobResubmission.py -h' for a list of options.
 #   You can run the script from this directory and specify the job directory in the args,
@@ -35,14 +42,19 @@ import sys
 import argparse
 import glob
 import jobCheck
+import logScanner as ls
+import condorTools as ct
 
  
 if __name__=='__main__':
 
     # parse command line arguments
     parser = argparse.ArgumentParser(description='Job resubmission.')
-    parser.add_argument('--jd', required=True,
+    parser.add_argument('--jd', default=None,
 			help='Condor job description file managing the submission.')
+    parser.add_argument('--manifest', default=None,
+			help='Manifest file written by a bulk submission'
+			    +' (can be used instead of --jd).')
     parser.add_argument('--dir', default=os.getcwd(),
                         help='Directory to scan for files (default: cwd)')
     parser.add_argument('--starting_tag', default='###starting###',
@@ -51,6 +63,11 @@ if __name__=='__main__':
                         help='Done tag, default is "###done###".')
     parser.add_argument('--ntags', default=None,
                          help='Number of expected starting and done tags per job.')
+    parser.add_argument('--db', action='store_true',
+			help='Use the job state database in the job directory'
+			    +' (see jobDatabase.py) to find the failed jobs'
+			    +' and resubmit them in a single bulk submission'
+			    +' (--jd and --manifest are not needed in this case).')
     args = parser.parse_args()
 
     # print arguments
@@ -58,18 +75,53 @@ if __name__=='__main__':
     for arg in vars(args):
         print('  - {}: {}'.format(arg,getattr(args,arg)))
 
+    # resubmission using the job state database
+    if args.db:
+	import jobDatabase
+	if args.ntags is not None: args.ntags = int(args.ntags)
+	with jobDatabase.JobDatabase(args.dir) as jobdb:
+	    print('scanning changed error log files...')
+	    jobdb.update(starting_tag=args.starting_tag, done_tag=args.done_tag,
+			 ntarget=args.ntags, verbose=False)
+	    jobs = jobdb.getJobs(statuses=['unfinished','failed'])
+	    print('found {} unfinished or failed jobs.'.format(len(jobs)))
+	    if len(jobs)==0:
+		print('nothing to resubmit; exiting.')
+		sys.exit()
+	    print('found following resubmission strategy:')
+	    for job in jobs:
+		print(' - job {}.{} (status {}, attempt {}) -> exe {}'.format(
+		    job['clusterid'], job['procid'], job['status'], job['attempts'], job['script']))
+	    print('continue with resubmission?')
+	    go = raw_input()
+	    if go!='y': sys.exit()
+	    clusterids = jobdb.resubmitJobs(jobs)
+	print('resubmitted {} jobs as cluster(s) {}'.format(len(jobs),
+	      ', '.join([str(clusterid) for clusterid in clusterids])))
+	print('done')
+	sys.exit()
+
     # some more parsing
-    jobfile = os.path.abspath(args.jd)
+    if( args.jd is None and args.manifest is None ):
+	raise Exception('ERROR: either --jd or --manifest must be specified.')
+    jobfile = os.path.abspath(args.jd) if args.jd is not None else None
+    manifest = ct.readManifest(args.manifest) if args.manifest is not None else None
     if args.ntags is not None: args.ntags = int(args.ntags)    
 
     # find error log files
     print('finding error log files...')
     condorpattern = os.path.join(args.dir,'*_err_*')
+    if manifest is not None and manifest['clusterid'] is not None:
+	condorpattern = os.path.join(args.dir,'*_err_{}_*'.format(manifest['clusterid']))
     elfiles = glob.glob(condorpattern)
     nelfiles = len(elfiles)
     print('found {} error log files.'.format(nelfiles))
     print('start scanning...')
 
+    # scan all error log files in a single pass per file
+    tags = [args.starting_tag, args.done_tag] + jobCheck.default_error_content
+    counts = ls.scanFilesAsDicts(elfiles, tags)
+
     # loop over all error log files found above
     # and find those corresponding to unfinished/failed jobs
     errorfiles = []
@@ -79,10 +131,11 @@ if __name__=='__main__':
         if jobCheck.check_start_done(elfile,
 		starting_tag = args.starting_tag,
 		done_tag = args.done_tag,
-		ntarget = args.ntags): 
+		ntarget = args.ntags,
+		counts = counts[elfile]): 
 	    errorfiles.append(elfile)
 	    nunfinished += 1
-	elif jobCheck.check_error_content(elfile):
+	elif jobCheck.check_error_content(elfile, counts=counts[elfile]):
 	    errorfiles.append(elfile)
 	    nerrortag += 1
     nerrorfiles = len(errorfiles)
@@ -102,8 +155,10 @@ if __name__=='__main__':
     jobids = []
     for errorfile in errorfiles:
 	jobid = os.path.basename(errorfile).split('_')[3]
+	# (in case of a bulk submission, remove only the failed job, not the full cluster)
+	if manifest is not None: jobid = '.'.join(os.path.basename(errorfile).rsplit('_',2)[1:])
 	try:
-	    jobidtest = int(jobid)
+	    jobidtest = int(jobid.split('.')[0])
 	    jobids.append(jobid)
 	except:
 	    msg = 'WARNING in jobResubmission.py:'
@@ -116,7 +171,19 @@ if __name__=='__main__':
     # check corresponding output log files and find the executables
     shfiles = []
     shtag = '###exename###:'
-    for errorfile in errorfiles:
+    if manifest is not None:
+	# retrieve the executables directly from the manifest
+	scripts = dict([(job['procid'],job['script']) for job in manifest['jobs']])
+	for errorfile in errorfiles:
+	    procid = os.path.basename(errorfile).rsplit('_',1)[-1]
+	    try: shfiles.append(scripts[int(procid)])
+	    except:
+		msg = 'WARNING in jobResubmission.py:'
+		msg += ' could not retrieve corresponding executable'
+		msg += ' for the error log file {} from the manifest.'.format(errorfile)
+		print(msg)
+		shfiles.append(None)
+    for errorfile in (errorfiles if manifest is None else []):
 	outputfile = errorfile.replace('_err_', '_out_')
 	with open(outputfile,'r') as f:
 	    line = f.readline()
@@ -156,13 +223,29 @@ if __name__=='__main__':
 
     # modify the job description file and submit jobs
     print('resubmitting...')
-    with open(jobfile,'r') as f:
-	lines = f.readlines()
-    for shfile in shfiles:
-	lines[0] = 'executable = {}\n'.format(shfile)
-	with open(jobfile,'w') as f:
-	    for line in lines: f.write(line)
-	os.system('condor_submit {}'.format(jobfile))
+    if manifest is not None:
+	# make a new bulk submission for all failed jobs
+	# (with the same resources as the original submission)
+	name = os.path.splitext(manifest['jobdescription'])[0]+'_resubmit'
+	resources = manifest['resources']
+	jdname = ct.makeBulkJobDescription(ct.makeUnique(name+'.txt'), shfiles,
+					   **(resources if resources is not None else {}))
+	clusterid = ct.submitCondorJobGetClusterId(jdname)
+	jobs = [job for job in manifest['jobs'] if job['script'] in shfiles]
+	newjobs = []
+	for procid,shfile in enumerate(shfiles):
+	    job = [job for job in jobs if job['script']==shfile][0]
+	    newjobs.append({'procid':procid, 'script':shfile, 'commands':job['commands']})
+	ct.writeManifest(os.path.splitext(jdname)[0]+'_manifest.json', newjobs,
+	    jobdescription=os.path.abspath(jdname), clusterid=clusterid, resources=resources)
+    else:
+	with open(jobfile,'r') as f:
+	    lines = f.readlines()
+	for shfile in shfiles:
+	    lines[0] = 'executable = {}\n'.format(shfile)
+	    with open(jobfile,'w') as f:
+		for line in lines: f.write(line)
+	    os.system('condor_submit {}'.format(jobfile))
 
     # remove old version of error, output and log files
     print('removing old log files...')
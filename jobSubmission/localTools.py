@@ -0,0 +1,167 @@
+####################################################################
+# functionality for running jobs locally in a bounded process pool #
+####################################################################
+
+# general use:
+# the functions in this tool have the same entry points as the ones in condorTools.py,
+# but instead of submitting the jobs to condor, they are run on the local machine,
+# with at most a given number of jobs running at the same time.
+# the same executable bash scripts as for condor are created,
+# and the output, error and log files are written with the same naming convention
+# (name_out_<ClusterId>_<ProcId> etc.), so that the job checking and resubmission tools
+# (jobCheck.py and jobResubmit.py) can be used on them without modifications.
+# note: the starting and done tags (###starting### and ###done###) are written
+#       by the executables themselves, exactly as in the case of condor jobs.
+# note: options that only make sense for a scheduler (e.g. cpus, mem, disk, jobflavour)
+#       are accepted for compatibility but ignored.
+
+import os
+import sys
+import time
+import datetime
+import subprocess
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+import condorTools as ct
+
+
+def makeClusterId():
+    ### make an integer identifier for a set of local jobs
+    # (mimicking the condor ClusterId, which is used e.g. in jobResubmit.py)
+    return int(time.time()*1000)%1000000000
+
+def makeLogFileNames(name, clusterid, procid, stdout=None, stderr=None, log=None):
+    ### make the names of the output, error and log files for a job
+    # note: same default naming convention as in condorTools.makeJobDescription;
+    #       custom names can use $(ClusterId) and $(ProcId) as in condor.
+    name = os.path.splitext(name)[0]
+    if stdout is None: stdout = name+'_out_$(ClusterId)_$(ProcId)'
+    if stderr is None: stderr = name+'_err_$(ClusterId)_$(ProcId)'
+    if log is None: log = name+'_log_$(ClusterId)_$(ProcId)'
+    res = []
+    for fname in [stdout, stderr, log]:
+        fname = fname.replace('$(ClusterId)',str(clusterid))
+        fname = fname.replace('$(ProcId)',str(procid))
+        res.append(fname)
+    return tuple(res)
+
+def writeLogEvent(log, clusterid, procid, eventcode, message):
+    ### append an event to a job log file (in a format similar to condor)
+    ctime = datetime.datetime.now().strftime('%m/%d %H:%M:%S')
+    with open(log,'a') as f:
+        f.write('{:03d} ({}.{:03d}.000) {} {}\n'.format(eventcode, clusterid, procid,
+                                                       ctime, message))
+
+def runLocalJob(job):
+    ### run a single job
+    # input arguments:
+    # - job: dict with keys 'exe' (path to executable bash script),
+    #   'args' (list of arguments), 'stdout', 'stderr', 'log', 'clusterid' and 'procid'
+    # returns:
+    # the exit code of the job
+    writeLogEvent(job['log'], job['clusterid'], job['procid'], 1, 'Job executing on host: local')
+    with open(job['stdout'],'w') as out:
+        with open(job['stderr'],'w') as err:
+            try:
+                proc = subprocess.Popen(['bash', job['exe']]+job['args'],
+                                        stdout=out, stderr=err)
+                exitcode = proc.wait()
+            except OSError as e:
+                err.write('###error###: could not start job: {}\n'.format(e))
+                exitcode = -1
+    writeLogEvent(job['log'], job['clusterid'], job['procid'], 5,
+                  'Job terminated.\n\t(1) Normal termination (return value {})'.format(exitcode))
+    return exitcode
+
+def runLocalJobs(jobs, nworkers=None):
+    ### run a list of jobs with at most nworkers running at the same time
+    # input arguments:
+    # - jobs: list of dicts (see runLocalJob)
+    # - nworkers: maximum number of simultaneous jobs (default: number of cores)
+    # returns:
+    # a list of exit codes (in the same order as jobs)
+    if nworkers is None: nworkers = multiprocessing.cpu_count()
+    nworkers = max(1, min(nworkers, len(jobs)))
+    for job in jobs:
+        writeLogEvent(job['log'], job['clusterid'], job['procid'], 0,
+                      'Job submitted from host: local')
+    print('running {} jobs locally using {} worker(s)...'.format(len(jobs), nworkers))
+    if nworkers==1: exitcodes = [runLocalJob(job) for job in jobs]
+    else:
+        # (each job is a separate process, the threads only wait for them to finish)
+        pool = ThreadPool(processes=nworkers)
+        exitcodes = pool.map(runLocalJob, jobs, chunksize=1)
+        pool.close()
+        pool.join()
+    nfailed = len([code for code in exitcodes if code!=0])
+    print('{} out of {} jobs finished with nonzero exit code.'.format(nfailed, len(jobs)))
+    return exitcodes
+
+def submitCommandsAsLocalCluster(name, commands, stdout=None, stderr=None, log=None,
+                        cpus=1, mem=1024, disk=10240,
+                        home=None,
+                        proxy=None,
+                        cmssw_version=None,
+                        jobflavour=None,
+                        nworkers=None):
+    ### run several similar commands as a cluster of local jobs
+    # note: see condorTools.submitCommandsAsCondorCluster for the requirements on commands.
+    # returns:
+    # a list of exit codes (one per command)
+
+    # parse arguments
+    name = os.path.splitext(name)[0]
+    shname = ct.makeUnique(name+'.sh')
+    [exe,argstring] = commands[0].split(' ',1) # exe must be the same for all commands
+    nargs = len(argstring.split(' ')) # nargs must be the same for all commands
+    for command in commands[1:]:
+        [thisexe,thisargstring] = command.split(' ',1)
+        thisnargs = len(thisargstring.split(' '))
+        if( thisexe!=exe or thisnargs!=nargs):
+            print('### ERROR ###: commands are not compatible to put in same cluster')
+            return None
+    # make the executable
+    ct.initJobScript(shname, home=home, cmssw_version=cmssw_version, proxy=proxy)
+    with open(shname,'a') as script:
+        script.write(exe)
+        script.write(' "$@"')
+        script.write('\n')
+    # make the jobs
+    clusterid = makeClusterId()
+    jobs = []
+    for procid,command in enumerate(commands):
+        (out,err,lg) = makeLogFileNames(name, clusterid, procid,
+                                        stdout=stdout, stderr=stderr, log=log)
+        jobs.append({'exe':os.path.abspath(shname), 'args':command.split(' ',1)[1].split(' '),
+                     'stdout':out, 'stderr':err, 'log':lg,
+                     'clusterid':clusterid, 'procid':procid})
+    # run the jobs
+    return runLocalJobs(jobs, nworkers=nworkers)
+
+def submitCommandsAsLocalJobs(name, commands, stdout=None, stderr=None, log=None,
+            cpus=1, mem=1024, disk=10240,
+            home=None,
+            proxy=None,
+            cmssw_version=None,
+            jobflavour=None,
+            nworkers=None):
+    ### run multiple sets of commands as local jobs (one job per set)
+    # note: see condorTools.submitCommandsAsCondorJobs for the format of commands.
+    # returns:
+    # a list of exit codes (one per set of commands)
+    name = os.path.splitext(name)[0]
+    clusterid = makeClusterId()
+    jobs = []
+    for procid,commandset in enumerate(commands):
+        # make the executable
+        shname = ct.makeUnique(name+'.sh')
+        ct.initJobScript(shname, home=home, cmssw_version=cmssw_version, proxy=proxy)
+        with open(shname,'a') as script:
+            for cmd in commandset: script.write(cmd+'\n')
+        (out,err,lg) = makeLogFileNames(name, clusterid, procid,
+                                        stdout=stdout, stderr=stderr, log=log)
+        jobs.append({'exe':os.path.abspath(shname), 'args':[],
+                     'stdout':out, 'stderr':err, 'log':lg,
+                     'clusterid':clusterid, 'procid':procid})
+    # run the jobs
+    return runLocalJobs(jobs, nworkers=nworkers)
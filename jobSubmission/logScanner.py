@@ -0,0 +1,108 @@
+##########################################################
+# streaming scanner for searching tags in job log files #
+##########################################################
+
+# general use:
+# count the occurrences of a list of tags (e.g. starting and done tags and known error content)
+# in one or more log files.
+# the files are read in fixed-size chunks (so that the full file is never kept in memory),
+# and all tags are matched in a single pass over each chunk
+# using one compiled regular expression (alternation of all tags).
+# multiple files are scanned in parallel in a thread pool.
+# note: the tags are matched as non-overlapping occurrences (as with str.count),
+#       where at a given position longer tags take precedence over shorter ones.
+#       this makes no difference as long as no tag is contained in another one.
+
+import os
+import sys
+import re
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+
+
+class TagMatcher(object):
+    ### single-pass matcher for a list of tags
+
+    def __init__(self, tags):
+        self.tags = list(tags)
+        self.index = dict([(tag.encode(),idx) for idx,tag in enumerate(self.tags)])
+        # (longest tags first, so they take precedence in the alternation)
+        alternatives = sorted(set(self.index.keys()), key=len, reverse=True)
+        self.pattern = None
+        if len(alternatives)>0:
+            self.pattern = re.compile(b'|'.join([re.escape(tag) for tag in alternatives]))
+        self.maxlength = max([len(tag) for tag in self.index.keys()]) if len(self.tags)>0 else 0
+
+    def count(self, text, start=0):
+        ### count occurrences of each tag in a bytes object
+        # only occurrences that end after position start are counted.
+        counts = [0]*len(self.tags)
+        if self.pattern is None: return counts
+        for match in self.pattern.finditer(text):
+            if match.end()<=start: continue
+            counts[self.index[match.group()]] += 1
+        return counts
+
+
+def scanFile(filename, tags, offset=0, chunksize=4*1024*1024):
+    ### count occurrences of tags in a file, starting from a given byte offset
+    # input arguments:
+    # - filename: name of the file to scan
+    # - tags: list of strings to count, or a TagMatcher object
+    # - offset: byte offset from which to start
+    #   (occurrences that end before the offset are not counted,
+    #   so the scan can be continued from the offset returned by a previous scan)
+    # - chunksize: number of bytes to read at once
+    # returns:
+    # a tuple of a list of counts (one per tag) and the new offset (i.e. the scanned size)
+    matcher = tags if isinstance(tags,TagMatcher) else TagMatcher(tags)
+    counts = [0]*len(matcher.tags)
+    overlap = max(0, matcher.maxlength-1)
+    with open(filename,'rb') as f:
+        # (re-read the last bytes before the offset,
+        #  to find occurrences that were incomplete at the previous scan)
+        start = max(0, offset-overlap)
+        f.seek(start)
+        tail = f.read(offset-start)
+        position = offset
+        while True:
+            chunk = f.read(chunksize)
+            if not chunk: break
+            text = tail+chunk
+            # (only count occurrences that end in the new chunk,
+            #  as the ones ending in the tail were counted before)
+            for idx,count in enumerate(matcher.count(text, start=len(tail))):
+                counts[idx] += count
+            tail = text[-overlap:] if overlap>0 else b''
+            position += len(chunk)
+    return (counts, position)
+
+
+def scanFiles(filenames, tags, offsets=None, nthreads=None, chunksize=4*1024*1024):
+    ### count occurrences of tags in multiple files in parallel
+    # input arguments:
+    # - filenames: list of file names
+    # - tags: list of strings to count
+    # - offsets: list of byte offsets (one per file) from which to start (default: 0)
+    # - nthreads: number of threads (default: number of cores)
+    # - chunksize: see scanFile
+    # returns:
+    # a list of results of scanFile (in the same order as filenames)
+    if len(filenames)==0: return []
+    if offsets is None: offsets = [0]*len(filenames)
+    matcher = TagMatcher(tags)
+    if nthreads is None: nthreads = multiprocessing.cpu_count()
+    nthreads = max(1, min(nthreads, len(filenames)))
+    scan = lambda args: scanFile(args[0], matcher, offset=args[1], chunksize=chunksize)
+    if nthreads==1: return [scan(args) for args in zip(filenames,offsets)]
+    pool = ThreadPool(processes=nthreads)
+    res = pool.map(scan, list(zip(filenames,offsets)), chunksize=1)
+    pool.close()
+    pool.join()
+    return res
+
+
+def scanFilesAsDicts(filenames, tags, nthreads=None, chunksize=4*1024*1024):
+    ### same as scanFiles, but return a dict mapping each file name to a dict of tag counts
+    res = scanFiles(filenames, tags, nthreads=nthreads, chunksize=chunksize)
+    return dict([(fname, dict(zip(tags,counts))) for fname,(counts,_) in zip(filenames,res)])
@@ -5,6 +5,11 @@
 #include "PhysicsObject.h"
 #include "../../TreeReader/interface/TreeReader.h"
 #include "../../Tools/interface/stringTools.h"
+#include "../../Tools/interface/VariationTable.h"
+
+//include c++ library classes
+#include <memory>
+#include <vector>
 //#include "JetSelector.h"
 
 
@@ -53,8 +58,8 @@ class Jet : public PhysicsObject{
 	Jet JetHEM1516Down() const;
 
 	// create new Jet with JEC varied within uncertainties, split per source
-	Jet JetJECDown( const std::string source ) const;
-	Jet JetJECUp( const std::string source ) const;
+	Jet JetJECDown( const std::string& source ) const;
+	Jet JetJECUp( const std::string& source ) const;
 
         //check if any of the jet variations passes the selection
         bool isGoodAnyVariation() const;
@@ -76,15 +81,18 @@ class Jet : public PhysicsObject{
         double _pt_JERDown = 0;
         double _pt_JERUp = 0;
 
-	std::map< std::string, double > _pt_JECSourcesUp;
-	std::map< std::string, double > _pt_JECSourcesDown;
-	std::map< std::string, double > _pt_JECGroupedUp;
-	std::map< std::string, double > _pt_JECGroupedDown;
+	// split JEC uncertainties: tables of variation names (shared with the TreeReader)
+	// and varied pt values stored contiguously as 
+	// [ sources up, sources down, grouped up, grouped down ] (NaN if not available)
+	std::shared_ptr< const VariationTable > _jecSourcesTable;
+	std::shared_ptr< const VariationTable > _jecGroupedTable;
+	std::vector< double > _pt_JECVariations;
 
         //jet selector 
         JetSelector* selector;
 
         Jet variedJet(const double) const;
+	double splitJECVariedPt( const std::string&, const bool isUp ) const;
 
         Jet* clone() const & { return new Jet(*this); }
         Jet* clone() && { return new Jet( std::move( *this ) ); }
@@ -4,6 +4,7 @@
 #include <cmath>
 #include <stdexcept>
 #include <string>
+#include <limits>
 
 //include other parts of framework
 #include "../interface/JetSelector.h"
@@ -38,33 +39,28 @@ Jet::Jet( const TreeReader& treeReader, const unsigned jetIndex,
     _pt_JERUp( treeReader._jetSmearedPt_JERUp[jetIndex] ),
     selector( new JetSelector( this ) )
 {
-    if( readAllJECVariations ){
-	for( const auto mapEl: treeReader._jetSmearedPt_JECSourcesUp ){
-	    std::string key = mapEl.first;
-	    key = stringTools::removeOccurencesOf(key,"_jetSmearedPt_");
-	    key = stringTools::removeOccurencesOf(key,"_JECSourcesUp");
-	    _pt_JECSourcesUp.insert( {key,mapEl.second[jetIndex]} );
-	}
-	for( const auto mapEl: treeReader._jetSmearedPt_JECSourcesDown ){
-	    std::string key = mapEl.first;
-	    key = stringTools::removeOccurencesOf(key,"_jetSmearedPt_");
-	    key = stringTools::removeOccurencesOf(key,"_JECSourcesDown");
-	    _pt_JECSourcesDown.insert( {key,mapEl.second[jetIndex]} );
+    // split JEC variations (names are interned in tables shared with the TreeReader)
+    auto appendVariations = [this,jetIndex]( const std::vector< const Double_t* >& arrays ){
+	for( const Double_t* array : arrays ){
+	    _pt_JECVariations.push_back( ( array == nullptr ) ? 
+		std::numeric_limits< double >::quiet_NaN() : array[jetIndex] );
 	}
+    };
+    if( readAllJECVariations && treeReader._jecSourcesTable ){
+	_jecSourcesTable = treeReader._jecSourcesTable;
     }
-    if( readGroupedJECVariations ){
-	for( const auto mapEl: treeReader._jetSmearedPt_JECGroupedUp ){
-	    std::string key = mapEl.first;
-	    key = stringTools::removeOccurencesOf(key,"_jetSmearedPt_");
-	    key = stringTools::removeOccurencesOf(key,"_JECGroupedUp");
-	    _pt_JECGroupedUp.insert( {key,mapEl.second[jetIndex]} );
-	}
-	for( const auto mapEl: treeReader._jetSmearedPt_JECGroupedDown ){
-	    std::string key = mapEl.first;
-	    key = stringTools::removeOccurencesOf(key,"_jetSmearedPt_");
-	    key = stringTools::removeOccurencesOf(key,"_JECGroupedDown");
-	    _pt_JECGroupedDown.insert( {key,mapEl.second[jetIndex]} );
-	}
+    if( readGroupedJECVariations && treeReader._jecGroupedTable ){
+	_jecGroupedTable = treeReader._jecGroupedTable;
+    }
+    _pt_JECVariations.reserve( 2*( ( _jecSourcesTable ? _jecSourcesTable->size() : 0 )
+	+ ( _jecGroupedTable ? _jecGroupedTable->size() : 0 ) ) );
+    if( _jecSourcesTable ){
+	appendVariations( treeReader._jetSmearedPt_JECSourcesUpArrays );
+	appendVariations( treeReader._jetSmearedPt_JECSourcesDownArrays );
+    }
+    if( _jecGroupedTable ){
+	appendVariations( treeReader._jetSmearedPt_JECGroupedUpArrays );
+	appendVariations( treeReader._jetSmearedPt_JECGroupedDownArrays );
     }
 
     //catch potential invalid values of deepCSV and deepFlavor
@@ -100,10 +96,9 @@ Jet::Jet( const Jet& rhs ) :
     _pt_JECUp( rhs._pt_JECUp ),
     _pt_JERDown( rhs._pt_JERDown ),
     _pt_JERUp( rhs._pt_JERUp ),
-    _pt_JECSourcesUp( rhs._pt_JECSourcesUp ),
-    _pt_JECSourcesDown( rhs._pt_JECSourcesDown ),
-    _pt_JECGroupedUp( rhs._pt_JECGroupedUp ),
-    _pt_JECGroupedDown( rhs._pt_JECGroupedDown ),
+    _jecSourcesTable( rhs._jecSourcesTable ),
+    _jecGroupedTable( rhs._jecGroupedTable ),
+    _pt_JECVariations( rhs._pt_JECVariations ),
     selector( new JetSelector( this ) )
     {}
 
@@ -119,10 +114,9 @@ Jet::Jet( Jet&& rhs ) noexcept :
     _pt_JECUp( rhs._pt_JECUp ),
     _pt_JERDown( rhs._pt_JERDown ),
     _pt_JERUp( rhs._pt_JERUp ),
-    _pt_JECSourcesUp( rhs._pt_JECSourcesUp ),
-    _pt_JECSourcesDown( rhs._pt_JECSourcesDown ),
-    _pt_JECGroupedUp( rhs._pt_JECGroupedUp ),
-    _pt_JECGroupedDown( rhs._pt_JECGroupedDown ),
+    _jecSourcesTable( std::move( rhs._jecSourcesTable ) ),
+    _jecGroupedTable( std::move( rhs._jecGroupedTable ) ),
+    _pt_JECVariations( std::move( rhs._pt_JECVariations ) ),
     selector( new JetSelector( this ) )
     {}
 
@@ -142,10 +136,9 @@ void Jet::copyNonPointerAttributes( const Jet& rhs ){
     _pt_JECUp = rhs._pt_JECUp;
     _pt_JERDown = rhs._pt_JERDown;
     _pt_JERUp = rhs._pt_JERUp;
-    _pt_JECSourcesUp = rhs._pt_JECSourcesUp;
-    _pt_JECSourcesDown = rhs._pt_JECSourcesDown;
-    _pt_JECGroupedUp = rhs._pt_JECGroupedUp;
-    _pt_JECGroupedDown = rhs._pt_JECGroupedDown;
+    _jecSourcesTable = rhs._jecSourcesTable;
+    _jecGroupedTable = rhs._jecGroupedTable;
+    _pt_JECVariations = rhs._pt_JECVariations;
 }
 
 
@@ -223,26 +216,34 @@ Jet Jet::JetHEM1516Down() const{
 }
 
 
-Jet Jet::JetJECDown( const std::string source ) const{
+double Jet::splitJECVariedPt( const std::string& source, const bool isUp ) const{
+    // get the varied pt for a split JEC variation, or NaN if it is not available.
     // note: this function checks both all and grouped variations,
     // need to check if there is no overlap in names between them!
-    // first check case of empty string (total combined JEC)
-    if( source.size()==0 ){ return this->JetJECDown(); }
-    double newpt = 0.;
-    bool found = false;
-    for( auto mapEl: this->_pt_JECSourcesDown ){
-	if(source==mapEl.first){ 
-	    newpt = mapEl.second;
-	    found = true; 
+    // (in case of overlap, the grouped variation takes precedence)
+    const std::size_t nSources = ( _jecSourcesTable ? _jecSourcesTable->size() : 0 );
+    if( _jecGroupedTable ){
+	VariationTable::size_type index = _jecGroupedTable->index( source );
+	if( index != VariationTable::npos ){
+	    double pt = _pt_JECVariations[ 2*nSources + ( isUp ? 0 : _jecGroupedTable->size() ) + index ];
+	    if( !std::isnan( pt ) ){ return pt; }
 	}
     }
-    for( auto mapEl: this->_pt_JECGroupedDown ){
-        if(source==mapEl.first){
-	    newpt = mapEl.second;
-	    found = true;
+    if( _jecSourcesTable ){
+	VariationTable::size_type index = _jecSourcesTable->index( source );
+	if( index != VariationTable::npos ){
+	    return _pt_JECVariations[ ( isUp ? 0 : nSources ) + index ];
 	}
     }
-    if( !found ){
+    return std::numeric_limits< double >::quiet_NaN();
+}
+
+
+Jet Jet::JetJECDown( const std::string& source ) const{
+    // first check case of empty string (total combined JEC)
+    if( source.size()==0 ){ return this->JetJECDown(); }
+    double newpt = splitJECVariedPt( source, false );
+    if( std::isnan( newpt ) ){
 	std::string msg = "ERROR in Jet.JetJECDown: JEC source " + source;
 	msg.append( " not recognized." );
 	throw std::runtime_error( msg );
@@ -251,31 +252,15 @@ Jet Jet::JetJECDown( const std::string source ) const{
 }
 
 
-Jet Jet::JetJECUp( const std::string source ) const{
-    // note: this function checks both all and grouped variations,
-    // need to check if there is no overlap in names between them!
+Jet Jet::JetJECUp( const std::string& source ) const{
     // first check case of empty string (total combined JEC)
     if( source.size()==0 ){ return this->JetJECUp(); }
-    double newpt = 0.;
-    bool found = false;
-    for( auto mapEl: this->_pt_JECSourcesUp ){
-        if(source==mapEl.first){
-	    newpt = mapEl.second;
-	    found = true;
-	}
-    }
-    for( auto mapEl: this->_pt_JECGroupedUp ){
-        if(source==mapEl.first){
-	    newpt = mapEl.second;
-	    found = true;
-	}
-    }
-    if( !found ){
+    double newpt = splitJECVariedPt( source, true );
+    if( std::isnan( newpt ) ){
         std::string msg = "ERROR in Jet.JetJECUp: JEC source " + source;
         msg.append( " not recognized." );
         throw std::runtime_error( msg );
     }
-
     return variedJet( newpt );
 }
 
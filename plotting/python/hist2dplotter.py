@@ -115,6 +115,8 @@ def plot2dhistogram(hist, outfilepath, outfmts=['.png'],
 		    topmargin=None, bottommargin=None, leftmargin=None, rightmargin=None,
 		    extrainfos=[], infofont=None, infosize=None, infoleft=None, infotop=None ):
     # options:
+    # - outfilepath: path of the figure to save, without extension
+    #   (the figure is saved as outfilepath+outfmt for each format in outfmts)
     # - cmin and cmax: minimum and maximum values for the color scales
     #   note: in default "colz" behaviour, bins above cmax are colored as cmax,
     #         while bins below cmin are left blank.
@@ -217,7 +219,6 @@ def plot2dhistogram(hist, outfilepath, outfmts=['.png'],
 
     # save the plot
     c1.Update()
-    outfilepath = os.path.splitext(outfilepath)[0]
     for outfmt in outfmts: c1.SaveAs(outfilepath+outfmt)
    
     # close the canvas
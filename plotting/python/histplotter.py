@@ -78,7 +78,8 @@ def plotdatavsmc(outfile, datahist, mchistlist,
 	extracmstext='', lumi=None,
 	extrainfos=[], infosize=None, infoleft=None, infotop=None,
         binlabels=None, labelsize=None, labelangle=None,
-        canvaswidth=None, canvasheight=None):
+        canvaswidth=None, canvasheight=None,
+        outfmts=['.png','.eps','.pdf']):
     ### make a (stacked) simulation vs. data plot
     # arguments:
     # - outfile is the output file where the figure will be saved
@@ -113,6 +114,8 @@ def plotdatavsmc(outfile, datahist, mchistlist,
     #   extension: this argument toggles single vs double variable plotting;
     #   in the latter case, binlabels must be a tuple of two lists: 
     #   (primary variable labels, secondary variable labels)
+    # - outfmts: list of file extensions to save the figure in
+    #   (the canvas is drawn once and saved in each format)
     
     pt.setTDRstyle()
     ROOT.gROOT.SetBatch(ROOT.kTRUE)
@@ -458,6 +461,4 @@ def plotdatavsmc(outfile, datahist, mchistlist,
                 p2vlines.append(vline)
     
     ### save the plot
-    c1.SaveAs(outfile+'.png')
-    c1.SaveAs(outfile+'.eps')
-    c1.SaveAs(outfile+'.pdf')
+    for outfmt in outfmts: c1.SaveAs(outfile+outfmt)
@@ -19,7 +19,7 @@ def plotmultihistograms(histlist,
 	    lumitext='', extracmstext = '',
 	    doratio=False, ratiorange=None, ylims=None, yminzero=False,
 	    extrainfos=[], infosize=None, infoleft=None, infotop=None,
-	    uncertainties=None ):
+	    uncertainties=None, outfmts=['.png','.eps','.pdf'] ):
     ### plot multiple overlaying histograms (e.g. for shape comparison)
     # note: the ratio plot will show ratios w.r.t. the first histogram in the list!
     # arguments:
@@ -44,6 +44,7 @@ def plotmultihistograms(histlist,
     # - infoleft: left border of extra info text (default leftmargin + 0.05)
     # - infotop: top border of extra info text (default 1 - topmargin - 0.1)
     # - uncertainties: list of TH1, same length as histlist, that contain the uncertainties.
+    # - outfmts: list of file extensions to save the figure in (if figname is not None)
 
     pt.setTDRstyle()
     ROOT.gROOT.SetBatch(ROOT.kTRUE)
@@ -259,9 +260,7 @@ def plotmultihistograms(histlist,
 			    'legend':legend}
 	    return plotobject
 	else:
-	    c1.SaveAs(figname.replace('.png','')+'.png')
-	    c1.SaveAs(figname.replace('.png','')+'.eps')
-	    c1.SaveAs(figname.replace('.png','')+'.pdf')
+	    for outfmt in outfmts: c1.SaveAs(figname.replace('.png','')+outfmt)
 	    return None
 
     ### make the lower part of the plot
@@ -310,7 +309,5 @@ def plotmultihistograms(histlist,
 			'legend':legend}
         return plotobject
     else:
-	c1.SaveAs(figname.replace('.png','')+'.png')
-	c1.SaveAs(figname.replace('.png','')+'.eps')
-	c1.SaveAs(figname.replace('.png','')+'.pdf')
+	for outfmt in outfmts: c1.SaveAs(figname.replace('.png','')+outfmt)
         return None
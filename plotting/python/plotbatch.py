@@ -0,0 +1,268 @@
+###########################################################################
+# render a batch of plots in parallel, skipping plots that are up to date #
+###########################################################################
+
+# general use:
+# instead of calling the plotting functions directly, plots are added to a PlotBatch
+# with the same arguments, and rendered together at the end with PlotBatch.run().
+# the plots are rendered in a pool of processes (one plot per process at a time).
+# for each plot, a hash is computed from the plotting function, its source code
+# and all its arguments (including the contents of the histograms);
+# it is stored next to the output files as <output file without extension>.plothash.
+# if all output files of a plot exist and the stored hash is the same,
+# the plot is skipped, so rerunning a plotting script after changing a few inputs
+# only redraws the affected figures.
+# example:
+#   batch = PlotBatch()
+#   batch.add('histplotter.plotdatavsmc', figname, datahist, mchists, xaxtitle='p_{T}')
+#   batch.add('hist2dplotter.plot2dhistogram', frmap, frmapfile, outfmts=['.png','.pdf'])
+#   batch.run()
+# notes:
+# - the arguments are copied when the plot is added, so the histograms can be modified
+#   (e.g. scaled or reset) after adding a plot, without affecting that plot.
+# - to have each canvas drawn only once, all formats of a plot should be requested
+#   through the outfmts argument, rather than by adding the same plot for each format.
+
+import os
+import sys
+import inspect
+import hashlib
+import importlib
+import pickle
+import traceback
+import multiprocessing
+import numpy as np
+import ROOT
+thisdir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(thisdir)
+sys.path.append(os.path.join(thisdir, '../../Tools/python'))
+import histtools as ht
+
+
+# supported plotting functions
+# (maps the function name to the name of its output file argument
+#  and to a function returning the output files for given output file argument and formats;
+#  the latter follows the way the output file names are built in each plotting function)
+plotfunctions = ({
+  'histplotter.plotdatavsmc': ('outfile',
+    lambda outfile, outfmts: [outfile+fmt for fmt in outfmts]),
+  'hist2dplotter.plot2dhistogram': ('outfilepath',
+    lambda outfile, outfmts: [outfile+fmt for fmt in outfmts]),
+  'singlehistplotter.plotsinglehistogram': ('figname',
+    lambda outfile, outfmts: [outfile.split('.')[0]+fmt for fmt in outfmts]),
+  'multihistplotter.plotmultihistograms': ('figname',
+    lambda outfile, outfmts: [outfile.replace('.png','')+fmt for fmt in outfmts])
+})
+
+# plotting tools used by all plotting functions
+# (changes to these files invalidate the hash of all plots)
+commonsources = [os.path.join(thisdir, 'plottools.py')]
+
+
+def getplotfunction( name ):
+    ### return the plotting module and function for a given function name
+    if name not in plotfunctions:
+        raise Exception('ERROR in plotbatch.getplotfunction: function {} not recognized;'.format(name)
+                        +' options are {}.'.format(sorted(plotfunctions.keys())))
+    (modulename, functionname) = name.split('.')
+    module = importlib.import_module(modulename)
+    return (module, getattr(module, functionname))
+
+
+def _sourcefile( module ):
+    ### return the .py source file of a module
+    sourcefile = module.__file__
+    if sourcefile.endswith('.pyc'): sourcefile = sourcefile[:-1]
+    return sourcefile
+
+
+def _update( hasher, *items ):
+    ### add strings or other simple objects to a hash
+    # note: repr is used for numbers, since str rounds floats to 12 digits in python 2
+    for item in items:
+        if isinstance(item, float): item = repr(item)
+        if not isinstance(item, bytes): item = str(item).encode('utf-8')
+        hasher.update(item)
+        hasher.update(b'|')
+
+
+def _hashaxis( hasher, axis ):
+    ### add the binning, range, title and labels of a histogram axis to a hash
+    _update( hasher, 'axis', axis.GetNbins(), axis.GetTitle(), axis.GetFirst(), axis.GetLast() )
+    edges = [axis.GetBinLowEdge(i) for i in range(1, axis.GetNbins()+2)]
+    _update( hasher, np.array(edges, dtype=float).tobytes() )
+    if axis.GetLabels():
+        _update( hasher, *[axis.GetBinLabel(i) for i in range(1, axis.GetNbins()+1)] )
+
+
+def _hashattributes( hasher, obj ):
+    ### add the line, fill and marker attributes of a histogram or graph to a hash
+    _update( hasher, obj.GetLineColor(), obj.GetLineStyle(), obj.GetLineWidth(),
+             obj.GetFillColor(), obj.GetFillStyle(),
+             obj.GetMarkerColor(), obj.GetMarkerStyle(), obj.GetMarkerSize() )
+
+
+def hashobject( hasher, obj ):
+    ### add an argument of a plotting function to a hash
+    # note: histograms and graphs are hashed by their contents and drawing properties
+    #       (not by their name, which is not drawn and typically not reproducible);
+    #       other ROOT objects are hashed by their serialized form.
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        _update( hasher, type(obj).__name__, repr(obj) )
+    elif isinstance(obj, (list, tuple)):
+        _update( hasher, type(obj).__name__, len(obj) )
+        for el in obj: hashobject( hasher, el )
+    elif isinstance(obj, dict):
+        _update( hasher, 'dict', len(obj) )
+        for key in sorted(obj.keys(), key=repr):
+            hashobject( hasher, key )
+            hashobject( hasher, obj[key] )
+    elif isinstance(obj, np.ndarray):
+        _update( hasher, 'ndarray', obj.dtype.str, obj.shape, np.ascontiguousarray(obj).tobytes() )
+    elif isinstance(obj, ROOT.TH1):
+        _update( hasher, obj.ClassName(), obj.GetTitle(), obj.GetDimension(),
+                 obj.GetMinimumStored(), obj.GetMaximumStored(), obj.GetEntries() )
+        _hashaxis( hasher, obj.GetXaxis() )
+        if obj.GetDimension()>1: _hashaxis( hasher, obj.GetYaxis() )
+        if obj.GetDimension()>2: _hashaxis( hasher, obj.GetZaxis() )
+        _hashattributes( hasher, obj )
+        _update( hasher, ht.histcontents(obj).tobytes(), ht.histerrors(obj).tobytes() )
+    elif isinstance(obj, ROOT.TGraph):
+        _update( hasher, obj.ClassName(), obj.GetTitle(), obj.GetN() )
+        _hashattributes( hasher, obj )
+        for i in range(obj.GetN()):
+            _update( hasher, obj.GetX()[i], obj.GetY()[i],
+                     obj.GetErrorXlow(i), obj.GetErrorXhigh(i),
+                     obj.GetErrorYlow(i), obj.GetErrorYhigh(i) )
+    elif isinstance(obj, ROOT.TObject):
+        _update( hasher, obj.ClassName(), pickle.dumps(obj, 2) )
+    else: _update( hasher, type(obj).__name__, repr(obj) )
+
+
+def hashplot( name, callargs ):
+    ### compute the hash of a plot from the plotting function and all its arguments
+    # input arguments:
+    # - name: name of the plotting function (see plotfunctions)
+    # - callargs: dict mapping all argument names of the function to their values
+    hasher = hashlib.sha1()
+    (module, _) = getplotfunction( name )
+    _update( hasher, name )
+    for sourcefile in [_sourcefile(module)]+commonsources:
+        with open(sourcefile, 'rb') as f: _update( hasher, f.read() )
+    for argname in sorted(callargs.keys()):
+        _update( hasher, argname )
+        hashobject( hasher, callargs[argname] )
+    return hasher.hexdigest()
+
+
+# jobs of the batch that is currently running
+# (global, so that the worker processes inherit them when they are forked,
+#  and only the job index needs to be passed to them)
+_jobs = []
+
+def _renderjob( index ):
+    ### render a single plot (in a worker process)
+    # returns a tuple (index, error message or None if the plot was made successfully)
+    job = _jobs[index]
+    try:
+        (_, function) = getplotfunction( job['name'] )
+        (args, kwargs) = pickle.loads(job['payload'])
+        function(*args, **kwargs)
+    except Exception:
+        return (index, traceback.format_exc())
+    return (index, None)
+
+
+class PlotBatch(object):
+    ### collection of plots that are rendered together
+
+    def __init__( self, nprocesses=None, force=False, verbose=True ):
+        ### initializer
+        # input arguments:
+        # - nprocesses: number of parallel processes (default: number of cpus);
+        #   if 1, the plots are rendered sequentially in the current process.
+        # - force: render all plots, also the ones that are up to date.
+        # - verbose: print which plots are rendered and skipped.
+        if nprocesses is None: nprocesses = multiprocessing.cpu_count()
+        if nprocesses<1:
+            raise Exception('ERROR in PlotBatch: number of processes must be positive.')
+        self.nprocesses = nprocesses
+        self.force = force
+        self.verbose = verbose
+        self.jobs = []
+
+    def __len__( self ):
+        return len(self.jobs)
+
+    def add( self, name, *args, **kwargs ):
+        ### add a plot to the batch
+        # input arguments:
+        # - name: name of the plotting function, e.g. 'histplotter.plotdatavsmc'
+        #   (see plotfunctions for the supported functions)
+        # - args and kwargs: arguments to the plotting function, as for a direct call
+        (_, function) = getplotfunction( name )
+        try: callargs = inspect.getcallargs(function, *args, **kwargs)
+        except TypeError as e:
+            raise Exception('ERROR in PlotBatch.add: invalid arguments for {}: {}'.format(name, e))
+        (outfilearg, outfilefunction) = plotfunctions[name]
+        if callargs[outfilearg] is None:
+            raise Exception('ERROR in PlotBatch.add: no output file given for {}.'.format(name))
+        outfiles = outfilefunction(callargs[outfilearg], callargs['outfmts'])
+        if len(outfiles)==0:
+            raise Exception('ERROR in PlotBatch.add: no output formats given for {}.'.format(name))
+        for job in self.jobs:
+            for outfile in outfiles:
+                if outfile in job['outfiles']:
+                    raise Exception('ERROR in PlotBatch.add: output file {}'.format(outfile)
+                                    +' is already made by another plot in this batch.')
+        self.jobs.append({'name': name,
+                          'outfiles': outfiles,
+                          'hashfile': os.path.splitext(outfiles[0])[0]+'.plothash',
+                          'hash': hashplot( name, callargs ),
+                          'payload': pickle.dumps((args, kwargs), 2)})
+
+    def isuptodate( self, job ):
+        ### check if all output files of a plot exist and were made with the same hash
+        for outfile in job['outfiles']+[job['hashfile']]:
+            if not os.path.exists(outfile): return False
+        with open(job['hashfile'], 'r') as f: return (f.read().strip()==job['hash'])
+
+    def run( self ):
+        ### render all plots in the batch that are not up to date
+        # returns a tuple (number of rendered plots, number of skipped plots);
+        # the batch is emptied afterwards.
+        global _jobs
+        torender = []
+        for index, job in enumerate(self.jobs):
+            if not self.force and self.isuptodate(job):
+                if self.verbose: print('plot {} is up to date, skipping it.'.format(job['outfiles'][0]))
+            else: torender.append(index)
+        nskipped = len(self.jobs)-len(torender)
+        if self.verbose:
+            print('rendering {} plots ({} up to date)...'.format(len(torender), nskipped))
+        _jobs = self.jobs
+        try:
+            if self.nprocesses==1 or len(torender)<=1:
+                results = [_renderjob(index) for index in torender]
+            else:
+                pool = multiprocessing.Pool(processes=min(self.nprocesses, len(torender)))
+                try: results = pool.map(_renderjob, torender, chunksize=1)
+                finally:
+                    pool.close()
+                    pool.join()
+        finally: _jobs = []
+        # write the hashes of the successful plots and report the failed ones
+        failed = []
+        for (index, error) in results:
+            job = self.jobs[index]
+            if error is None:
+                with open(job['hashfile'], 'w') as f: f.write(job['hash']+'\n')
+            else:
+                failed.append(job['outfiles'][0])
+                if os.path.exists(job['hashfile']): os.remove(job['hashfile'])
+                print('ERROR: plot {} failed:\n{}'.format(job['outfiles'][0], error))
+        self.jobs = []
+        if len(failed)>0:
+            raise Exception('ERROR in PlotBatch.run: {} of {} plots failed: {}'.format(
+                            len(failed), len(torender), failed))
+        return (len(torender)-len(failed), nskipped)
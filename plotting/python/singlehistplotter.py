@@ -19,7 +19,8 @@ def plotsinglehistogram(hist, figname,
 		yaxmin=None, yaxmax=None,
 	        writebincontent=False, bincontentfont=None, 
 	        bincontentsize=None, bincontentfmt=None,
-		extrainfos=[], infosize=None, infoleft=None, infotop=None ):
+		extrainfos=[], infosize=None, infoleft=None, infotop=None,
+		outfmts=['.png','.eps','.pdf'] ):
     ### drawing a single histogram
     # - label: string for the legend entry for this histogram.
     #	note: if label is 'auto', the implicit title of the TH1 will be used.
@@ -32,6 +33,7 @@ def plotsinglehistogram(hist, figname,
     # - infosize: font size of extra info
     # - infoleft: left border of extra info text (default leftmargin + 0.05)
     # - infotop: top border of extra info text (default 1 - topmargin - 0.1)
+    # - outfmts: list of file extensions to save the figure in
 
     pt.setTDRstyle()
     ROOT.gROOT.SetBatch(ROOT.kTRUE)
@@ -161,6 +163,4 @@ def plotsinglehistogram(hist, figname,
 	    printvalue = hist.GetBinContent(i)
 	    bintext.DrawLatex(xcoord, ycoord+0.05, bincontentfmt.format(printvalue))
 
-    c1.SaveAs(figname.split('.')[0]+'.png')
-    c1.SaveAs(figname.split('.')[0]+'.eps')
-    c1.SaveAs(figname.split('.')[0]+'.pdf')
+    for outfmt in outfmts: c1.SaveAs(figname.split('.')[0]+outfmt)
@@ -0,0 +1,48 @@
+/*
+Small utility to build the catalog of sample metadata for one or more sample lists
+*/
+
+// the catalog is written to the sample directory (see SampleCatalog::defaultFileName),
+// where it is read automatically by TreeReader, so that jobs processing a single sample
+// do not need to open any other sample file.
+// samples that are already in the catalog (and did not change since) are not opened again.
+
+// include c++ library classes 
+#include <string>
+#include <vector>
+#include <exception>
+#include <iostream>
+
+// include other parts of framework
+#include "../Tools/interface/Sample.h"
+#include "../Tools/interface/SampleCatalog.h"
+
+
+int main( int argc, char* argv[] ){
+    std::cerr << "###starting###" << std::endl;
+
+    if( argc < 3 ){
+        std::cerr << "buildSampleCatalog requires at least two arguments to run : " << std::endl;
+	std::cerr << "- directory of input files" << std::endl;
+	std::cerr << "- sample list(s) (.txt)" << std::endl;
+        return -1;
+    }
+
+    std::vector< std::string > argvStr( &argv[0], &argv[0] + argc );
+    std::string& sampleDirectory = argvStr[1];
+
+    // read all samples
+    std::vector< Sample > samples;
+    for( unsigned i = 2; i < argvStr.size(); ++i ){
+	std::vector< Sample > sampleList = readSampleList( argvStr[i], sampleDirectory );
+	samples.insert( samples.end(), sampleList.begin(), sampleList.end() );
+    }
+
+    // build the catalog
+    std::string catalogFile = SampleCatalog::defaultFileName( sampleDirectory );
+    SampleCatalog catalog = SampleCatalog::readOrBuild( catalogFile, samples );
+    std::cout << "sample catalog " << catalogFile << " contains " << catalog.size() << " samples" << std::endl;
+
+    std::cerr << "###done###" << std::endl;
+    return 0;
+}
@@ -4,27 +4,30 @@
 
 import sys
 import os
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'../jobSubmission'))
+import logScanner as ls
 
 
-def check_start_done(filename):
+def check_start_done(filename, counts=None):
     # returns 0 if the number of done tags equals the number of starting tags,
     # and if both are present at least once in the file;
     # returns 1 otherwise.
+    # note: counts is an optional dict of tag counts for this file
+    #       (see logScanner.scanFilesAsDicts); if not provided, the file is scanned.
 
-    # read the file content
-    f = open(filename)
-    filetext = f.read()
-    f.close()
+    # scan the file
+    if counts is None:
+	counts = ls.scanFilesAsDicts([filename], ['###starting###','###done###'])[filename]
     
     # count number of starting tags
-    nstarted = filetext.count('###starting###')
+    nstarted = counts['###starting###']
     if(nstarted==0):
         print('### WARNING: file '+filename+' contains no valid starting tag.')
         print('             does the process write the correct tags to the error files?')
         return 1
 
     # count number of done tags
-    ndone = filetext.count('###done###')
+    ndone = counts['###done###']
     if(nstarted==ndone): return 0
 
     # print result
@@ -34,19 +37,20 @@ def check_start_done(filename):
     return 1
 
 
-def check_content(filename, contentlist):
+def check_content(filename, contentlist, counts=None):
     # returns 0 if none of the elements of contentlist is present in the file;
     # returns 1 otherwise.
+    # note: counts is an optional dict of tag counts for this file
+    #       (see logScanner.scanFilesAsDicts); if not provided, the file is scanned.
 
-    # read the file content
-    f = open(filename)
-    filetext = f.read()
-    f.close()
+    # scan the file
+    if counts is None:
+	counts = ls.scanFilesAsDicts([filename], contentlist)[filename]
 
     # check if the file content contains provided error tags
     contains = False
     for content in contentlist:
-	if filetext.count(content)>0:
+	if counts[content]>0:
 	    contains = True
 	    print('found issue in file '+filename+':')
 	    print('   file contains the sequence '+content+' which was flagged as problematic.')
@@ -91,6 +95,12 @@ if __name__=='__main__':
     print('found '+str(len(files))+' error log files.')
     print('start scanning...')
 
+    # scan all files in a single pass per file
+    tags = []
+    if not ignoreStartingTags: tags += ['###starting###','###done###']
+    if not ignoreErrorTags: tags += errortags
+    counts = ls.scanFilesAsDicts(files, tags)
+
     # loop over files
     nfiles = len(files)
     nerror = 0
@@ -99,8 +109,8 @@ if __name__=='__main__':
 	error_start_done = 0
 	error_content = 0
 	# error checking
-	if not ignoreStartingTags: error_start_done = check_start_done(fname)
-	if not ignoreErrorTags: error_content = check_content(fname, errortags)
+	if not ignoreStartingTags: error_start_done = check_start_done(fname, counts=counts[fname])
+	if not ignoreErrorTags: error_content = check_content(fname, errortags, counts=counts[fname])
 	if(error_start_done + error_content > 0): nerror += 1
 
     # print results
@@ -0,0 +1,146 @@
+##############################################################
+# tools for splitting files into jobs with balanced workload #
+##############################################################
+
+# general use:
+# instead of splitting the files of a sample into chunks with a fixed number of files
+# (see fileListing.listParts), the files are packed into chunks
+# that contain approximately the same amount of work,
+# where the work per file is estimated either by its number of entries
+# or (as a cheaper proxy) by its size on disk.
+# the number of entries per file is cached in a json file per sample and version,
+# so that it needs to be read only once per file
+# (entries are reread only if the size or modification time of the file changed).
+
+import os
+import sys
+import json
+import heapq
+from fileListing import getFileCatalog
+
+tree_name = 'blackJackAndHookers/blackJackAndHookersTree'
+default_cache_directory = os.path.join(os.path.expanduser('~'), '.cache', 'skimChunkPlanner')
+
+
+def getNEntries( filename, default=0 ):
+    # get the number of entries in the tree of an ntuple file
+    # returns default if the file or the tree could not be read
+    import ROOT
+    f = ROOT.TFile.Open( filename )
+    if( not f or f.IsZombie() ): return default
+    tree = f.Get( tree_name )
+    if not tree:
+        f.Close()
+        return default
+    nentries = tree.GetEntries()
+    f.Close()
+    return int(nentries)
+
+
+def getCacheFileName( sample_directory, version, cache_directory=None ):
+    # get the name of the cache file for a given sample and version
+    if cache_directory is None: cache_directory = default_cache_directory
+    sample_name = sample_directory.rstrip( os.path.sep ).split( os.path.sep )[-1]
+    return os.path.join( cache_directory, '{}_{}.json'.format(sample_name, version) )
+
+
+def getFileWeights( files, mode='events', cachefile=None ):
+    # get the weight (i.e. estimated amount of work) of each file in a list
+    # input arguments:
+    # - files: list of file names
+    # - mode: either 'events' (number of entries in the tree) or 'bytes' (file size)
+    # - cachefile: json file to cache the number of entries per file
+    #   (not used for mode 'bytes')
+    # returns:
+    # a list of weights (one per file)
+    # note: files that cannot be read are not cached, and their number of entries is estimated
+    #       from their size, using the average size per entry of the readable files.
+    if mode not in ['events','bytes']:
+        raise Exception('ERROR in chunkPlanner.getFileWeights: mode {}'.format(mode)
+                        +' not recognized; choose from "events" or "bytes".')
+    # (sizes and modification times are taken from the file catalog, see fileListing.py)
+    catalog = getFileCatalog()
+    stats = [catalog.getFileInfo(f) for f in files]
+    if mode=='bytes': return [stat[0] for stat in stats]
+    # read the cache
+    cache = {}
+    if( cachefile is not None and os.path.exists(cachefile) ):
+        with open(cachefile,'r') as f: cache = json.load(f)
+    # get the number of entries for each file (from the cache if up to date)
+    weights = []
+    nread = 0
+    for fname, stat in zip(files, stats):
+        entry = cache.get(fname,None)
+        if( entry is None or entry['size']!=stat[0] or entry['mtime']!=stat[1] ):
+            nentries = getNEntries(fname, default=None)
+            if nentries is None:
+                weights.append( None )
+                continue
+            entry = {'size':stat[0], 'mtime':stat[1], 'nentries':nentries}
+            cache[fname] = entry
+            nread += 1
+        weights.append( entry['nentries'] )
+    # estimate the number of entries of unreadable files from their size
+    unreadable = [fname for fname, weight in zip(files, weights) if weight is None]
+    if len(unreadable)>0:
+        readable = [(stat[0], weight) for stat, weight in zip(stats, weights) if weight is not None]
+        if( len(readable)==0 or sum([size for size,_ in readable])==0 ):
+            raise Exception('ERROR in chunkPlanner.getFileWeights: none of the files'
+                            +' could be read to estimate their number of entries'
+                            +' (e.g. {}); use bytes_per_job instead.'.format(unreadable[0]))
+        print('WARNING in chunkPlanner.getFileWeights: {} files could not be read;'.format(len(unreadable))
+              +' estimating their number of entries from their size.')
+        entries_per_byte = float(sum([weight for _,weight in readable]))/sum([size for size,_ in readable])
+        weights = [ int(round(stat[0]*entries_per_byte)) if weight is None else weight
+                    for stat, weight in zip(stats, weights) ]
+    # write the cache
+    if( cachefile is not None and nread>0 ):
+        if not os.path.exists(os.path.dirname(cachefile)): os.makedirs(os.path.dirname(cachefile))
+        with open(cachefile,'w') as f: json.dump(cache, f)
+    return weights
+
+
+def listBalancedParts( input_list, weights, target ):
+    # split a list into lists with approximately equal total weight
+    # input arguments:
+    # - input_list: list of elements to split
+    # - weights: list of weights (one per element)
+    # - target: target total weight per part
+    # note: the number of parts is the total weight divided by the target (rounded up),
+    #       and elements are assigned greedily (heaviest first) to the part with the lowest weight.
+    #       elements that are heavier than the target end up in a part of their own.
+    # note: the elements within each part keep their original order.
+    if len(input_list)==0: return []
+    if target<=0:
+        raise Exception('ERROR in chunkPlanner.listBalancedParts: target must be positive.')
+    nparts = int( -(-sum(weights)//target) )
+    nparts = max(1, min(nparts, len(input_list)))
+    parts = [ (0, i, []) for i in range(nparts) ]
+    heapq.heapify(parts)
+    for idx in sorted( range(len(input_list)), key=lambda i: weights[i], reverse=True ):
+        (weight, i, part) = heapq.heappop(parts)
+        part.append(idx)
+        heapq.heappush(parts, (weight+weights[idx], i, part))
+    parts = [ sorted(part) for (_,_,part) in sorted(parts, key=lambda el: el[1]) ]
+    return [ [input_list[idx] for idx in part] for part in parts if len(part)>0 ]
+
+
+def planChunks( files, files_per_job=None, events_per_job=None, bytes_per_job=None,
+                cachefile=None ):
+    # split a list of files into chunks for job submission
+    # exactly one of files_per_job, events_per_job and bytes_per_job must be specified
+    # (see fileListing.listParts, getFileWeights and listBalancedParts).
+    # returns:
+    # a list of lists of files
+    nspecified = len([arg for arg in [files_per_job, events_per_job, bytes_per_job]
+                        if arg is not None])
+    if nspecified!=1:
+        raise Exception('ERROR in chunkPlanner.planChunks: exactly one of files_per_job,'
+                        +' events_per_job and bytes_per_job must be specified.')
+    if files_per_job is not None:
+        return [ files[i:i+files_per_job] for i in range(0, len(files), files_per_job) ]
+    if events_per_job is not None:
+        weights = getFileWeights( files, mode='events', cachefile=cachefile )
+        return listBalancedParts( files, weights, events_per_job )
+    weights = getFileWeights( files, mode='bytes' )
+    return listBalancedParts( files, weights, bytes_per_job )
@@ -0,0 +1,241 @@
+/*
+Convert a (skimmed) ntuple to a columnar cache that can be read in python without ROOT
+*/
+
+// the cache is a directory containing:
+// - one .npy file per branch, with one row per entry for scalar and fixed size array branches,
+//   and with the values of all entries concatenated for variable size array branches
+//   (e.g. the lepton branches indexed by _nL and the jet branches indexed by _nJets),
+// - one <counter>.offsets.npy file per counter branch of variable size arrays,
+//   with the (64-bit) index of the first value of each entry, followed by the total number of values,
+// - a manifest.json describing the columns and the source file (size and modification time),
+//   which is written last, so a cache without manifest is incomplete.
+// see Tools/python/columnarcache.py for reading the cache.
+
+// include c++ library classes
+#include <string>
+#include <vector>
+#include <map>
+#include <memory>
+#include <fstream>
+#include <iostream>
+#include <exception>
+#include <algorithm>
+#include <iterator>
+#include <cstdio>
+#include <sys/stat.h>
+
+// include ROOT classes
+#include "TFile.h"
+#include "TTree.h"
+#include "TLeaf.h"
+#include "TH1.h"
+
+// include other parts of framework
+#include "../Tools/interface/NpyColumnWriter.h"
+#include "../Tools/interface/stringTools.h"
+#include "../Tools/interface/systemTools.h"
+
+
+struct Column {
+    std::string name;
+    TLeaf* leaf;
+    std::string counter;
+    int staticLength;
+    std::vector< char > buffer;
+    std::unique_ptr< NpyColumnWriter > writer;
+};
+
+
+std::string numpyDataType( const std::string& rootTypeName ){
+    static const std::map< std::string, std::string > dataTypes = {
+        { "Bool_t", "|b1" }, { "Char_t", "|i1" }, { "UChar_t", "|u1" },
+        { "Short_t", "<i2" }, { "UShort_t", "<u2" }, { "Int_t", "<i4" }, { "UInt_t", "<u4" },
+        { "Long64_t", "<i8" }, { "ULong64_t", "<u8" }, { "Long_t", "<i8" }, { "ULong_t", "<u8" },
+        { "Float_t", "<f4" }, { "Double_t", "<f8" }
+    };
+    auto it = dataTypes.find( rootTypeName );
+    return ( it == dataTypes.cend() ) ? "" : it->second;
+}
+
+
+bool isSelected( const std::string& branchName, const std::vector< std::string >& selection ){
+    if( selection.empty() ) return true;
+    for( const auto& pattern : selection ){
+        if( !pattern.empty() && pattern.back() == '*' ){
+            if( stringTools::stringStartsWith( branchName, pattern.substr( 0, pattern.size() - 1 ) ) ) return true;
+        } else if( branchName == pattern ){
+            return true;
+        }
+    }
+    return false;
+}
+
+
+void convertToColumnar( const std::string& pathToFile, const std::string& cacheDirectory,
+			const std::vector< std::string >& branchSelection ){
+
+    std::cout << "converting " << pathToFile << std::endl;
+
+    // open input file
+    std::shared_ptr< TFile > inputFile( TFile::Open( pathToFile.c_str() ) );
+    if( !inputFile || inputFile->IsZombie() ){
+        throw std::runtime_error( "File '" + pathToFile + "' can not be opened." );
+    }
+    TTree* tree = dynamic_cast< TTree* >( inputFile->Get( "blackJackAndHookers/blackJackAndHookersTree" ) );
+    if( tree == nullptr ){
+        throw std::runtime_error( "File '" + pathToFile + "' does not contain blackJackAndHookersTree." );
+    }
+    struct stat fileStat;
+    if( stat( pathToFile.c_str(), &fileStat ) != 0 ){
+        throw std::runtime_error( "File '" + pathToFile + "' does not exist." );
+    }
+
+    // prepare cache directory, removing the manifest of a previous conversion if present
+    std::string directory = stringTools::formatDirectoryName( cacheDirectory );
+    systemTools::makeDirectory( directory );
+    std::string manifestFile = directory + "manifest.json";
+    if( systemTools::fileExists( manifestFile ) ) systemTools::deleteFile( manifestFile );
+
+    // find the selected leaves and the counters of the variable size arrays among them
+    std::vector< std::unique_ptr< Column > > columns;
+    std::map< std::string, TLeaf* > counterLeaves;
+    tree->SetBranchStatus( "*", 0 );
+    TObjArray* leaves = tree->GetListOfLeaves();
+    for( int l = 0; l < leaves->GetEntriesFast(); ++l ){
+        TLeaf* leaf = dynamic_cast< TLeaf* >( leaves->At( l ) );
+        std::string name = leaf->GetBranch()->GetName();
+        if( !isSelected( name, branchSelection ) ) continue;
+        if( leaf->GetBranch()->GetListOfLeaves()->GetEntriesFast() != 1 || numpyDataType( leaf->GetTypeName() ).empty() ){
+            std::cerr << "WARNING: branch " << name << " of type " << leaf->GetTypeName() << " is not supported and will be skipped." << std::endl;
+            continue;
+        }
+        std::unique_ptr< Column > column( new Column );
+        column->name = name;
+        column->leaf = leaf;
+        column->staticLength = leaf->GetLenStatic();
+        int maximumLength = column->staticLength;
+        if( leaf->GetLeafCount() != nullptr ){
+            TLeaf* counterLeaf = leaf->GetLeafCount();
+            column->counter = counterLeaf->GetBranch()->GetName();
+            counterLeaves[ column->counter ] = counterLeaf;
+            maximumLength *= std::max( counterLeaf->GetMaximum(), 1 );
+        }
+        column->buffer.resize( maximumLength*leaf->GetLenType() );
+        columns.push_back( std::move( column ) );
+    }
+    if( columns.empty() ){
+        throw std::invalid_argument( "None of the selected branches is present in file '" + pathToFile + "'." );
+    }
+
+    // the counters are always read, also if they are not in the selection
+    for( const auto& counter : counterLeaves ){
+        bool isColumn = false;
+        for( const auto& column : columns ) isColumn = isColumn || ( column->name == counter.first );
+        if( !isColumn ){
+            std::unique_ptr< Column > column( new Column );
+            column->name = counter.first;
+            column->leaf = counter.second;
+            column->staticLength = 1;
+            column->buffer.resize( counter.second->GetLenType() );
+            columns.push_back( std::move( column ) );
+        }
+    }
+
+    // connect the buffers and make the writers
+    for( auto& column : columns ){
+        tree->SetBranchStatus( column->name.c_str(), 1 );
+        tree->SetBranchAddress( column->name.c_str(), column->buffer.data() );
+        std::vector< NpyColumnWriter::size_type > innerShape;
+        if( column->staticLength > 1 ) innerShape.push_back( column->staticLength );
+        column->writer.reset( new NpyColumnWriter( directory + column->name + ".npy",
+            numpyDataType( column->leaf->GetTypeName() ), innerShape ) );
+    }
+    std::map< std::string, std::unique_ptr< NpyColumnWriter > > offsetWriters;
+    std::map< std::string, long long > offsets;
+    for( const auto& counter : counterLeaves ){
+        offsetWriters[ counter.first ].reset( new NpyColumnWriter( directory + counter.first + ".offsets.npy", "<i8" ) );
+        offsets[ counter.first ] = 0;
+        offsetWriters[ counter.first ]->writeValue( offsets[ counter.first ] );
+    }
+
+    // fill the columns
+    long unsigned numberOfEntries = tree->GetEntries();
+    for( long unsigned entry = 0; entry < numberOfEntries; ++entry ){
+        if( entry%100000 == 0 ) std::cout << "processed " << entry << " of " << numberOfEntries << " entries" << std::endl;
+        tree->GetEntry( entry );
+        for( auto& column : columns ){
+            if( column->counter.empty() ){
+                column->writer->write( column->buffer.data() );
+            } else {
+                column->writer->write( column->buffer.data(), column->leaf->GetLen() / column->staticLength );
+            }
+        }
+        for( const auto& counter : counterLeaves ){
+            offsets[ counter.first ] += static_cast< long long >( counter.second->GetValue() );
+            offsetWriters[ counter.first ]->writeValue( offsets[ counter.first ] );
+        }
+    }
+    for( auto& column : columns ) column->writer->close();
+    for( auto& writer : offsetWriters ) writer.second->close();
+
+    // sum of simulated event weights, needed to normalize simulated samples
+    double sumOfWeights = 0.;
+    TH1* hCounter = dynamic_cast< TH1* >( inputFile->Get( "blackJackAndHookers/hCounter" ) );
+    if( hCounter != nullptr ) sumOfWeights = hCounter->GetBinContent( 1 );
+
+    // write the manifest
+    std::string temporaryFile = systemTools::uniqueFileName( manifestFile + ".tmp" );
+    std::ofstream manifest( temporaryFile );
+    manifest.precision( 17 );
+    manifest << "{\n";
+    manifest << "  \"format\": \"columnarcache\",\n";
+    manifest << "  \"version\": 1,\n";
+    manifest << "  \"source\": \"" << pathToFile << "\",\n";
+    manifest << "  \"sourcesize\": " << static_cast< long long >( fileStat.st_size ) << ",\n";
+    manifest << "  \"sourcemtime\": " << static_cast< long long >( fileStat.st_mtime ) << ",\n";
+    manifest << "  \"nentries\": " << numberOfEntries << ",\n";
+    manifest << "  \"sumofweights\": " << sumOfWeights << ",\n";
+    manifest << "  \"counters\": [";
+    for( auto it = counterLeaves.cbegin(); it != counterLeaves.cend(); ++it ){
+        manifest << ( it == counterLeaves.cbegin() ? "" : ", " ) << "\"" << it->first << "\"";
+    }
+    manifest << "],\n";
+    manifest << "  \"columns\": {\n";
+    for( auto it = columns.cbegin(); it != columns.cend(); ++it ){
+        const Column& column = **it;
+        manifest << "    \"" << column.name << "\": {\"dtype\": \"" << column.writer->dataType() << "\", ";
+        manifest << "\"shape\": [" << ( column.staticLength > 1 ? std::to_string( column.staticLength ) : "" ) << "], ";
+        manifest << "\"counter\": " << ( column.counter.empty() ? "null" : "\"" + column.counter + "\"" ) << "}";
+        manifest << ( std::next( it ) == columns.cend() ? "\n" : ",\n" );
+    }
+    manifest << "  }\n";
+    manifest << "}\n";
+    manifest.close();
+    if( manifest.fail() || std::rename( temporaryFile.c_str(), manifestFile.c_str() ) != 0 ){
+        throw std::runtime_error( "Manifest " + manifestFile + " could not be written." );
+    }
+    std::cout << "wrote " << columns.size() << " columns for " << numberOfEntries << " entries to " << directory << std::endl;
+}
+
+
+int main( int argc, char* argv[] ){
+    std::cerr << "###starting###" << std::endl;
+
+    if( argc != 3 && argc != 4 ){
+        std::cerr << "convertToColumnar requires two or three arguments to run : " << std::endl;
+	std::cerr << "- input file" << std::endl;
+	std::cerr << "- cache directory" << std::endl;
+	std::cerr << "- (optional) comma-separated list of branches to convert";
+	std::cerr << " (a trailing * matches any branch starting with the given name, default: all branches)" << std::endl;
+        return -1;
+    }
+
+    std::vector< std::string > argvStr( &argv[0], &argv[0] + argc );
+    std::vector< std::string > branchSelection;
+    if( argc == 4 ) branchSelection = stringTools::split( argvStr[3], "," );
+    convertToColumnar( argvStr[1], argvStr[2], branchSelection );
+
+    std::cerr << "###done###" << std::endl;
+    return 0;
+}
@@ -0,0 +1,82 @@
+####################################################################
+# convert all (skimmed and merged) ntuples in a directory          #
+# to columnar caches that can be read in python without ROOT       #
+####################################################################
+# note: this script calls the ./convertToColumnar executable,
+#       built from convertToColumnar.cc by makeConvertToColumnar.
+# note: the cache of <inputdir>/<sample>.root is written to <outputdir>/<sample>;
+#       samples with a cache that is up to date (i.e. the ntuple did not change since conversion)
+#       are skipped, so the script can be rerun after adding or updating samples.
+# note: see Tools/python/columnarcache.py for reading the caches.
+
+# import python library classes
+import os
+import sys
+import fnmatch
+import argparse
+
+# import other parts of code
+sys.path.append(os.path.abspath('../Tools/python'))
+from columnarcache import ColumnarCache
+sys.path.append(os.path.abspath('../jobSubmission'))
+import condorTools as ct
+import executorTools as et
+from jobSettings import CMSSW_VERSION
+
+
+def cacheIsUpToDate( inputfile, cachedir ):
+    # check if a complete cache exists for the current version of the input file
+    try: cache = ColumnarCache( cachedir )
+    except: return False
+    return cache.isuptodate( sourcefile=inputfile )
+
+
+if __name__ == '__main__':
+
+  # parse arguments
+  parser = argparse.ArgumentParser('Convert ntuples to columnar caches')
+  parser.add_argument('--inputdir', required=True, type=os.path.abspath)
+  parser.add_argument('--outputdir', required=True, type=os.path.abspath)
+  parser.add_argument('--branches', default=None,
+    help='Comma-separated list of branches to convert'
+         +' (a trailing * matches any branch starting with the given name, default: all branches)')
+  parser.add_argument('--runmode', default='condor', choices=['condor','local','local-parallel'])
+  parser.add_argument('--searchkey', default=None)
+  args = parser.parse_args()
+
+  # print arguments
+  print('Running with following configuration:')
+  for arg in vars(args):
+    print('  - {}: {}'.format(arg,getattr(args,arg)))
+
+  # argument checks and parsing
+  if not os.path.exists(args.inputdir):
+    raise Exception('ERROR: input directory {} does not exist.'.format(args.inputdir))
+  if not os.path.exists('./convertToColumnar'):
+    raise Exception('ERROR: executable does not seem to exist,'
+                    +' run make -f makeConvertToColumnar first.')
+
+  # find the files to convert
+  cmds = []
+  for inputfile in sorted(os.listdir(args.inputdir)):
+    if not inputfile.endswith('.root'): continue
+    if args.searchkey is not None:
+      if not fnmatch.fnmatch(inputfile,args.searchkey): continue
+    inputpath = os.path.join(args.inputdir, inputfile)
+    cachedir = os.path.join(args.outputdir, inputfile.replace('.root',''))
+    if cacheIsUpToDate( inputpath, cachedir ):
+      print('cache for {} is up to date, skipping it.'.format(inputfile))
+      continue
+    cmd = './convertToColumnar {} {}'.format(inputpath, cachedir)
+    if args.branches is not None: cmd += ' "{}"'.format(args.branches)
+    cmds.append(cmd)
+  print('found {} files to convert.'.format(len(cmds)))
+  if len(cmds)==0: sys.exit()
+
+  # submit the commands
+  if not os.path.exists(args.outputdir): os.makedirs(args.outputdir)
+  if args.runmode=='local':
+    for cmd in cmds: os.system(cmd)
+  else:
+    et.submitCommandsAsCluster('cjob_convertToColumnar', cmds,
+      runmode=args.runmode, cmssw_version=CMSSW_VERSION)
@@ -2,23 +2,162 @@
 # tools for listing files to skim #
 ###################################
 
+# note: directory listings go through a file catalog (see FileCatalog below),
+#       which caches the content of each directory (including file sizes and mtimes)
+#       in a persistent cache per sample and version,
+#       and lists a directory again only if its modification time changed.
+
 # import python library classes
 import os
 import sys
+import json
+import hashlib
+import threading
+from multiprocessing.pool import ThreadPool
+
+
+class FileCatalog(object):
+    # cached listing of directory trees
+    # the cache is kept in one json file per top directory (usually sample + version),
+    # containing for each directory its modification time, subdirectories and files
+    # (with their sizes and modification times).
+    # when walking a directory tree, each directory is checked with a single stat call,
+    # and only listed again if its modification time differs from the cached one.
+    # note: modifications of files that do not change the directory (e.g. overwriting a file)
+    #       are not detected, so the cached file sizes and mtimes might be outdated in that case.
+
+    def __init__( self, cache_directory=None, nthreads=8 ):
+	if cache_directory is None:
+	    cache_directory = os.path.join( os.path.expanduser('~'), '.cache', 'skimFileCatalog' )
+	self.cache_directory = cache_directory
+	self.nthreads = nthreads
+	self.caches = {}
+	self.fileinfo = {}
+	self.lock = threading.Lock()
+
+    def _cacheFileName( self, top_directory ):
+	# get the cache file name for a top directory
+	# (last two path components for readability, hash of the full path for uniqueness)
+	top_directory = os.path.abspath( top_directory )
+	parts = top_directory.rstrip( os.path.sep ).split( os.path.sep )[-2:]
+	tag = hashlib.md5( top_directory.encode() ).hexdigest()[:10]
+	return os.path.join( self.cache_directory, '_'.join(parts+[tag])+'.json' )
+
+    def _getCache( self, top_directory ):
+	# get the (in-memory) cache for a top directory, loading it from disk if needed
+	top_directory = os.path.abspath( top_directory )
+	with self.lock:
+	    if top_directory not in self.caches:
+		cache = {}
+		cachefile = self._cacheFileName( top_directory )
+		if os.path.exists(cachefile):
+		    try:
+			with open(cachefile,'r') as f: cache = json.load(f)
+		    except ValueError: cache = {}
+		self.caches[top_directory] = cache
+	    return self.caches[top_directory]
+
+    def _saveCache( self, top_directory ):
+	# write the cache for a top directory to disk
+	top_directory = os.path.abspath( top_directory )
+	cache = self.caches.get(top_directory, None)
+	if cache is None: return
+	cachefile = self._cacheFileName( top_directory )
+	with self.lock:
+	    if not os.path.exists(self.cache_directory): os.makedirs(self.cache_directory)
+	    # (write to a temporary file first to avoid corrupt cache files)
+	    with open(cachefile+'.tmp','w') as f: json.dump(cache, f)
+	    os.rename(cachefile+'.tmp', cachefile)
+
+    def _listDirectory( self, directory, cache ):
+	# list the content of a single directory, using the cache if it is up to date
+	# returns a dict with keys 'mtime', 'subdirs' and 'files' (list of [name, size, mtime])
+	mtime = os.stat( directory ).st_mtime
+	entry = cache.get(directory, None)
+	if( entry is not None and entry['mtime']==mtime ):
+	    self.fileinfo[directory] = dict([(f[0], (f[1], f[2])) for f in entry['files']])
+	    return entry
+	subdirs = []
+	files = []
+	for name in sorted(os.listdir( directory )):
+	    path = os.path.join( directory, name )
+	    if os.path.isdir( path ): subdirs.append( name )
+	    else:
+		stat = os.stat( path )
+		files.append( [name, stat.st_size, stat.st_mtime] )
+	entry = {'mtime': mtime, 'subdirs': subdirs, 'files': files}
+	cache[directory] = entry
+	self.fileinfo[directory] = dict([(f[0], (f[1], f[2])) for f in files])
+	return entry
+
+    def walk( self, input_directory, max_depth=None ):
+	# list a directory tree (top-down, similar to os.walk)
+	# returns a list of tuples (directory, subdirectories, files),
+	# where files is a list of [name, size, mtime].
+	input_directory = os.path.abspath( input_directory ).rstrip( os.path.sep )
+	cache = self._getCache( input_directory )
+	res = []
+	stack = [(input_directory, 0)]
+	while len(stack)>0:
+	    (directory, depth) = stack.pop(0)
+	    entry = self._listDirectory( directory, cache )
+	    res.append( (directory, list(entry['subdirs']), list(entry['files'])) )
+	    if( max_depth is not None and depth>=max_depth ): continue
+	    stack += [(os.path.join(directory, subdir), depth+1) for subdir in entry['subdirs']]
+	self._saveCache( input_directory )
+	return res
+
+    def listFiles( self, input_directory, identifier='' ):
+	# list all files (recursively) in a directory containing an identifier in their name
+	# returns a list of tuples (path, size, mtime)
+	res = []
+	for directory, _, files in self.walk( input_directory ):
+	    for name, size, mtime in files:
+		if identifier in name: res.append( (os.path.join(directory,name), size, mtime) )
+	return res
+
+    def getFileInfo( self, path ):
+	# get the size and modification time of a file
+	# from the cache of a previous listing if available, else from os.stat
+	(directory, name) = os.path.split( os.path.abspath( path ) )
+	info = self.fileinfo.get(directory, {}).get(name, None)
+	if info is not None: return info
+	stat = os.stat( path )
+	return (stat.st_size, stat.st_mtime)
+
+    def listFilesParallel( self, input_directories, identifier='' ):
+	# same as listFiles, but for multiple directories in parallel
+	# returns a list of results of listFiles (one per input directory)
+	if len(input_directories)==0: return []
+	nthreads = max(1, min(self.nthreads, len(input_directories)))
+	pool = ThreadPool(processes=nthreads)
+	res = pool.map( lambda d: self.listFiles(d, identifier), input_directories, chunksize=1 )
+	pool.close()
+	pool.join()
+	return res
+
+
+_default_catalog = None
+
+def getFileCatalog():
+    # get the default file catalog (shared by all functions below)
+    global _default_catalog
+    if _default_catalog is None: _default_catalog = FileCatalog()
+    return _default_catalog
+
+
+def listDirectory( input_directory ):
+    # cached equivalent of os.listdir (see FileCatalog)
+    (_, subdirectories, files) = getFileCatalog().walk( input_directory, max_depth=0 )[0]
+    return subdirectories + [f[0] for f in files]
+
 
 def walkLimitedDepth( input_directory, max_depth ):
     # perform os.walk up to a specified depth
-	
-    # remove trailing separators 
-    input_directory = input_directory.rstrip( os.path.sep )
-    # get depth of input directory 
-    base_depth = input_directory.count( os.path.sep )
-    for directory, subdirectories, files in os.walk( input_directory ):
-	yield directory, subdirectories, files
-	current_depth = directory.count( os.path.sep )
-	# the difference in the depth of the input directory and current directory 
-	# is the depth of the walk
-	if ( current_depth - base_depth ) >= max_depth : del subdirectories[:]
+    # note: the directory listings are retrieved from the file catalog
+    for directory, subdirectories, files in getFileCatalog().walk( input_directory,
+								    max_depth=max_depth ):
+	yield directory, subdirectories, [f[0] for f in files]
 
 
 def listSampleDirectories( input_directory, name_to_search ):
@@ -37,10 +176,9 @@ def listFiles( input_directory, identifier ):
     # (used to list all root files in a given sample's directory)
     # note: the search extends arbitrarily deep,
     #       but the identifier is only applied on the file name!
-    for directory, subdirectories, files in os.walk( input_directory ):
-        for f in files:
-            if identifier in f:
-                yield os.path.join( directory, f )
+    # note: the directory listings are retrieved from the file catalog
+    for f, _, _ in getFileCatalog().listFiles( input_directory, identifier ):
+        yield f
 
 
 def listSampleFiles( input_directory ):
@@ -48,18 +186,41 @@ def listSampleFiles( input_directory ):
     # the input directory should be the full path to a sample + version name!
     # this function checks that only one sample is present in the provided input directory,
     # i.e. that there is only one time stamp folder.
+    # note: the directory listings are retrieved from the file catalog,
+    #       with one cache entry per sample + version.
     
+    # list the full sample directory
+    listing = getFileCatalog().walk( input_directory )
     # find time stamp folders (assumed to be one level below version name)
-    timestamps = os.listdir(input_directory)
+    (top_directory, timestamps, files) = listing[0]
+    timestamps = timestamps + [f[0] for f in files]
     if len(timestamps)!=1:
 	msg = 'ERROR in fileListing.listSampleFiles:'
 	msg += ' the sample in directory {}'.format(input_directory)
 	msg += ' contains {} time stamp folders, while 1 was expected.'.format(len(timestamps))
 	msg += ' please check.'
 	raise Exception(msg)
-    timestamp = timestamps[0]
+    timestamp = os.path.join( top_directory, timestamps[0] )
     # find all root files in this folder
-    return list(listFiles(os.path.join(input_directory,timestamp),'.root'))
+    res = []
+    for directory, _, files in listing:
+	if not( directory==timestamp or directory.startswith(timestamp+os.path.sep) ): continue
+	res += [os.path.join(directory, f[0]) for f in files if '.root' in f[0]]
+    return res
+
+
+def listSampleFilesParallel( input_directories ):
+    # same as listSampleFiles, but for multiple sample directories,
+    # which are listed in parallel in a thread pool
+    # returns a list of lists of root files (one per input directory)
+    if len(input_directories)==0: return []
+    catalog = getFileCatalog()
+    nthreads = max(1, min(catalog.nthreads, len(input_directories)))
+    pool = ThreadPool(processes=nthreads)
+    res = pool.map( listSampleFiles, input_directories, chunksize=1 )
+    pool.close()
+    pool.join()
+    return res
 
 
 def listParts( input_list, chunk_size ):
@@ -0,0 +1,51 @@
+/*
+Simple thread-safe queue with a maximum size.
+push() blocks while the queue is full and pop() blocks while it is empty,
+so that producers can not run arbitrarily far ahead of the consumer.
+*/
+
+
+#ifndef BoundedQueue_H
+#define BoundedQueue_H
+
+//include c++ library classes
+#include <queue>
+#include <mutex>
+#include <condition_variable>
+#include <stdexcept>
+
+
+template< typename T > class BoundedQueue {
+
+    public:
+        BoundedQueue( const std::size_t capacity ) : _capacity( capacity ){
+            if( capacity == 0 ){
+                throw std::invalid_argument( "BoundedQueue capacity must be larger than 0." );
+            }
+        }
+
+        void push( T element ){
+            std::unique_lock< std::mutex > lock( _mutex );
+            _notFull.wait( lock, [this](){ return _queue.size() < _capacity; } );
+            _queue.push( std::move( element ) );
+            _notEmpty.notify_one();
+        }
+
+        T pop(){
+            std::unique_lock< std::mutex > lock( _mutex );
+            _notEmpty.wait( lock, [this](){ return !_queue.empty(); } );
+            T element( std::move( _queue.front() ) );
+            _queue.pop();
+            _notFull.notify_one();
+            return element;
+        }
+
+    private:
+        std::size_t _capacity;
+        std::queue< T > _queue;
+        std::mutex _mutex;
+        std::condition_variable _notFull;
+        std::condition_variable _notEmpty;
+};
+
+#endif
@@ -9,6 +9,7 @@ Make sure to always add new skim conditions to the std::map in the passSkim func
 
 //include other parts of framework
 #include "../../Event/interface/Event.h"
+#include "../../TreeReader/interface/TreeReader.h"
 
 bool passSingleLeptonSkim( Event& );
 bool passDileptonSkim( Event& );
@@ -17,4 +18,9 @@ bool passFourLeptonSkim( Event& );
 bool passFakeRateSkim( Event& );
 bool passSkim( Event&, const std::string& skimCondition );
 
+// initialize partial reading of only the branches needed for a skim condition
+// (see TreeReader::initPartialRead);
+// returns false if partial reading is not useful for this skim condition (e.g. noskim)
+bool initSkimPartialRead( TreeReader&, const std::string& skimCondition );
+
 #endif
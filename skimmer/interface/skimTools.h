@@ -0,0 +1,38 @@
+/*
+Tools shared by the skimmer executables (skimmer.cc and multiSkimmer.cc).
+*/
+
+
+#ifndef skimTools_H
+#define skimTools_H
+
+//include c++ library classes
+#include <string>
+#include <functional>
+
+//include ROOT classes
+#include "TTree.h"
+
+//include other parts of framework
+#include "../../TreeReader/interface/TreeReader.h"
+
+// name of the skimmed output file corresponding to an input file
+std::string skimOutputFilePath( const std::string& pathToFile, const std::string& outputDirectory );
+
+// loop over all entries of the current tree of a TreeReader and apply the skim selection;
+// passAction is called for each passing entry (at which point the full entry is read).
+// note: skimMode can be "default" (build the full event for each entry)
+//       or "twostage" (first read only the branches needed for the skim selection,
+//       and read the full entry only for entries that pass the selection).
+// returns the number of passing entries.
+long unsigned skimEntries( TreeReader&, const std::string& skimCondition, 
+			   const std::string& skimMode,
+			   const std::function< void( long unsigned ) >& passAction );
+
+// make a skimmed output file for the current sample of a TreeReader:
+// the histograms of the input file are copied, an output tree is created,
+// and fillTree is called to fill it.
+void writeSkimmedFile( TreeReader&, const std::string& outputFilePath,
+		       const std::function< void( TTree* ) >& fillTree );
+
+#endif
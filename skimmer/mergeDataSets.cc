@@ -16,22 +16,32 @@ Executable C++ file that calls the function mergeAndRemoveOverlap from the frame
 int main( int argc, char* argv[] ){
     std::cerr << "###starting###" << std::endl;
     
-    if( argc < 4 ){
+    // parse arguments
+    // (the memory budget is an optional argument of the form --memorybudget=<MB>)
+    std::vector< std::string > argvStr;
+    double memoryBudget = 0;
+    const std::string memoryBudgetKey = "--memorybudget=";
+    for(int i=0; i<argc; i++){
+	std::string arg( argv[i] );
+	if( arg.compare( 0, memoryBudgetKey.size(), memoryBudgetKey ) == 0 ){
+	    memoryBudget = std::stod( arg.substr( memoryBudgetKey.size() ) );
+	} else {
+	    argvStr.push_back( arg );
+	}
+    }
+
+    if( argvStr.size() < 4 ){
         std::cerr << "ERROR: need more arguments to run: " << std::endl;
         std::cerr << " - output file name" << std::endl;
 	std::cerr << " - at least two input files" << std::endl;
 	std::cerr << "(similar command line structure as hadd)" << std::endl;
+	std::cerr << "optional: --memorybudget=<maximum memory in MB for overlap removal>" << std::endl;
         return -1;
     }
     
-    // parse arguments
-    std::vector< std::string > argvStr( &argv[0], &argv[0] + argc );
     std::string& output_file_path = argvStr[1];
-    std::vector<std::string> input_files;
-    for(int i=2; i<argc; i++){
-	input_files.push_back(argvStr[i]);
-    }
+    std::vector<std::string> input_files( argvStr.begin() + 2, argvStr.end() );
 
-    mergeAndRemoveOverlap(input_files, output_file_path, false);
+    mergeAndRemoveOverlap(input_files, output_file_path, false, memoryBudget);
     std::cerr << "###done###" << std::endl;
 }
@@ -15,10 +15,18 @@ if __name__=='__main__':
 	print('ERROR: need at least three command line arguments:')
 	print('- target file')
 	print('- at least two files to merge')
+	print('- optional: memorybudget=<maximum memory in MB for overlap removal>')
 	sys.exit()
 
-    targetfile = sys.argv[1]
-    inputfiles = sys.argv[2:]
+    # (the memory budget can be given anywhere on the command line)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('memorybudget=')]
+    memorybudget = None
+    for arg in sys.argv[1:]:
+	if arg.startswith('memorybudget='): memorybudget = float(arg.split('=')[1])
+    targetfile = args[0]
+    inputfiles = args[1:]
+    if len(inputfiles)<2:
+	raise Exception('ERROR: need at least two files to merge.')
     exe = './mergeDataSets'
     
     # check if input files exist
@@ -39,6 +47,8 @@ if __name__=='__main__':
     print('will merge the following files:')
     for f in inputfiles: print('- {}'.format(f))
     print('into the target file {}'.format(targetfile))
+    if memorybudget is not None:
+	print('with a memory budget of {} MB for overlap removal'.format(memorybudget))
     print('continue? (y/n)')
     go = raw_input()
     if go != 'y': sys.exit()
@@ -46,7 +56,11 @@ if __name__=='__main__':
     # make the command
     cmd = '{} {}'.format(exe,targetfile)
     for f in inputfiles: cmd += ' {}'.format(f)
+    if memorybudget is not None: cmd += ' --memorybudget={}'.format(memorybudget)
 
     # submit the command
+    # (request the memory budget on top of the default memory)
+    mem = 1024
+    if memorybudget is not None: mem += int(memorybudget)
     ct.submitCommandAsCondorJob( 'cjob_mergeDataSets', cmd, 
-				 cmssw_version=CMSSW_VERSION )
+				 cmssw_version=CMSSW_VERSION, mem=mem )
@@ -8,12 +8,15 @@ sys.path.append(os.path.abspath('../jobSubmission'))
 import condorTools as ct
 from jobSettings import CMSSW_VERSION
 import argparse
+from fileListing import listDirectory
 
 if __name__=='__main__':
 
   # parse arguments
   parser = argparse.ArgumentParser('Merge datasets for trigger efficiency measurement')
   parser.add_argument('--inputdir', required=True, type=os.path.abspath)
+  parser.add_argument('--memorybudget', default=None, type=float,
+    help='Maximum memory (in MB) for overlap removal (see mergeAndRemoveOverlap)')
   args = parser.parse_args()
 
   # print arguments
@@ -31,7 +34,7 @@ if __name__=='__main__':
 
   # make merging dict
   mergedict = {}
-  for f in os.listdir(args.inputdir):
+  for f in listDirectory(args.inputdir):
     if f[-5:]!='.root': continue
     (dataset,version) = f.split('_',1)
     merged = '_'.join(['Merged',version])
@@ -53,6 +56,10 @@ if __name__=='__main__':
   for outputfile, inputfiles in mergedict.items():
     cmd = '{} {}'.format(exe,os.path.join(args.inputdir,outputfile))
     for f in inputfiles: cmd += ' {}'.format(f)
+    if args.memorybudget is not None: cmd += ' --memorybudget={}'.format(args.memorybudget)
     # submit the command
+    # (request the memory budget on top of the default memory)
+    mem = 1024
+    if args.memorybudget is not None: mem += int(args.memorybudget)
     ct.submitCommandAsCondorJob( 'cjob_mergeDataSetsTrigger', cmd,
-                                  cmssw_version=CMSSW_VERSION ) 
+                                  cmssw_version=CMSSW_VERSION, mem=mem ) 
@@ -3,7 +3,9 @@
 #########################################
 # note: this functionality is supposed to be run on the output of skimTuples.py 
 #       or skimTuplesFromList.py (important to extract sample name from folder name)
-# note: the merging is done using simple hadd; it results in one file per sample / primary dataset.
+# note: the merging is done using hadd; it results in one file per sample / primary dataset.
+#       by default, the files of each sample are merged as a parallel tree of hadd commands
+#       (see treeMerger.py), use --mergemode hadd for a single (serial) hadd command per sample.
 #       for merging primary datasets, a more involved procedure should be applied
 #	(see mergeAndRemoveOverlap)
 
@@ -15,9 +17,10 @@ import argparse
 
 # import other parts of code 
 from jobSubmission import submitQsubJob, initializeJobScript
-from fileListing import walkLimitedDepth, listSampleDirectories
+from fileListing import walkLimitedDepth, listSampleDirectories, listDirectory
 sys.path.append(os.path.abspath('../jobSubmission'))
 import condorTools as ct
+import executorTools as et
 from jobSettings import CMSSW_VERSION
 
 
@@ -69,8 +72,13 @@ if __name__ == '__main__':
   parser.add_argument('--inputdir', required=True, type=os.path.abspath)
   parser.add_argument('--outputdir', required=True, type=os.path.abspath)
   parser.add_argument('--include_recovery', default=False )
-  parser.add_argument('--runmode', default='condor', choices=['condor','local'])
+  parser.add_argument('--runmode', default='condor', choices=['condor','local','local-parallel'])
   parser.add_argument('--searchkey', default=None)
+  parser.add_argument('--mergemode', default='tree', choices=['tree','hadd'])
+  parser.add_argument('--groupsize', default=10, type=int,
+    help='Number of files per hadd command (only for mergemode tree)')
+  parser.add_argument('--nworkers', default=4, type=int,
+    help='Number of parallel hadd commands per sample (only for mergemode tree)')
   args = parser.parse_args()
 
   # print arguments
@@ -88,7 +96,7 @@ if __name__ == '__main__':
   mergedict = {}
   # loop over all directories in the provided top directory
   #for sample_directory in listSkimmedSampleDirectories( args.inputdir ):
-  for sample_directory in os.listdir( args.inputdir ):
+  for sample_directory in listDirectory( args.inputdir ):
     # check if this sample should be taken into account
     if args.searchkey is not None:
       if not fnmatch.fnmatch(sample_directory,args.searchkey): continue
@@ -112,12 +120,22 @@ if __name__ == '__main__':
   if go!='y': sys.exit()
 
   # continue with the submission
+  cmds = []
   for outputfile, inputdirs in mergedict.items():
-    cmd = 'hadd'
-    cmd += ' {}'.format(outputfile)
-    for inputdir in inputdirs: cmd += ' {}'.format(os.path.join(inputdir,'*.root'))
+    if args.mergemode=='hadd':
+      cmd = 'hadd'
+      cmd += ' {}'.format(outputfile)
+      for inputdir in inputdirs: cmd += ' {}'.format(os.path.join(inputdir,'*.root'))
+    else:
+      cmd = 'python treeMerger.py'
+      cmd += ' --outputfile {}'.format(outputfile)
+      cmd += ' --inputdirs {}'.format(' '.join(inputdirs))
+      cmd += ' --groupsize {} --nworkers {}'.format(args.groupsize, args.nworkers)
     outputdir = os.path.dirname(outputfile)
     if not os.path.exists(outputdir): os.makedirs(outputdir)
     if args.runmode=='local': os.system(cmd)
-    elif args.runmode=='condor':
-      ct.submitCommandAsCondorJob('cjob_mergeTuples', cmd, cmssw_version=CMSSW_VERSION)
+    else: cmds.append(cmd)
+  if len(cmds)>0:
+    cpus = args.nworkers if args.mergemode=='tree' else 1
+    et.submitCommandsAsJobs('cjob_mergeTuples', [[cmd] for cmd in cmds],
+      runmode=args.runmode, cmssw_version=CMSSW_VERSION, cpus=cpus)
@@ -0,0 +1,199 @@
+/*
+Skim multiple input files in a single process.
+The skim selection is run concurrently on a number of worker threads (each with its own TreeReader);
+the list of passing entries of each finished file is passed through a bounded queue
+to a single writer (the main thread), which writes the skimmed output file.
+The output files are identical to the ones produced by the skimmer executable (see skimmer.cc).
+A machine-readable summary (json) with the number of entries and passing entries per file is written at the end.
+*/
+
+//include c++ library classes 
+#include <string>
+#include <vector>
+#include <exception>
+#include <iostream>
+#include <fstream>
+#include <sstream>
+#include <thread>
+#include <atomic>
+#include <algorithm>
+
+//include ROOT classes 
+#include "TROOT.h"
+#include "TTree.h"
+
+//include other parts of framework
+#include "../TreeReader/interface/TreeReader.h"
+#include "interface/skimTools.h"
+#include "interface/BoundedQueue.h"
+
+
+struct SkimResult {
+    std::string inputFilePath;
+    std::string outputFilePath;
+    std::string status = "ok";
+    long unsigned nentries = 0;
+    long unsigned npass = 0;
+    std::vector< long unsigned > passingEntries;
+};
+
+
+SkimResult selectFile( const std::string& pathToFile, const std::string& outputDirectory,
+		       const std::string& skimCondition, const std::string& skimMode ){
+    // run the skim selection on a file and collect the passing entries
+    SkimResult result;
+    result.inputFilePath = pathToFile;
+    result.outputFilePath = skimOutputFilePath( pathToFile, outputDirectory );
+
+    // initialize TreeReader, input files might be corrupt in rare cases
+    TreeReader treeReader;
+    try{
+        treeReader.initSampleFromFile( pathToFile );
+    } catch( std::domain_error& ){
+        std::cerr << "Can not read file " << pathToFile << ". Skipping it." << std::endl;
+	result.status = "unreadable";
+	return result;
+    }
+    result.nentries = treeReader.numberOfEntries();
+    result.npass = skimEntries( treeReader, skimCondition, skimMode,
+	[&result]( long unsigned entry ){ result.passingEntries.push_back( entry ); } );
+    return result;
+}
+
+
+void writeFile( const SkimResult& result ){
+    // write the skimmed output file for a file processed by selectFile
+    TreeReader treeReader;
+    treeReader.initSampleFromFile( result.inputFilePath );
+    writeSkimmedFile( treeReader, result.outputFilePath,
+	[&]( TTree* outputTreePtr ){
+	    for( long unsigned entry : result.passingEntries ){
+		treeReader.GetEntry( entry );
+		outputTreePtr->Fill();
+	    }
+	} );
+}
+
+
+std::string jsonString( const std::string& s ){
+    // format a string as a json string
+    std::string res = "\"";
+    for( char c : s ){
+	if( c == '"' || c == '\\' ) res += '\\';
+	res += c;
+    }
+    return res + "\"";
+}
+
+
+void writeSummary( const std::string& summaryFilePath, const std::vector< SkimResult >& results ){
+    std::ofstream summaryFile( summaryFilePath );
+    summaryFile << "[\n";
+    for( std::vector< SkimResult >::size_type i = 0; i < results.size(); ++i ){
+	const SkimResult& result = results[i];
+	summaryFile << "  {\"input\": " << jsonString( result.inputFilePath );
+	summaryFile << ", \"output\": " << jsonString( result.outputFilePath );
+	summaryFile << ", \"status\": " << jsonString( result.status );
+	summaryFile << ", \"nentries\": " << result.nentries;
+	summaryFile << ", \"npass\": " << result.npass << "}";
+	summaryFile << ( ( i + 1 < results.size() ) ? ",\n" : "\n" );
+    }
+    summaryFile << "]\n";
+    summaryFile.close();
+}
+
+
+bool skimFiles( const std::vector< std::string >& inputFiles, const std::string& outputDirectory,
+		const std::string& skimCondition, const std::string& skimMode,
+		const unsigned numberOfThreads, const std::string& summaryFilePath ){
+    // skim a list of files using a number of worker threads
+    // returns false if an error occurred for any of the files
+
+    // note: thread safety is needed also for a single worker thread,
+    //       since the writer reads the input files concurrently in the main thread
+    ROOT::EnableThreadSafety();
+    unsigned nThreads = std::max( 1u, std::min( numberOfThreads, unsigned( inputFiles.size() ) ) );
+
+    // worker threads: pick up the next file, run the selection and put the result in the queue
+    // note: the queue holds at most one result per thread, to limit the memory usage
+    //       in case the writer is slower than the workers
+    BoundedQueue< SkimResult > queue( nThreads );
+    std::atomic< std::size_t > nextFile( 0 );
+    auto worker = [&](){
+	std::size_t index;
+	while( ( index = nextFile++ ) < inputFiles.size() ){
+	    SkimResult result;
+	    try{
+		result = selectFile( inputFiles[index], outputDirectory, skimCondition, skimMode );
+	    } catch( std::exception& e ){
+		result.inputFilePath = inputFiles[index];
+		result.status = std::string( "error: " ) + e.what();
+	    }
+	    queue.push( std::move( result ) );
+	}
+    };
+    std::vector< std::thread > threads;
+    for( unsigned i = 0; i < nThreads; ++i ){
+	threads.emplace_back( worker );
+    }
+
+    // writer: write the output files in the order in which they are finished
+    std::vector< SkimResult > results;
+    bool success = true;
+    for( std::size_t i = 0; i < inputFiles.size(); ++i ){
+	SkimResult result = queue.pop();
+	if( result.status == "ok" ){
+	    try{
+		writeFile( result );
+	    } catch( std::exception& e ){
+		result.status = std::string( "error: " ) + e.what();
+	    }
+	}
+	if( result.status == "ok" ){
+	    std::cout << "skimmed " << result.inputFilePath << std::endl;
+	    std::cout << "number of entries: " << result.nentries << std::endl;
+	    std::cout << "number of passing entries: " << result.npass << std::endl;
+	} else if( result.status != "unreadable" ){
+	    std::cerr << "ERROR while skimming " << result.inputFilePath << ": ";
+	    std::cerr << result.status << std::endl;
+	    success = false;
+	}
+	result.passingEntries.clear();
+	result.passingEntries.shrink_to_fit();
+	results.push_back( std::move( result ) );
+    }
+    for( auto& thread : threads ){
+	thread.join();
+    }
+
+    if( !summaryFilePath.empty() ) writeSummary( summaryFilePath, results );
+    return success;
+}
+
+
+int main( int argc, char* argv[] ){
+    std::cerr << "###starting###" << std::endl;
+
+    if( argc < 7 ){
+        std::cerr << "multiSkimmer requires at least six arguments to run : " << std::endl;
+	std::cerr << "output_directory, skim_condition, skim_mode (default or twostage),";
+	std::cerr << " number_of_threads, summary_file (use 'none' to not write a summary),";
+	std::cerr << " input_file_path(s)" << std::endl;
+        return -1;
+    }
+
+    std::vector< std::string > argvStr( &argv[0], &argv[0] + argc );
+
+    std::string& output_directory = argvStr[1];
+    std::string& skimCondition = argvStr[2];
+    std::string& skimMode = argvStr[3];
+    unsigned numberOfThreads = std::stoul( argvStr[4] );
+    std::string summaryFile = ( argvStr[5] == "none" ) ? "" : argvStr[5];
+    std::vector< std::string > inputFiles( argvStr.begin() + 6, argvStr.end() );
+    bool success = skimFiles( inputFiles, output_directory, skimCondition, skimMode,
+			      numberOfThreads, summaryFile );
+    if( !success ) return 1;
+
+    std::cerr << "###done###" << std::endl;
+    return 0;
+}
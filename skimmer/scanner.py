@@ -4,9 +4,10 @@
 
 import sys
 import os
-from fileListing import listParts
+from fileListing import listParts, listDirectory
 sys.path.append(os.path.abspath('../jobSubmission'))
 import condorTools as ct
+import executorTools as et
 from jobSettings import CMSSW_VERSION
 
 if __name__=="__main__":
@@ -14,6 +15,7 @@ if __name__=="__main__":
     sampledir = sys.argv[1]
     nfilesperjob = int(sys.argv[2])
     runmode = 'condor'
+    # (choose 'condor', 'local' or 'local-parallel')
 
     # check if executable exists
     exe = './scanner'
@@ -25,7 +27,7 @@ if __name__=="__main__":
 	raise Exception('ERROR: input directory {} does not exist.'.format(sampledir))
 
     # find all root files in sampledir
-    rfiles = [os.path.join(sampledir,f) for f in os.listdir(sampledir) if f[-5:]=='.root']
+    rfiles = [os.path.join(sampledir,f) for f in listDirectory(sampledir) if f[-5:]=='.root']
     if len(rfiles)==0:
 	raise Exception('ERROR: no root files found in {}.'.format(sampledir))
    
@@ -34,6 +36,7 @@ if __name__=="__main__":
 
     # submit jobs
     cwd = os.getcwd()
+    commandsets = []
     for chunk in chunks:
         commands = []
         commands.append( 'cd {}'.format(cwd) )
@@ -43,7 +46,8 @@ if __name__=="__main__":
         # run locally (for testing and debugging)
         if runmode=='local':
 	    for cmd in commands: os.system(cmd)
-        # or submit condor job
-        if runmode=='condor': 
-	    ct.submitCommandsAsCondorJob( 'cjob_scanner', commands,
-					  cmssw_version=CMSSW_VERSION )
+        # or submit condor job or run in local process pool (see below)
+        if runmode in ['condor','local-parallel']: commandsets.append(commands)
+    if len(commandsets)>0:
+	et.submitCommandsAsJobs( 'cjob_scanner', commandsets, runmode=runmode,
+				 cmssw_version=CMSSW_VERSION )
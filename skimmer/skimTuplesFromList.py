@@ -13,16 +13,27 @@
 # - optional: ntuple version (e.g. singlelepton_MC_2016_v1) 
 #             (overwrites ntuple version that may be present in the sample list!)
 # - optional: files per job
+# - optional: events per job or size per job (in MB)
+#             (overwrites files per job, files are packed into jobs with balanced workload,
+#             see chunkPlanner.py)
 # - optional: wall time per job
-# - optional: run mode (condor, qsub or local)
+# - optional: run mode (condor, qsub, local or local-parallel)
+# - optional: skim mode (default or twostage, see skimmer.cc)
+# - optional: number of threads
+#             (if specified, all files in a job are skimmed in a single process
+#             by the multiSkimmer executable, using this number of threads;
+#             a json summary per job is written in the skimSummaries subdirectory
+#             of the output directory)
 
 import sys
 import os
-from fileListing import listSampleDirectories, listSampleFiles, listParts
+from fileListing import listSampleDirectories, listSampleFilesParallel
+from chunkPlanner import planChunks, getCacheFileName
 from skimTuples import yearIdentifierFromPath
 from jobSubmission import initializeJobScript, submitQsubJob
 sys.path.append(os.path.abspath('../jobSubmission'))
 import condorTools as ct
+import executorTools as et
 from jobSettings import CMSSW_VERSION
 sys.path.append(os.path.abspath('../Tools/python'))
 from samplelisttools import readsamplelist
@@ -37,8 +48,12 @@ if len(sys.argv) < 5:
     print('  - skim condition')
     print('  - version = ntuple version [optional]')
     print('  - files per job = number of files per job [optional]')
+    print('  - eventsperjob = number of events per job [optional]')
+    print('  - sizeperjob = size of input files per job in MB [optional]')
     print('  - walltime = maximum wall time [optional]')
-    print('  - runmode = run mode (condor, qsub or local) [optional]')
+    print('  - runmode = run mode (condor, qsub, local or local-parallel) [optional]')
+    print('  - skimmode = skim mode (default or twostage) [optional]')
+    print('  - threads = number of threads per job (uses multiSkimmer) [optional]')
     sys.exit()
 
 # read required command line args
@@ -50,17 +65,28 @@ skim_condition = sys.argv[4]
 # read optional command line args
 version_name = None
 files_per_job = 50
+events_per_job = None
+size_per_job = None
 wall_time = '24:00:00'
 runmode = 'condor'
+skim_mode = 'default'
+nthreads = None
 if len(sys.argv)>5:
     for sysarg in sys.argv[5:]:
         sysarg = sysarg.split('=')
         if sysarg[0]=='filesperjob': files_per_job = int(sysarg[1])
+        elif sysarg[0]=='eventsperjob': events_per_job = int(sysarg[1])
+        elif sysarg[0]=='sizeperjob': size_per_job = float(sysarg[1])
         elif sysarg[0]=='walltime': wall_time = sysarg[1]
         elif sysarg[0]=='version': version_name = sysarg[1]
 	elif sysarg[0]=='runmode': runmode = sysarg[1]
+	elif sysarg[0]=='skimmode': skim_mode = sysarg[1]
+	elif sysarg[0]=='threads': nthreads = int(sysarg[1])
         else: 
-            raise Exception('ERROR: optional argument '+sysargi[0]+' not recognized!')
+            raise Exception('ERROR: optional argument '+sysarg[0]+' not recognized!')
+if( events_per_job is not None and size_per_job is not None ):
+    raise Exception('ERROR: eventsperjob and sizeperjob can not be specified simultaneously.')
+if( events_per_job is not None or size_per_job is not None ): files_per_job = None
 
 # print command line args for checking
 print('Running with the follwing options:')
@@ -70,11 +96,15 @@ print('  - output directory: {}'.format(output_directory_base))
 print('  - skim condition: {}'.format(skim_condition))
 print('  - version: {}'.format(version_name))
 print('  - files per job: {}'.format(files_per_job))
+print('  - events per job: {}'.format(events_per_job))
+print('  - size per job (MB): {}'.format(size_per_job))
 print('  - walltime: {}'.format(wall_time))
 print('  - runmode: {}'.format(runmode))
+print('  - skim mode: {}'.format(skim_mode))
+print('  - threads: {}'.format(nthreads))
 
 # check if executable exists
-exe = './skimmer'
+exe = './skimmer' if nthreads is None else './multiSkimmer'
 if not os.path.exists(exe):
     raise Exception('ERROR: executable {} does not exist.'.format(exe))
 
@@ -93,6 +123,16 @@ if skim_condition not in allowed_skim_conditions:
     raise Exception('ERROR: skim condition {} not valid. Options are {}'.format(
 			skim_condition, allowed_skim_conditions))
 
+# check skim mode
+allowed_skim_modes = ['default', 'twostage']
+if skim_mode not in allowed_skim_modes:
+    raise Exception('ERROR: skim mode {} not valid. Options are {}'.format(
+			skim_mode, allowed_skim_modes))
+
+# check number of threads
+if( nthreads is not None and nthreads<1 ):
+    raise Exception('ERROR: number of threads must be at least 1, found {}'.format(nthreads))
+
 # check if output directory is empty and ask permission to clean it
 if os.path.exists(output_directory_base):
     if not len(os.listdir(output_directory_base))==0:
@@ -154,14 +194,21 @@ print('Found {} valid sample directories:'.format(len(sample_directories)))
 for directory,subdirectory in zip(sample_directories,sample_sub_directories):
     print('  - {}/{}'.format(directory,subdirectory))
 
-# determine the number of files for each sample
-print('Finding number of files to process...')
-nfiles = []
-for sample_directory, sub_directory in zip(sample_directories, sample_sub_directories):
-    nfiles.append( len(list(listSampleFiles(os.path.join(sample_directory,sub_directory)))) )
-nfiles = sum(nfiles)
-njobs = max(1,int(nfiles/files_per_job))
-print('Found a total of {} files, which will result in approximately {} jobs.'.format(
+# find the files for each sample and split them into jobs
+print('Finding files to process and splitting them into jobs...')
+# (the sample directories are listed in parallel, see fileListing.py)
+sample_files = listSampleFilesParallel( [os.path.join(sample_directory,sub_directory)
+		for sample_directory, sub_directory in zip(sample_directories, sample_sub_directories)] )
+sample_chunks = []
+itlist = zip(sample_directories, sample_sub_directories, sample_files)
+for sample_directory, sub_directory, root_files in itlist:
+    sample_chunks.append( planChunks( root_files, files_per_job=files_per_job,
+	events_per_job=events_per_job,
+	bytes_per_job=(size_per_job*1e6 if size_per_job is not None else None),
+	cachefile=getCacheFileName(sample_directory, sub_directory) ) )
+nfiles = sum([len(root_files) for root_files in sample_files])
+njobs = sum([len(chunks) for chunks in sample_chunks])
+print('Found a total of {} files, which will result in {} jobs.'.format(
 	nfiles,njobs))
 print('Continue with the submission? (y/n)')
 go = raw_input()
@@ -178,27 +225,38 @@ for directory, subdirectory in zip(sample_directories, sample_sub_directories):
     if not os.path.exists( output_directory ):
         os.makedirs( output_directory )
     sample_output_directories.append( output_directory )
+summary_directory = os.path.join( output_directory_base, 'skimSummaries' )
+if( nthreads is not None and not os.path.exists(summary_directory) ):
+    os.makedirs( summary_directory )
 
 # loop over samples and submit skimming jobs
 print('Starting submission...')
 cwd = os.getcwd()
-itlist = zip(sample_directories, sample_sub_directories, sample_output_directories)
-for sample_directory, sub_directory, output_directory in itlist:
-    #find the files to process for this sample 
-    root_files = list( listSampleFiles( os.path.join( sample_directory, sub_directory ) ) )
+commandsets = []
+itlist = zip(sample_directories, sample_sub_directories, sample_output_directories,
+	     sample_files, sample_chunks)
+for sample_directory, sub_directory, output_directory, root_files, chunks in itlist:
     print('----------------------------')
     print('Now processing the following sample:')
     print('  {}'.format(sample_directory))
     print('  {}'.format(sub_directory))
     print('  Number of root files: {}'.format(len(root_files)))
-    # split files in lists of files_per_job
-    chunks = list(listParts( root_files, files_per_job ))
-    for chunk in chunks:
+    print('  Number of jobs: {}'.format(len(chunks)))
+    for i, chunk in enumerate(chunks):
 	# make the commands to execute for this chunk
 	commands = []
 	commands.append( 'cd {}'.format(cwd) )
-	for f in chunk:
-	    command = './skimmer {} {} {}'.format(f,output_directory,skim_condition)
+	if nthreads is None:
+	    for f in chunk:
+		command = './skimmer {} {} {}'.format(f,output_directory,skim_condition)
+		if skim_mode!='default': command += ' {}'.format(skim_mode)
+		commands.append(command)
+	else:
+	    # (all files in the chunk in a single multithreaded process, see multiSkimmer.cc)
+	    summary_file = os.path.join( summary_directory, '{}_{}.json'.format(
+			    os.path.basename(output_directory), i) )
+	    command = './multiSkimmer {} {} {} {} {} {}'.format(output_directory, skim_condition,
+			skim_mode, nthreads, summary_file, ' '.join(chunk))
 	    commands.append(command)
         # submission via qsub or local
 	if( runmode=='qsub' or runmode=='local' ):
@@ -212,5 +270,18 @@ for sample_directory, sub_directory, output_directory in itlist:
 	    # case of local (mainly intended for testing and debugging)
 	    if runmode=='local': os.system('bash '+script_name)
 	# submission via condor
-	if runmode=='condor': ct.submitCommandsAsCondorJob( 'cjob_skimTuplesFromList', commands,
-				    cmssw_version=CMSSW_VERSION )
+	# collect commands for submission via condor or running in a local process pool
+	# (see below)
+	if runmode in ['condor','local-parallel']: commandsets.append(commands)
+
+# submit all condor jobs in a single submission
+# (request one cpu per thread in case of multithreaded skimming)
+cpus = nthreads if nthreads is not None else 1
+if runmode=='condor':
+    et.submitCommandsAsJobs( 'cjob_skimTuplesFromList', commandsets, runmode='condor-bulk',
+			     cmssw_version=CMSSW_VERSION, cpus=cpus )
+
+# run all jobs in a local process pool
+if runmode=='local-parallel':
+    et.submitCommandsAsJobs( 'cjob_skimTuplesFromList', commandsets, runmode=runmode,
+			     cmssw_version=CMSSW_VERSION, cpus=cpus )
@@ -2,6 +2,8 @@
 
 //include c++ library classes
 #include <functional>
+#include <vector>
+#include <string>
 
 
 bool passLeptonicSkim( Event& event, LeptonCollection::size_type numberOfLeptons ){
@@ -61,3 +63,38 @@ bool passSkim( Event& event, const std::string& skimCondition ){
         return (it->second)(event);
     }
 }
+
+
+bool initSkimPartialRead( TreeReader& treeReader, const std::string& skimCondition ){
+    // branches needed to build the lepton collection and apply the loose lepton selection
+    // note: these should be kept in sync with the variables read in the lepton classes
+    //       (objects/src/Lepton.cc, LightLepton.cc, Muon.cc, Electron.cc, Tau.cc)
+    //       and the variables used in the skim selections above!
+    static const std::vector< std::string > leptonBranches = {
+	"_nL", "_nMu", "_nEle", "_nLight", "_nTau",
+	"_lPt", "_lE", "_lEta", "_lPhi", "_lFlavor", "_lCharge",
+	"_lElectron", "_lMuon", "_lPOG", "_lIsPrompt", "_lMatch", "_lMomPdgId", "_lProvenance",
+	"_dxy", "_dz", "_3dIP", "_relIso", "_miniIso", "_ptRel", "_ptRatio",
+	"_closestJet", "_selectedTrackMult", "_leptonMva",
+	"_tau", "_decayModeFinding"
+    };
+    // branches needed to build the jet collection and apply the good jet selection
+    static const std::vector< std::string > jetBranches = { "_nJets", "_jet" };
+    // split JEC variations are not needed for the skim selections
+    static const std::vector< std::string > antiIdentifiers = { "JECSources", "JECGrouped" };
+
+    std::vector< std::string > branches;
+    if( skimCondition == "noskim" ){
+	return false;
+    } else if( skimCondition == "fakerate" ){
+	branches = leptonBranches;
+	branches.insert( branches.end(), jetBranches.cbegin(), jetBranches.cend() );
+    } else if( skimCondition == "singlelepton" || skimCondition == "dilepton"
+		|| skimCondition == "trilepton" || skimCondition == "fourlepton" ){
+	branches = leptonBranches;
+    } else {
+	throw std::invalid_argument( "unknown skim condition " + skimCondition );
+    }
+    treeReader.initPartialRead( branches, antiIdentifiers );
+    return true;
+}
@@ -0,0 +1,98 @@
+#include "../interface/skimTools.h"
+
+//include c++ library classes
+#include <memory>
+#include <vector>
+#include <stdexcept>
+
+//include ROOT classes
+#include "TFile.h"
+#include "TH1.h"
+
+//include other parts of framework
+#include "../../Tools/interface/stringTools.h"
+#include "../../Event/interface/Event.h"
+#include "../interface/skimSelections.h"
+
+
+std::string skimOutputFilePath( const std::string& pathToFile, const std::string& outputDirectory ){
+    // make file names unique by modifying the full path, 
+    // but shorten slightly to avoid errors with too long file names for the OS
+    std::string outputFileName = stringTools::split( pathToFile, "/heavyNeutrino/" ).back();
+    outputFileName = stringTools::removeOccurencesOf( outputFileName, "/" );
+    return stringTools::formatDirectoryName( outputDirectory ) + outputFileName;
+}
+
+
+long unsigned skimEntries( TreeReader& treeReader, const std::string& skimCondition,
+			   const std::string& skimMode,
+			   const std::function< void( long unsigned ) >& passAction ){
+
+    // initialize partial reading of entries for the first stage
+    bool twoStage = false;
+    if( skimMode == "twostage" ){
+	twoStage = initSkimPartialRead( treeReader, skimCondition );
+    } else if( skimMode != "default" ){
+	throw std::invalid_argument( "unknown skim mode " + skimMode );
+    }
+
+    long unsigned nentries = treeReader.numberOfEntries();
+    long unsigned npass = 0;
+    for( long unsigned entry = 0; entry < nentries; ++entry ){
+
+	if( twoStage ){
+
+	    // build event from the branches needed for the selection only
+	    Event event = treeReader.buildPartialEvent( entry );
+
+	    // apply event selection
+	    if( !passSkim( event, skimCondition ) ) continue;
+
+	    // read all branches for passing entries
+	    treeReader.GetEntry( entry );
+
+	} else {
+
+	    // build event
+	    Event event = treeReader.buildEvent( entry, true, true, false, false, true );
+
+	    // apply event selection
+	    if( !passSkim( event, skimCondition ) ) continue;
+	}
+
+	npass++;
+	passAction( entry );
+    }
+    return npass;
+}
+
+
+void writeSkimmedFile( TreeReader& treeReader, const std::string& outputFilePath,
+		       const std::function< void( TTree* ) >& fillTree ){
+
+    // make output ROOT file
+    TFile* outputFilePtr = TFile::Open( outputFilePath.c_str() , "RECREATE" );
+    outputFilePtr->mkdir( "blackJackAndHookers" );
+    outputFilePtr->cd( "blackJackAndHookers" );
+
+    // read histograms from input file and write them to the new file
+    std::vector< std::shared_ptr< TH1 > > histVector = treeReader.getHistogramsFromCurrentFile();
+    for( const auto& histPtr : histVector ){
+        histPtr->Write();
+    }
+
+    // make output tree
+    std::shared_ptr< TTree > outputTreePtr( std::make_shared< TTree >( 
+	"blackJackAndHookersTree","blackJackAndHookersTree" ) );
+    treeReader.setOutputTree( outputTreePtr.get(), 
+      true, true, true, true, true, true, true, true );
+
+    // fill new tree
+    fillTree( outputTreePtr.get() );
+
+    // write new tree
+    outputTreePtr->Write( "",  BIT(2) );
+
+    // close output file
+    outputFilePtr->Close();
+}
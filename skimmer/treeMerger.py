@@ -0,0 +1,184 @@
+#################################################
+# merge ntuples as a parallel tree of hadd jobs #
+#################################################
+
+# general use:
+# instead of merging all files of a sample in a single (serial) hadd command,
+# the files are merged as a tree reduction:
+# groups of K files are merged concurrently into intermediate files,
+# which are then merged again in groups of K, until a single file remains.
+# each merge is done by hadd, so the blackJackAndHookers directory
+# with its histograms and tree is kept as usual.
+# the number of entries in the tree of each merged file is verified
+# against the sum of the number of entries of its inputs.
+# the intermediate files and the state of the merging are kept in a work directory
+# (by default <output file>_mergework), so that in case of a partial failure,
+# the same command can be rerun and groups that were completed before are not redone.
+# the work directory is removed after successful completion.
+
+# command line arguments: see below
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+from chunkPlanner import getNEntries
+from fileListing import getFileCatalog
+
+
+def listRootFiles( inputdirs ):
+    ### list all root files in a list of directories (sorted, for reproducible grouping)
+    # note: the directory listings are retrieved from the file catalog (see fileListing.py)
+    files = []
+    for inputdir in inputdirs:
+        (_, _, dirfiles) = getFileCatalog().walk( inputdir, max_depth=0 )[0]
+        files += sorted([os.path.join(inputdir,f[0]) for f in dirfiles
+                         if f[0].endswith('.root')])
+    return files
+
+
+class TreeMerger(object):
+    ### merge a list of files into one file as a tree reduction
+
+    def __init__( self, inputfiles, outputfile, groupsize=10, nworkers=None, workdir=None ):
+        if groupsize<2:
+            raise Exception('ERROR in TreeMerger: group size must be at least 2.')
+        self.inputfiles = list(inputfiles)
+        self.outputfile = os.path.abspath(outputfile)
+        self.groupsize = groupsize
+        self.nworkers = nworkers if nworkers is not None else multiprocessing.cpu_count()
+        if workdir is None: workdir = os.path.splitext(self.outputfile)[0]+'_mergework'
+        self.workdir = os.path.abspath(workdir)
+        self.statefile = os.path.join(self.workdir, 'mergeState.json')
+        # state: number of entries per (input or merged) file,
+        # and the inputs of each completed merge
+        self.state = {'entries':{}, 'merged':{}}
+        if os.path.exists(self.statefile):
+            with open(self.statefile,'r') as f: self.state = json.load(f)
+
+    def saveState( self ):
+        ### write the state to the work directory (via a temporary file to avoid corruption)
+        tmpfile = self.statefile+'.tmp'
+        with open(tmpfile,'w') as f: json.dump(self.state, f)
+        os.rename(tmpfile, self.statefile)
+
+    def nEntries( self, filename ):
+        ### get the number of entries of a file (cached in the state)
+        if filename not in self.state['entries']:
+            self.state['entries'][filename] = getNEntries(filename)
+        return self.state['entries'][filename]
+
+    def isDone( self, group, outputfile ):
+        ### check if a group was merged before (with the same inputs)
+        return( self.state['merged'].get(outputfile,None)==group
+                and os.path.exists(outputfile) )
+
+    def mergeGroup( self, group, outputfile ):
+        ### merge a group of files with hadd and verify the number of entries
+        # returns None if successful, an error message otherwise
+        # (the output is written to a temporary file first,
+        #  so that an incomplete output is never taken as a completed merge)
+        tmpfile = os.path.splitext(outputfile)[0]+'_tmp.root'
+        with open(os.devnull,'w') as devnull:
+            ret = subprocess.call(['hadd','-f',tmpfile]+group, stdout=devnull)
+        if ret!=0:
+            return 'hadd exited with code {} for {}'.format(ret, outputfile)
+        nexpected = sum([self.state['entries'][f] for f in group])
+        nfound = getNEntries(tmpfile)
+        if nfound!=nexpected:
+            return 'merged file {} has {} entries while {} were expected'.format(
+                    outputfile, nfound, nexpected)
+        os.rename(tmpfile, outputfile)
+        return None
+
+    def run( self ):
+        ### run the merging
+        # returns True if successful, False otherwise
+        if len(self.inputfiles)==0:
+            raise Exception('ERROR in TreeMerger: no input files.')
+        if not os.path.exists(self.workdir): os.makedirs(self.workdir)
+        print('counting entries in {} input files...'.format(len(self.inputfiles)))
+        for f in self.inputfiles: self.nEntries(f)
+        self.saveState()
+        ntotal = sum([self.state['entries'][f] for f in self.inputfiles])
+        # special case of only one input file: copy it
+        if len(self.inputfiles)==1:
+            shutil.copy(self.inputfiles[0], self.outputfile)
+        files = self.inputfiles
+        level = 0
+        while len(files)>1:
+            level += 1
+            groups = [files[i:i+self.groupsize] for i in range(0,len(files),self.groupsize)]
+            # (the last level writes directly to the output file)
+            if len(groups)==1: outputs = [self.outputfile]
+            else: outputs = [os.path.join(self.workdir,'level{}_group{}.root'.format(level,i))
+                             for i in range(len(groups))]
+            todo = [(group,output) for group,output in zip(groups,outputs)
+                    if not self.isDone(group,output)]
+            print('merging level {}: {} groups ({} done before)'.format(
+                  level, len(groups), len(groups)-len(todo)))
+            if len(todo)>0:
+                pool = ThreadPool(processes=max(1,min(self.nworkers,len(todo))))
+                errors = pool.map(lambda args: self.mergeGroup(*args), todo, chunksize=1)
+                pool.close()
+                pool.join()
+                # update the state with the completed merges
+                for (group,output),error in zip(todo,errors):
+                    if error is not None:
+                        print('ERROR in TreeMerger: {}'.format(error))
+                        continue
+                    self.state['merged'][output] = group
+                    self.state['entries'][output] = sum([self.state['entries'][f]
+                                                        for f in group])
+                self.saveState()
+                if any([error is not None for error in errors]): return False
+            files = outputs
+        # final check and cleanup
+        nfound = getNEntries(self.outputfile)
+        if nfound!=ntotal:
+            print('ERROR in TreeMerger: output file {} has {} entries'.format(
+                  self.outputfile, nfound)+' while {} were expected'.format(ntotal))
+            return False
+        shutil.rmtree(self.workdir)
+        print('merged {} files into {} ({} entries)'.format(
+              len(self.inputfiles), self.outputfile, ntotal))
+        return True
+
+
+if __name__=='__main__':
+
+    # parse arguments
+    parser = argparse.ArgumentParser('Merge ntuples as a parallel tree of hadd jobs')
+    parser.add_argument('--outputfile', required=True, type=os.path.abspath)
+    parser.add_argument('--inputdirs', required=True, nargs='+', type=os.path.abspath,
+        help='Directories with files to merge (all .root files are used)')
+    parser.add_argument('--groupsize', default=10, type=int,
+        help='Number of files to merge in one hadd command')
+    parser.add_argument('--nworkers', default=None, type=int,
+        help='Number of hadd commands to run in parallel (default: number of cores)')
+    parser.add_argument('--workdir', default=None,
+        help='Directory for intermediate files and merging state'
+            +' (default: <outputfile>_mergework)')
+    args = parser.parse_args()
+
+    # print arguments
+    print('Running with following configuration:')
+    for arg in vars(args):
+        print('  - {}: {}'.format(arg,getattr(args,arg)))
+
+    # argument checks
+    for inputdir in args.inputdirs:
+        if not os.path.exists(inputdir):
+            raise Exception('ERROR: input directory {} does not exist.'.format(inputdir))
+
+    # do the merging
+    sys.stderr.write('###starting###\n')
+    merger = TreeMerger( listRootFiles(args.inputdirs), args.outputfile,
+                         groupsize=args.groupsize, nworkers=args.nworkers,
+                         workdir=args.workdir )
+    if not merger.run(): sys.exit(1)
+    sys.stderr.write('###done###\n')
@@ -0,0 +1,109 @@
+#include "../../Tools/interface/DenseModel.h"
+#include "../../Tools/interface/BatchedPredictor.h"
+
+//include c++ library classes 
+#include <cmath>
+#include <random>
+#include <sstream>
+#include <string>
+#include <vector>
+#include <stdexcept>
+
+
+//reference implementation of the model below
+double referencePrediction( const std::vector< double >& x ){
+    //dense layer with 3 inputs and 2 outputs and relu activation
+    double h0 = std::max( 0., 0.5*x[0] - 1.*x[1] + 2.*x[2] + 0.1 );
+    double h1 = std::max( 0., -0.3*x[0] + 0.7*x[1] + 0.2*x[2] - 0.2 );
+    //batch normalization
+    h0 = 2.*h0 - 1.;
+    h1 = 0.5*h1 + 1.;
+    //PReLU
+    h0 = ( h0 > 0 ) ? h0 : 0.25*h0;
+    h1 = ( h1 > 0 ) ? h1 : 0.5*h1;
+    //dense layer with sigmoid activation
+    return 1. / ( 1. + std::exp( -( 1.5*h0 - 0.5*h1 + 0.3 ) ) );
+}
+
+
+int main(){
+
+    std::stringstream modelStream;
+    modelStream << "densemodel 4\n";
+    modelStream << "dense 3 2 relu\n 0.5 -0.3\n -1. 0.7\n 2. 0.2\n 0.1 -0.2\n";
+    modelStream << "batchnorm 2\n 2. 0.5\n -1. 1.\n";
+    modelStream << "prelu 2\n 0.25 0.5\n";
+    modelStream << "dense 2 1 sigmoid\n 1.5\n -0.5\n 0.3\n";
+    DenseModel model( modelStream );
+    if( model.numberOfInputs() != 3 || model.numberOfOutputs() != 1 ){
+        throw std::runtime_error( "model has wrong number of inputs or outputs." );
+    }
+
+    //compare single and batched predictions to the reference
+    std::mt19937 rng( 42 );
+    std::uniform_real_distribution< double > dist( -3, 3 );
+    const std::vector< double >::size_type nRows = 1000;
+    std::vector< double > batchInputs;
+    for( std::vector< double >::size_type row = 0; row < nRows; ++row ){
+        std::vector< double > inputs = { dist( rng ), dist( rng ), dist( rng ) };
+        if( std::abs( model.predict( inputs ) - referencePrediction( inputs ) ) > 1e-12 ){
+            throw std::runtime_error( "prediction is " + std::to_string( model.predict( inputs ) ) + " while it should be " + std::to_string( referencePrediction( inputs ) ) + "." );
+        }
+        batchInputs.insert( batchInputs.end(), inputs.cbegin(), inputs.cend() );
+    }
+    std::vector< double > batchOutputs = model.predictBatch( batchInputs, nRows );
+    for( std::vector< double >::size_type row = 0; row < nRows; ++row ){
+        std::vector< double > inputs( batchInputs.cbegin() + 3*row, batchInputs.cbegin() + 3*row + 3 );
+        if( batchOutputs[ row ] != model.predict( inputs ) ){
+            throw std::runtime_error( "batched prediction is not equal to single prediction." );
+        }
+    }
+
+    //buffered evaluation, with a batch size that does not divide the number of events
+    std::vector< double > bufferedOutputs( nRows, -1. );
+    unsigned numberOfBatches = 0;
+    {
+        BatchedPredictor predictor( [&]( const std::vector< double >& inputs, const std::vector< double >::size_type n ){ 
+            ++numberOfBatches;
+            return model.predictBatch( inputs, n );
+        }, model.numberOfInputs(), 64 );
+        for( std::vector< double >::size_type row = 0; row < nRows; ++row ){
+            std::vector< double > inputs( batchInputs.cbegin() + 3*row, batchInputs.cbegin() + 3*row + 3 );
+            predictor.add( inputs, [&bufferedOutputs, row]( double score ){ bufferedOutputs[ row ] = score; } );
+        }
+        predictor.flush();
+        if( predictor.numberOfBufferedEvents() != 0 ){
+            throw std::runtime_error( "events left in buffer after flush." );
+        }
+    }
+    if( bufferedOutputs != batchOutputs ){
+        throw std::runtime_error( "buffered predictions are not equal to batched predictions." );
+    }
+    if( numberOfBatches != ( nRows + 63 ) / 64 ){
+        throw std::runtime_error( "model evaluated in " + std::to_string( numberOfBatches ) + " batches." );
+    }
+
+    //softmax outputs sum to one
+    std::stringstream softmaxStream( "densemodel 2 dense 2 3 linear 1 2 3 4 5 6 0 0 0 activation 3 softmax" );
+    DenseModel softmaxModel( softmaxStream );
+    std::vector< double > softmaxOutputs = softmaxModel.predictAll( { 0.3, -0.2 } );
+    if( std::abs( softmaxOutputs[0] + softmaxOutputs[1] + softmaxOutputs[2] - 1. ) > 1e-12 ){
+        throw std::runtime_error( "softmax outputs do not sum to 1." );
+    }
+
+    //invalid models
+    for( const std::string& invalidModel : std::vector< std::string >( { "dense 2 1 linear 1 2 3", "densemodel 1 dense 2 1 linear 1 2", "densemodel 1 dense 2 1 swish 1 2 3", "densemodel 2 dense 2 3 linear 1 2 3 4 5 6 0 0 0 prelu 2 1 1" } ) ){
+        std::stringstream invalidStream( invalidModel );
+        bool caught = false;
+        try{
+            DenseModel invalid( invalidStream );
+        } catch( std::invalid_argument& ){
+            caught = true;
+        }
+        if( !caught ){
+            throw std::runtime_error( "no error for invalid model '" + invalidModel + "'." );
+        }
+    }
+
+    return 0;
+}
@@ -0,0 +1,71 @@
+#include "../../Tools/interface/EventKeySet.h"
+
+//include c++ library classes 
+#include <set>
+#include <tuple>
+#include <random>
+#include <string>
+#include <stdexcept>
+
+//include test function
+#include "../copyMoveTest.h"
+
+
+int main(){
+
+    //fill the set with random events (with many duplicates) and compare to std::set
+    std::mt19937_64 rng( 42 );
+    std::uniform_int_distribution< std::uint64_t > runDist( 0, 20 );
+    std::uniform_int_distribution< std::uint64_t > lumiDist( 0, 50 );
+    std::uniform_int_distribution< std::uint64_t > eventDist( 0, 200 );
+    std::set< std::tuple< std::uint64_t, std::uint64_t, std::uint64_t > > referenceSet;
+
+    //start from a small table to test the growth of the table
+    EventKeySet keySet( 1 );
+    for( unsigned i = 0; i < 200000; ++i ){
+        std::uint64_t run = runDist( rng );
+        std::uint64_t lumi = lumiDist( rng );
+        std::uint64_t event = eventDist( rng );
+        bool isNew = referenceSet.insert( std::make_tuple( run, lumi, event ) ).second;
+        if( keySet.insert( run, lumi, event ) != isNew ){
+            throw std::runtime_error( "insert returned wrong result for event " + std::to_string( run ) + ":" + std::to_string( lumi ) + ":" + std::to_string( event ) + "." );
+        }
+    }
+    if( keySet.size() != referenceSet.size() ){
+        throw std::runtime_error( "set has size " + std::to_string( keySet.size() ) + " while it should be " + std::to_string( referenceSet.size() ) + "." );
+    }
+    for( const auto& tags : referenceSet ){
+        if( !keySet.contains( std::get<0>( tags ), std::get<1>( tags ), std::get<2>( tags ) ) ){
+            throw std::runtime_error( "inserted event not found in set." );
+        }
+    }
+    if( keySet.contains( 21, 0, 0 ) ){
+        throw std::runtime_error( "event that was not inserted found in set." );
+    }
+
+    //large event numbers and the key consisting of only zeros
+    EventKeySet largeKeySet;
+    if( !largeKeySet.insert( 0, 0, 0 ) || largeKeySet.insert( 0, 0, 0 ) || !largeKeySet.contains( 0, 0, 0 ) ){
+        throw std::runtime_error( "wrong treatment of event 0:0:0." );
+    }
+    if( !largeKeySet.insert( 325172, 4000, 12345678901234ULL ) || largeKeySet.insert( 325172, 4000, 12345678901234ULL ) ){
+        throw std::runtime_error( "wrong treatment of event with large event number." );
+    }
+
+    //memory estimate should be consistent with the actual table
+    EventKeySet reservedKeySet( 1000 );
+    if( reservedKeySet.memoryUsage() != EventKeySet::memoryForSize( 1000 ) ){
+        throw std::runtime_error( "memory estimate is not consistent with table size." );
+    }
+
+    //clear
+    keySet.clear();
+    if( keySet.size() != 0 || keySet.contains( 0, 0, 0 ) ){
+        throw std::runtime_error( "set is not empty after clear." );
+    }
+
+    //test copy and move behavior for leaks
+    copyMoveTest( largeKeySet );
+
+    return 0;
+}
@@ -0,0 +1,110 @@
+#include "../../Tools/interface/LookupTable2D.h"
+
+//include c++ library classes 
+#include <random>
+#include <string>
+#include <vector>
+#include <stdexcept>
+
+//include ROOT classes
+#include "TH2D.h"
+
+//include other parts of framework
+#include "../../Tools/interface/histogramTools.h"
+
+//include test function
+#include "../copyMoveTest.h"
+
+
+void compareToHistogram( TH2D& hist ){
+
+    LookupTable2D table( hist );
+    if( table.numberOfBinsX() != static_cast< LookupTable2D::size_type >( hist.GetNbinsX() ) || table.numberOfBinsY() != static_cast< LookupTable2D::size_type >( hist.GetNbinsY() ) ){
+        throw std::runtime_error( "lookup table has wrong number of bins." );
+    }
+
+    //compare lookups to histogram::contentAtValues for random values, including values outside the axis ranges
+    std::mt19937 rng( 7 );
+    std::uniform_real_distribution< double > xDist( hist.GetXaxis()->GetXmin() - 10, hist.GetXaxis()->GetXmax() + 10 );
+    std::uniform_real_distribution< double > yDist( hist.GetYaxis()->GetXmin() - 1, hist.GetYaxis()->GetXmax() + 1 );
+    std::vector< double > xValues;
+    std::vector< double > yValues;
+    for( unsigned i = 0; i < 100000; ++i ){
+        xValues.push_back( xDist( rng ) );
+        yValues.push_back( yDist( rng ) );
+    }
+
+    //also check the values exactly at the bin edges
+    for( int xBin = 1; xBin <= hist.GetNbinsX() + 1; ++xBin ){
+        for( int yBin = 1; yBin <= hist.GetNbinsY() + 1; ++yBin ){
+            xValues.push_back( hist.GetXaxis()->GetBinLowEdge( xBin ) );
+            yValues.push_back( hist.GetYaxis()->GetBinLowEdge( yBin ) );
+        }
+    }
+    std::vector< double > batchedContents = table.contentsAt( xValues, yValues );
+    for( std::vector< double >::size_type i = 0; i < xValues.size(); ++i ){
+        double expected = histogram::contentAtValues( &hist, xValues[ i ], yValues[ i ] );
+        if( table.contentAt( xValues[ i ], yValues[ i ] ) != expected || batchedContents[ i ] != expected ){
+            throw std::runtime_error( "lookup at ( " + std::to_string( xValues[ i ] ) + ", " + std::to_string( yValues[ i ] ) + " ) gives " + std::to_string( table.contentAt( xValues[ i ], yValues[ i ] ) ) + " while it should be " + std::to_string( expected ) + "." );
+        }
+        double expectedError = histogram::uncertaintyAtValues( &hist, xValues[ i ], yValues[ i ] );
+        if( table.errorAt( xValues[ i ], yValues[ i ] ) != expectedError ){
+            throw std::runtime_error( "error lookup at ( " + std::to_string( xValues[ i ] ) + ", " + std::to_string( yValues[ i ] ) + " ) is not correct." );
+        }
+    }
+
+    //test copying and moving
+    copyMoveTest( table );
+}
+
+
+int main(){
+
+    //histogram with variable bin widths (as for fake-rate maps)
+    std::vector< double > ptEdges = { 10, 15, 20, 25, 35, 50, 100 };
+    std::vector< double > etaEdges = { 0, 0.8, 1.479, 2.5 };
+    TH2D variableHist( "variableHist", "variableHist", ptEdges.size() - 1, &ptEdges[0], etaEdges.size() - 1, &etaEdges[0] );
+
+    //histogram with equal bin widths
+    TH2D uniformHist( "uniformHist", "uniformHist", 9, 10, 100, 5, 0, 2.5 );
+
+    std::mt19937 rng( 42 );
+    std::uniform_real_distribution< double > contentDist( 0, 1 );
+    for( TH2D* hist : { &variableHist, &uniformHist } ){
+        for( int xBin = 0; xBin <= hist->GetNbinsX() + 1; ++xBin ){
+            for( int yBin = 0; yBin <= hist->GetNbinsY() + 1; ++yBin ){
+                hist->SetBinContent( xBin, yBin, contentDist( rng ) );
+                hist->SetBinError( xBin, yBin, contentDist( rng ) );
+            }
+        }
+        compareToHistogram( *hist );
+    }
+
+    //construction from arrays
+    LookupTable2D table( { 0, 1, 2 }, { 0, 1 }, { 3, 4 } );
+    if( table.contentAt( 0.5, 0.5 ) != 3 || table.contentAt( 1.5, 5 ) != 4 || table.errorAt( 1.5, 0.5 ) != 0 ){
+        throw std::runtime_error( "wrong lookup in table constructed from arrays." );
+    }
+
+    //invalid input
+    bool caught = false;
+    try{
+        LookupTable2D invalidTable( { 0, 1, 2 }, { 0, 1 }, { 3 } );
+    } catch( std::invalid_argument& ){
+        caught = true;
+    }
+    if( !caught ){
+        throw std::runtime_error( "no error for wrong number of bin contents." );
+    }
+    caught = false;
+    try{
+        LookupTable2D invalidTable( { 0, 2, 1 }, { 0, 1 }, { 3, 4 } );
+    } catch( std::invalid_argument& ){
+        caught = true;
+    }
+    if( !caught ){
+        throw std::runtime_error( "no error for edges that are not increasing." );
+    }
+
+    return 0;
+}
@@ -0,0 +1,84 @@
+#include "../../Tools/interface/NpyColumnWriter.h"
+
+//include c++ library classes 
+#include <cstdio>
+#include <cstring>
+#include <fstream>
+#include <iostream>
+#include <iterator>
+#include <string>
+#include <vector>
+#include <stdexcept>
+
+
+std::string readFile( const std::string& fileName ){
+    std::ifstream inputStream( fileName, std::ios::binary );
+    return std::string( std::istreambuf_iterator< char >( inputStream ), std::istreambuf_iterator< char >() );
+}
+
+
+std::string headerDictionary( const std::string& content ){
+    std::string::size_type start = content.find( '{' );
+    std::string::size_type end = content.find( '}' );
+    return content.substr( start, end - start + 1 );
+}
+
+
+int main(){
+
+    //scalar column written in several steps
+    const std::string scalarFile = "NpyColumnWriter_test_scalar.npy";
+    std::vector< double > values = { 1.5, -2., 3.25, 0., 1e10 };
+    {
+        NpyColumnWriter writer( scalarFile, "<f8" );
+        writer.write( values.data(), 2 );
+        writer.write( values.data() + 2, 3 );
+        if( writer.numberOfRows() != 5 ){
+            throw std::runtime_error( "writer has " + std::to_string( writer.numberOfRows() ) + " rows while it should have 5." );
+        }
+    }
+    std::string content = readFile( scalarFile );
+    if( content.size() != NpyColumnWriter::headerSize + values.size()*sizeof( double ) ){
+        throw std::runtime_error( "scalar column file has size " + std::to_string( content.size() ) + "." );
+    }
+    if( content.compare( 0, 6, "\x93NUMPY" ) != 0 || content[ NpyColumnWriter::headerSize - 1 ] != '\n' ){
+        throw std::runtime_error( "scalar column file does not have a valid npy header." );
+    }
+    if( headerDictionary( content ) != "{'descr': '<f8', 'fortran_order': False, 'shape': (5,), }" ){
+        throw std::runtime_error( "scalar column header is " + headerDictionary( content ) + "." );
+    }
+    if( std::memcmp( content.data() + NpyColumnWriter::headerSize, values.data(), values.size()*sizeof( double ) ) != 0 ){
+        throw std::runtime_error( "scalar column data differs from the written values." );
+    }
+    std::cout << headerDictionary( content ) << std::endl;
+
+    //column with fixed size rows and single values
+    const std::string arrayFile = "NpyColumnWriter_test_array.npy";
+    {
+        NpyColumnWriter writer( arrayFile, "<i4", { 2, 3 } );
+        std::vector< int > row = { 1, 2, 3, 4, 5, 6 };
+        writer.write( row.data() );
+        writer.write( row.data() );
+        try{
+            writer.writeValue( 1 );
+            throw std::runtime_error( "writing a single value to a column with rows of 6 values does not throw an error." );
+        } catch( std::invalid_argument& ){}
+    }
+    content = readFile( arrayFile );
+    if( headerDictionary( content ) != "{'descr': '<i4', 'fortran_order': False, 'shape': (2, 2, 3), }" ){
+        throw std::runtime_error( "array column header is " + headerDictionary( content ) + "." );
+    }
+    std::cout << headerDictionary( content ) << std::endl;
+
+    //invalid data types
+    for( const std::string& dataType : std::vector< std::string >( { "f8", "<c16", "<f0", "<U8" } ) ){
+        try{
+            NpyColumnWriter::elementSize( dataType );
+            throw std::runtime_error( "data type " + dataType + " does not throw an error." );
+        } catch( std::invalid_argument& ){}
+    }
+
+    std::remove( scalarFile.c_str() );
+    std::remove( arrayFile.c_str() );
+    return 0;
+}
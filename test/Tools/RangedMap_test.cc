@@ -21,6 +21,10 @@ int main(){
     std::cout << "testMap[3000] = " << testMap[3000] << std::endl;
     std::cout << "testMap[6200] = " << testMap[6200] << std::endl;
 
+    //indexing a const RangedMap
+    const RangedMap<int>& constTestMap = testMap;
+    std::cout << "constTestMap[400] = " << constTestMap[400] << std::endl;
+
     try{
         testMap[-1]; 
     } catch( const std::invalid_argument& ){
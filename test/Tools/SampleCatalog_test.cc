@@ -0,0 +1,128 @@
+#include "../../Tools/interface/SampleCatalog.h"
+
+//include c++ library classes 
+#include <string>
+#include <vector>
+#include <stdexcept>
+#include <sstream>
+
+//include ROOT classes
+#include "TFile.h"
+#include "TTree.h"
+#include "TH1D.h"
+
+//include other parts of framework
+#include "../../Tools/interface/SampleCrossSections.h"
+#include "../../Tools/interface/systemTools.h"
+
+//include test function
+#include "../copyMoveTest.h"
+
+
+//write a small file with the same structure as the ntuples
+void makeTestFile( const std::string& fileName, const long unsigned numberOfEntries ){
+    TFile outputFile( fileName.c_str(), "RECREATE" );
+    outputFile.mkdir( "blackJackAndHookers" );
+    outputFile.cd( "blackJackAndHookers" );
+    //(objects are owned and deleted by the file)
+    TTree* tree = new TTree( "blackJackAndHookersTree", "blackJackAndHookersTree" );
+    Double_t weight;
+    tree->Branch( "_weight", &weight, "_weight/D" );
+    for( long unsigned i = 0; i < numberOfEntries; ++i ){
+        weight = 1. + 0.1*i;
+        tree->Fill();
+    }
+    TH1D* hCounter = new TH1D( "hCounter", "Events counter", 1, 0, 1 );
+    hCounter->SetBinContent( 1, 123.5 );
+    TH1D* lheCounter = new TH1D( "lheCounter", "lheCounter", 110, 0, 110 );
+    for( int bin = 1; bin <= 110; ++bin ) lheCounter->SetBinContent( bin, 100. + bin );
+    TH1D* psCounter = new TH1D( "psCounter", "psCounter", 46, 0, 46 );
+    for( int bin = 1; bin <= 46; ++bin ) psCounter->SetBinContent( bin, 120. + bin );
+    outputFile.Write();
+    outputFile.Close();
+}
+
+
+int main(){
+
+    //make two test samples
+    std::string directory = systemTools::currentDirectory();
+    std::vector< Sample > samples;
+    for( long unsigned i = 1; i < 3; ++i ){
+        std::string fileName = "SampleCatalog_test_" + std::to_string( i ) + "_Summer20UL18.root";
+        makeTestFile( fileName, 10*i );
+        samples.push_back( Sample( directory, fileName, false, false, false, false, true, false ) );
+    }
+
+    //build the catalog and check the entries
+    SampleCatalog catalog( samples );
+    for( long unsigned i = 0; i < samples.size(); ++i ){
+        if( !catalog.isUpToDate( samples[ i ] ) ){
+            throw std::runtime_error( "catalog is not up to date right after building it." );
+        }
+        const SampleCatalog::Entry& entry = catalog.entry( samples[ i ] );
+        if( entry.numberOfEntries != 10*( i + 1 ) || entry.sumOfWeights != 123.5 || entry.year != "2018" ){
+            throw std::runtime_error( "wrong metadata for " + samples[ i ].fileName() + "." );
+        }
+        if( entry.lheSumsOfWeights.size() != 110 || entry.psSumsOfWeights.size() != 46 ){
+            throw std::runtime_error( "wrong number of lhe or ps sums of weights for " + samples[ i ].fileName() + "." );
+        }
+    }
+
+    //write and read back the catalog
+    std::string catalogFile = SampleCatalog::defaultFileName( directory );
+    catalog.write( catalogFile );
+    SampleCatalog readCatalog( catalogFile );
+    for( const auto& sample : samples ){
+        const SampleCatalog::Entry& lhs = catalog.entry( sample );
+        const SampleCatalog::Entry& rhs = readCatalog.entry( sample );
+        if( lhs.fileSize != rhs.fileSize || lhs.modificationTime != rhs.modificationTime || lhs.numberOfEntries != rhs.numberOfEntries
+            || lhs.sumOfWeights != rhs.sumOfWeights || lhs.lheSumsOfWeights != rhs.lheSumsOfWeights || lhs.psSumsOfWeights != rhs.psSumsOfWeights ){
+            throw std::runtime_error( "catalog read from file differs from the one that was written." );
+        }
+    }
+
+    //cross section ratios from the catalog should be the same as the ones from the file
+    SampleCrossSections fromFile( samples.front() );
+    SampleCrossSections fromCatalog( samples.front(), readCatalog );
+    for( SampleCrossSections::size_type i = 0; i < 100; ++i ){
+        if( fromFile.crossSectionRatio_pdfVar( i ) != fromCatalog.crossSectionRatio_pdfVar( i ) ){
+            throw std::runtime_error( "pdf variation " + std::to_string( i ) + " from catalog differs from the one from file." );
+        }
+    }
+    if( fromFile.crossSectionRatio_ISR_2() != fromCatalog.crossSectionRatio_ISR_2() ){
+        throw std::runtime_error( "ps variation from catalog differs from the one from file." );
+    }
+
+    //a modified sample is not up to date anymore, and is rebuilt by readOrBuild
+    systemTools::sleep( 1 );
+    makeTestFile( samples.back().fileName(), 50 );
+    if( readCatalog.isUpToDate( samples.back() ) || !readCatalog.isUpToDate( samples.front() ) ){
+        throw std::runtime_error( "modification of sample file is not detected." );
+    }
+    SampleCatalog rebuiltCatalog = SampleCatalog::readOrBuild( catalogFile, samples );
+    if( rebuiltCatalog.entry( samples.back() ).numberOfEntries != 50 || !SampleCatalog( catalogFile ).isUpToDate( samples.back() ) ){
+        throw std::runtime_error( "modified sample is not updated by readOrBuild." );
+    }
+
+    //an invalid catalog gives an error
+    bool caught = false;
+    std::istringstream invalidStream( "samplecatalog 2\nfile.root 1 2 0 2018" );
+    try{
+        SampleCatalog invalidCatalog( invalidStream );
+    } catch( std::invalid_argument& ){
+        caught = true;
+    }
+    if( !caught ){
+        throw std::runtime_error( "no error for incomplete catalog." );
+    }
+
+    //test copying and moving
+    copyMoveTest( catalog );
+
+    //clean up
+    for( const auto& sample : samples ) systemTools::deleteFile( sample.fileName() );
+    systemTools::deleteFile( catalogFile );
+
+    return 0;
+}
@@ -0,0 +1,53 @@
+#include "../../Tools/interface/VariationTable.h"
+
+//include c++ library classes 
+#include <string> 
+#include <vector>
+#include <stdexcept>
+
+//include test function
+#include "../copyMoveTest.h"
+
+
+int main(){
+
+    std::vector< std::string > names = { "AbsoluteStat", "AbsoluteScale", "FlavorQCD", "RelativeBal" };
+    VariationTable table( names );
+
+    //check that all names get consecutive indices in order of insertion
+    if( table.size() != names.size() ){
+        throw std::runtime_error( "table has size " + std::to_string( table.size() ) + " while it should be " + std::to_string( names.size() ) + "." );
+    }
+    for( VariationTable::size_type i = 0; i < names.size(); ++i ){
+        if( table.index( names[i] ) != i ){
+            throw std::runtime_error( "index of " + names[i] + " is " + std::to_string( table.index( names[i] ) ) + " while it should be " + std::to_string( i ) + "." );
+        }
+        if( table.name( i ) != names[i] ){
+            throw std::runtime_error( "name at index " + std::to_string( i ) + " is " + table.name( i ) + " while it should be " + names[i] + "." );
+        }
+    }
+
+    //adding an existing name should not change the table
+    if( table.add( "FlavorQCD" ) != 2 || table.size() != names.size() ){
+        throw std::runtime_error( "adding an existing name modified the table." );
+    }
+
+    //unknown names
+    if( table.contains( "Total" ) || table.index( "Total" ) != VariationTable::npos ){
+        throw std::runtime_error( "unknown name was found in the table." );
+    }
+    bool caught = false;
+    try{
+        table.name( names.size() );
+    } catch( std::out_of_range& ){
+        caught = true;
+    }
+    if( !caught ){
+        throw std::runtime_error( "out of range index did not throw an error." );
+    }
+
+    //test copy and move behavior for leaks
+    copyMoveTest( table );
+
+    return 0;
+}
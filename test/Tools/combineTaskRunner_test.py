@@ -0,0 +1,123 @@
+#######################################################################################
+# test of the status and skipping logic of combinetools.CombineTaskRunner            #
+#######################################################################################
+# usage:
+#   python combineTaskRunner_test.py
+# note: combine itself is not needed; the combine executables are replaced by small scripts
+#       in a temporary directory that write the expected output files,
+#       and that can be made to fail in different ways.
+
+import os
+import sys
+import stat
+import shutil
+import tempfile
+sys.path.append(os.path.abspath('../../Tools/python'))
+from combinetools import CombineTaskRunner
+
+# replacement for text2workspace.py
+text2workspace = """#!/bin/bash
+# usage: text2workspace.py <card> -o <workspace>
+cp $1 $3
+"""
+
+# replacement for combine
+# (the behaviour is read from a file 'behaviour' in the working directory:
+#  'ok' (default), 'exit' (exit with code 3) or 'fitfailed' (report a failed fit))
+combine = """#!/bin/bash
+method=""
+name=""
+while [ $# -gt 0 ]; do
+  case $1 in
+    -M) method=$2; shift;;
+    -n) name=$2; shift;;
+  esac
+  shift
+done
+behaviour=ok
+if [ -f behaviour ]; then behaviour=$(cat behaviour); fi
+if [ $behaviour == exit ]; then echo "error"; exit 3; fi
+touch higgsCombine$name.$method.mH120.root
+if [ $behaviour == fitfailed ]; then echo "Fit failed"; exit 0; fi
+echo "   r :    +1.000   -0.123/+0.130 (68%)"
+"""
+
+
+def writeexecutable( path, content ):
+    with open(path, 'w') as f: f.write(content)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+def check( name, summary, expected ):
+    ### compare the status of all tasks to the expected status
+    statuses = sorted(set([res['status'] for res in summary.values()]))
+    if statuses!=[expected]:
+        print('{}: FAILED (status {} instead of {})'.format(name, statuses, expected))
+        return False
+    print('{}: OK'.format(name))
+    return True
+
+
+if __name__=='__main__':
+
+    # make a temporary directory with datacards and the replacement executables
+    tmpdir = tempfile.mkdtemp()
+    bindir = os.path.join(tmpdir, 'bin')
+    carddir = os.path.join(tmpdir, 'datacards')
+    os.makedirs(bindir)
+    os.makedirs(carddir)
+    writeexecutable(os.path.join(bindir, 'text2workspace.py'), text2workspace)
+    writeexecutable(os.path.join(bindir, 'combine'), combine)
+    os.environ['PATH'] = bindir+os.pathsep+os.environ['PATH']
+    for card in ['card_a.txt', 'card_b.txt']:
+        with open(os.path.join(carddir, card), 'w') as f: f.write('# {}\n'.format(card))
+    def setbehaviour( behaviour ):
+        with open(os.path.join(carddir, 'behaviour'), 'w') as f: f.write(behaviour)
+
+    def makerunner():
+        runner = CombineTaskRunner(carddir, nprocesses=2)
+        for card in ['card_a.txt', 'card_b.txt']:
+            runner.add_task(card, method='multidimfit')
+            runner.add_task(card, method='multidimfit', dostatonly=True)
+            runner.add_task(card, method='multidimfit', nuisance='lumi')
+        return runner
+
+    passed = True
+    try:
+        # first run: all tasks are run
+        setbehaviour('ok')
+        passed &= check('first run', makerunner().run(verbose=False), 'done')
+        # second run: all tasks are up to date
+        passed &= check('second run', makerunner().run(verbose=False), 'skipped')
+        # second run from another working directory: all tasks are still up to date
+        cwd = os.getcwd()
+        os.chdir(tmpdir)
+        passed &= check('run from other directory', makerunner().run(verbose=False), 'skipped')
+        os.chdir(cwd)
+        # forced run: all tasks are run again
+        passed &= check('forced run', makerunner().run(force=True, verbose=False), 'done')
+        # failing combine: all tasks fail, also in the next run
+        with open(os.path.join(carddir, 'card_a.txt'), 'a') as f: f.write('# modified\n')
+        with open(os.path.join(carddir, 'card_b.txt'), 'a') as f: f.write('# modified\n')
+        setbehaviour('exit')
+        passed &= check('failing combine', makerunner().run(verbose=False), 'failed')
+        passed &= check('failing combine (rerun)', makerunner().run(verbose=False), 'failed')
+        # failed fit: all tasks fail, also in the next run
+        setbehaviour('fitfailed')
+        passed &= check('failed fit', makerunner().run(verbose=False), 'failed')
+        passed &= check('failed fit (rerun)', makerunner().run(verbose=False), 'failed')
+        # working combine: the failed tasks are run again
+        setbehaviour('ok')
+        passed &= check('recovery', makerunner().run(verbose=False), 'done')
+        passed &= check('recovery (rerun)', makerunner().run(verbose=False), 'skipped')
+        # missing workspace tool: dependent fits are not run
+        os.remove(os.path.join(bindir, 'text2workspace.py'))
+        with open(os.path.join(carddir, 'card_a.txt'), 'a') as f: f.write('# modified again\n')
+        with open(os.path.join(carddir, 'card_b.txt'), 'a') as f: f.write('# modified again\n')
+        passed &= check('failing workspace', makerunner().run(verbose=False), 'dependency failed')
+    finally:
+        shutil.rmtree(tmpdir)
+
+    if not passed:
+        print('### ERROR ###: CombineTaskRunner does not behave as expected.')
+        sys.exit(1)
+    print('CombineTaskRunner behaves as expected.')
@@ -99,6 +99,14 @@ int main(){
         throw std::runtime_error( "Number of entries in merged dataset of overlapping files is " + std::to_string( mergedNumEntries ) + " while it should be " + std::to_string( initialNumEntries ) + "." );
     }
 
+    //same check with a very small memory budget, so the files are processed per range of runs
+    mergeAndRemoveOverlap( overlappingFileVector, "overlapping_sharded_test.root", false, 1e-6 );
+
+    mergedNumEntries = numberOfEntries( "overlapping_sharded_test.root" );
+    if( mergedNumEntries != initialNumEntries ){
+        throw std::runtime_error( "Number of entries in merged dataset of overlapping files with limited memory is " + std::to_string( mergedNumEntries ) + " while it should be " + std::to_string( initialNumEntries ) + "." );
+    }
+
 
     //Check whether merged sum of histograms is the same as the sum of the histograms 
     //simultaneously check whether TreeReader::getHistogramsFromCurrentFile() retrieves all the necessary histograms
@@ -0,0 +1,93 @@
+/*
+Reference output of the C++ object selections for the equivalence test of the vectorized selections
+(see Tools/python/columnarselection.py and columnarSelection_test.py)
+*/
+
+// for each lepton and jet in the given file (in the order of the ntuple branches),
+// the loose, FO and tight lepton selections and the good jet and b-tagging selections are written,
+// as well as the number of objects per event after the cleaning in the skims and in a FO-based selection.
+// the output is written as .npy files (one per selection) in the given directory,
+// together with a text file containing the year of the sample.
+
+//include class to test 
+#include "../../TreeReader/interface/TreeReader.h"
+#include "../../Event/interface/Event.h"
+#include "../../Tools/interface/NpyColumnWriter.h"
+#include "../../Tools/interface/stringTools.h"
+#include "../../Tools/interface/systemTools.h"
+
+//include c++ library classes
+#include <iostream>
+#include <fstream>
+#include <map>
+#include <memory>
+#include <string>
+#include <vector>
+
+
+int main( int argc, char* argv[] ){
+
+    if( argc != 3 ){
+        std::cerr << "columnarSelection_test requires exactly two arguments to run : " << std::endl;
+        std::cerr << "- input file" << std::endl;
+        std::cerr << "- output directory" << std::endl;
+        return -1;
+    }
+    std::vector< std::string > argvStr( &argv[0], &argv[0] + argc );
+    const std::string directory = stringTools::formatDirectoryName( argvStr[2] );
+    systemTools::makeDirectory( directory );
+
+    TreeReader treeReader;
+    treeReader.initSampleFromFile( argvStr[1] );
+    std::ofstream yearFile( directory + "year.txt" );
+    yearFile << treeReader.currentSample().year() << std::endl;
+
+    std::map< std::string, std::shared_ptr< NpyColumnWriter > > writers;
+    for( const std::string& name : { "isLoose", "isFO", "isTight", "isGood", "isBTaggedLoose", "isBTaggedMedium", "isBTaggedTight" } ){
+        writers[ name ] = std::make_shared< NpyColumnWriter >( directory + name + ".npy", "|b1" );
+    }
+    for( const std::string& name : { "nSkimLeptons", "nSkimLightLeptons", "nSkimJets", "nFOLeptons", "nFOJets", "nFOMediumBJets" } ){
+        writers[ name ] = std::make_shared< NpyColumnWriter >( directory + name + ".npy", "<i8" );
+    }
+    auto writeFlag = [&writers]( const std::string& name, const bool flag ){ writers[ name ]->writeValue( flag ); };
+    auto writeCount = [&writers]( const std::string& name, const long long count ){ writers[ name ]->writeValue( count ); };
+
+    for( long unsigned entry = 0; entry < treeReader.numberOfEntries(); ++entry ){
+
+        //selections of the individual objects
+        Event event = treeReader.buildEvent( entry );
+        for( const auto& leptonPtr : event.leptonCollection() ){
+            writeFlag( "isLoose", leptonPtr->isLoose() );
+            writeFlag( "isFO", leptonPtr->isFO() );
+            writeFlag( "isTight", leptonPtr->isTight() );
+        }
+        for( const auto& jetPtr : event.jetCollection() ){
+            writeFlag( "isGood", jetPtr->isGood() );
+            writeFlag( "isBTaggedLoose", jetPtr->isBTaggedLoose() );
+            writeFlag( "isBTaggedMedium", jetPtr->isBTaggedMedium() );
+            writeFlag( "isBTaggedTight", jetPtr->isBTaggedTight() );
+        }
+
+        //cleaning as in the leptonic and fake rate skims
+        event.selectLooseLeptons();
+        event.cleanElectronsFromLooseMuons();
+        event.cleanTausFromLooseLightLeptons();
+        writeCount( "nSkimLeptons", event.numberOfLeptons() );
+        writeCount( "nSkimLightLeptons", event.numberOfLightLeptons() );
+        event.selectGoodJets();
+        event.cleanJetsFromLooseLeptons();
+        writeCount( "nSkimJets", event.numberOfJets() );
+
+        //cleaning based on FO leptons
+        Event foEvent = treeReader.buildEvent( entry );
+        foEvent.selectFOLeptons();
+        foEvent.cleanElectronsFromFOMuons();
+        foEvent.cleanTausFromFOLightLeptons();
+        writeCount( "nFOLeptons", foEvent.numberOfLeptons() );
+        foEvent.selectGoodJets();
+        foEvent.cleanJetsFromFOLeptons();
+        writeCount( "nFOJets", foEvent.numberOfJets() );
+        writeCount( "nFOMediumBJets", foEvent.numberOfMediumBTaggedJets() );
+    }
+    return 0;
+}
@@ -0,0 +1,137 @@
+#######################################################################################
+# equivalence test of the vectorized object selections against the C++ selectors    #
+#######################################################################################
+# usage:
+# - make the columnar cache of a sample:
+#   ../../skimmer/convertToColumnar <sample file> <cache directory>
+# - make the reference output of the C++ selectors for the same sample:
+#   make -f makeColumnarSelection_test && ./columnarSelection_test <sample file> <reference directory>
+# - run this script:
+#   python columnarSelection_test.py --cachedir <cache directory> --referencedir <reference directory>
+# note: besides the comparison on the sample, the selections are checked on a small artificial chunk
+#       with taus, for which the light lepton columns (indexed by _nLight) are shorter than the _nL columns.
+
+import os
+import sys
+import argparse
+import numpy as np
+sys.path.append(os.path.abspath('../../Tools/python'))
+from columnarcache import ColumnarCache, JaggedArray
+import columnarselection as cs
+
+
+def compare( name, result, reference ):
+    ### compare a vectorized selection to the reference and print the outcome
+    reference = np.asarray(reference)
+    if len(result)!=len(reference):
+        print('{}: FAILED (length {} instead of {})'.format(name, len(result), len(reference)))
+        return False
+    ndiff = np.count_nonzero(np.asarray(result)!=reference)
+    if ndiff>0:
+        first = np.flatnonzero(np.asarray(result)!=reference)[0]
+        print('{}: FAILED ({} of {} values differ, first at index {})'.format(
+              name, ndiff, len(reference), first))
+        return False
+    print('{}: OK ({} values)'.format(name, len(reference)))
+    return True
+
+
+def checktaulayout():
+    ### check the selections on a small artificial chunk with taus
+    # (the light lepton columns have less values than the _nL columns in events with taus)
+    # event 0: muon, electron, tau; event 1: tau only; event 2: muon
+    nl = [3, 1, 1]
+    nlight = [2, 0, 1]
+    def lepton( values ): return JaggedArray(np.array(values), np.concatenate(([0], np.cumsum(nl))))
+    def light( values ): return JaggedArray(np.array(values), np.concatenate(([0], np.cumsum(nlight))))
+    columns = {'_nMu': np.array([1, 0, 1]), '_nLight': np.array(nlight),
+      '_lPt': lepton([30., 30., 30., 30., 30.]), '_lEta': lepton([0.1, 1.0, 2.0, 0.5, 0.3]),
+      '_lPhi': lepton([0., 1.5, 3.0, 0., 0.]), '_dxy': lepton([0.]*5), '_dz': lepton([0.]*5),
+      '_3dIPSig': lepton([0.]*5), '_lPOGVeto': lepton([False, False, True, True, False]),
+      '_lPOGLoose': lepton([True, True, False, False, True]),
+      '_lPOGMedium': lepton([True, True, False, False, True]),
+      '_lPOGTight': lepton([False, False, True, False, False]),
+      '_decayModeFinding': lepton([False, False, True, True, False]),
+      '_lPtCorr': light([30., 30., 30.]), '_lEtaSC': light([0.1, 1.0, 0.3]),
+      '_miniIso': light([0., 0., 0.]), '_ptRatio': light([1., 1., 1.]),
+      '_leptonMvaTTH': light([0.9, 0.9, 0.9]),
+      '_closestJetDeepFlavor_b': light([0., 0., 0.]), '_closestJetDeepFlavor_bb': light([0., 0., 0.]),
+      '_closestJetDeepFlavor_lepb': light([0., 0., 0.]),
+      '_lElectronMissingHits': light(np.array([0, 0, 0], dtype=np.uint32)),
+      '_lElectronPassMVAFall17NoIsoWPLoose': light([False, True, False]),
+      '_lElectronPassMVAFall17NoIsoWP80': light([False, True, False]),
+      '_lElectronPassConvVeto': light([False, True, False]),
+      '_lElectronHOverE': light([0., 0., 0.]), '_lElectronEInvMinusPInv': light([0., 0., 0.]),
+      '_lElectronSigmaIetaIeta': light([0., 0.005, 0.])}
+    expected = [True, True, True, True, True]
+    passed = compare('loose leptons (artificial chunk with taus)', cs.looseleptons(columns, '2018'), expected)
+    passed &= compare('FO leptons (artificial chunk with taus)', cs.foleptons(columns, '2018'), expected)
+    passed &= compare('tight leptons (artificial chunk with taus)', cs.tightleptons(columns, '2018'),
+                      [True, True, True, False, True])
+    return passed
+
+
+if __name__=='__main__':
+
+    # parse arguments
+    parser = argparse.ArgumentParser('Equivalence test of vectorized object selections')
+    parser.add_argument('--cachedir', required=True, type=os.path.abspath)
+    parser.add_argument('--referencedir', required=True, type=os.path.abspath)
+    parser.add_argument('--year', default=None,
+      help='Year of the sample (default: the year written by columnarSelection_test)')
+    args = parser.parse_args()
+    year = args.year
+    if year is None:
+        with open(os.path.join(args.referencedir, 'year.txt')) as f: year = f.read().strip()
+
+    # read the columns and the reference
+    cache = ColumnarCache(args.cachedir)
+    columns = cache.read(cs.requiredcolumns())
+    def reference( name ): return np.load(os.path.join(args.referencedir, name+'.npy'))
+    leptons = columns['_lPt']
+    jets = columns['_jetSmearedPt']
+
+    # check the handling of the light lepton columns in events with taus
+    passed = checktaulayout()
+
+    # compare the individual object selections
+    loose = cs.looseleptons(columns, year)
+    fo = cs.foleptons(columns, year, loose=loose)
+    tight = cs.tightleptons(columns, year, fo=fo)
+    good = cs.goodjets(columns, year)
+    passed &= compare('loose leptons', loose, reference('isLoose'))
+    passed &= compare('FO leptons', fo, reference('isFO'))
+    passed &= compare('tight leptons', tight, reference('isTight'))
+    passed &= compare('good jets', good, reference('isGood'))
+    _, _, istau = cs.leptonflavours(columns)
+    if np.count_nonzero(istau)==0:
+        print('WARNING: the sample does not contain taus, the tau selections are not tested.')
+    for name, mask, refname in [('loose', loose, 'isLoose'), ('FO', fo, 'isFO'), ('tight', tight, 'isTight')]:
+        passed &= compare('{} taus'.format(name), mask[istau], reference(refname)[istau])
+    for wp in ['loose','medium','tight']:
+        passed &= compare('b-tagged jets ({})'.format(wp), cs.btaggedjets(columns, year, wp, good=good),
+                          reference('isBTagged'+wp.capitalize()))
+
+    # compare the cleaning in the skims
+    ismuon, iselectron, _ = cs.leptonflavours(columns)
+    skimleptons = cs.skimleptons(columns, year)
+    skimjets = cs.cleanjetsfromleptons(columns, good, skimleptons)
+    passed &= compare('skim leptons', cs.countperevent(leptons, skimleptons), reference('nSkimLeptons'))
+    passed &= compare('skim light leptons', cs.countperevent(leptons, skimleptons & (ismuon|iselectron)),
+                      reference('nSkimLightLeptons'))
+    passed &= compare('skim jets', cs.countperevent(jets, skimjets), reference('nSkimJets'))
+
+    # compare the cleaning based on FO leptons
+    foleptons = cs.cleanelectronsfrommuons(columns, fo, fo)
+    foleptons = cs.cleantausfromlightleptons(columns, foleptons, fo)
+    fojets = cs.cleanjetsfromleptons(columns, good, foleptons)
+    mediumbjets = fojets & cs.btaggedjets(columns, year, 'medium', good=good)
+    passed &= compare('FO leptons after cleaning', cs.countperevent(leptons, foleptons), reference('nFOLeptons'))
+    passed &= compare('jets cleaned from FO leptons', cs.countperevent(jets, fojets), reference('nFOJets'))
+    passed &= compare('medium b-tagged jets cleaned from FO leptons', cs.countperevent(jets, mediumbjets),
+                      reference('nFOMediumBJets'))
+
+    if not passed:
+        print('### ERROR ###: vectorized selections are not equivalent to the C++ selectors.')
+        sys.exit(1)
+    print('vectorized selections are equivalent to the C++ selectors.')
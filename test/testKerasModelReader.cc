@@ -18,6 +18,13 @@ int main(){
         reader.predict( vector );
     }
     std::cout << "reader.predict( vector ) = " << reader.predict( vector ) << std::endl;
+
+    //same number of predictions, evaluated in batches of 1000 events
+    std::vector<double> batch( 1000*36, 1. );
+    for(unsigned i = 0; i < 10; ++i){
+        reader.predictBatch( batch, 1000 );
+    }
+    std::cout << "reader.predictBatch( batch, 1000 )[0] = " << reader.predictBatch( batch, 1000 )[0] << std::endl;
     return 0;
 }
 
@@ -0,0 +1,81 @@
+/*
+Compute the normalization factors of the b-tag shape reweighter for a list of samples,
+and write them to the cache (see ReweighterBTagShape::initialize),
+so that they are available to Run2ULReweighterFactory without any extra event loop.
+Samples for which the factors are already in the cache (and up to date) are skipped.
+*/
+
+// include b-tag shape reweighter
+#include "interface/ReweighterBTagShape.h"
+#include "interface/CombinedReweighter.h"
+#include "interface/ConcreteReweighterFactory.h"
+
+//include c++ library classes
+#include <iostream>
+#include <memory>
+
+// include other parts of the framework
+#include "../TreeReader/interface/TreeReader.h"
+#include "../Tools/interface/Sample.h"
+#include "../Tools/interface/stringTools.h"
+
+
+int main( int argc, char* argv[] ){
+
+    if( argc < 4 || argc > 6 ){
+        std::cerr << "ERROR: fillBTagShapeNormCache.cc requires 3 to 5 arguments to run:" << std::endl;
+	std::cerr << "- directory of input files" << std::endl;
+	std::cerr << "- samplelist (.txt)" << std::endl;
+	std::cerr << "- number of threads" << std::endl;
+	std::cerr << "- (optional) number of events (default: 0 for all events)" << std::endl;
+	std::cerr << "- (optional) cache directory (default: bTagShapeNormCache in weights directory)" << std::endl;
+        return -1;
+    }
+
+    // parse arguments
+    std::vector< std::string > argvStr( &argv[0], &argv[0] + argc );
+    std::string& inputDirectory = argvStr[1];
+    std::string& sampleList = argvStr[2];
+    unsigned nThreads = std::stoul(argvStr[3]);
+    long unsigned nEvents = ( argc > 4 ) ? std::stoul(argvStr[4]) : 0;
+    std::string weightDirectory = "./";
+    std::string cacheDirectory = ( argc > 5 ) ? argvStr[5] :
+	ReweighterBTagShape::defaultNormCacheDirectory( weightDirectory );
+
+    // read the samples (only simulation needs normalization factors)
+    TreeReader treeReader;
+    treeReader.readSamples( sampleList, inputDirectory );
+    std::vector<Sample> samples;
+    for( const Sample& sample: treeReader.sampleVector() ){
+	if( sample.isMC() ) samples.push_back( sample );
+    }
+    if( samples.empty() ){
+	std::cerr << "ERROR: no simulated samples found in " << sampleList << std::endl;
+	return -1;
+    }
+    std::cout << "will use the following samples:" << std::endl;
+    for( const Sample& sample: samples ) std::cout << "- " << sample.fileName() << std::endl;
+
+    // initialize year from first sample
+    // note: all samples in the list are assumed to be of the same year
+    treeReader.initSample();
+    std::string year = treeReader.getYearString();
+
+    // make the reweighter in exactly the same way as in the analysis,
+    // so that the cache keys agree
+    std::shared_ptr< ReweighterFactory > reweighterFactory( new Run2ULReweighterFactory() );
+    CombinedReweighter reweighter = reweighterFactory->buildReweighter(
+	weightDirectory, year, samples );
+    ReweighterBTagShape* reweighterBTagShape = dynamic_cast<ReweighterBTagShape*>(
+	reweighter.getReweighter( "bTag_shape" ) );
+    if( reweighterBTagShape == nullptr ){
+	std::cerr << "ERROR: no b-tag shape reweighter found." << std::endl;
+	return -1;
+    }
+
+    // compute the missing normalization factors and write them to the cache
+    reweighterBTagShape->initialize( samples, nEvents, cacheDirectory, nThreads );
+    reweighterBTagShape->printNormFactors();
+    std::cerr << "###done###" << std::endl;
+    return 0;
+}
@@ -24,6 +24,17 @@ class ReweighterBTagShape: public Reweighter{
                                 const std::vector<std::string>& variations,
                                 const std::vector<Sample>& samples);
 	void initialize( const std::vector<Sample>& samples, long unsigned numberOfEntries=0 );
+	// same as above, but with a persistent cache of normalization factors:
+	// factors are read from the cache if available, the others are computed
+	// (in parallel over samples) and written to the cache
+	void initialize( const std::vector<Sample>& samples, long unsigned numberOfEntries,
+			 const std::string& cacheDirectory, unsigned numberOfThreads=1 );
+	// read normalization factors from the cache (without computing missing ones),
+	// returns true if factors were found for all samples
+	bool loadNormFactorsFromCache( const std::string& cacheDirectory,
+				       const std::vector<Sample>& samples,
+				       long unsigned numberOfEntries=0 );
+	static std::string defaultNormCacheDirectory( const std::string& weightDirectory );
 
 	bool hasVariation( const std::string& variation ) const;
 	bool hasSystematic( const std::string systematic ) const;
@@ -60,6 +71,7 @@ class ReweighterBTagShape: public Reweighter{
 	std::shared_ptr<BTagCalibrationReader> bTagSFReader;
 	std::string _flavor;
 	std::string _bTagAlgo;
+	std::string _sfFilePath;
 	std::vector<std::string> _variations;
 	std::vector<std::string> _systematics;
 	std::map< std::string, std::map< std::string, std::map<int,double >>> _normFactors;
@@ -68,6 +80,11 @@ class ReweighterBTagShape: public Reweighter{
         int getNJets( const Event& event ) const;
 	double weight( const Jet& jet, const std::string& variation ) const;
 	double weight( const Event& event, const std::string& variation ) const;
+
+	// help functions for the cache of normalization factors
+	std::string normCacheKey( const Sample& sample, long unsigned numberOfEntries ) const;
+	std::string normCacheFile( const std::string& cacheDirectory, const std::string& key,
+				   const Sample& sample ) const;
 };
 
 #endif
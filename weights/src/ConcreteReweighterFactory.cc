@@ -339,6 +339,18 @@ CombinedReweighter Run2ULReweighterFactory::buildReweighter(
 	weightDirectory, sfFilePath, flavor, bTagAlgo, variations, samples );
     //reweighterBTagShape->initialize(samples, 0);
     // (above line is commented out -> do not initialize, do it manually in calling)
+    // step 4: read the normalization factors from the cache if they were computed before
+    // (see weights/fillBTagShapeNormCache.cc)
+    std::string bTagNormCacheDirectory = ReweighterBTagShape::defaultNormCacheDirectory( weightDirectory );
+    std::vector< Sample > simulatedSamples;
+    for( const Sample& sample : samples ){
+        if( sample.isMC() ) simulatedSamples.push_back( sample );
+    }
+    if( !reweighterBTagShape->loadNormFactorsFromCache( bTagNormCacheDirectory, simulatedSamples ) ){
+	std::cout << "WARNING in Run2ULReweighterFactory: b-tag shape normalization factors";
+	std::cout << " not found in " << bTagNormCacheDirectory << " for all samples;";
+	std::cout << " they are set to 1 for the missing samples." << std::endl;
+    }
     combinedReweighter.addReweighter( "bTag_shape", reweighterBTagShape );
 
     // make pileup reweighter
@@ -14,6 +14,23 @@ This method corresponds to "1d", whereas ReweighterBTag corresponds to "1a".
 
 #include "../interface/ReweighterBTagShape.h"
 
+// include C++ classes
+#include <algorithm>
+#include <cstdio>
+#include <fstream>
+#include <sstream>
+#include <iomanip>
+#include <thread>
+#include <atomic>
+#include <functional>
+#include <sys/stat.h>
+
+// include ROOT classes
+#include "TROOT.h"
+
+// include other parts of framework
+#include "../../Tools/interface/systemTools.h"
+
 
 /// constructor ///
 ReweighterBTagShape::ReweighterBTagShape(   const std::string& weightDirectory,
@@ -54,6 +71,7 @@ ReweighterBTagShape::ReweighterBTagShape(   const std::string& weightDirectory,
                 + "'deepCSV' or 'deepFlavor'.");
     }
     _bTagAlgo = bTagAlgo;
+    _sfFilePath = sfFilePath;
 
     // define lists of valid "variations" and "systematics"
     // note: "variations" are all varied scale factors present in the csv file;
@@ -188,6 +206,150 @@ void ReweighterBTagShape::initialize( const std::vector<Sample>& samples,
 }
 
 
+/// cache of normalization factors ///
+
+std::string ReweighterBTagShape::defaultNormCacheDirectory( const std::string& weightDirectory ){
+    // default location of the cache of normalization factors
+    return stringTools::formatDirectoryName(weightDirectory) + "bTagShapeNormCache";
+}
+
+std::string ReweighterBTagShape::normCacheKey( const Sample& sample, 
+					       long unsigned numberOfEntries ) const{
+    // make a string identifying the normalization factors for a given sample,
+    // i.e. all settings on which they depend:
+    // the sample file (including its size and modification time, to detect changes),
+    // the scale factor file, flavor, b-tagging algorithm, variations and number of entries
+    std::string filePath = sample.filePath();
+    struct stat fileStat;
+    // (remove double slashes, so the key does not depend on the formatting of the directory)
+    for( std::size_t pos = filePath.find("//"); pos != std::string::npos; pos = filePath.find("//") ){
+	filePath.erase( pos, 1 );
+    }
+    if( stat( filePath.c_str(), &fileStat ) != 0 ){
+	throw std::runtime_error( std::string("ERROR in ReweighterBTagShape::normCacheKey: ")
+	    + "file " + filePath + " does not exist." );
+    }
+    std::vector<std::string> sortedVariations = _variations;
+    std::sort( sortedVariations.begin(), sortedVariations.end() );
+    std::string key = filePath + " " + std::to_string( fileStat.st_size );
+    key += " " + std::to_string( fileStat.st_mtime );
+    key += " " + _sfFilePath + " " + _flavor + " " + _bTagAlgo;
+    for( const std::string& var: sortedVariations ) key += " " + var;
+    key += " " + std::to_string( numberOfEntries );
+    return key;
+}
+
+std::string ReweighterBTagShape::normCacheFile( const std::string& cacheDirectory,
+						const std::string& key,
+						const Sample& sample ) const{
+    // get the name of the cache file for a given key
+    // (the key itself is stored in the file to protect against hash collisions)
+    std::stringstream hash;
+    hash << std::hex << std::hash<std::string>()( key );
+    std::string sampleName = stringTools::removeOccurencesOf( sample.fileName(), ".root" );
+    return stringTools::formatDirectoryName(cacheDirectory) + sampleName + "_" + hash.str() + ".txt";
+}
+
+bool ReweighterBTagShape::loadNormFactorsFromCache( const std::string& cacheDirectory,
+						    const std::vector<Sample>& samples,
+						    long unsigned numberOfEntries ){
+    // read normalization factors for a collection of samples from the cache
+    // note: samples without (up-to-date) entry in the cache are left unchanged
+    // cache file format: first line is the key (see normCacheKey),
+    // following lines are "<variation> <number of jets> <normalization factor>"
+    bool foundAll = true;
+    for( const Sample& sample: samples ){
+	if( !systemTools::fileExists( sample.filePath() ) ){
+	    foundAll = false;
+	    continue;
+	}
+	std::string key = normCacheKey( sample, numberOfEntries );
+	std::ifstream cacheFile( normCacheFile( cacheDirectory, key, sample ) );
+	std::string firstLine;
+	if( !cacheFile || !std::getline( cacheFile, firstLine ) || firstLine != key ){
+	    foundAll = false;
+	    continue;
+	}
+	std::map<std::string, std::map<int, double>> normFactors;
+	std::string variation;
+	int njets;
+	double normFactor;
+	while( cacheFile >> variation >> njets >> normFactor ){
+	    normFactors[variation][njets] = normFactor;
+	}
+	this->setNormFactors( sample, normFactors );
+    }
+    return foundAll;
+}
+
+void ReweighterBTagShape::initialize( const std::vector<Sample>& samples,
+				      long unsigned numberOfEntries,
+				      const std::string& cacheDirectory,
+				      unsigned numberOfThreads ){
+    // initialize the reweighter for a collection of samples (see above),
+    // reading the normalization factors from the cache if they were computed before.
+    // the normalization factors of the other samples are computed in parallel
+    // (each sample in a single thread) and written to the cache.
+    std::cout << "initializing ReweighterBTagShape using cache " << cacheDirectory << std::endl;
+    if( !systemTools::directoryExists( cacheDirectory ) ){
+	systemTools::makeDirectory( cacheDirectory );
+    }
+    std::vector<Sample> missingSamples;
+    for( const Sample& sample: samples ){
+	if( !loadNormFactorsFromCache( cacheDirectory, {sample}, numberOfEntries ) ){
+	    missingSamples.push_back( sample );
+	}
+    }
+    std::cout << "found " << samples.size() - missingSamples.size() << " out of ";
+    std::cout << samples.size() << " samples in cache" << std::endl;
+    if( missingSamples.empty() ) return;
+
+    // compute the missing normalization factors
+    ROOT::EnableThreadSafety();
+    std::vector< std::map<std::string, std::map<int, double>> > averages( missingSamples.size() );
+    std::vector< std::string > errors( missingSamples.size() );
+    std::atomic< std::size_t > nextSample( 0 );
+    auto worker = [&](){
+	for( std::size_t i = nextSample++; i < missingSamples.size(); i = nextSample++ ){
+	    try{
+		averages[i] = this->calcAverageOfWeights( missingSamples[i], numberOfEntries );
+	    } catch( std::exception& e ){
+		errors[i] = e.what();
+	    }
+	}
+    };
+    numberOfThreads = std::max( 1u, std::min( numberOfThreads, unsigned(missingSamples.size()) ) );
+    std::vector< std::thread > threads;
+    for( unsigned t = 1; t < numberOfThreads; ++t ) threads.emplace_back( worker );
+    worker();
+    for( std::thread& thread: threads ) thread.join();
+
+    // set the normalization factors and write them to the cache
+    for( std::size_t i = 0; i < missingSamples.size(); ++i ){
+	if( !errors[i].empty() ){
+	    throw std::runtime_error( std::string("ERROR in ReweighterBTagShape::initialize: ")
+		+ "computing normalization factors for " + missingSamples[i].fileName() 
+		+ " failed with error: " + errors[i] );
+	}
+	this->setNormFactors( missingSamples[i], averages[i] );
+	std::string key = normCacheKey( missingSamples[i], numberOfEntries );
+	std::string cacheFileName = normCacheFile( cacheDirectory, key, missingSamples[i] );
+	// (write to a temporary file first, so that concurrent jobs never read a partial file)
+	std::string tempFileName = systemTools::uniqueFileName( cacheFileName + ".tmp" );
+	std::ofstream cacheFile( tempFileName );
+	cacheFile << key << "\n" << std::setprecision( 17 );
+	for( const auto& varEl: _normFactors.at( missingSamples[i].fileName() ) ){
+	    for( const auto& njetsEl: varEl.second ){
+		cacheFile << varEl.first << " " << njetsEl.first << " " << njetsEl.second << "\n";
+	    }
+	}
+	cacheFile.close();
+	std::rename( tempFileName.c_str(), cacheFileName.c_str() );
+    }
+    std::cout << "done initializing ReweighterBTagShape" << std::endl;
+}
+
+
 /// help functions for checking a variation or systematic ///
 
 std::string jecToVarName( const std::string& jecVariation ){
@@ -121,16 +121,13 @@ int main( int argc, char* argv[] ){
     }
 
     // second event loop (for normalization)
-    for( unsigned i = 0; i < numberOfSamples; ++i ){
-	std::cout<<"start processing sample n. "<<i+1<<" of "<<numberOfSamples<<std::endl;
-	std::cout << "norm factors of b-tag reweighter before initializatino: " << std::endl;
-	reweighterBTagShape->printNormFactors();
-	std::map<std::string, std::map<int,double>> averageOfWeights;
-	averageOfWeights = reweighterBTagShape->calcAverageOfWeights( samples[i], nEvents );
-	reweighterBTagShape->setNormFactors( samples[i], averageOfWeights );
-	std::cout << "norm factors of b-tag reweighter after initialization: " << std::endl;
-	reweighterBTagShape->printNormFactors();
-    }
+    // (the normalization factors are cached, so this loop is only done once per sample)
+    std::cout << "norm factors of b-tag reweighter before initialization: " << std::endl;
+    reweighterBTagShape->printNormFactors();
+    reweighterBTagShape->initialize( samples, nEvents,
+	ReweighterBTagShape::defaultNormCacheDirectory( weightDirectory ) );
+    std::cout << "norm factors of b-tag reweighter after initialization: " << std::endl;
+    reweighterBTagShape->printNormFactors();
 
     // do extra event loop (for checking)
     for( unsigned i = 0; i < numberOfSamples; ++i ){
@@ -33,7 +33,7 @@ if __name__=='__main__':
         continue
       sfhist = sfhist[0]
       # make a plot
-      figname = sffile.replace('.root','.png')
+      figname = sffile.replace('.root','')
       title = 'Electron Reco Scale Factor for {}, {}'.format(year,pt)
       plot2dhistogram( sfhist, figname,
                        histtitle=title )
@@ -77,7 +77,7 @@ if __name__=='__main__':
             print('ERROR: histogram {} not found in file {}'.format(hname[0],sffile))
           hist = process_histogram(hist, btype=hname[1], hvar=hvar)
           # make a plot
-          figname = sffile.replace('.root','_{}.png'.format(hvar))
+          figname = sffile.replace('.root','_{}'.format(hvar))
           title = 'Lepton ID scale factors for {}/{}/{}'.format(year,flavour,wp)
           ztitle = 'Scale factor' 
           if hvar == 'syst': ztitle = 'Systematic uncertainty (x100)'
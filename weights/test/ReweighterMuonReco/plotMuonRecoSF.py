@@ -35,7 +35,7 @@ if __name__=='__main__':
       continue
     sfhist = sfhist[0]
     # make a plot
-    figname = sffile.replace('.root','.png')
+    figname = sffile.replace('.root','')
     title = 'Muon Reco Scale Factors for {}'.format(year)
     plot2dhistogram( sfhist, figname,
                      histtitle=title,
@@ -8,7 +8,7 @@ import ROOT
 sys.path.append('../../../Tools/python')
 import histtools as ht
 sys.path.append('../../../plotting/python')
-import multihistplotter as mhp
+from plotbatch import PlotBatch
 
 if __name__=='__main__':
 
@@ -26,6 +26,10 @@ if __name__=='__main__':
                 ROOT.kViolet, ROOT.kMagenta-9, # first variation
                 ROOT.kRed+2, ROOT.kRed-7]) # second variation
 
+  # collect the plots of all input files to render them in parallel at the end
+  # (plots that did not change since a previous run are skipped)
+  batch = PlotBatch()
+
   # loop over input files
   for inputfile in inputfiles:
     print('Running on file {}...'.format(inputfile))
@@ -50,7 +54,7 @@ if __name__=='__main__':
     # make a plot
     figname = inputfile.replace('.root','.png')
     title = 'Total weight with variations'
-    mhp.plotmultihistograms(syshists+[nomhist],
+    batch.add('multihistplotter.plotmultihistograms', syshists+[nomhist],
         figname=figname,
         xaxtitle='Relative event weight',
         yaxtitle='Number of events',
@@ -87,7 +91,7 @@ if __name__=='__main__':
       # make a plot
       figname = inputfile.replace('.root','_{}.png'.format(tagkey))
       title = tagval
-      mhp.plotmultihistograms(hists,
+      batch.add('multihistplotter.plotmultihistograms', hists,
         figname=figname,
         xaxtitle='Relative event weight',
         yaxtitle='Number of events',
@@ -96,3 +100,6 @@ if __name__=='__main__':
         title=title,
         drawoptions='hist',
         extracmstext='#splitline{Preliminary}{Simulation}')
+
+  # make all plots
+  batch.run()